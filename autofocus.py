@@ -0,0 +1,218 @@
+"""
+Software autofocus: hill climbing on the focus assist metric.
+
+    python autofocus.py [--camera 0] [--run] [--step 128]
+
+Without --run it prints the sharpness the capture publishes with each frame
+(meta["sharpness"], see vcapture.FocusMeter) as a guide for focusing by hand.
+With --run, Autofocus switches the camera to manual focus and climbs: it
+moves focus by `step` with focus_direct, measures the first frame captured
+once the lens settled, keeps going while the picture gets sharper (or no
+worse, at the first step, so it crosses flat stretches) and turns back at
+half the step once it got worse, until the step is below `min_step`. It ends
+on the sharpest position it measured.
+
+The capture measures at a reduced rate, so its value can be a few frames
+older than the last move. Each step measures its frame itself, with the same
+FocusMeter and region. That frame must be freshly decoded: a capture with
+change detection on reuses the last changed frame for unchanged ones, and a
+focus move does not count as a change, so Autofocus refuses reused frames.
+JPEG bytes are always fresh.
+"""
+
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import Future
+from warnings import warn
+
+from position import read_position
+from vcapture import FOCUS_RATE, FOCUS_ROI, FocusMeter
+
+FOCUS_RANGE = (0, 1770)  # focus_direct positions
+DEFAULT_STEP = 128
+MIN_STEP = 8
+# Readings within this fraction below the best are noise or a plateau, the
+# coarse search walks on through them instead of turning back
+FLAT = 0.02
+
+
+def _manual_focus(camera):
+    camera.focus_mode("manual")
+    return read_position(camera, ("focus",))["focus"]
+
+
+def _set_focus(camera, position):
+    camera.focus("direct", position)
+
+
+class Autofocus:
+    """
+    One autofocus run of the camera behind `worker` on frames from `bus`.
+
+    The climb runs on its own thread from construction. `settle` is how long
+    after a move completes a frame must have been captured to count, at least
+    the stream's latency. `future` resolves to {"position", "sharpness",
+    "moves", "elapsed", "cancelled"}, or to the error that stopped the run.
+    `cancel()` ends the climb early on the best position so far.
+    """
+
+    def __init__(
+        self,
+        bus,
+        worker,
+        step=DEFAULT_STEP,
+        min_step=MIN_STEP,
+        settle=0.2,
+        max_moves=40,
+        roi=FOCUS_ROI,
+        focus_range=FOCUS_RANGE,
+        timeout=2.0,
+    ):
+        self.bus = bus
+        self.worker = worker
+        self.step = step
+        self.min_step = min_step
+        self.settle = settle
+        self.max_moves = max_moves
+        self.focus_range = tuple(focus_range)
+        self.timeout = timeout
+        self.meter = FocusMeter(roi=roi)
+        self.moves = 0
+        self.readings = []  # (position, sharpness) in the order measured
+        self.future = Future()
+        self.future.set_running_or_notify_cancel()
+        self._cancelled = threading.Event()
+        self._subscriber = bus.subscribe("latest")
+        self._thread = threading.Thread(target=self._run, name="autofocus", daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _run(self):
+        try:
+            result = self._climb()
+        except Exception as e:
+            warn(f"[autofocus] Autofocus failed: {e}")
+            self.future.set_exception(e)
+            return
+        self.future.set_result(result)
+
+    def _climb(self):
+        began = time.monotonic()
+        low, high = self.focus_range
+        position = self.worker.submit(_manual_focus).result(self.timeout)
+        start = best_position = current = position
+        turned = False
+        best = self._measure(position, time.time())
+        step, direction = self.step, 1
+        while (
+            step >= self.min_step
+            and self.moves < self.max_moves
+            and not self._cancelled.is_set()
+        ):
+            target = min(high, max(low, position + direction * step))
+            if target == position:
+                # The end of the range brackets the peak, turn back
+                direction, step = -direction, step // 2
+                continue
+            current = target
+            sharpness = self._move(target)
+            if sharpness > best:
+                best_position = position = target
+                best = sharpness
+            elif step == self.step and sharpness >= best * (1 - FLAT):
+                position = target
+            else:
+                # Past the peak, unless the first direction tried was the wrong one
+                if turned or best_position != start:
+                    step //= 2
+                turned = True
+                direction, position = -direction, best_position
+        if current != best_position:
+            self.worker.submit(_set_focus, best_position).result(self.timeout)
+        return {
+            "position": best_position,
+            "sharpness": best,
+            "moves": self.moves,
+            "elapsed": time.monotonic() - began,
+            "cancelled": self._cancelled.is_set(),
+        }
+
+    def _move(self, position):
+        self.moves += 1
+        self.worker.submit(_set_focus, position).result(self.timeout)
+        return self._measure(position, time.time())
+
+    def _measure(self, position, since):
+        """Sharpness of the first frame captured `settle` seconds after `since`"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            packet = self._subscriber.get(timeout=max(0.0, remaining))
+            if packet is None:
+                raise TimeoutError("No frame from the capture to measure focus on")
+            if packet.timestamp < since + self.settle:
+                continue
+            if packet.jpeg is not None:
+                sharpness = self.meter.measure(jpeg=packet.jpeg)
+            elif packet.meta.get("changed") is False:
+                raise ValueError(
+                    "The capture reuses unchanged frames, start it without "
+                    "change_threshold for autofocus"
+                )
+            else:
+                sharpness = self.meter.measure(packet.frame)
+            if sharpness is not None:
+                self.readings.append((position, sharpness))
+                return sharpness
+
+
+def main():
+    from camera_config import load_cameras
+    from camera_group import _connect_camera
+    from camera_streams import start_capture
+    from command_worker import CommandWorker
+
+    parser = argparse.ArgumentParser(description="Focus assist and autofocus")
+    parser.add_argument("--camera", type=int, default=0, help="index in cameras.json")
+    parser.add_argument("--run", action="store_true", help="autofocus once and exit")
+    parser.add_argument("--step", type=int, default=DEFAULT_STEP)
+    parser.add_argument("--settle", type=float, default=0.2)
+    parser.add_argument("--app-dir", default=os.path.dirname(os.path.abspath(__file__)))
+    args = parser.parse_args()
+
+    cam_cfg = load_cameras(os.path.join(args.app_dir, "cameras.json"))[args.camera]
+    # Without change detection, so every frame is decoded fresh
+    capture = start_capture(cam_cfg, focus_rate=FOCUS_RATE)
+    try:
+        if args.run:
+            worker = CommandWorker(lambda: _connect_camera(cam_cfg), name=cam_cfg["ip"])
+            worker.connect()
+            autofocus = Autofocus(
+                capture.bus, worker, step=args.step, settle=args.settle
+            )
+            try:
+                print(autofocus.future.result())
+            finally:
+                autofocus.cancel()
+                worker.close(timeout=2.0)
+            return
+        subscriber = capture.bus.subscribe("latest")
+        while (packet := subscriber.get(timeout=5.0)) is not None:
+            print(f"sharpness {packet.meta.get('sharpness')}")
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        capture.release()
+
+
+if __name__ == "__main__":
+    main()
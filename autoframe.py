@@ -0,0 +1,349 @@
+"""
+Speaker tracking: keeps a detected person in the middle of the shot.
+
+    python autoframe.py [--camera 0] [--detector hog|face|motion] [--rate 5]
+
+Without --detector the first of these the OpenCV build can run is used.
+
+An analytics thread takes the newest frame from the camera's capture bus a
+few times per second, downscales it and runs a CPU detector on it: OpenCV's
+HOG people detector, the frontal face cascade where OpenCV ships its Haar
+data, or "motion", the largest moving region between analysed frames, which
+needs no model and works with OpenCV builds without HOG (OpenCV 5 moved HOG
+and the cascades to contrib). The subject's offset from the center of the
+frame becomes pan/tilt drive speeds, sent on the camera's CommandWorker over
+one coalescing channel.
+
+Each axis has hysteresis: it starts moving once the subject is more than
+`deadband` (a fraction of half the frame) off center and keeps moving until
+it is back within `release`, so the head neither hunts around the center nor
+stops and starts on every small gesture.
+"""
+
+import argparse
+import math
+import os
+import threading
+import time
+from warnings import warn
+
+import cv2
+
+from mjpeg_capture import decode_jpeg, jpeg_size
+
+DETECTORS = ("hog", "face", "motion")
+# Where to aim inside a detection box, as fractions of its width and height.
+# HOG and motion boxes cover the whole body (or what of it moved), aim high.
+AIM = {"hog": (0.5, 0.2), "face": (0.5, 0.5), "motion": (0.5, 0.3)}
+# Drive command for each (pan, tilt) direction, -1 left/up, 1 right/down
+DRIVE_COMMANDS = {
+    (0, 0): "pan_stop",
+    (-1, 0): "pan_left",
+    (1, 0): "pan_right",
+    (0, -1): "pan_up",
+    (0, 1): "pan_down",
+    (-1, -1): "pan_up_left",
+    (1, -1): "pan_up_right",
+    (-1, 1): "pan_down_left",
+    (1, 1): "pan_down_right",
+}
+
+
+def make_detector(kind="hog"):
+    """Detector `detect(rgb frame) -> [(x, y, w, h), ...]` of the given kind"""
+    required = {"hog": "HOGDescriptor", "face": "CascadeClassifier"}.get(kind)
+    if required is not None and not hasattr(cv2, required):
+        raise ValueError(
+            f"This OpenCV build ({cv2.__version__}) has no {kind} detector"
+        )
+    if kind == "hog":
+        hog = cv2.HOGDescriptor()
+        hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+
+        def detect(frame):
+            boxes, _ = hog.detectMultiScale(
+                frame, winStride=(8, 8), padding=(8, 8), scale=1.05
+            )
+            return [tuple(int(v) for v in box) for box in boxes]
+
+        return detect
+    if kind == "face":
+        data = getattr(getattr(cv2, "data", None), "haarcascades", "")
+        path = os.path.join(data, "haarcascade_frontalface_default.xml")
+        cascade = cv2.CascadeClassifier(path)
+        if cascade.empty():
+            raise ValueError(f"Face cascade not found at {path}")
+
+        def detect(frame):
+            gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+            boxes = cascade.detectMultiScale(gray, 1.1, 4, minSize=(20, 20))
+            return [tuple(int(v) for v in box) for box in boxes]
+
+        return detect
+    if kind == "motion":
+        return _motion_detector()
+    raise ValueError(f"Unknown detector {kind}, expected one of {DETECTORS}")
+
+
+def available_detectors():
+    """The DETECTORS this OpenCV build can run, in order of preference"""
+    available = []
+    for kind in DETECTORS:
+        try:
+            make_detector(kind)
+        except ValueError:
+            continue
+        available.append(kind)
+    return available
+
+
+def _motion_detector(threshold=25, min_area=0.005, max_area=0.5):
+    previous = {}
+
+    def detect(frame):
+        gray = cv2.GaussianBlur(cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY), (5, 5), 0)
+        last, previous["gray"] = previous.get("gray"), gray
+        if last is None or last.shape != gray.shape:
+            return []
+        _, mask = cv2.threshold(
+            cv2.absdiff(last, gray), threshold, 255, cv2.THRESH_BINARY
+        )
+        mask = cv2.dilate(mask, None, iterations=2)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        area = gray.shape[0] * gray.shape[1]
+        boxes = [cv2.boundingRect(contour) for contour in contours]
+        if any(w * h > max_area * area for _, _, w, h in boxes):
+            # The whole picture changed, the camera itself is moving
+            return []
+        return [box for box in boxes if box[2] * box[3] >= min_area * area]
+
+    return detect
+
+
+def downscale(packet, width):
+    """RGB frame of a FramePacket at `width` pixels wide, None if undecodable"""
+    if packet.jpeg is not None and not packet.decoded:
+        size = jpeg_size(packet.jpeg)
+        if size is not None:
+            # Decode straight to the analysis size instead of full size
+            scaled = (width, max(1, round(size[1] * width / size[0])))
+            return decode_jpeg(packet.jpeg, scaled if width < size[0] else None)
+    frame = packet.frame
+    if frame is None or frame.shape[1] <= width:
+        return frame
+    height = max(1, round(frame.shape[0] * width / frame.shape[1]))
+    return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def subject_offset(boxes, size, aim=(0.5, 0.5)):
+    """
+    (x, y) offset of the largest box's aim point from the frame center, -1 to 1
+    on each axis, None without boxes
+    """
+    if not boxes:
+        return None
+    x, y, w, h = max(boxes, key=lambda box: box[2] * box[3])
+    width, height = size
+    return (
+        (x + w * aim[0]) / width * 2 - 1,
+        (y + h * aim[1]) / height * 2 - 1,
+    )
+
+
+def axis_speed(offset, moving, deadband, release, max_speed):
+    """
+    Signed drive speed for one axis, with hysteresis: a stopped axis starts
+    beyond `deadband`, a moving one (`moving`) stops within `release`
+    """
+    threshold = release if moving else deadband
+    if abs(offset) <= threshold:
+        return 0
+    speed = max(1, min(max_speed, math.ceil(abs(offset) * max_speed)))
+    return speed if offset > 0 else -speed
+
+
+def _drive(camera, name, pan_speed, tilt_speed):
+    camera.send(camera.build_command(name, pan_speed, tilt_speed))
+
+
+class AutoFramer:
+    """
+    Tracks the subject in `bus` with the camera behind `worker`.
+
+    Detection runs on its own thread at up to `rate` frames per second on
+    frames `width` pixels wide. Drive commands are only sent when the wanted
+    direction or speed changes, and the head stops when the subject was not
+    seen for `lost_after` seconds. `detect_ms` holds the recent detection times.
+    Without a `detector` the first available one is used.
+    """
+
+    def __init__(
+        self,
+        bus,
+        worker,
+        detector=None,
+        rate=5.0,
+        width=320,
+        deadband=0.15,
+        release=0.05,
+        max_pan_speed=8,
+        max_tilt_speed=6,
+        lost_after=1.0,
+        channel="autoframe",
+        clock=time.monotonic,
+    ):
+        if release > deadband:
+            raise ValueError("release must not be larger than deadband")
+        if detector is None:
+            detector = available_detectors()[0]
+        if callable(detector):
+            self._detect, self._aim = detector, AIM["face"]
+        else:
+            self._detect, self._aim = make_detector(detector), AIM[detector]
+        self.bus = bus
+        self.worker = worker
+        self.rate = rate
+        self.width = width
+        self.deadband = deadband
+        self.release = release
+        self.max_pan_speed = max_pan_speed
+        self.max_tilt_speed = max_tilt_speed
+        self.lost_after = lost_after
+        self.channel = channel
+        self.frames = 0
+        self.detections = 0
+        self.commands = 0
+        self.detect_ms = []
+        self.offset = None  # Subject offset in the last analysed frame
+        self._clock = clock
+        self._speeds = (0, 0)
+        self._seen = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="autoframe", daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def close(self):
+        """Stop tracking and stop the head"""
+        self._stopped.set()
+        self._thread.join(2.0)
+        self._send(0, 0)
+
+    def _run(self):
+        subscriber = self.bus.subscribe("latest")
+        interval = 1.0 / self.rate if self.rate else 0.0
+        next_at = self._clock()
+        while not self._stopped.is_set():
+            if self._stopped.wait(max(0.0, next_at - self._clock())):
+                return
+            packet = subscriber.get(timeout=0.5)
+            if packet is None:
+                if self.bus.closed:
+                    break
+                continue
+            began = self._clock()
+            next_at = max(next_at + interval, began)
+            try:
+                self._analyse(packet)
+            except Exception as e:
+                warn(f"[autoframe] Detection failed: {e}")
+            self.detect_ms = [*self.detect_ms[-49:], (self._clock() - began) * 1000]
+        self._send(0, 0)
+
+    def _analyse(self, packet):
+        frame = downscale(packet, self.width)
+        if frame is None:
+            return
+        self.frames += 1
+        now = self._clock()
+        height, width = frame.shape[:2]
+        self.offset = subject_offset(self._detect(frame), (width, height), self._aim)
+        if self.offset is None:
+            if self._seen is None or now - self._seen >= self.lost_after:
+                self._send(0, 0)
+            return
+        self.detections += 1
+        self._seen = now
+        pan_speed, tilt_speed = self._speeds
+        self._send(
+            axis_speed(
+                self.offset[0],
+                pan_speed != 0,
+                self.deadband,
+                self.release,
+                self.max_pan_speed,
+            ),
+            axis_speed(
+                self.offset[1],
+                tilt_speed != 0,
+                self.deadband,
+                self.release,
+                self.max_tilt_speed,
+            ),
+        )
+
+    def _send(self, pan_speed, tilt_speed):
+        if (pan_speed, tilt_speed) == self._speeds:
+            return
+        self._speeds = (pan_speed, tilt_speed)
+        direction = (
+            (pan_speed > 0) - (pan_speed < 0),
+            (tilt_speed > 0) - (tilt_speed < 0),
+        )
+        self.commands += 1
+        self.worker.submit(
+            _drive,
+            DRIVE_COMMANDS[direction],
+            max(1, abs(pan_speed)),
+            max(1, abs(tilt_speed)),
+            channel=self.channel,
+        )
+
+
+def main():
+    from camera_config import load_cameras
+    from camera_group import _connect_camera
+    from camera_streams import start_capture
+    from command_worker import CommandWorker
+
+    parser = argparse.ArgumentParser(description="Speaker tracking for one camera")
+    parser.add_argument("--camera", type=int, default=0, help="index in cameras.json")
+    parser.add_argument(
+        "--detector", choices=DETECTORS, help="default: the first one available"
+    )
+    parser.add_argument("--rate", type=float, default=5.0)
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--app-dir", default=os.path.dirname(os.path.abspath(__file__)))
+    args = parser.parse_args()
+    available = available_detectors()
+    detector = args.detector or available[0]
+    if detector not in available:
+        parser.error(
+            f"the {detector} detector is not available in this OpenCV build "
+            f"({cv2.__version__}), use one of: {', '.join(available)}"
+        )
+
+    cam_cfg = load_cameras(os.path.join(args.app_dir, "cameras.json"))[args.camera]
+    capture = start_capture(cam_cfg)
+    worker = CommandWorker(lambda: _connect_camera(cam_cfg), name=cam_cfg["ip"])
+    worker.connect()
+    framer = AutoFramer(
+        capture.bus, worker, detector, rate=args.rate, width=args.width
+    )
+    try:
+        while framer.running:
+            time.sleep(1.0)
+            print(f"offset {framer.offset}  detections {framer.detections}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        framer.close()
+        worker.close(timeout=2.0)
+        capture.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Cost of the focus assist metric and convergence of the software autofocus.
+
+  measure   CPU time of one FocusMeter measurement on the simulator's frames,
+            from the JPEG (half size grayscale decode) and from a decoded
+            frame, against the capture's frame time
+  capture   this process's CPU per wall second with the metric off, at
+            FOCUS_RATE and on every frame, with the simulator panning so every
+            frame is a new scene
+  climb     Autofocus runs from several focus positions of the simulator,
+            which is sharpest at 0: moves, time and where it ended
+
+Usage: python benchmarks/bench_autofocus.py [--seconds 5] [--samples 30]
+"""
+
+import argparse
+import time
+
+from common import CENTER, STREAM_URL, move_marker, start_simulator, summarize
+from autofocus import Autofocus
+from cameras import testcamera_sim as sim
+from command_worker import CommandWorker
+from controller import Camera
+from mjpeg_capture import MJPEGCapture, decode_jpeg
+from vcapture import FOCUS_RATE, FocusMeter, vcapture
+from visca import ViscaCommandBuilder
+
+CAPTURE_FPS = 30
+STARTS = (400, 900, 1500)
+
+
+def _jpegs(samples):
+    reader = MJPEGCapture(STREAM_URL)
+    jpegs = [reader.read()[1] for _ in range(samples)]
+    reader.release()
+    return jpegs
+
+
+def _measure_times(jpegs):
+    meter = FocusMeter()
+    times = {"jpeg": [], "frame": []}
+    for jpeg in jpegs:
+        started = time.process_time()
+        meter.measure(jpeg=jpeg)
+        times["jpeg"].append(time.process_time() - started)
+        frame = decode_jpeg(jpeg)
+        started = time.process_time()
+        meter.measure(frame)
+        times["frame"].append(time.process_time() - started)
+    return times
+
+
+def _capture_cpu(focus_rate, seconds):
+    capture = vcapture(STREAM_URL, "mjpeg", {"focus_rate": focus_rate}, mode="thread")
+    capture.start()
+    capture.subscribe("latest").get(timeout=15.0)
+    time.sleep(0.5)
+    wall, cpu = time.perf_counter(), time.process_time()
+    time.sleep(seconds)
+    load = (time.process_time() - cpu) / (time.perf_counter() - wall)
+    capture.release()
+    return load
+
+
+def _set_focus(position):
+    with sim.STATE.lock:
+        sim.STATE.focus_pos = position
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--samples", type=int, default=30)
+    args = parser.parse_args()
+    start_simulator()
+
+    times = _measure_times(_jpegs(args.samples))
+    print(f"budget: {1000 / CAPTURE_FPS:.0f} ms per frame at {CAPTURE_FPS} fps")
+    for source, values in times.items():
+        print(f"measure {source:>5}: {summarize(values)}")
+
+    # Pan slowly so change detection never skips a measurement
+    move_marker(CENTER - 0x2000)
+    sim.apply_visca_command(
+        ViscaCommandBuilder("testcamera").build_command("pan_right", 1, 1)
+    )
+    off = _capture_cpu(None, args.seconds)
+    print(f"capture metric off: cpu {off:4.2f}")
+    for label, rate in ((f"{FOCUS_RATE:g}/s", FOCUS_RATE), ("every frame", 0)):
+        load = _capture_cpu(rate, args.seconds)
+        print(f"capture {label:>10}: cpu {load:4.2f}  (+{load - off:5.3f})")
+    move_marker(CENTER)
+
+    capture = vcapture(STREAM_URL, "mjpeg", mode="thread")
+    capture.start()
+    capture.subscribe("latest").get(timeout=15.0)
+    worker = CommandWorker(lambda: Camera(ip="127.0.0.1", camera_type="testcamera"))
+    for start in STARTS:
+        _set_focus(start)
+        time.sleep(0.2)
+        autofocus = Autofocus(capture.bus, worker, settle=0.1)
+        result = autofocus.future.result(timeout=30.0)
+        first = autofocus.readings[0][1]
+        print(
+            f"climb from {start:4d}: {result['moves']:2d} moves "
+            f"{result['elapsed']:4.2f} s, ended at {result['position']:4d}, "
+            f"sharpness {first:6.1f} -> {result['sharpness']:6.1f}"
+        )
+    worker.close(timeout=2.0)
+    capture.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+CPU cost of auto-framing detection on frames from the simulated camera.
+
+  analyse   CPU time per analysed frame (decode to the analysis width and
+            detect), against the --rate budget and the capture's frame time
+  capture   frames per second the capture publishes with and without an
+            AutoFramer running, and this process's CPU per wall second
+
+Detectors the installed OpenCV build lacks are skipped.
+
+Usage: python benchmarks/bench_autoframe.py [--seconds 5] [--rate 5]
+"""
+
+import argparse
+import time
+
+from common import STREAM_URL, start_simulator, summarize
+from autoframe import DETECTORS, AutoFramer, downscale, make_detector
+from command_worker import CommandWorker
+from controller import Camera
+from frame_bus import FrameBus
+from mjpeg_capture import MJPEGCapture
+from vcapture import vcapture
+
+WIDTHS = (160, 320, 640)
+CAPTURE_FPS = 30
+
+
+def _jpegs(samples):
+    reader = MJPEGCapture(STREAM_URL)
+    jpegs = [reader.read()[1] for _ in range(samples)]
+    reader.release()
+    return jpegs
+
+
+def _analyse_times(detect, width, jpegs):
+    bus = FrameBus()
+    times = []
+    for jpeg in jpegs:
+        started = time.process_time()
+        detect(downscale(bus.publish(None, jpeg=jpeg), width))
+        times.append(time.process_time() - started)
+    return times
+
+
+def _capture_run(seconds, detector=None, rate=5.0):
+    capture = vcapture(STREAM_URL, "mjpeg", mode="thread")
+    capture.start()
+    time.sleep(1.0)  # Connect and warm up
+    worker = framer = None
+    if detector is not None:
+        worker = CommandWorker(lambda: Camera(ip="127.0.0.1", camera_type="testcamera"))
+        framer = AutoFramer(capture.bus, worker, detector, rate=rate)
+    first = capture.bus.seq
+    wall, cpu = time.perf_counter(), time.process_time()
+    time.sleep(seconds)
+    fps = (capture.bus.seq - first) / (time.perf_counter() - wall)
+    load = (time.process_time() - cpu) / (time.perf_counter() - wall)
+    if framer is not None:
+        framer.close()
+        worker.close(timeout=2.0)
+    capture.release()
+    return fps, load, framer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rate", type=float, default=5.0)
+    parser.add_argument("--samples", type=int, default=30)
+    args = parser.parse_args()
+    start_simulator()
+
+    jpegs = _jpegs(args.samples)
+    available = []
+    print(
+        f"budget: {1000 / args.rate:.0f} ms per analysed frame at --rate "
+        f"{args.rate:g}, {1000 / CAPTURE_FPS:.0f} ms per frame at {CAPTURE_FPS} fps"
+    )
+    for kind in DETECTORS:
+        try:
+            make_detector(kind)
+        except ValueError as e:
+            print(f"{kind:>7}: skipped, {e}")
+            continue
+        available.append(kind)
+        for width in WIDTHS:
+            times = _analyse_times(make_detector(kind), width, jpegs)
+            worst = max(times) * 1000
+            print(
+                f"{kind:>7} {width:4d} px: {summarize(times)}  "
+                f"{'fits' if worst < 1000 / CAPTURE_FPS else 'over'} frame time"
+            )
+
+    fps, load, _ = _capture_run(args.seconds)
+    print(f"capture alone: {fps:5.1f} fps  cpu {load:4.2f}")
+    for kind in available:
+        fps, load, framer = _capture_run(args.seconds, kind, args.rate)
+        print(
+            f"capture + {kind:>6}: {fps:5.1f} fps  cpu {load:4.2f}  "
+            f"analysed {framer.frames / args.seconds:4.1f} fps  "
+            f"detect {summarize([ms / 1000 for ms in framer.detect_ms])}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Preset recall on several simulated cameras: one after another against a
+CameraGroup.
+
+The simulator answers at once, so every command's reply is delayed by
+--latency seconds to stand in for the network and the camera's ack.
+
+  sequential   camera.preset_recall() on each camera in turn
+  group        CameraGroup.preset_recall() on all cameras at once
+
+Usage: python benchmarks/bench_camera_group.py [--cameras 8] [--latency 0.03]
+"""
+
+import argparse
+import time
+
+from common import start_simulator, summarize
+from camera_group import CameraGroup
+from controller import Camera
+
+
+def _slow_camera(cam_cfg, latency):
+    camera = Camera(ip=cam_cfg["ip"], camera_type=cam_cfg["type"])
+    recv = camera.socket.recv
+
+    def delayed_recv(size):
+        time.sleep(latency)
+        return recv(size)
+
+    camera.socket.recv = delayed_recv
+    return camera
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cameras", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.03)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    start_simulator()
+    cameras = [
+        {"ip": f"127.0.0.{index + 1}", "type": "testcamera"}
+        for index in range(args.cameras)
+    ]
+
+    direct = [_slow_camera(cam, args.latency) for cam in cameras]
+    sequential = []
+    for round_ in range(args.rounds):
+        started = time.perf_counter()
+        for camera in direct:
+            camera.preset_recall(round_ % 4)
+        sequential.append(time.perf_counter() - started)
+    for camera in direct:
+        camera.close()
+
+    group = CameraGroup.from_cameras(
+        cameras, connect=lambda cam: _slow_camera(cam, args.latency)
+    )
+    group.call("check")  # Connect every camera before timing
+    parallel = []
+    for round_ in range(args.rounds):
+        started = time.perf_counter()
+        results = group.preset_recall(round_ % 4)
+        parallel.append(time.perf_counter() - started)
+        assert all(result["ok"] for result in results.values()), results
+    group.close()
+
+    print(f"{args.cameras} cameras, {args.latency * 1000:.0f} ms per reply")
+    print(f"{'sequential':>11}: {summarize(sequential)}")
+    print(f"{'group':>11}: {summarize(parallel)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Startup time and latency of the vcapture backends on the simulator's MJPEG stream.
+
+startup:  vcapture.start() until the first frame is published
+latency:  VISCA pan command until the first frame that shows the moved marker
+
+Usage: python benchmarks/bench_capture_backends.py [--runs 5] [--backends opencv ffmpeg mjpeg]
+"""
+
+import argparse
+import time
+
+from common import (
+    CENTER,
+    STREAM_URL,
+    marker_visible,
+    move_marker,
+    start_simulator,
+    summarize,
+    wait_for,
+)
+from ffmpeg_capture import ffmpeg_available
+from vcapture import vcapture
+
+LEFT = 0x3000
+RIGHT = 0xD000
+
+
+def _measure(backend, runs, moves):
+    startups = []
+    latencies = []
+    for _ in range(runs):
+        move_marker(CENTER)
+        cap = vcapture(STREAM_URL, backend)
+        started = time.perf_counter()
+        cap.start()
+        subscriber = cap.subscribe("latest")
+        first = subscriber.get(timeout=15.0)
+        if first is None:
+            cap.release()
+            print(f"  {backend}: no frame received")
+            return None, None
+        startups.append(time.perf_counter() - started)
+
+        for index in range(moves):
+            target = LEFT if index % 2 == 0 else RIGHT
+            move_marker(target)
+
+            def moved():
+                packet = subscriber.poll()
+                return packet is not None and marker_visible(packet.frame, target)
+
+            _, seconds = wait_for(moved, timeout=5.0)
+            latencies.append(seconds)
+        cap.release()
+    return startups, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--moves", type=int, default=10)
+    parser.add_argument("--backends", nargs="+", default=["opencv", "ffmpeg", "mjpeg"])
+    args = parser.parse_args()
+
+    start_simulator()
+    print(f"Source: {STREAM_URL} (simulator serves ~15 fps)")
+    for backend in args.backends:
+        if backend == "ffmpeg" and not ffmpeg_available():
+            print(f"{backend:>8}: skipped, ffmpeg not found on PATH")
+            continue
+        startups, latencies = _measure(backend, args.runs, args.moves)
+        if startups is None:
+            continue
+        print(f"{backend:>8}: startup  {summarize(startups)}")
+        print(f"{'':>8}  latency  {summarize(latencies)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark matrix for the process and thread capture modes.
+
+For every mode/backend pair against the simulator's MJPEG stream:
+  startup   start() until the first frame is published
+  rss       resident memory added by the capture (parent plus child process)
+  fps       frames published per second over the sampling window
+  delivery  capture timestamp to publish on the bus (queue and pickling cost)
+
+Usage: python benchmarks/bench_capture_modes.py [--seconds 5] [--backends opencv mjpeg]
+"""
+
+import argparse
+import gc
+import time
+
+from common import STREAM_URL, rss_mb, start_simulator
+from ffmpeg_capture import ffmpeg_available
+from vcapture import CAPTURE_MODES, vcapture
+
+
+def _measure(mode, backend, seconds):
+    gc.collect()
+    rss_before = rss_mb()
+    cap = vcapture(STREAM_URL, backend, mode=mode)
+    started = time.perf_counter()
+    cap.start()
+    subscriber = cap.subscribe("every")
+    first = subscriber.get(timeout=15.0)
+    if first is None:
+        cap.release()
+        return None
+    startup = time.perf_counter() - started
+
+    frames = 0
+    delivery = []
+    window_start = time.perf_counter()
+    while time.perf_counter() - window_start < seconds:
+        packet = subscriber.get(timeout=1.0)
+        if packet is None:
+            continue
+        delivery.append(time.time() - packet.timestamp)
+        frames += 1
+        # Consumers need pixels, so decode like the preview would
+        packet.frame
+    fps = frames / (time.perf_counter() - window_start)
+
+    rss = rss_mb() - rss_before
+    if mode == "process":
+        rss += rss_mb(cap.pid)
+    cap.release()
+    delivery.sort()
+    return {
+        "startup_ms": startup * 1000,
+        "rss_mb": rss,
+        "fps": fps,
+        "delivery_ms": delivery[len(delivery) // 2] * 1000 if delivery else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--backends", nargs="+", default=["opencv", "mjpeg", "ffmpeg"])
+    args = parser.parse_args()
+
+    start_simulator()
+    print(f"Source: {STREAM_URL} (simulator serves ~15 fps)")
+    print(f"{'mode':>8} {'backend':>8} {'startup':>10} {'rss':>9} {'fps':>6} {'delivery':>9}")
+    for backend in args.backends:
+        if backend == "ffmpeg" and not ffmpeg_available():
+            print(f"{'':>8} {backend:>8}  skipped, ffmpeg not found on PATH")
+            continue
+        for mode in CAPTURE_MODES:
+            result = _measure(mode, backend, args.seconds)
+            if result is None:
+                print(f"{mode:>8} {backend:>8}  no frame received")
+                continue
+            print(
+                f"{mode:>8} {backend:>8} {result['startup_ms']:>8.1f}ms "
+                f"{result['rss_mb']:>7.1f}MB {result['fps']:>6.1f} "
+                f"{result['delivery_ms']:>7.2f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
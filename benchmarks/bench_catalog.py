@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Startup load time of cameras.json plus presets.json against the SQLite catalog.
+
+Startup needs the camera list and the active camera's presets. The JSON path
+parses and normalizes both whole documents, the catalog reads the camera table
+and one camera's rows by primary key.
+
+  load     time to get the camera list and the first camera's presets
+
+Usage: python benchmarks/bench_catalog.py [--cameras 10 50 200] [--runs 20]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from common import summarize
+from camera_config import camera_key, load_cameras
+from catalog import Catalog
+from preset_store import PresetStore, build_default_slots
+
+
+def _write_json(folder, count):
+    cameras = [
+        {"ip": f"10.0.{i // 250}.{i % 250}", "type": "ptzoptics"} for i in range(count)
+    ]
+    cameras_json = os.path.join(folder, "cameras.json")
+    with open(cameras_json, "w", encoding="utf-8") as f:
+        json.dump({"cameras": cameras}, f)
+    presets = {camera_key(cam): {"presets": build_default_slots()} for cam in cameras}
+    presets_json = os.path.join(folder, "presets.json")
+    with open(presets_json, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "cameras": presets}, f, indent=2)
+    return cameras_json, presets_json
+
+
+def _load_json(cameras_json, presets_json):
+    cameras = load_cameras(cameras_json)
+    store = PresetStore(presets_json)
+    store.presets(camera_key(cameras[0]))
+    store.close()
+
+
+def _load_catalog(path):
+    catalog = Catalog(path)
+    cameras = catalog.cameras()
+    catalog.presets(camera_key(cameras[0]))
+    catalog.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cameras", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    for count in args.cameras:
+        with tempfile.TemporaryDirectory() as folder:
+            cameras_json, presets_json = _write_json(folder, count)
+            catalog_path = os.path.join(folder, "catalog.sqlite3")
+            catalog = Catalog(catalog_path)
+            catalog.import_json(cameras_json, presets_json)
+            # Fill every VISCA slot, the JSON files only hold the 9 button slots
+            for cam in catalog.cameras():
+                for slot_index in range(10, 128):
+                    catalog.update_slot(camera_key(cam), slot_index, name="Shot")
+            catalog.close()
+            size = os.path.getsize(presets_json) // 1024
+            print(f"{count} cameras ({size} KB presets.json, 128 slots in the catalog)")
+
+            for name, load in (
+                ("json", lambda: _load_json(cameras_json, presets_json)),
+                ("catalog", lambda: _load_catalog(catalog_path)),
+            ):
+                times = []
+                for _ in range(args.runs):
+                    started = time.perf_counter()
+                    load()
+                    times.append(time.perf_counter() - started)
+                print(f"  {name:>8}: load {summarize(times)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Request round trip through the headless service's JSON-lines API, against
+calling the simulated camera directly.
+
+  status    "status" request, no camera I/O
+  call      pan_left + pan_stop through the service, waiting for each reply
+  direct    the same two commands called on a Camera in this process
+
+Usage: python benchmarks/bench_headless.py [--requests 200] [--clients 4]
+"""
+
+import argparse
+import json
+import socket
+import tempfile
+import threading
+import time
+
+from common import start_simulator, summarize
+from controller import Camera
+from headless import ControlService, ServiceServer
+from preset_store import PresetStore
+
+CAMERAS = [{"ip": "127.0.0.1", "type": "testcamera"}]
+
+
+def _client(address, requests, times):
+    with socket.create_connection(address) as sock:
+        reader = sock.makefile("rb")
+        for request in requests:
+            started = time.perf_counter()
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            reply = json.loads(reader.readline())
+            assert reply["ok"], reply
+            times.append(time.perf_counter() - started)
+
+
+def _run_clients(address, requests, clients):
+    times = []
+    threads = [
+        threading.Thread(target=_client, args=(address, requests, times))
+        for _ in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=4)
+    args = parser.parse_args()
+
+    start_simulator()
+    with tempfile.TemporaryDirectory() as folder:
+        store = PresetStore(f"{folder}/presets.json")
+        service = ControlService(CAMERAS, store, folder)
+        server = ServiceServer(("127.0.0.1", 0), service)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        address = server.server_address
+
+        status = _run_clients(
+            address, [{"cmd": "status"}] * args.requests, args.clients
+        )
+        print(f"{'status':>7}: {summarize(status)}  ({args.clients} clients)")
+
+        moves = [
+            {"cmd": "call", "method": "pan_left", "args": [7, 7]},
+            {"cmd": "call", "method": "pan_stop"},
+        ] * (args.requests // 2)
+        calls = _run_clients(address, moves, 1)
+        print(f"{'call':>7}: {summarize(calls)}")
+
+        camera = Camera(ip="127.0.0.1", camera_type="testcamera")
+        direct = []
+        for index in range(args.requests):
+            started = time.perf_counter()
+            if index % 2:
+                camera.pan_stop()
+            else:
+                camera.pan_left(7, 7)
+            direct.append(time.perf_counter() - started)
+        camera.close()
+        print(f"{'direct':>7}: {summarize(direct)}")
+
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+UI-thread cost of the multiview grid with 4 and 9 feeds from the simulator.
+
+  full     captures publish full-size frames, tiles scale them on the UI thread
+  scaled   captures scale and rate limit in their loop (output_size, max_fps)
+
+The window thread is modelled as in bench_ui_latency.py.
+
+  tick     UI-thread time per render pass, against the per-pass budget
+  fps      frames shown per tile per second
+  cpu      process CPU time per wall second (1.0 = one core)
+
+Usage: python benchmarks/bench_multiview.py [--seconds 5] [--budget-ms 8] [--max-fps 10]
+"""
+
+import argparse
+import time
+
+from common import STREAM_URL, WindowModel, start_simulator, summarize
+from multiview import MultiviewGrid, grid_layout
+from vcapture import vcapture
+
+GRID_SIZE = (640, 360)
+
+
+class _Widget:
+    image = None
+
+    def update(self):
+        pass
+
+
+class _TickTimes:
+    """Wraps the grid's tick to record the time of every render pass"""
+
+    def __init__(self, grid):
+        self.values = []
+        self._tick = grid._tick
+        grid._tick = self
+
+    def __call__(self):
+        self._tick()
+        self.values.append(self._tick.__self__.last_tick_ms / 1000)
+
+
+def _measure(feeds, scaled, seconds, budget_ms, max_fps):
+    layout = grid_layout(feeds, *GRID_SIZE)
+    tile_size = layout[0][2:]
+    window = WindowModel()
+    window.start()
+    grid = MultiviewGrid(
+        window.after, [_Widget() for _ in layout], tile_size, budget_ms, max_fps
+    )
+    ticks = _TickTimes(grid)
+    options = {"output_size": tile_size, "max_fps": max_fps} if scaled else {}
+    captures = [vcapture(STREAM_URL, "mjpeg", options, mode="thread") for _ in layout]
+    for index, capture in enumerate(captures):
+        capture.start()
+        grid.attach(index, capture)
+
+    time.sleep(1.0)  # Let every feed connect
+    shown = [surface.frames_shown for surface in grid._surfaces]
+    ticks.values.clear()
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    time.sleep(seconds)
+    elapsed = time.perf_counter() - started
+    cpu = (time.process_time() - cpu_started) / elapsed
+    fps = [
+        (surface.frames_shown - before) / elapsed
+        for surface, before in zip(grid._surfaces, shown)
+    ]
+
+    for capture in grid.close():
+        capture.release()
+    window.stop()
+    return ticks.values, min(fps), cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--budget-ms", type=float, default=8.0)
+    parser.add_argument("--max-fps", type=float, default=10)
+    args = parser.parse_args()
+
+    start_simulator()
+    print(f"Source: {STREAM_URL} (simulator serves ~15 fps), grid {GRID_SIZE}")
+    print(f"Budget {args.budget_ms} ms per pass, tiles capped at {args.max_fps} fps")
+    for feeds in (4, 9):
+        for name, scaled in (("full", False), ("scaled", True)):
+            ticks, fps, cpu = _measure(
+                feeds, scaled, args.seconds, args.budget_ms, args.max_fps
+            )
+            print(f"{feeds} feeds {name:>6}: tick  {summarize(ticks)}")
+            print(f"{'':>14}  fps/tile >= {fps:.1f}  cpu {cpu:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Detecting the end of a pan move on the simulated camera: PositionTracker's
+adaptive polling against reading the position every --interval seconds.
+
+The head pans at a fixed speed and is stopped on the target by a watcher on
+the simulator state, --latency seconds are added to every reply.
+
+  polls     pan/tilt position reads until arrival was reported
+  detected  time from the head stopping to the caller knowing it
+
+Usage: python benchmarks/bench_position.py [--latency 0.01] [--runs 5]
+"""
+
+import argparse
+import threading
+import time
+
+from common import CENTER, move_marker, start_simulator, summarize
+from cameras import testcamera_sim as sim
+from command_worker import CommandWorker
+from controller import Camera
+from position import DEFAULT_TOLERANCE, PositionTracker, read_position
+
+TARGET = CENTER + 0x3000
+SPEED = 5
+
+
+def _slow_camera(latency):
+    camera = Camera(ip="127.0.0.1", camera_type="testcamera")
+    recv = camera.socket.recv
+
+    def delayed_recv(size):
+        time.sleep(latency)
+        return recv(size)
+
+    camera.socket.recv = delayed_recv
+    return camera
+
+
+def _start_move():
+    """Pan right from the center, returns {"stopped": time} once on target"""
+    move_marker(CENTER)
+    stop = {}
+
+    def stopper():
+        while True:
+            with sim.STATE.lock:
+                if sim.STATE.pan_pos >= TARGET:
+                    sim.STATE.pan_pos = TARGET
+                    sim.STATE.pan_velocity = 0.0
+                    stop["stopped"] = time.perf_counter()
+                    return
+            time.sleep(0.0005)
+
+    camera = Camera(ip="127.0.0.1", camera_type="testcamera")
+    camera.execute(camera.build_command("pan_right", SPEED, SPEED))
+    camera.close()
+    threading.Thread(target=stopper, daemon=True).start()
+    return stop
+
+
+def _fixed(camera, interval):
+    stop = _start_move()
+    polls = 0
+    while True:
+        pose = read_position(camera, ("pan",))
+        polls += 1
+        if abs(pose["pan"] - TARGET) <= DEFAULT_TOLERANCE["pan"]:
+            return polls, time.perf_counter() - stop["stopped"]
+        time.sleep(interval)
+
+
+def _tracked(tracker):
+    stop = _start_move()
+    result = tracker.watch({"pan": TARGET}, timeout=30.0).result()
+    assert result["arrived"], result
+    return result["polls"], time.perf_counter() - stop["stopped"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--interval", type=float, default=0.05)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    start_simulator()
+    print(
+        f"pan {TARGET - CENTER} units at {SPEED * sim.PAN_TILT_UNITS_PER_SPEED:.0f} "
+        f"units/s, {args.latency * 1000:.0f} ms per reply"
+    )
+
+    camera = _slow_camera(args.latency)
+    runs = [_fixed(camera, args.interval) for _ in range(args.runs)]
+    camera.close()
+    print(
+        f"{'fixed':>8}: polls {sum(p for p, _ in runs) / len(runs):5.1f}  "
+        f"detected {summarize([d for _, d in runs])}"
+    )
+
+    worker = CommandWorker(lambda: _slow_camera(args.latency))
+    worker.connect().result()
+    tracker = PositionTracker(worker, min_interval=args.interval)
+    runs = [_tracked(tracker) for _ in range(args.runs)]
+    print(
+        f"{'tracker':>8}: polls {sum(p for p, _ in runs) / len(runs):5.1f}  "
+        f"detected {summarize([d for _, d in runs])}"
+    )
+    tracker.close()
+    worker.close()
+    move_marker(CENTER)
+
+
+if __name__ == "__main__":
+    main()
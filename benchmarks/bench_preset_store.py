@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+UI-thread cost of preset edits, rewriting presets.json on every change against
+the debounced background PresetStore.
+
+Each run switches between cameras and renames presets the way the UI does,
+with --cameras cameras already in the file.
+
+  edit     time spent on the calling (UI) thread per change
+  writes   number of times presets.json was written
+
+Usage: python benchmarks/bench_preset_store.py [--cameras 50] [--edits 200]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from common import summarize
+from preset_store import PresetStore, build_default_slots, write_json_atomic
+
+
+def _legacy(path, store, camera_key, slot_index, name):
+    store["cameras"][camera_key]["presets"][str(slot_index)]["name"] = name
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(store, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cameras", type=int, default=50)
+    parser.add_argument("--edits", type=int, default=200)
+    args = parser.parse_args()
+
+    keys = [f"192.168.0.{index}|ptzoptics" for index in range(args.cameras)]
+    data = {
+        "version": 1,
+        "cameras": {key: {"presets": build_default_slots()} for key in keys},
+    }
+    edits = [
+        (keys[index % len(keys)], index % 9 + 1, f"Shot {index}")
+        for index in range(args.edits)
+    ]
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "presets.json")
+        write_json_atomic(path, data)
+        print(f"{args.cameras} cameras, {os.path.getsize(path) // 1024} KB presets.json")
+
+        times = []
+        for edit in edits:
+            started = time.perf_counter()
+            _legacy(path, data, *edit)
+            times.append(time.perf_counter() - started)
+        print(f"  legacy: edit  {summarize(times)}  writes {len(edits)}")
+
+        store = PresetStore(path)
+        times = []
+        for camera_key, slot_index, name in edits:
+            started = time.perf_counter()
+            store.update_slot(camera_key, slot_index, name=name)
+            times.append(time.perf_counter() - started)
+        store.close()
+        print(f"   store: edit  {summarize(times)}  writes {store.writes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Cost of putting a captured frame on the 300x150 preview, legacy against PreviewSurface.
+
+legacy   Image.fromarray, resize and the RGBA conversion the renderer does,
+         three new images per frame (nebulatk's Image wrapper needs a display,
+         so its copy is left out, which favours the legacy path)
+surface  PreviewSurface blitting into its preallocated buffers
+
+  time    per frame, on the thread that renders
+  rss     resident memory swing (max - min) while showing the frames
+
+Usage: python benchmarks/bench_preview.py [--frames 2000]
+"""
+
+import argparse
+import time
+
+from PIL import Image
+
+from common import STREAM_URL, rss_mb, start_simulator, summarize
+from preview import PreviewSurface
+from vcapture import vcapture
+
+PREVIEW_SIZE = (300, 150)
+
+
+class _Widget:
+    image = None
+
+    def update(self):
+        pass
+
+
+def _legacy(widget):
+    def show(frame):
+        img = Image.fromarray(frame, "RGB").resize(PREVIEW_SIZE)
+        widget.image = img.convert("RGBA")
+
+    return show
+
+
+def _sample_frames(count):
+    cap = vcapture(STREAM_URL, "mjpeg", mode="thread")
+    cap.start()
+    subscriber = cap.subscribe("every")
+    frames = []
+    while len(frames) < count:
+        packet = subscriber.get(timeout=15.0)
+        if packet is None:
+            break
+        frames.append(packet.frame)
+    cap.release()
+    return frames
+
+
+def _measure(show, frames, total):
+    times = []
+    rss = []
+    for index in range(total):
+        frame = frames[index % len(frames)]
+        started = time.perf_counter()
+        show(frame)
+        times.append(time.perf_counter() - started)
+        if index % 50 == 0:
+            rss.append(rss_mb())
+    return times, max(rss) - min(rss)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=2000)
+    args = parser.parse_args()
+
+    start_simulator()
+    frames = _sample_frames(30)
+    if not frames:
+        print(f"No frames received from {STREAM_URL}")
+        return
+    height, width = frames[0].shape[:2]
+    print(f"Source: {STREAM_URL}, {width}x{height} frames to {PREVIEW_SIZE}")
+    for name, show in (
+        ("legacy", _legacy(_Widget())),
+        ("surface", PreviewSurface(_Widget(), *PREVIEW_SIZE).show),
+    ):
+        times, swing = _measure(show, frames, args.frames)
+        print(f"{name:>8}: time  {summarize(times)}")
+        print(f"{'':>8}  rss swing {swing:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
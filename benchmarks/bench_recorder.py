@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Preview cost of a pre-roll Recorder on the simulator's stream.
+
+Each run shows the stream on the modelled window (as in bench_ui_latency.py)
+for --seconds, without a recorder and with one holding a --pre-roll second
+ring, then saves the ring.
+
+  passthrough  the capture publishes the camera's JPEGs, the ring keeps them
+  encode       the capture publishes decoded 640x360 frames with change
+               detection off, the recorder encodes every one on its thread
+
+  latency   time from a frame's capture to it being rendered
+  cpu       process CPU time per wall second (1.0 = one core)
+  ring      frames, MB and seconds held at the end, frames dropped
+  save      time to write the ring to disk once asked to
+
+Usage: python benchmarks/bench_recorder.py [--seconds 10] [--pre-roll 5]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from common import STREAM_URL, WindowModel, start_simulator, summarize
+from recorder import Recorder
+from render_loop import FrameRenderScheduler
+from vcapture import vcapture
+
+PREVIEW_SIZE = (300, 150)
+
+
+def _measure(pipeline, record, seconds, pre_roll):
+    options = {}
+    if pipeline == "encode":
+        options = {"output_size": (640, 360), "change_threshold": None}
+    cap = vcapture(STREAM_URL, "mjpeg", options, mode="thread")
+    cap.start()
+    cap.subscribe("latest").get(timeout=15.0)
+    window = WindowModel()
+    window.start()
+    latencies = []
+
+    def render(packet):
+        frame = packet.frame
+        if frame is not None:
+            latencies.append(time.time() - packet.timestamp)
+
+    scheduler = FrameRenderScheduler(window.after, render, max_fps=30)
+    scheduler.attach(cap)
+    recorder = Recorder(cap.bus, pre_roll) if record else None
+    wall, cpu = time.perf_counter(), time.process_time()
+    time.sleep(seconds)
+    load = (time.process_time() - cpu) / (time.perf_counter() - wall)
+    result = {"latency": summarize(latencies), "cpu": load}
+    if recorder is not None:
+        frames, size, span = recorder.buffered
+        result["ring"] = (
+            f"{frames} frames {size / 2**20:.1f} MB {span:.1f} s, "
+            f"{recorder.dropped} dropped"
+        )
+        with tempfile.TemporaryDirectory() as folder:
+            started = time.perf_counter()
+            future = recorder.start_recording(os.path.join(folder, "clip.mjpeg"))
+            while recorder.recording is None:
+                time.sleep(0.001)
+            result["save"] = (time.perf_counter() - started) * 1000
+            recorder.stop_recording()
+            future.result(timeout=5.0)
+        recorder.close()
+    scheduler.detach()
+    window.stop()
+    cap.release()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--pre-roll", type=float, default=5.0)
+    args = parser.parse_args()
+    start_simulator()
+
+    for pipeline in ("passthrough", "encode"):
+        for record in (False, True):
+            result = _measure(pipeline, record, args.seconds, args.pre_roll)
+            label = f"{pipeline} {'recorder' if record else 'preview only'}"
+            print(f"{label:>24}: latency {result['latency']}  cpu {result['cpu']:4.2f}")
+            if record:
+                print(
+                    f"{'':>24}  ring {result['ring']}, "
+                    f"saved in {result['save']:.1f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Viewers served by the restreaming hub from one pull of the simulated camera.
+
+For each viewer count every viewer reads the 360p MJPEG stream for a few
+seconds. Reported: frames per second each viewer got, frames encoded per
+second (shared by all viewers), CPU time of this process and the number of
+sessions the camera saw. "per viewer" is the encode CPU one encode per viewer
+would have cost instead.
+
+Usage: python benchmarks/bench_restream.py [--seconds 3] [--viewers 1 4 16]
+"""
+
+import argparse
+import threading
+import time
+import urllib.request
+
+from common import STREAM_URL, start_simulator
+from camera_streams import start_capture
+from cameras import testcamera_sim as sim
+from frame_bus import FrameBus
+from mjpeg_capture import MJPEGCapture, encode_frame
+from restream import RestreamHub, RestreamServer
+
+CAMERAS = [{"ip": "127.0.0.1", "type": "testcamera"}]
+PROFILE = "360p"
+
+
+def _viewer(url, stop, counts, index):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        while not stop.is_set():
+            line = response.readline()
+            if line.lower().startswith(b"content-length:"):
+                response.readline()
+                response.read(int(line.split(b":")[1]))
+                counts[index] += 1
+
+
+def _encode_ms(size, quality, samples=30):
+    reader = MJPEGCapture(STREAM_URL)
+    bus = FrameBus()
+    jpegs = [reader.read()[1] for _ in range(samples)]
+    reader.release()
+    started = time.process_time()
+    for jpeg in jpegs:
+        encode_frame(bus.publish(None, jpeg=jpeg), size, quality)
+    return (time.process_time() - started) / samples * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--viewers", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    start_simulator()
+    hub = RestreamHub(
+        CAMERAS, capture=lambda cam_cfg: start_capture(cam_cfg, mode="thread")
+    )
+    http_server = RestreamServer(("127.0.0.1", 0), hub)
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{http_server.server_address[1]}/cameras/0/{PROFILE}.mjpg"
+    profile = hub.profiles[PROFILE]
+    encode_ms = _encode_ms(profile["size"], profile["quality"])
+
+    print(f"{PROFILE} encode: {encode_ms:.1f} ms CPU per frame")
+    for viewers in args.viewers:
+        stop = threading.Event()
+        counts = [0] * viewers
+        threads = [
+            threading.Thread(
+                target=_viewer, args=(url, stop, counts, index), daemon=True
+            )
+            for index in range(viewers)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(1.0)  # Capture start and warm up
+        stream = hub.acquire(0, PROFILE)
+        hub.release(0)
+        counts[:] = [0] * viewers
+        encoded, cpu, started = stream.encoded, time.process_time(), time.perf_counter()
+        time.sleep(args.seconds)
+        elapsed = time.perf_counter() - started
+        fps = sum(counts) / viewers / elapsed
+        encodes = (stream.encoded - encoded) / elapsed
+        cpu_percent = (time.process_time() - cpu) / elapsed * 100
+        sessions = sim.STATE.client_count
+        stop.set()
+        for thread in threads:
+            thread.join(2.0)
+        print(
+            f"{viewers:3d} viewers: {fps:5.1f} fps each  {encodes:5.1f} encodes/s  "
+            f"CPU {cpu_percent:5.1f} %  camera sessions {sessions}  "
+            f"(per viewer: {encodes * viewers * encode_ms / 10:5.1f} % encode CPU)"
+        )
+
+    http_server.shutdown()
+    http_server.server_close()
+    hub.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Timing of a preset tour on simulated cameras: the sequencer against one
+blocking script thread per camera (recall, then time.sleep for the dwell).
+
+Every tour is --cycles rounds of recall + dwell. "drift" is how much longer
+the tour took than its camera steps plus its dwells, i.e. the time lost
+between steps. The sequencer runs all cameras on one scheduler thread.
+
+Usage: python benchmarks/bench_sequencer.py [--cameras 4] [--cycles 50] [--dwell 0.02]
+"""
+
+import argparse
+import threading
+import time
+
+from common import start_simulator
+from camera_group import CameraGroup
+from controller import Camera
+from sequencer import Sequencer
+
+
+def _timed_camera(cam_cfg, busy):
+    camera = Camera(ip=cam_cfg["ip"], camera_type=cam_cfg["type"])
+    recall = camera.preset_recall
+
+    def timed_recall(preset):
+        started = time.perf_counter()
+        recall(preset)
+        busy[cam_cfg["ip"]] += time.perf_counter() - started
+
+    camera.preset_recall = timed_recall
+    return camera
+
+
+def _script(cam_cfg, cycles, dwell, busy, ends):
+    camera = _timed_camera(cam_cfg, busy)
+    for cycle in range(cycles):
+        camera.preset_recall(cycle % 4)
+        time.sleep(dwell)
+    ends[cam_cfg["ip"]] = time.perf_counter()
+    camera.close()
+
+
+def _report(label, cameras, started, ends, busy, cycles, dwell, threads):
+    drifts = [
+        ends[cam["ip"]] - started - busy[cam["ip"]] - cycles * dwell for cam in cameras
+    ]
+    worst = max(drifts)
+    print(
+        f"{label:>10}: drift worst {worst * 1000:6.1f} ms  "
+        f"({worst / (2 * cycles) * 1e6:5.0f} us per step)  {threads} threads"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cameras", type=int, default=4)
+    parser.add_argument("--cycles", type=int, default=50)
+    parser.add_argument("--dwell", type=float, default=0.02)
+    args = parser.parse_args()
+
+    start_simulator()
+    cameras = [
+        {"ip": f"127.0.0.{index + 1}", "type": "testcamera"}
+        for index in range(args.cameras)
+    ]
+
+    busy = {cam["ip"]: 0.0 for cam in cameras}
+    ends = {}
+    threads = [
+        threading.Thread(
+            target=_script, args=(cam, args.cycles, args.dwell, busy, ends)
+        )
+        for cam in cameras
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    running_threads = threading.active_count()
+    for thread in threads:
+        thread.join()
+    _report(
+        "script", cameras, started, ends, busy, args.cycles, args.dwell, running_threads
+    )
+
+    busy = {cam["ip"]: 0.0 for cam in cameras}
+    ends = {}
+    group = CameraGroup.from_cameras(
+        cameras, connect=lambda cam: _timed_camera(cam, busy)
+    )
+    group.call("check")
+    busy = {cam["ip"]: 0.0 for cam in cameras}
+    macros = {
+        f"Tour {index}": {
+            "camera": index,
+            "steps": [
+                step
+                for cycle in range(args.cycles)
+                for step in ({"recall": cycle % 4}, {"dwell": args.dwell})
+            ],
+        }
+        for index in range(args.cameras)
+    }
+    done = threading.Event()
+    remaining = set(macros)
+
+    def on_step(name, index, step):
+        if index == 2 * args.cycles - 1:
+            # Last dwell started: the tour ends when it is over
+            ends[cameras[int(name.split()[1])]["ip"]] = time.perf_counter() + args.dwell
+            remaining.discard(name)
+            if not remaining:
+                done.set()
+
+    sequencer = Sequencer(group.workers, macros, on_step=on_step)
+    started = time.perf_counter()
+    for name in macros:
+        sequencer.start(name)
+    running_threads = threading.active_count()
+    done.wait()
+    time.sleep(args.dwell)
+    _report(
+        "sequencer",
+        cameras,
+        started,
+        ends,
+        busy,
+        args.cycles,
+        args.dwell,
+        running_threads,
+    )
+    sequencer.close()
+    group.close()
+
+
+if __name__ == "__main__":
+    main()
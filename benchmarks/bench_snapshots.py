@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+UI-thread cost of saving a preset snapshot, encoding on the UI thread against
+handing the frame to a SnapshotWorker.
+
+Frames are published to a FrameBus at --fps, raw 1920x1080 RGB like the
+OpenCV and FFmpeg backends deliver. Both variants write the snapshot JPEG and
+the preset button thumbnail.
+
+  ui       time the "preset stored" handler spends on the UI thread
+  saved    time from the handler until the snapshot is on disk
+
+Usage: python benchmarks/bench_snapshots.py [--runs 10] [--fps 30]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+from common import summarize
+from frame_bus import FrameBus
+from snapshots import SnapshotWorker
+from thumbnails import write_thumbnail
+
+BUTTON_SIZE = (100, 50)
+
+
+def _publish(bus, fps, stop):
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (1080, 1920, 3), np.uint8) for _ in range(4)]
+    index = 0
+    while not stop.is_set():
+        bus.publish(frames[index % len(frames)])
+        index += 1
+        time.sleep(1 / fps)
+
+
+def _legacy(bus, path, saved):
+    image = Image.fromarray(bus.latest.frame, "RGB")
+    image.save(path, format="JPEG")
+    write_thumbnail(path, BUTTON_SIZE, image=image)
+    saved.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--fps", type=float, default=30.0)
+    args = parser.parse_args()
+
+    bus = FrameBus()
+    stop = threading.Event()
+    publisher = threading.Thread(target=_publish, args=(bus, args.fps, stop))
+    publisher.start()
+    worker = SnapshotWorker(thumbnail_size=BUTTON_SIZE)
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "1.jpg")
+        while bus.latest is None:
+            time.sleep(0.01)
+        for name in ("legacy", "worker"):
+            ui, saved_after = [], []
+            for _ in range(args.runs):
+                saved = threading.Event()
+                started = time.perf_counter()
+                if name == "legacy":
+                    _legacy(bus, path, saved)
+                else:
+                    worker.request(bus.subscribe("latest"), path, lambda _: saved.set())
+                ui.append(time.perf_counter() - started)
+                saved.wait()
+                saved_after.append(time.perf_counter() - started)
+            print(f"{name:>7}: ui     {summarize(ui)}")
+            print(f"{'':>7}  saved  {summarize(saved_after)}")
+    worker.close()
+    stop.set()
+    publisher.join()
+
+
+if __name__ == "__main__":
+    main()
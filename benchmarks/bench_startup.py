@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Import time camera_controller spends before it can create its window, with the
+previous eager imports against the current lazy ones.
+
+Each run imports the modules in a fresh interpreter. nebulatk and win32api are
+left out, both variants import them the same way (win32api only on Windows).
+
+  imports  time to import the modules needed before the window is created
+
+Usage: python benchmarks/bench_startup.py [--runs 10]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+from common import summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMON = [
+    "json",
+    "re",
+    "shutil",
+    "controller",
+    "command_worker",
+    "camera_config",
+    "catalog",
+    "camera_streams",
+    "preset_store",
+    "render_loop",
+    "thumbnails",
+]
+VARIANTS = {
+    "eager": COMMON
+    + ["multiprocessing", "cv2", "vcapture", "multiview", "preview", "snapshots"],
+    "lazy": COMMON + ["threading", "warnings", "startup"],
+}
+
+SCRIPT = """
+import time
+started = time.perf_counter()
+{imports}
+print(time.perf_counter() - started)
+"""
+
+
+def _measure(modules):
+    script = SCRIPT.format(imports="\n".join(f"import {name}" for name in modules))
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    for name, modules in VARIANTS.items():
+        times = [_measure(modules) for _ in range(args.runs)]
+        print(f"{name:>6}: imports {summarize(times)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+CPU of the preview pipeline with and without change detection, on a static
+and a moving scene from the simulator.
+
+  preview   the main window's path: JPEGs passed through, decoded and blitted
+            into the 300x150 PreviewSurface by the FrameRenderScheduler
+  tile      the multiview path: decoded to the tile size in the capture loop,
+            then blitted
+
+The static scene is the idle simulator (only its clock changes, once a
+second), the moving scene pans the head slowly so every frame differs.
+
+  cpu       pipeline CPU time per wall second (1.0 = one core): process CPU
+            less that of the simulator serving the stream to a bare reader,
+            since the simulator runs in this process
+  rendered  frames put on the preview per second, the rest were skipped
+
+Usage: python benchmarks/bench_static_frames.py [--seconds 5]
+"""
+
+import argparse
+import threading
+import time
+
+from common import CENTER, STREAM_URL, WindowModel, move_marker, start_simulator
+from cameras import testcamera_sim as sim
+from mjpeg_capture import MJPEGCapture
+from preview import PreviewSurface
+from render_loop import FrameRenderScheduler
+from vcapture import CHANGE_THRESHOLD, vcapture
+from visca import ViscaCommandBuilder
+
+PREVIEW_SIZE = (300, 150)
+TILE_SIZE = (320, 180)
+
+
+class _Widget:
+    image = None
+
+    def update(self):
+        pass
+
+
+def _scene(moving):
+    move_marker(CENTER - 0x2000)
+    if moving:
+        sim.apply_visca_command(
+            ViscaCommandBuilder("testcamera").build_command("pan_right", 1, 1)
+        )
+
+
+def _cpu(seconds):
+    wall, cpu = time.perf_counter(), time.process_time()
+    time.sleep(seconds)
+    return (time.process_time() - cpu) / (time.perf_counter() - wall)
+
+
+def _baseline(moving, seconds):
+    """CPU of the simulator streaming to a reader that does nothing"""
+    reader = MJPEGCapture(STREAM_URL)
+    stop = threading.Event()
+
+    def read():
+        while not stop.is_set():
+            reader.read()
+
+    thread = threading.Thread(target=read, daemon=True)
+    thread.start()
+    _scene(moving)
+    time.sleep(0.5)
+    load = _cpu(seconds)
+    stop.set()
+    thread.join()
+    reader.release()
+    move_marker(CENTER)
+    return load
+
+
+def _measure(pipeline, threshold, moving, seconds):
+    options = {"change_threshold": threshold}
+    if pipeline == "tile":
+        options["output_size"] = TILE_SIZE
+    cap = vcapture(STREAM_URL, "mjpeg", options, mode="thread")
+    cap.start()
+    cap.subscribe("latest").get(timeout=15.0)
+    window = WindowModel()
+    window.start()
+    surface = PreviewSurface(_Widget(), *PREVIEW_SIZE)
+    scheduler = FrameRenderScheduler(
+        window.after, lambda packet: surface.show(packet.frame), max_fps=30
+    )
+    _scene(moving)
+    scheduler.attach(cap)
+    time.sleep(0.5)
+    rendered = scheduler.rendered
+    load = _cpu(seconds)
+    result = (load, (scheduler.rendered - rendered) / seconds)
+    scheduler.detach()
+    window.stop()
+    cap.release()
+    move_marker(CENTER)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    start_simulator()
+
+    baseline = {moving: _baseline(moving, args.seconds) for moving in (False, True)}
+    for pipeline in ("preview", "tile"):
+        for moving in (False, True):
+            off = _measure(pipeline, None, moving, args.seconds)
+            on = _measure(pipeline, CHANGE_THRESHOLD, moving, args.seconds)
+            off_cpu, on_cpu = off[0] - baseline[moving], on[0] - baseline[moving]
+            print(
+                f"{pipeline:>7} {'moving' if moving else 'static':>6}: "
+                f"off cpu {off_cpu:5.3f} rendered {off[1]:4.1f}/s  "
+                f"on cpu {on_cpu:5.3f} rendered {on[1]:4.1f}/s  "
+                f"saved {(1 - on_cpu / off_cpu) * 100:3.0f}%"
+            )
+
+
+if __name__ == "__main__":
+    main()
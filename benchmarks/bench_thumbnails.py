@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Cost of refreshing the 9 preset buttons on a camera switch, loading each
+full-size preset JPEG by path against the ThumbnailCache.
+
+The path variant does what nebulatk does for a path image (open, then resize
+to the button size). Snapshots are 1920x1080 JPEGs, one per slot and camera.
+
+  switch   time to produce the 9 button images after switching camera
+
+Usage: python benchmarks/bench_thumbnails.py [--cameras 4] [--switches 40]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from common import summarize
+from thumbnails import ThumbnailCache
+
+BUTTON_SIZE = (100, 50)
+
+
+def _load_path(path):
+    return Image.open(path).resize(BUTTON_SIZE, Image.NEAREST)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cameras", type=int, default=4)
+    parser.add_argument("--switches", type=int, default=40)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as folder:
+        slots = []
+        for camera in range(args.cameras):
+            for slot_index in range(1, 10):
+                path = os.path.join(folder, f"{camera}_{slot_index}.jpg")
+                pixels = rng.integers(0, 255, (1080, 1920, 3), np.uint8)
+                Image.fromarray(pixels, "RGB").save(path, format="JPEG")
+                slots.append((f"cam{camera}", slot_index, path))
+
+        cache = ThumbnailCache(BUTTON_SIZE)
+        for name, load in (
+            ("path", lambda key, slot_index, path: _load_path(path)),
+            ("cache", cache.get),
+        ):
+            times = []
+            for switch in range(args.switches):
+                camera = f"cam{switch % args.cameras}"
+                started = time.perf_counter()
+                for key, slot_index, path in slots:
+                    if key == camera:
+                        load(key, slot_index, path)
+                times.append(time.perf_counter() - started)
+            first = summarize(times[: args.cameras])
+            later = summarize(times[args.cameras :])
+            print(f"{name:>6}: first view {first}")
+            print(f"{'':>6}  later      {later}")
+
+
+if __name__ == "__main__":
+    main()
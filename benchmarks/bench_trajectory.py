@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+A 2 s eased pan/tilt/zoom move on the simulated camera with --latency seconds
+added to every reply: the Trajectory engine against a loop calling
+Camera.move and Camera.zoom for each waypoint.
+
+  arrival   time from the start until the target pose was sent and the
+            camera reports it, against the planned duration
+  commands  VISCA messages sent (inquiries included)
+  late      worst lateness of a waypoint against its control tick
+
+Usage: python benchmarks/bench_trajectory.py [--latency 0.03] [--rate 20]
+"""
+
+import argparse
+import time
+
+from common import start_simulator
+from command_worker import CommandWorker
+from controller import Camera
+from trajectory import Trajectory, plan, read_pose
+
+START = {"pan": 0x8000, "tilt": 0x8000, "zoom": 0}
+TARGET = {"pan": 0xB000, "tilt": 0x6000, "zoom": 0x2000}
+
+
+def _slow_camera(latency, counts):
+    camera = Camera(ip="127.0.0.1", camera_type="testcamera")
+    recv = camera.socket.recv
+
+    def delayed_recv(size):
+        time.sleep(latency)
+        counts["commands"] += 1
+        return recv(size)
+
+    camera.socket.recv = delayed_recv
+    return camera
+
+
+def _reset(camera):
+    camera.move("abs", START["pan"], START["tilt"], 24, 24)
+    camera.zoom("direct", START["zoom"])
+    camera.clear_cache()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.03)
+    parser.add_argument("--rate", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=2.0)
+    args = parser.parse_args()
+    start_simulator()
+
+    counts = {"commands": 0}
+    camera = _slow_camera(args.latency, counts)
+    _reset(camera)
+    samples = plan(START, TARGET, args.duration, args.rate)
+    counts["commands"] = 0
+    late = 0.0
+    began = time.perf_counter()
+    previous = 0.0
+    for seconds, pose in samples:
+        due = began + previous
+        time.sleep(max(0.0, due - time.perf_counter()))
+        late = max(late, time.perf_counter() - due)
+        camera.move("abs", pose["pan"], pose["tilt"], 24, 24)
+        camera.zoom("direct", pose["zoom"])
+        previous = seconds
+    camera.clear_cache()
+    assert read_pose(camera) == TARGET
+    arrival = time.perf_counter() - began
+    print(
+        f"{'loop':>10}: arrival {arrival:5.2f} s (planned {args.duration:.2f} s)  "
+        f"commands {counts['commands']:4d}  late {late * 1000:6.0f} ms"
+    )
+
+    _reset(camera)
+    camera.close()
+    counts["commands"] = 0
+    worker = CommandWorker(lambda: _slow_camera(args.latency, counts))
+    worker.connect().result()
+    began = time.perf_counter()
+    move = Trajectory(worker, TARGET, args.duration, args.rate, start=START)
+    move.done.result(timeout=30)
+    assert worker.submit(read_pose).result() == TARGET
+    arrival = time.perf_counter() - began
+    print(
+        f"{'trajectory':>10}: arrival {arrival:5.2f} s (planned {args.duration:.2f} s)  "
+        f"commands {counts['commands']:4d}  late {move.late * 1000:6.0f} ms  "
+        f"({move.superseded} of {move.sent + move.superseded} waypoints superseded)"
+    )
+    worker.close()
+
+
+if __name__ == "__main__":
+    main()
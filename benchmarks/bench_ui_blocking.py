@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Time the UI thread spends in button handlers, calling the camera directly
+against posting to a CommandWorker.
+
+The simulated camera answers over a socket wrapper that adds a network round
+trip and keeps answering "Command Accepted" while a preset recall moves, like
+a real PTZ camera.
+
+  press     pan_left on press and pan_stop on release
+  recall    preset_recall, the camera moves for --move-ms before completing
+
+Usage: python benchmarks/bench_ui_blocking.py [--rtt-ms 5] [--move-ms 1500] [--runs 5]
+"""
+
+import argparse
+import time
+
+from common import start_simulator, summarize
+from command_worker import CommandWorker
+from controller import Camera
+
+ACCEPTED = bytes.fromhex("9041ff")
+PRESET_RECALL_PREFIX = "8101043f02"
+
+
+class _SlowSocket:
+    """Adds a round trip per exchange and a move time to preset recalls"""
+
+    def __init__(self, sock, rtt, move_time):
+        self._sock = sock
+        self._rtt = rtt
+        self._move_time = move_time
+        self._busy_until = 0.0
+
+    def send(self, data):
+        if data.hex().startswith(PRESET_RECALL_PREFIX):
+            self._busy_until = time.monotonic() + self._move_time
+        return self._sock.send(data)
+
+    def recv(self, size):
+        time.sleep(self._rtt)
+        reply = self._sock.recv(size)
+        if time.monotonic() < self._busy_until:
+            return ACCEPTED
+        return reply
+
+    def close(self):
+        self._sock.close()
+
+
+def _camera(rtt, move_time):
+    camera = Camera(ip="127.0.0.1", camera_type="testcamera")
+    camera.socket = _SlowSocket(camera.socket, rtt, move_time)
+    camera.preset_set(1)
+    return camera
+
+
+def _press(call):
+    call("pan_left", 7, 7)
+    call("pan_stop")
+
+
+def _recall(call):
+    call("preset_recall", 1)
+
+
+def _measure(action, runs, rtt, move_time):
+    camera = _camera(rtt, move_time)
+    worker = CommandWorker(lambda: camera)
+    direct, posted = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        action(lambda method, *args: getattr(camera, method)(*args))
+        direct.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        futures = []
+        action(lambda method, *args: futures.append(worker.post(method, *args)))
+        posted.append(time.perf_counter() - started)
+        for future in futures:
+            future.result()
+    worker.close()
+    return direct, posted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rtt-ms", type=float, default=5.0)
+    parser.add_argument("--move-ms", type=float, default=1500.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    start_simulator()
+    rtt, move_time = args.rtt_ms / 1000, args.move_ms / 1000
+    print(f"Simulated camera, {args.rtt_ms} ms round trip, {args.move_ms} ms recall move")
+    for name, action in (("press", _press), ("recall", _recall)):
+        direct, posted = _measure(action, args.runs, rtt, move_time)
+        print(f"{name:>7}: direct  {summarize(direct)}")
+        print(f"{'':>7}  posted  {summarize(posted)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+UI input latency and render cost of the legacy polling preview loop against the
+event-driven FrameRenderScheduler, on the simulator's MJPEG stream.
+
+The window thread is modelled on nebulatk's NativeGLWindow (mainloop polling
+events and `after` timers every 1 ms), since the real window needs a display.
+Rendering does the same work as camera_controller (decode, PIL image, resize
+to the preview size) while holding the window's render batch lock, which input
+handling also needs.
+
+  input     time from a posted click until the window thread handles it
+  renders   preview renders per second
+  cpu       process CPU time per wall second (1.0 = one core)
+
+Usage: python benchmarks/bench_ui_latency.py [--seconds 5] [--backend mjpeg]
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from PIL import Image
+
+from common import STREAM_URL, WindowModel, start_simulator, summarize
+from render_loop import FrameRenderScheduler
+from vcapture import vcapture
+
+PREVIEW_SIZE = (300, 150)
+
+
+def _render(window, packet):
+    frame = packet.frame
+    if frame is None:
+        return
+    with window.render_lock:
+        Image.fromarray(frame, "RGB").resize(PREVIEW_SIZE)
+
+
+def _legacy(window, cap, stop, counter):
+    # The pre-scheduler main loop: poll, sleep(1/30), rebuild every time
+    while not stop.is_set():
+        packet = cap.current_packet
+        time.sleep(1 / 30)
+        if packet is not None:
+            _render(window, packet)
+            counter[0] += 1
+
+
+def _measure(variant, backend, seconds):
+    cap = vcapture(STREAM_URL, backend, mode="thread")
+    cap.start()
+    if cap.subscribe("latest").get(timeout=15.0) is None:
+        cap.release()
+        return None
+
+    window = WindowModel()
+    window.start()
+    stop = threading.Event()
+    counter = [0]
+    if variant == "legacy":
+        worker = threading.Thread(target=_legacy, args=(window, cap, stop, counter))
+        worker.start()
+    else:
+        scheduler = FrameRenderScheduler(
+            window.after, lambda packet: _render(window, packet), max_fps=30
+        )
+        scheduler.attach(cap)
+
+    latencies = []
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    while time.perf_counter() - started < seconds:
+        window.post_event(latencies.append)
+        time.sleep(random.uniform(0.01, 0.04))
+    elapsed = time.perf_counter() - started
+    cpu = (time.process_time() - cpu_started) / elapsed
+
+    if variant == "legacy":
+        stop.set()
+        worker.join()
+        renders = counter[0]
+    else:
+        scheduler.detach()
+        renders = scheduler.rendered
+    window.stop()
+    cap.release()
+    return latencies, renders / elapsed, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--backend", default="mjpeg")
+    args = parser.parse_args()
+
+    start_simulator()
+    print(f"Source: {STREAM_URL} (simulator serves ~15 fps), backend {args.backend}")
+    for variant in ("legacy", "event"):
+        result = _measure(variant, args.backend, args.seconds)
+        if result is None:
+            print(f"{variant:>8}: no frame received")
+            continue
+        latencies, renders, cpu = result
+        print(f"{variant:>8}: input    {summarize(latencies)}")
+        print(f"{'':>8}  renders  {renders:.1f}/s  cpu {cpu:.2f}")
+
+
+if __name__ == "__main__":
+    main()
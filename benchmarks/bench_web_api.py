@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Request round trip through the HTTP/WebSocket API, against the simulator.
+
+  http status   GET /api/status on a keep-alive connection, no camera I/O
+  http call     POST /api/command pan_left / pan_stop
+  ws call       the same commands as WebSocket messages
+  direct        the same commands called on a Camera in this process
+
+Usage: python benchmarks/bench_web_api.py [--requests 200]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+
+from common import start_simulator, summarize
+from controller import Camera
+from headless import ControlService
+from preset_store import PresetStore
+from web_api import WebApi
+
+CAMERAS = [{"ip": "127.0.0.1", "type": "testcamera"}]
+MOVES = [
+    {"cmd": "call", "method": "pan_left", "args": [7, 7]},
+    {"cmd": "call", "method": "pan_stop"},
+]
+
+
+def _start_api(service):
+    started = threading.Event()
+    state = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        state["api"] = WebApi(service)
+        loop.run_until_complete(state["api"].start("127.0.0.1", 0))
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    return state["api"].port
+
+
+def _http(sock, reader, method, path, body=b""):
+    sock.sendall(
+        f"{method} {path} HTTP/1.1\r\nHost: bench\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    length = 0
+    while (line := reader.readline()) != b"\r\n":
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    return json.loads(reader.read(length))
+
+
+def _ws_send(sock, payload):
+    mask = os.urandom(4)
+    masked = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    sock.sendall(struct.pack("!BB", 0x81, 0x80 | len(payload)) + mask + masked)
+
+
+def _ws_receive(reader):
+    _, length = reader.read(2)
+    if length == 126:
+        (length,) = struct.unpack("!H", reader.read(2))
+    return json.loads(reader.read(length))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    start_simulator()
+    with tempfile.TemporaryDirectory() as folder:
+        service = ControlService(CAMERAS, PresetStore(f"{folder}/presets.json"), folder)
+        port = _start_api(service)
+
+        with socket.create_connection(("127.0.0.1", port)) as sock:
+            reader = sock.makefile("rb")
+            times = []
+            for _ in range(args.requests):
+                started = time.perf_counter()
+                assert _http(sock, reader, "GET", "/api/status")["ok"]
+                times.append(time.perf_counter() - started)
+            print(f"{'http status':>12}: {summarize(times)}")
+
+            times = []
+            for index in range(args.requests):
+                body = json.dumps(MOVES[index % 2]).encode()
+                started = time.perf_counter()
+                assert _http(sock, reader, "POST", "/api/command", body)["ok"]
+                times.append(time.perf_counter() - started)
+            print(f"{'http call':>12}: {summarize(times)}")
+
+        with socket.create_connection(("127.0.0.1", port)) as sock:
+            reader = sock.makefile("rb")
+            sock.sendall(
+                b"GET /ws HTTP/1.1\r\nHost: bench\r\nUpgrade: websocket\r\n"
+                b"Connection: Upgrade\r\nSec-WebSocket-Key: YmVuY2htYXJrYmVuY2htYQ==\r\n"
+                b"Sec-WebSocket-Version: 13\r\n\r\n"
+            )
+            while reader.readline() != b"\r\n":
+                pass
+            times = []
+            for index in range(args.requests):
+                payload = json.dumps({"id": index, **MOVES[index % 2]}).encode()
+                started = time.perf_counter()
+                _ws_send(sock, payload)
+                # Events for the command may arrive before or after the reply
+                while _ws_receive(reader).get("id") != index:
+                    pass
+                times.append(time.perf_counter() - started)
+            print(f"{'ws call':>12}: {summarize(times)}")
+
+        camera = Camera(ip="127.0.0.1", camera_type="testcamera")
+        times = []
+        for index in range(args.requests):
+            started = time.perf_counter()
+            if index % 2:
+                camera.pan_stop()
+            else:
+                camera.pan_left(7, 7)
+            times.append(time.perf_counter() - started)
+        camera.close()
+        print(f"{'direct':>12}: {summarize(times)}")
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Shared helpers for the benchmark scripts.
+
+All benchmarks run against the in-process test camera simulator, so they need
+no hardware: the simulator's MJPEG stream is served on 127.0.0.1 and VISCA
+commands are applied directly to its state.
+"""
+
+import heapq
+import itertools
+import os
+import queue
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cameras import testcamera_sim as sim
+from camera_streams import TESTCAMERA_DEFAULT_STREAM_URL
+from visca import ViscaCommandBuilder
+
+STREAM_URL = TESTCAMERA_DEFAULT_STREAM_URL
+CENTER = 0x8000
+
+_builder = ViscaCommandBuilder("testcamera")
+
+
+def start_simulator():
+    sim.ensure_server()
+    move_marker(CENTER)
+
+
+def move_marker(pan_pos, tilt_pos=CENTER):
+    """Move the simulator's green PT marker with an absolute pan/tilt command"""
+    sim.apply_visca_command(
+        _builder.build_command("pan_direct_abs", 24, 24, pan_pos, tilt_pos)
+    )
+
+
+def marker_visible(frame, pan_pos, tilt_pos=CENTER):
+    """True if the RGB frame shows the green PT marker at the given position"""
+    if frame is None:
+        return False
+    height, width = frame.shape[:2]
+    x = min(width - 1, int(pan_pos / 0xFFFF * width))
+    # Sample above the "PT" label, still inside the 20 px marker on a 960x540 frame
+    y = max(0, min(height - 1, int(tilt_pos / 0xFFFF * height) - 14 * height // 540))
+    r, g, b = (int(channel) for channel in frame[y, x][:3])
+    return g > 150 and r < 140 and b < 140
+
+
+def wait_for(predicate, timeout=10.0, interval=0.002):
+    """Poll predicate until it returns a truthy value, returns (value, seconds)"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        value = predicate()
+        if value:
+            return value, time.perf_counter() - start
+        time.sleep(interval)
+    return None, None
+
+
+def rss_mb(pid=None):
+    """Resident set size in MB for a process (Linux /proc, psutil if available)"""
+    pid = pid or os.getpid()
+    try:
+        import psutil
+
+        return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def summarize(values):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return "n/a"
+    median = values[len(values) // 2]
+    return f"median {median * 1000:7.1f} ms  min {values[0] * 1000:7.1f} ms  max {values[-1] * 1000:7.1f} ms"
+
+
+class WindowModel(threading.Thread):
+    """
+    Event loop of nebulatk's native window (events, `after` timers, 1 ms sleep),
+    for measuring UI-thread behaviour without a display.
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.render_lock = threading.Lock()
+        self._events = queue.Queue()
+        self._timers = []
+        self._timers_lock = threading.Lock()
+        self._counter = itertools.count()
+        self._running = True
+
+    def after(self, ms, callback):
+        due = time.time() + max(0, int(ms)) / 1000.0
+        with self._timers_lock:
+            heapq.heappush(self._timers, (due, next(self._counter), callback))
+
+    def post_event(self, handler):
+        self._events.put((time.perf_counter(), handler))
+
+    def run(self):
+        while self._running:
+            while True:
+                try:
+                    posted, handler = self._events.get_nowait()
+                except queue.Empty:
+                    break
+                with self.render_lock:
+                    handler(time.perf_counter() - posted)
+            now = time.time()
+            ready = []
+            with self._timers_lock:
+                while self._timers and self._timers[0][0] <= now:
+                    ready.append(heapq.heappop(self._timers))
+            for _, _, callback in ready:
+                callback()
+            time.sleep(0.001)
+
+    def stop(self):
+        self._running = False
+        self.join()
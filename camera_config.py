@@ -0,0 +1,53 @@
+import json
+import re
+
+
+def camera_key(cam_cfg):
+    """Stable "ip|type" key that presets and thumbnails are stored under"""
+    ip = str(cam_cfg.get("ip", "")).strip()
+    camera_type = str(cam_cfg.get("type", "ptzoptics")).strip()
+    return f"{ip}|{camera_type}"
+
+
+def camera_folder_name(key):
+    """Folder under Images/ for a camera's preset snapshots"""
+    sanitized = re.sub(r"[^A-Za-z0-9._-]", "_", key)
+    return sanitized or "camera"
+
+
+def normalize_cameras(data):
+    """
+    Camera list from a parsed cameras.json document ({"cameras": [...]} or a
+    bare list). Entries without an IP are dropped.
+    """
+    if isinstance(data, dict):
+        cameras = data.get("cameras", [])
+    else:
+        cameras = data if isinstance(data, list) else []
+    if not isinstance(cameras, list):
+        return []
+    normalized = []
+    for cam in cameras:
+        if not isinstance(cam, dict):
+            continue
+        ip = cam.get("ip")
+        cam_type = cam.get("type") or cam.get("camera_type") or "ptzoptics"
+        stream_url = cam.get("stream_url")
+        capture = cam.get("capture")
+        if isinstance(ip, str) and ip.strip():
+            normalized_cam = {"ip": ip.strip(), "type": str(cam_type)}
+            if isinstance(stream_url, str) and stream_url.strip():
+                normalized_cam["stream_url"] = stream_url.strip()
+            if isinstance(capture, (str, dict)) and capture:
+                normalized_cam["capture"] = capture
+            normalized.append(normalized_cam)
+    return normalized
+
+
+def load_cameras(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return []
+    return normalize_cameras(data)
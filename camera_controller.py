@@ -1,16 +1,26 @@
+from startup import StartupTimer
+
+startup = StartupTimer()
+
 import nebulatk as ntk
 from controller import Camera
-from vcapture import vcapture
-from time import sleep, time
-from PIL import Image
-import multiprocessing
-import cv2
+from command_worker import CommandWorker
 import json
 import os
-import re
 import shutil
+import sys
+import threading
 import contextlib
-from camera_streams import stream_url_for_camera
+from warnings import warn
+from camera_config import camera_folder_name, camera_key, load_cameras
+from catalog import CATALOG_FILENAME, Catalog
+from camera_streams import start_capture, stream_url_for_camera
+from preset_store import DEFAULT_PRESET_NAMES, PRESET_SLOTS, PresetStore
+from render_loop import FrameRenderScheduler
+from thumbnails import ThumbnailCache
+
+# OpenCV, vcapture, preview, multiview and snapshots are imported where they are
+# first used, once the window is up, so they don't delay startup
 
 
 def close():
@@ -18,16 +28,35 @@ def close():
         with contextlib.suppress(Exception):
             _cap.release()
 
+    if _multiview_grid := globals().get("multiview_grid"):
+        for _tile_cap in _multiview_grid.close():
+            with contextlib.suppress(Exception):
+                _tile_cap.release(wait=False)
+
     if _ptz_cam := globals().get("ptz_cam"):
         with contextlib.suppress(Exception):
-            _ptz_cam.close()
-    cv2.destroyAllWindows()
+            _ptz_cam.close(timeout=1.0)
+
+    if _snapshots := globals().get("snapshots"):
+        with contextlib.suppress(Exception):
+            _snapshots.close()
+
+    # Write out preset changes still waiting for the debounce
+    if _preset_store := globals().get("preset_store"):
+        with contextlib.suppress(Exception):
+            _preset_store.close()
+    if cv2 := sys.modules.get("cv2"):
+        cv2.destroyAllWindows()
     quit()
 
 
 import atexit
-import win32api
-import win32con
+
+try:
+    import win32api
+    import win32con
+except ImportError:  # Not on Windows
+    win32api = win32con = None
 
 
 # (close, logoff, shutdown)
@@ -42,37 +71,44 @@ def console_ctrl_handler(event):
     return False
 
 
-# Register the save function to be called on normal program exit
-atexit.register(close)
+if __name__ == "__main__":
+    # Register the save function to be called on normal program exit
+    atexit.register(close)
 
-win32api.SetConsoleCtrlHandler(console_ctrl_handler, True)
+    if win32api is not None:
+        win32api.SetConsoleCtrlHandler(console_ctrl_handler, True)
+    startup.mark("imports")
 
-if __name__ == "__main__":
     APP_DIR = os.path.dirname(os.path.abspath(__file__))
     IMAGES_DIR = os.path.join(APP_DIR, "Images")
     PRESETS_JSON_PATH = os.path.join(APP_DIR, "presets.json")
-    DEFAULT_PRESET_NAMES = [
-        "Band",
-        "Speaker R",
-        "Speaker",
-        "Speaker L",
-        "Stage no Lyrics",
-        "Worship Leader",
-        "Wide Shot Left",
-        "Wide Shot Center",
-        "Wide Shot Right",
-    ]
-
+    CATALOG_PATH = os.path.join(APP_DIR, CATALOG_FILENAME)
     defaults_file = os.path.join(
         APP_DIR, "defaults_dark.py"
     )
     window = ntk.Window(
         width=300, height=600, closing_command=close, defaults_file=defaults_file
     ).place(y=30)
+    startup.mark("window")
 
     PAN_SPEED = 7
     TILT_SPEED = 7
 
+    # Multiview window size, tile frame rate and UI-thread time per render pass
+    MULTIVIEW_DEFAULTS = {
+        "width": 640,
+        "height": 360,
+        "columns": None,
+        "max_fps": 10,
+        "budget_ms": 8.0,
+    }
+    MULTIVIEW_MAX_TILES = 9
+    PRESET_BUTTON_SIZE = (100, 50)
+    # The main preview, its capture decodes straight to this size
+    PREVIEW_SIZE = (300, 150)
+    # Preset snapshot size (None keeps the camera's JPEG as is) and JPEG quality
+    SNAPSHOT_DEFAULTS = {"width": None, "height": None, "quality": 90}
+
     def _cameras_json_path():
         return os.path.join(APP_DIR, "cameras.json")
 
@@ -83,6 +119,15 @@ if __name__ == "__main__":
 
         Format:
           { "cameras": [ { "ip": "...", "type": "ptzoptics" }, ... ] }
+
+        Optional per camera: "stream_url" and "capture" (a vcapture backend name
+        such as "ffmpeg", or an object with "backend", "mode" ("process" or
+        "thread") plus backend options).
+
+        Optional top level "multiview": { "width", "height", "columns",
+        "max_fps", "budget_ms" } for the multiview window (see MULTIVIEW_DEFAULTS)
+        and "snapshots": { "width", "height", "quality" } for preset snapshots
+        (see SNAPSHOT_DEFAULTS).
         """
         path = _cameras_json_path()
         if os.path.exists(path):
@@ -93,93 +138,19 @@ if __name__ == "__main__":
                 json.dump(default, f, indent=2)
 
     def _load_cameras():
+        if catalog is not None:
+            return catalog.cameras()
         _ensure_cameras_json_exists()
-        path = _cameras_json_path()
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except Exception:
-            return []
-
-        cameras = data.get("cameras", data if isinstance(data, list) else [])
-        if not isinstance(cameras, list):
-            return []
-        normalized = []
-        for cam in cameras:
-            if not isinstance(cam, dict):
-                continue
-            ip = cam.get("ip")
-            cam_type = cam.get("type") or cam.get("camera_type") or "ptzoptics"
-            stream_url = cam.get("stream_url")
-            if isinstance(ip, str) and ip.strip():
-                normalized_cam = {"ip": ip.strip(), "type": str(cam_type)}
-                if isinstance(stream_url, str) and stream_url.strip():
-                    normalized_cam["stream_url"] = stream_url.strip()
-                normalized.append(normalized_cam)
-        return normalized
-
-    def _camera_key(cam_cfg):
-        ip = str(cam_cfg.get("ip", "")).strip()
-        camera_type = str(cam_cfg.get("type", "ptzoptics")).strip()
-        return f"{ip}|{camera_type}"
-
-    def _camera_folder_name(camera_key):
-        sanitized = re.sub(r"[^A-Za-z0-9._-]", "_", camera_key)
-        return sanitized or "camera"
-
-    def _build_default_slots():
-        return {
-            str(index + 1): {"name": DEFAULT_PRESET_NAMES[index], "image_path": ""}
-            for index in range(9)
-        }
+        return load_cameras(_cameras_json_path())
 
-    def _normalize_slots(raw_slots):
-        normalized = _build_default_slots()
-        if isinstance(raw_slots, dict):
-            for index in range(1, 10):
-                raw_slot = raw_slots.get(str(index), {})
-                if not isinstance(raw_slot, dict):
-                    continue
-                raw_name = raw_slot.get("name")
-                raw_image = raw_slot.get("image_path")
-                if isinstance(raw_name, str) and raw_name.strip():
-                    normalized[str(index)]["name"] = raw_name.strip()
-                if isinstance(raw_image, str):
-                    normalized[str(index)]["image_path"] = raw_image.strip()
-        return normalized
-
-    def _load_presets_store():
-        default_store = {"version": 1, "cameras": {}}
-        if not os.path.exists(PRESETS_JSON_PATH):
-            return default_store
-        try:
-            with open(PRESETS_JSON_PATH, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except Exception:
-            return default_store
-        if not isinstance(data, dict):
-            return default_store
-        cameras_data = data.get("cameras")
-        if not isinstance(cameras_data, dict):
-            cameras_data = {}
-        normalized_cameras = {}
-        for key, payload in cameras_data.items():
-            if not isinstance(key, str) or not key:
-                continue
-            slots = payload.get("presets") if isinstance(payload, dict) else {}
-            normalized_cameras[key] = {"presets": _normalize_slots(slots)}
-        return {"version": 1, "cameras": normalized_cameras}
-
-    def _save_presets_store(store):
+    def _load_options(section, defaults):
+        options = dict(defaults)
         with contextlib.suppress(Exception):
-            with open(PRESETS_JSON_PATH, "w", encoding="utf-8") as f:
-                json.dump(store, f, indent=2)
-
-    def _ensure_camera_presets(store, camera_key):
-        cameras_data = store.setdefault("cameras", {})
-        camera_data = cameras_data.setdefault(camera_key, {})
-        camera_data["presets"] = _normalize_slots(camera_data.get("presets", {}))
-        return camera_data["presets"]
+            with open(_cameras_json_path(), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data.get(section), dict):
+                options.update(data[section])
+        return options
 
     def _camera_cfg_for_index(index):
         if isinstance(index, int) and 0 <= index < len(cameras):
@@ -189,6 +160,58 @@ if __name__ == "__main__":
     def _active_camera_cfg():
         return _camera_cfg_for_index(_active_index)
 
+    def _start_stream(cam_cfg):
+        """
+        Start the camera's capture on a background thread (importing OpenCV and
+        starting the capture process take a while), then show it in the preview.
+        A stream that finishes starting after another camera was selected is
+        released again.
+        """
+        global _stream_generation
+        _stream_generation += 1
+        generation = _stream_generation
+
+        def run():
+            try:
+                from vcapture import CHANGE_THRESHOLD
+
+                # hd rtsp stream 1, sd 2. Change detection lets the render loop
+                # skip repeats of the picture on screen
+                capture = start_capture(
+                    cam_cfg,
+                    output_size=PREVIEW_SIZE,
+                    change_threshold=CHANGE_THRESHOLD,
+                )
+            except Exception as e:
+                warn(f"[camera_controller] Failed to start stream: {e}")
+                return
+            startup.mark("stream started")
+            window.root.after(0, lambda: _show_stream(generation, capture))
+
+        threading.Thread(target=run, name="stream-start", daemon=True).start()
+
+    def _show_stream(generation, capture):
+        global cap, preview
+        if generation != _stream_generation or not window.is_alive():
+            with contextlib.suppress(Exception):
+                capture.release(wait=False)
+            return
+        cap = capture
+        if preview is None:
+            from preview import PreviewSurface
+
+            # One preallocated display buffer, every frame is blitted into it in place
+            preview_surface = PreviewSurface(frame_container, *PREVIEW_SIZE)
+
+            def _render(packet):
+                preview_surface.show(packet.frame)
+                startup.mark("first frame")
+
+            # Frames are rendered from the window's event loop when the capture
+            # publishes a new one, instead of polling from this thread
+            preview = FrameRenderScheduler(window.root.after, _render, max_fps=30)
+        preview.attach(cap)
+
     def _stored_to_abs_path(stored_path):
         if not isinstance(stored_path, str) or not stored_path.strip():
             return ""
@@ -197,69 +220,116 @@ if __name__ == "__main__":
             return value
         return os.path.join(APP_DIR, value)
 
-    def _save_current_frame_for_preset(slot_index):
-        frame = cap.current_frame
-        if frame is None:
-            return
-        active_camera_key = _camera_key(_active_camera_cfg())
-        folder = os.path.join(IMAGES_DIR, _camera_folder_name(active_camera_key))
+    def _request_preset_snapshot(active_camera_key, slot_index, frames):
+        folder = os.path.join(IMAGES_DIR, camera_folder_name(active_camera_key))
         with contextlib.suppress(Exception):
             os.makedirs(folder, exist_ok=True)
-        target_path = os.path.join(folder, f"{slot_index}.jpg")
-        try:
-            Image.fromarray(frame, "RGB").save(target_path, format="JPEG")
-        except Exception:
-            return
-        presets = _ensure_camera_presets(preset_store, active_camera_key)
-        presets[str(slot_index)]["image_path"] = os.path.relpath(target_path, APP_DIR)
-        _save_presets_store(preset_store)
+
+        def _snapshot_saved(target_path):
+            thumbnail_cache.invalidate(active_camera_key, slot_index)
+            preset_store.update_slot(
+                active_camera_key,
+                slot_index,
+                image_path=os.path.relpath(target_path, APP_DIR),
+            )
+            _refresh_preset_button(slot_index)
+
+        _snapshot_worker().request(
+            frames, os.path.join(folder, f"{slot_index}.jpg"), callback=_snapshot_saved
+        )
 
     def _migrate_legacy_images(store):
         if not cameras:
             return
-        first_camera_key = _camera_key(cameras[0])
-        first_presets = _ensure_camera_presets(store, first_camera_key)
-        target_folder = os.path.join(IMAGES_DIR, _camera_folder_name(first_camera_key))
+        first_camera_key = camera_key(cameras[0])
+        target_folder = os.path.join(IMAGES_DIR, camera_folder_name(first_camera_key))
         with contextlib.suppress(Exception):
             os.makedirs(target_folder, exist_ok=True)
-        migrated = False
-        for slot_index in range(1, 10):
+        for slot_index in range(1, PRESET_SLOTS + 1):
             legacy_path = os.path.join(IMAGES_DIR, f"{slot_index}.jpg")
             if not os.path.exists(legacy_path):
                 continue
             target_path = os.path.join(target_folder, f"{slot_index}.jpg")
             try:
                 shutil.copy2(legacy_path, target_path)
-                first_presets[str(slot_index)]["image_path"] = os.path.relpath(
-                    target_path, APP_DIR
+                store.update_slot(
+                    first_camera_key,
+                    slot_index,
+                    image_path=os.path.relpath(target_path, APP_DIR),
                 )
-                migrated = True
             except Exception:
                 continue
-        if migrated:
-            _save_presets_store(store)
 
+    # catalog.sqlite3 (see catalog.py) replaces cameras.json and presets.json
+    catalog = Catalog(CATALOG_PATH) if os.path.exists(CATALOG_PATH) else None
     cameras = _load_cameras()
 
+    def _start_command_worker(cam_cfg):
+        """
+        VISCA I/O for the camera runs on its own worker thread. Button commands
+        post to it and never wait on the camera from the UI thread.
+        """
+        return CommandWorker(
+            lambda: Camera(ip=cam_cfg["ip"], camera_type=cam_cfg["type"]),
+            after=window.root.after,
+            name=cam_cfg["ip"],
+        )
+
     # Initialize default camera (first from cameras.json if available, otherwise keep legacy default)
     if cameras:
         _active_index = 0
-        ptz_cam = Camera(ip=cameras[0]["ip"], camera_type=cameras[0]["type"])
+        ptz_cam = _start_command_worker(cameras[0])
         _active_rtsp_url = stream_url_for_camera(cameras[0])
     else:
         _active_index = None
-        ptz_cam = Camera(ip="192.168.0.126")
+        ptz_cam = _start_command_worker({"ip": "192.168.0.126", "type": "ptzoptics"})
         _active_rtsp_url = stream_url_for_camera(
             {"ip": "192.168.0.126", "type": "ptzoptics"}
         )
 
-    presets_file_exists = os.path.exists(PRESETS_JSON_PATH)
-    preset_store = _load_presets_store()
-    if not presets_file_exists:
+    def _camera_connected(future):
+        if not future.cancelled() and future.exception() is None:
+            startup.mark("camera connected")
+
+    # Connect to the camera and start its stream while the controls are built
+    ptz_cam.connect().add_done_callback(_camera_connected)
+    frame_container = ntk.Frame(window, width=300, height=150, style="surface").place(
+        0, 450
+    )
+    cap = None
+    preview = None
+    _stream_generation = 0
+    _start_stream(_active_camera_cfg())
+
+    # Edits are written to presets.json in the background, see PresetStore
+    preset_store = catalog or PresetStore(PRESETS_JSON_PATH)
+    if not preset_store.exists:
         _migrate_legacy_images(preset_store)
-    _ensure_camera_presets(preset_store, _camera_key(_active_camera_cfg()))
-    _save_presets_store(preset_store)
-    preset_buttons = [None] * 9
+    preset_store.presets(camera_key(_active_camera_cfg()))
+    preset_buttons = [None] * PRESET_SLOTS
+    # Decoded button images, switching cameras only reads the disk on first view
+    thumbnail_cache = ThumbnailCache(PRESET_BUTTON_SIZE, catalog=catalog)
+    # Preset snapshots are encoded and written on worker threads, started on first use
+    snapshots = None
+
+    def _snapshot_worker():
+        global snapshots
+        if snapshots is None:
+            from snapshots import SnapshotWorker
+
+            options = _load_options("snapshots", SNAPSHOT_DEFAULTS)
+            snapshots = SnapshotWorker(
+                after=window.root.after,
+                size=(
+                    (options["width"], options["height"])
+                    if options["width"] and options["height"]
+                    else None
+                ),
+                quality=options["quality"],
+                thumbnail_size=PRESET_BUTTON_SIZE,
+            )
+        return snapshots
+
     rename_prompt_widgets = {}
 
     def _refresh_preset_button(slot_index):
@@ -268,19 +338,15 @@ if __name__ == "__main__":
         button = preset_buttons[slot_index - 1]
         if button is None:
             return
-        camera_key = _camera_key(_active_camera_cfg())
-        presets = _ensure_camera_presets(preset_store, camera_key)
-        slot = presets[str(slot_index)]
+        active_camera_key = camera_key(_active_camera_cfg())
+        slot = preset_store.slot(active_camera_key, slot_index)
         button.text = slot["name"]
         image_path = _stored_to_abs_path(slot.get("image_path", ""))
-        button.image = image_path if image_path and os.path.exists(image_path) else None
+        button.image = thumbnail_cache.get(active_camera_key, slot_index, image_path)
         button.update()
 
     def _refresh_preset_buttons():
-        camera_key = _camera_key(_active_camera_cfg())
-        _ensure_camera_presets(preset_store, camera_key)
-        _save_presets_store(preset_store)
-        for slot_index in range(1, 10):
+        for slot_index in range(1, PRESET_SLOTS + 1):
             _refresh_preset_button(slot_index)
 
     def _close_rename_prompt():
@@ -292,9 +358,8 @@ if __name__ == "__main__":
 
     def _show_rename_prompt(slot_index):
         _close_rename_prompt()
-        camera_key = _camera_key(_active_camera_cfg())
-        presets = _ensure_camera_presets(preset_store, camera_key)
-        current_name = presets[str(slot_index)]["name"]
+        active_camera_key = camera_key(_active_camera_cfg())
+        current_name = preset_store.slot(active_camera_key, slot_index)["name"]
 
         panel = ntk.Frame(window, width=280, height=100, style="settings_panel").place(10, 345)
         title = ntk.Label(
@@ -316,8 +381,7 @@ if __name__ == "__main__":
         def save_name():
             new_name = entry.get().strip()
             if new_name:
-                presets[str(slot_index)]["name"] = new_name
-                _save_presets_store(preset_store)
+                preset_store.update_slot(active_camera_key, slot_index, name=new_name)
                 _refresh_preset_button(slot_index)
             _close_rename_prompt()
 
@@ -354,7 +418,7 @@ if __name__ == "__main__":
         If the camera doesn't exist in cameras.json, do nothing.
         Ensures the RTSP feed is stopped and restarted, and ptz_cam is replaced.
         """
-        global cameras, ptz_cam, cap, _active_index, _active_rtsp_url
+        global cameras, ptz_cam, cap, preview, _active_index, _active_rtsp_url
 
         if not isinstance(index, int) or index < 0:
             return
@@ -364,26 +428,27 @@ if __name__ == "__main__":
             return
 
         cam_cfg = cameras[index]
-        new_ip = cam_cfg["ip"]
-        new_type = cam_cfg["type"]
 
-        # Stop old RTSP feed first (so the while-loop stops using it promptly)
+        # Stop old RTSP feed first (so the preview stops using it promptly).
+        # Shutdown finishes in the background within cap.release_budget.
         if cap:
             with contextlib.suppress(Exception):
-                cap.release()
+                cap.release(wait=False)
 
-        # Close old camera socket
+        # Close old camera socket once its queued commands (such as a stop) ran
         if ptz_cam:
             with contextlib.suppress(Exception):
-                ptz_cam.close()
+                ptz_cam.close(wait=False)
 
-        # Swap PTZ camera object
-        ptz_cam = Camera(ip=new_ip, camera_type=new_type)
+        # Swap PTZ camera worker
+        ptz_cam = _start_command_worker(cam_cfg)
 
         # Start new feed URL (RTSP by default, synthetic stream for testcamera)
         _active_rtsp_url = stream_url_for_camera(cam_cfg)
-        cap = vcapture(_active_rtsp_url)
-        cap.start()
+        cap = None
+        if preview is not None:
+            preview.detach()
+        _start_stream(cam_cfg)
 
         _active_index = index
         _close_rename_prompt()
@@ -406,8 +471,10 @@ if __name__ == "__main__":
         height=50,
         width=50,
         style="button_neutral",
-        command=lambda: ptz_cam.pan_left(PAN_SPEED, TILT_SPEED),
-        command_off=lambda: ptz_cam.pan_stop(),
+        command=lambda: ptz_cam.post(
+            "pan_left", PAN_SPEED, TILT_SPEED, channel="pan_tilt"
+        ),
+        command_off=lambda: ptz_cam.post("pan_stop", channel="pan_tilt"),
     ).place(75, 100)
     right_btn = ntk.Button(
         window,
@@ -415,8 +482,10 @@ if __name__ == "__main__":
         height=50,
         width=50,
         style="button_neutral",
-        command=lambda: ptz_cam.pan_right(PAN_SPEED, TILT_SPEED),
-        command_off=lambda: ptz_cam.pan_stop(),
+        command=lambda: ptz_cam.post(
+            "pan_right", PAN_SPEED, TILT_SPEED, channel="pan_tilt"
+        ),
+        command_off=lambda: ptz_cam.post("pan_stop", channel="pan_tilt"),
     ).place(175, 100)
 
     left_btn = ntk.Button(
@@ -425,8 +494,10 @@ if __name__ == "__main__":
         height=50,
         width=50,
         style="button_neutral",
-        command=lambda: ptz_cam.pan_left(PAN_SPEED * 2, TILT_SPEED * 2),
-        command_off=lambda: ptz_cam.pan_stop(),
+        command=lambda: ptz_cam.post(
+            "pan_left", PAN_SPEED * 2, TILT_SPEED * 2, channel="pan_tilt"
+        ),
+        command_off=lambda: ptz_cam.post("pan_stop", channel="pan_tilt"),
     ).place(25, 100)
     right_btn = ntk.Button(
         window,
@@ -434,8 +505,10 @@ if __name__ == "__main__":
         height=50,
         width=50,
         style="button_neutral",
-        command=lambda: ptz_cam.pan_right(PAN_SPEED * 2, TILT_SPEED * 2),
-        command_off=lambda: ptz_cam.pan_stop(),
+        command=lambda: ptz_cam.post(
+            "pan_right", PAN_SPEED * 2, TILT_SPEED * 2, channel="pan_tilt"
+        ),
+        command_off=lambda: ptz_cam.post("pan_stop", channel="pan_tilt"),
     ).place(225, 100)
 
     up_btn = ntk.Button(
@@ -444,8 +517,10 @@ if __name__ == "__main__":
         height=50,
         width=50,
         style="button_neutral",
-        command=lambda: ptz_cam.pan_up(PAN_SPEED, TILT_SPEED),
-        command_off=lambda: ptz_cam.pan_stop(),
+        command=lambda: ptz_cam.post(
+            "pan_up", PAN_SPEED, TILT_SPEED, channel="pan_tilt"
+        ),
+        command_off=lambda: ptz_cam.post("pan_stop", channel="pan_tilt"),
     ).place(125, 50)
     down_btn = ntk.Button(
         window,
@@ -453,8 +528,10 @@ if __name__ == "__main__":
         height=50,
         width=50,
         style="button_neutral",
-        command=lambda: ptz_cam.pan_down(PAN_SPEED, TILT_SPEED),
-        command_off=lambda: ptz_cam.pan_stop(),
+        command=lambda: ptz_cam.post(
+            "pan_down", PAN_SPEED, TILT_SPEED, channel="pan_tilt"
+        ),
+        command_off=lambda: ptz_cam.post("pan_stop", channel="pan_tilt"),
     ).place(125, 150)
 
     up_left_btn = ntk.Button(
@@ -463,8 +540,10 @@ if __name__ == "__main__":
         height=50,
         width=50,
         style="button_neutral",
-        command=lambda: ptz_cam.pan_up_left(PAN_SPEED, TILT_SPEED),
-        command_off=lambda: ptz_cam.pan_stop(),
+        command=lambda: ptz_cam.post(
+            "pan_up_left", PAN_SPEED, TILT_SPEED, channel="pan_tilt"
+        ),
+        command_off=lambda: ptz_cam.post("pan_stop", channel="pan_tilt"),
     ).place(75, 50)
     up_right_btn = ntk.Button(
         window,
@@ -472,8 +551,10 @@ if __name__ == "__main__":
         height=50,
         width=50,
         style="button_neutral",
-        command=lambda: ptz_cam.pan_up_right(PAN_SPEED, TILT_SPEED),
-        command_off=lambda: ptz_cam.pan_stop(),
+        command=lambda: ptz_cam.post(
+            "pan_up_right", PAN_SPEED, TILT_SPEED, channel="pan_tilt"
+        ),
+        command_off=lambda: ptz_cam.post("pan_stop", channel="pan_tilt"),
     ).place(175, 50)
 
     down_left_btn = ntk.Button(
@@ -482,8 +563,10 @@ if __name__ == "__main__":
         height=50,
         width=50,
         style="button_neutral",
-        command=lambda: ptz_cam.pan_down_left(PAN_SPEED, TILT_SPEED),
-        command_off=lambda: ptz_cam.pan_stop(),
+        command=lambda: ptz_cam.post(
+            "pan_down_left", PAN_SPEED, TILT_SPEED, channel="pan_tilt"
+        ),
+        command_off=lambda: ptz_cam.post("pan_stop", channel="pan_tilt"),
     ).place(75, 150)
     down_right_btn = ntk.Button(
         window,
@@ -491,8 +574,10 @@ if __name__ == "__main__":
         height=50,
         width=50,
         style="button_neutral",
-        command=lambda: ptz_cam.pan_down_right(PAN_SPEED, TILT_SPEED),
-        command_off=lambda: ptz_cam.pan_stop(),
+        command=lambda: ptz_cam.post(
+            "pan_down_right", PAN_SPEED, TILT_SPEED, channel="pan_tilt"
+        ),
+        command_off=lambda: ptz_cam.post("pan_stop", channel="pan_tilt"),
     ).place(175, 150)
 
     zoom_in_btn = ntk.Button(
@@ -501,8 +586,8 @@ if __name__ == "__main__":
         height=50,
         width=50,
         style="button_neutral",
-        command=lambda: ptz_cam.zoom("tele"),
-        command_off=lambda: ptz_cam.zoom_stop(),
+        command=lambda: ptz_cam.post("zoom", "tele", channel="zoom"),
+        command_off=lambda: ptz_cam.post("zoom_stop", channel="zoom"),
     ).place(25, 210)
     zoom_out_btn = ntk.Button(
         window,
@@ -510,8 +595,8 @@ if __name__ == "__main__":
         height=50,
         width=50,
         style="button_neutral",
-        command=lambda: ptz_cam.zoom("wide"),
-        command_off=lambda: ptz_cam.zoom_stop(),
+        command=lambda: ptz_cam.post("zoom", "wide", channel="zoom"),
+        command_off=lambda: ptz_cam.post("zoom_stop", channel="zoom"),
     ).place(75, 210)
     zoom_lbl = ntk.Label(
         window, text="Zoom", height=15, width=50, style="label_transparent"
@@ -523,8 +608,8 @@ if __name__ == "__main__":
         height=50,
         width=50,
         style="button_neutral",
-        command=lambda: ptz_cam.focus("far"),
-        command_off=lambda: ptz_cam.focus_stop(),
+        command=lambda: ptz_cam.post("focus", "far", channel="focus"),
+        command_off=lambda: ptz_cam.post("focus_stop", channel="focus"),
     ).place(175, 210)
     focus_out_btn = ntk.Button(
         window,
@@ -532,8 +617,8 @@ if __name__ == "__main__":
         height=50,
         width=50,
         style="button_neutral",
-        command=lambda: ptz_cam.focus("near"),
-        command_off=lambda: ptz_cam.focus_stop(),
+        command=lambda: ptz_cam.post("focus", "near", channel="focus"),
+        command_off=lambda: ptz_cam.post("focus_stop", channel="focus"),
     ).place(225, 210)
     focus_lbl = ntk.Label(
         window, text="Focus", height=15, width=50, style="label_transparent"
@@ -547,9 +632,9 @@ if __name__ == "__main__":
 
     def toggle_focus():
         if not af_btn.state:
-            ptz_cam.focus_mode("manual")
+            ptz_cam.post("focus_mode", "manual", channel="focus_mode")
         else:
-            ptz_cam.focus_mode("auto")
+            ptz_cam.post("focus_mode", "auto", channel="focus_mode")
 
     af_btn = ntk.Button(
         window,
@@ -560,18 +645,36 @@ if __name__ == "__main__":
         style="button_accent",
         command=toggle_focus,
     ).place(225, 275)
-    if int(ptz_cam.inquire(ptz_cam.commands["inq"]["focus_mode"])[0]) == 2:
-        ntk.standard_methods.toggle_object_toggle(af_btn)
+
+    def _show_focus_mode(focus_mode):
+        if int(focus_mode[0]) == 2 and not af_btn.state:
+            ntk.standard_methods.toggle_object_toggle(af_btn)
+
+    ptz_cam.submit(
+        lambda camera: camera.inquire(camera.commands["inq"]["focus_mode"]),
+        callback=_show_focus_mode,
+    )
 
     def set_recall(index):
         if set_btn.state:
-            ptz_cam.preset_set(index)
-            _save_current_frame_for_preset(index)
-            _refresh_preset_button(index)
+            snapshot_capture = cap
+            active_camera_key = camera_key(_active_camera_cfg())
+
+            def _store_preset(camera):
+                camera.preset_set(index)
+                # Frames published from here on show the stored position
+                if snapshot_capture is not None:
+                    return snapshot_capture.subscribe("latest")
+
+            def _preset_stored(frames):
+                if frames is not None:
+                    _request_preset_snapshot(active_camera_key, index, frames)
+
+            ptz_cam.submit(_store_preset, callback=_preset_stored)
             ntk.standard_methods.toggle_object_toggle(set_btn)
             _show_rename_prompt(index)
         else:
-            ptz_cam.preset_recall(index)
+            ptz_cam.post("preset_recall", index, channel="preset_recall")
 
     for i in range(9):
         y = 250 + 50 * ((i + 3) // 3)
@@ -580,8 +683,8 @@ if __name__ == "__main__":
         button_kwargs = {
             "text_color": "default",
             "font": "default",
-            "height": 50,
-            "width": 100,
+            "height": PRESET_BUTTON_SIZE[1],
+            "width": PRESET_BUTTON_SIZE[0],
             "command": lambda i=i: set_recall(i + 1),
         }
         preset_button = ntk.Button(
@@ -593,31 +696,110 @@ if __name__ == "__main__":
 
     _refresh_preset_buttons()
 
-    frame_container = ntk.Frame(window, width=300, height=150, style="surface").place(
-        0, 450
-    )
+    # Multiview: every camera in a tile of a separate window, click to switch
+    multiview_window = None
+    multiview_grid = None
+
+    def _close_multiview():
+        global multiview_window, multiview_grid
+        grid, multiview_grid = multiview_grid, None
+        multiview_window = None
+        if grid is not None:
+            for tile_cap in grid.close():
+                with contextlib.suppress(Exception):
+                    tile_cap.release(wait=False)
+        if multiview_btn.state:
+            window.root.after(
+                0, lambda: ntk.standard_methods.toggle_object_toggle(multiview_btn)
+            )
+
+    def _open_multiview():
+        global multiview_window, multiview_grid
+        from multiview import MultiviewGrid, grid_layout
+
+        options = _load_options("multiview", MULTIVIEW_DEFAULTS)
+        tile_cameras = cameras[:MULTIVIEW_MAX_TILES]
+        if not tile_cameras:
+            return
+        layout = grid_layout(
+            len(tile_cameras), options["width"], options["height"], options["columns"]
+        )
+        tile_size = layout[0][2:]
+        multiview_window = ntk.Window(
+            width=options["width"],
+            height=options["height"],
+            title="Multiview",
+            closing_command=_close_multiview,
+            defaults_file=defaults_file,
+        )
+        tiles = [
+            ntk.Button(
+                multiview_window,
+                width=tile_width,
+                height=tile_height,
+                style="surface",
+                # Tiles live on the multiview window's thread, switch on the main one
+                command=lambda i=i: window.root.after(0, lambda: switch_camera(i)),
+            ).place(x, y)
+            for i, (x, y, tile_width, tile_height) in enumerate(layout)
+        ]
+        multiview_grid = MultiviewGrid(
+            multiview_window.root.after,
+            tiles,
+            tile_size,
+            budget_ms=options["budget_ms"],
+            max_fps=options["max_fps"],
+        )
+        grid = multiview_grid
+
+        def start_tile(index, cam_cfg):
+            # Opening a stream can block for seconds, start each tile off the UI
+            # thread as _start_stream does, and drop it if multiview was closed
+            try:
+                from vcapture import CHANGE_THRESHOLD
 
-    count = 0
-    cap = vcapture(_active_rtsp_url)  # hd rtsp stream 1, sd 2
-    cap.start()
-    img = ntk.image_manager.Image(_object=frame_container, image=None)
-
-    while True:
-        try:
-            frame_time1 = time()
-            frame = cap.current_frame
-            frame_time2 = time()
-            # sleep(1/30)
-            sleep(1 / 30)
-            if frame is not None:
-                # cv2.imshow('frame',frame)
-                im = Image.fromarray(frame, "RGB")
-                # print(im.size)
-                img = ntk.image_manager.Image(image=im)
-                img.resize(width=300, height=150)
-                frame_container.image = img
-                frame_container.update()
-
-            frame_time3 = time()
-        except KeyboardInterrupt:
-            close()
+                capture = start_capture(
+                    cam_cfg,
+                    output_size=tile_size,
+                    max_fps=options["max_fps"],
+                    change_threshold=CHANGE_THRESHOLD,
+                )
+            except Exception as e:
+                warn(f"[camera_controller] Failed to start multiview tile: {e}")
+                return
+            if multiview_grid is grid:
+                grid.attach(index, capture)
+                if multiview_grid is grid:
+                    return
+                grid.detach(index)
+            with contextlib.suppress(Exception):
+                capture.release(wait=False)
+
+        for i, cam_cfg in enumerate(tile_cameras):
+            threading.Thread(
+                target=start_tile, args=(i, cam_cfg), name="multiview-start", daemon=True
+            ).start()
+
+    def toggle_multiview():
+        if multiview_btn.state:
+            _open_multiview()
+        elif multiview_window is not None:
+            # Quit its event loop without waiting here, _close_multiview runs after
+            multiview_window.root.after(0, multiview_window.root.quit)
+
+    multiview_btn = ntk.Button(
+        window,
+        text="Multiview",
+        mode="toggle",
+        height=25,
+        width=75,
+        style="button_accent",
+        command=toggle_multiview,
+    ).place(112, 275)
+    startup.mark("ui ready")
+
+    try:
+        while window.is_alive():
+            window.join(timeout=0.5)
+    except KeyboardInterrupt:
+        close()
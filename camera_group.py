@@ -0,0 +1,120 @@
+import contextlib
+import time
+from concurrent.futures import wait
+
+from camera_config import camera_key
+from command_worker import CommandWorker
+
+COMPLETED = "Command Completed"
+
+
+def _connect_camera(cam_cfg):
+    from controller import Camera
+
+    return Camera(ip=cam_cfg["ip"], camera_type=cam_cfg["type"])
+
+
+def run_command(camera, method, args):
+    """
+    Call the Camera method `method`, or send the camera type's VISCA command of
+    that name (tally_light, wb_auto, ...) when Camera has no such method
+    """
+    fn = getattr(camera, method, None)
+    if callable(fn):
+        return fn(*args)
+    if method not in camera.commands:
+        raise AttributeError(f"Camera has no method or command {method!r}")
+    return camera.run(camera.build_command(method, *args))
+
+
+class CameraGroup:
+    """
+    Sends commands to several cameras at once and waits for all of them.
+
+    Every camera has its own CommandWorker, so the cameras work in parallel
+    and a call takes as long as the slowest camera rather than the sum of all.
+    A command is a Camera method (preset_recall, on, zoom, ...) or any VISCA
+    command of the camera type (tally_light, wb_auto, wb_indoor, ...).
+
+    Results are {camera key: {"ok": True, "result": "Command Completed"}} or
+    {"ok": False, "error": "..."} for each camera. Any other completion (an
+    error reply, no reply, a command still running at the camera's timeout)
+    is a failure.
+    """
+
+    def __init__(self, workers):
+        # {camera key: CommandWorker}, in group order
+        self.workers = dict(workers)
+        self._owned = []
+
+    @classmethod
+    def from_cameras(cls, cameras, connect=_connect_camera):
+        """Group with its own workers (connecting now) for cameras.json entries"""
+        workers = {}
+        for cam in cameras:
+            worker = CommandWorker(lambda cam=cam: connect(cam), name=cam["ip"])
+            worker.connect()
+            workers[camera_key(cam)] = worker
+        group = cls(workers)
+        group._owned = list(workers.values())
+        return group
+
+    @property
+    def keys(self):
+        return list(self.workers)
+
+    def call(self, method, *args, cameras=None, timeout=10.0):
+        """
+        Run `method(*args)` on every camera (or the keys in `cameras`) at the
+        same time, returns the results once all are done or `timeout` passed.
+        """
+        keys = self.keys if cameras is None else list(cameras)
+        return self.call_each({key: (method, *args) for key in keys}, timeout)
+
+    def call_each(self, calls, timeout=10.0):
+        """
+        Run a different call per camera, `calls` is {camera key: (method, *args)}.
+        All calls share one deadline of `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        futures = {}
+        for key, (method, *args) in calls.items():
+            if key not in self.workers:
+                raise KeyError(f"Unknown camera {key!r}")
+            futures[key] = self.workers[key].submit(run_command, method, args)
+        wait(futures.values(), timeout=max(0.0, deadline - time.monotonic()))
+
+        results = {}
+        for key, future in futures.items():
+            if not future.done():
+                # Calls still queued behind earlier work are dropped
+                future.cancel()
+                results[key] = {"ok": False, "error": "Camera timed out"}
+            elif future.cancelled():
+                results[key] = {"ok": False, "error": "Cancelled"}
+            elif future.exception() is not None:
+                error = future.exception()
+                results[key] = {
+                    "ok": False,
+                    "error": f"{type(error).__name__}: {error}",
+                }
+            elif future.result() != COMPLETED:
+                reply = future.result() or "no completion"
+                results[key] = {"ok": False, "error": f"Camera replied {reply}"}
+            else:
+                results[key] = {"ok": True, "result": COMPLETED}
+        return results
+
+    def preset_recall(self, preset, cameras=None, timeout=10.0):
+        """Recall the same preset on every camera, or {key: preset} per camera"""
+        if isinstance(preset, dict):
+            calls = {key: ("preset_recall", slot) for key, slot in preset.items()}
+            return self.call_each(calls, timeout)
+        return self.call("preset_recall", preset, cameras=cameras, timeout=timeout)
+
+    def close(self):
+        """Close the workers created by from_cameras"""
+        for worker in self._owned:
+            with contextlib.suppress(Exception):
+                worker.close(timeout=1.0)
+        self._owned = []
@@ -1,6 +1,13 @@
 TESTCAMERA_DEFAULT_STREAM_URL = "http://127.0.0.1:8765/stream.mjpg"
 
 
+def is_mjpeg_url(url):
+    path = str(url).split("?", 1)[0].lower()
+    return path.startswith(("http://", "https://")) and path.endswith(
+        (".mjpg", ".mjpeg")
+    )
+
+
 def stream_url_for_camera(cam_cfg):
     """
     Resolve stream URL with backward-compatible defaults.
@@ -15,3 +22,43 @@ def stream_url_for_camera(cam_cfg):
 
     ip = str(cam_cfg.get("ip", "")).strip()
     return f"rtsp://{ip}:554/2"
+
+
+def capture_options_for_camera(cam_cfg):
+    """
+    Resolve the vcapture backend and its options for a camera.
+
+    cameras.json accepts either a backend name or an options object:
+      "capture": "ffmpeg"
+      "capture": { "backend": "ffmpeg", "rtsp_transport": "udp", "threads": 2 }
+    Without a configured backend, HTTP MJPEG streams (such as the test camera's)
+    use the "mjpeg" passthrough reader and everything else uses "opencv".
+    Returns (backend, options).
+    """
+    default_backend = (
+        "mjpeg" if is_mjpeg_url(stream_url_for_camera(cam_cfg)) else "opencv"
+    )
+    capture = cam_cfg.get("capture")
+    if isinstance(capture, str) and capture.strip():
+        return capture.strip().lower(), {}
+    if isinstance(capture, dict):
+        options = dict(capture)
+        backend = str(options.pop("backend", "")).strip().lower() or default_backend
+        return backend, options
+    return default_backend, {}
+
+
+def start_capture(cam_cfg, **loop_options):
+    """
+    Start a vcapture for the camera, `loop_options` such as output_size and
+    max_fps are passed to the capture loop. vcapture (and OpenCV) are imported
+    on first use.
+    """
+    from vcapture import vcapture
+
+    backend, options = capture_options_for_camera(cam_cfg)
+    options.update(loop_options)
+    mode = options.pop("mode", "process")
+    capture = vcapture(stream_url_for_camera(cam_cfg), backend, options, mode=mode)
+    capture.start()
+    return capture
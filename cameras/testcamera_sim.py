@@ -1,3 +1,4 @@
+import heapq
 import json
 import threading
 import time
@@ -572,32 +573,104 @@ def ensure_server():
 
 
 class SimulatedViscaSocket:
-    def __init__(self, ip, port):
+    """
+    In-process stand-in for the camera's VISCA socket.
+
+    By default every command gets its completion as the single reply. With
+    `split_replies` a command gets an ACK first and its completion as a
+    separate reply `completion_delay` seconds later, as real cameras do.
+    Commands sent while both command buffers are busy get a buffer full error.
+    """
+
+    def __init__(self, ip, port, split_replies=False, completion_delay=0.0):
         ensure_server()
         self.ip = ip
         self.port = port
+        self.split_replies = split_replies
+        self.completion_delay = completion_delay
         self._closed = False
         self._pending_reply = "9051ff"
         self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._replies = []  # heap of (ready_at, order, reply) in split mode
+        self._order = 0
+        self._busy = {}  # command buffer -> time its command completes
+        self._timeout = None
 
     def connect(self, address):
         self.ip, self.port = address
 
+    def settimeout(self, timeout):
+        self._timeout = timeout
+
+    def gettimeout(self):
+        return self._timeout
+
+    def setblocking(self, flag):
+        self._timeout = None if flag else 0.0
+
     def send(self, data):
         if self._closed:
             raise OSError("Socket is closed")
         command_hex = data.hex()
+        if self.split_replies:
+            self._send_split(command_hex.lower())
+            return
         reply = apply_visca_command(command_hex)
         with self._lock:
             self._pending_reply = reply
 
+    def _send_split(self, command):
+        if not command:
+            return
+        if command in INQUIRY_REPLIES:
+            self._queue(apply_visca_command(command), time.monotonic())
+            return
+        now = time.monotonic()
+        with self._lock:
+            free = [n for n in (1, 2) if self._busy.get(n, 0.0) <= now]
+            if free:
+                self._busy[free[0]] = now + self.completion_delay
+        if not free:
+            self._queue("906003ff", now)
+            return
+        apply_visca_command(command)
+        self._queue(f"904{free[0]}ff", now)
+        self._queue(f"905{free[0]}ff", now + self.completion_delay)
+
+    def _queue(self, reply, ready_at):
+        with self._ready:
+            heapq.heappush(self._replies, (ready_at, self._order, reply))
+            self._order += 1
+            self._ready.notify_all()
+
     def recv(self, _size):
         if self._closed:
             raise OSError("Socket is closed")
+        if self.split_replies:
+            return bytes.fromhex(self._recv_split())
         with self._lock:
             reply = self._pending_reply
             self._pending_reply = "9051ff"
         return bytes.fromhex(reply)
 
+    def _recv_split(self):
+        timeout = self._timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._ready:
+            while True:
+                now = time.monotonic()
+                if self._replies and self._replies[0][0] <= now:
+                    return heapq.heappop(self._replies)[2]
+                if deadline is not None and now >= deadline:
+                    if timeout == 0:
+                        raise BlockingIOError("No reply ready")
+                    raise TimeoutError("timed out")
+                wait = None if deadline is None else deadline - now
+                if self._replies:
+                    ready_in = self._replies[0][0] - now
+                    wait = ready_in if wait is None else min(wait, ready_in)
+                self._ready.wait(wait)
+
     def close(self):
         self._closed = True
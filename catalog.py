@@ -0,0 +1,240 @@
+"""
+SQLite catalog of cameras, presets and preset thumbnails.
+
+An optional replacement for cameras.json and presets.json for venues with many
+cameras and presets. Lookups go through the primary keys (camera key, slot),
+so startup only reads the camera list and the active camera's presets no
+matter how large the catalog grows. Presets cover every VISCA slot (0-127).
+
+Create or update the catalog from the JSON files with:
+    python catalog.py [cameras.json] [presets.json] [catalog.sqlite3]
+camera_controller uses the catalog instead of the JSON files when
+catalog.sqlite3 exists next to it.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+from camera_config import camera_key, load_cameras
+from preset_store import DEFAULT_PRESET_NAMES, PRESET_SLOTS, load_presets
+
+CATALOG_FILENAME = "catalog.sqlite3"
+VISCA_PRESET_SLOTS = range(0, 128)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cameras (
+    key TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    ip TEXT NOT NULL,
+    type TEXT NOT NULL,
+    stream_url TEXT,
+    capture TEXT
+);
+CREATE INDEX IF NOT EXISTS cameras_position ON cameras (position);
+CREATE TABLE IF NOT EXISTS presets (
+    camera_key TEXT NOT NULL,
+    slot INTEGER NOT NULL CHECK (slot BETWEEN 0 AND 127),
+    name TEXT NOT NULL,
+    image_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (camera_key, slot)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS thumbnails (
+    camera_key TEXT NOT NULL,
+    slot INTEGER NOT NULL CHECK (slot BETWEEN 0 AND 127),
+    path TEXT NOT NULL,
+    source_mtime REAL NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    PRIMARY KEY (camera_key, slot)
+) WITHOUT ROWID;
+"""
+
+
+def default_preset_name(slot_index):
+    if 1 <= slot_index <= PRESET_SLOTS:
+        return DEFAULT_PRESET_NAMES[slot_index - 1]
+    return f"Preset {slot_index}"
+
+
+def _check_slot(slot_index):
+    slot_index = int(slot_index)
+    if slot_index not in VISCA_PRESET_SLOTS:
+        raise ValueError(f"Preset slot {slot_index} is outside 0-127")
+    return slot_index
+
+
+class Catalog:
+    """
+    Cameras, presets and thumbnails in one SQLite file.
+
+    Offers the same preset interface as PresetStore (presets, slot, update_slot,
+    flush, close). Every change is its own committed transaction, so there is
+    nothing to debounce and nothing is lost on a crash.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.exists = os.path.exists(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    # Cameras
+
+    def cameras(self):
+        """Camera configs in button order, like camera_config.load_cameras"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ip, type, stream_url, capture FROM cameras ORDER BY position"
+            ).fetchall()
+        cameras = []
+        for row in rows:
+            cam = {"ip": row["ip"], "type": row["type"]}
+            if row["stream_url"]:
+                cam["stream_url"] = row["stream_url"]
+            if row["capture"]:
+                cam["capture"] = json.loads(row["capture"])
+            cameras.append(cam)
+        return cameras
+
+    def set_cameras(self, cameras):
+        """Replace the camera list, presets of removed cameras are kept"""
+        rows = [
+            (
+                camera_key(cam),
+                position,
+                cam["ip"],
+                cam["type"],
+                cam.get("stream_url"),
+                json.dumps(cam["capture"]) if cam.get("capture") else None,
+            )
+            for position, cam in enumerate(cameras)
+        ]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cameras")
+            self._conn.executemany(
+                "INSERT INTO cameras VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+
+    # Presets, same interface as PresetStore
+
+    def presets(self, camera_key):
+        """Slots {"1": {"name", "image_path"}, ...}: the 9 button slots plus any stored ones"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT slot, name, image_path FROM presets WHERE camera_key = ?",
+                (camera_key,),
+            ).fetchall()
+        slots = {
+            str(index): {"name": default_preset_name(index), "image_path": ""}
+            for index in range(1, PRESET_SLOTS + 1)
+        }
+        for row in rows:
+            slots[str(row["slot"])] = {
+                "name": row["name"],
+                "image_path": row["image_path"],
+            }
+        return slots
+
+    def slot(self, camera_key, slot_index):
+        slot_index = _check_slot(slot_index)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, image_path FROM presets WHERE camera_key = ? AND slot = ?",
+                (camera_key, slot_index),
+            ).fetchone()
+        if row is None:
+            return {"name": default_preset_name(slot_index), "image_path": ""}
+        return {"name": row["name"], "image_path": row["image_path"]}
+
+    def update_slot(self, camera_key, slot_index, **fields):
+        """Change slot fields such as name or image_path"""
+        unknown = set(fields) - {"name", "image_path"}
+        if unknown:
+            raise ValueError(f"Unknown preset fields {sorted(unknown)}")
+        slot = {**self.slot(camera_key, slot_index), **fields}
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO presets VALUES (?, ?, ?, ?)",
+                (camera_key, _check_slot(slot_index), slot["name"], slot["image_path"]),
+            )
+
+    @property
+    def dirty(self):
+        return False
+
+    def flush(self):
+        pass
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # Thumbnails
+
+    def thumbnail(self, camera_key, slot_index):
+        """(path, source_mtime, width, height) of the slot's thumbnail, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, source_mtime, width, height FROM thumbnails "
+                "WHERE camera_key = ? AND slot = ?",
+                (camera_key, _check_slot(slot_index)),
+            ).fetchone()
+        return tuple(row) if row is not None else None
+
+    def set_thumbnail(self, camera_key, slot_index, path, source_mtime, width, height):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO thumbnails VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    camera_key,
+                    _check_slot(slot_index),
+                    path,
+                    source_mtime,
+                    width,
+                    height,
+                ),
+            )
+
+    # Migration
+
+    def import_json(self, cameras_json_path, presets_json_path):
+        """
+        Load cameras.json and presets.json into the catalog. Existing presets are
+        overwritten by the JSON ones, other catalog presets are kept.
+        """
+        cameras = load_cameras(cameras_json_path)
+        if cameras:
+            self.set_cameras(cameras)
+        rows = [
+            (key, int(slot_index), slot["name"], slot["image_path"])
+            for key, payload in load_presets(presets_json_path)["cameras"].items()
+            for slot_index, slot in payload["presets"].items()
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO presets VALUES (?, ?, ?, ?)", rows
+            )
+        return len(cameras), len(rows)
+
+
+def main(argv):
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    cameras_json = argv[1] if len(argv) > 1 else os.path.join(app_dir, "cameras.json")
+    presets_json = argv[2] if len(argv) > 2 else os.path.join(app_dir, "presets.json")
+    catalog_path = argv[3] if len(argv) > 3 else os.path.join(app_dir, CATALOG_FILENAME)
+    catalog = Catalog(catalog_path)
+    cameras, presets = catalog.import_json(cameras_json, presets_json)
+    catalog.close()
+    print(f"Imported {cameras} cameras and {presets} presets into {catalog_path}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
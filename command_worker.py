@@ -0,0 +1,124 @@
+import collections
+import threading
+from concurrent.futures import Future
+from warnings import warn
+
+
+class CommandWorker:
+    """
+    Runs all VISCA I/O for one camera on a background thread.
+
+    The UI posts calls and gets a Future back immediately. Calls run one at a
+    time in the order they were posted. `callback(result)` is handed to `after`
+    (the window's `root.after`), so it runs on the UI thread.
+
+    Calls posted with the same `channel` coalesce. A call that has not started
+    yet is cancelled when a newer one arrives on its channel, so a burst of
+    button presses and releases ends in the last state instead of replaying
+    every move. The camera is connected on the worker thread as well (with
+    `connect()`), and again on the next call if that failed.
+    """
+
+    def __init__(self, connect, after=None, name="camera"):
+        self._connect = connect
+        self._after = after
+        self.name = name
+        self.camera = None
+        self._jobs = collections.deque()
+        self._channels = {}
+        self._cond = threading.Condition()
+        self._closing = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"command-worker-{name}", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def pending(self):
+        with self._cond:
+            return len(self._jobs)
+
+    def submit(self, fn, *args, channel=None, callback=None, **kwargs):
+        """Run `fn(camera, *args, **kwargs)` on the worker thread, returns a Future"""
+        future = Future()
+        job = (future, fn, args, kwargs, channel, callback)
+        with self._cond:
+            if self._closing:
+                future.cancel()
+                return future
+            if channel is not None:
+                superseded = self._channels.get(channel)
+                if superseded is not None and superseded[0].cancel():
+                    self._jobs.remove(superseded)
+                self._channels[channel] = job
+            self._jobs.append(job)
+            self._cond.notify()
+        return future
+
+    def post(self, method, *args, channel=None, callback=None, **kwargs):
+        """Call the camera method named `method` on the worker thread"""
+        return self.submit(
+            lambda camera: getattr(camera, method)(*args, **kwargs),
+            channel=channel,
+            callback=callback,
+        )
+
+    def connect(self):
+        """Connect now in the background instead of on the first call, returns a Future"""
+        return self.submit(lambda camera: camera)
+
+    def close(self, wait=True, timeout=None):
+        """
+        Run what is already queued, then close the camera.
+
+        With wait=False this returns at once and the worker finishes in the background.
+        """
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        if wait:
+            self._thread.join(timeout)
+
+    def _next_job(self):
+        with self._cond:
+            while not self._jobs and not self._closing:
+                self._cond.wait()
+            if not self._jobs:
+                return None
+            job = self._jobs.popleft()
+            channel = job[4]
+            if channel is not None and self._channels.get(channel) is job:
+                del self._channels[channel]
+            return job
+
+    def _run(self):
+        while (job := self._next_job()) is not None:
+            future, fn, args, kwargs, _, callback = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if self.camera is None:
+                    self.camera = self._connect()
+                result = fn(self.camera, *args, **kwargs)
+            except Exception as e:
+                warn(f"[command_worker] {self.name}: command failed: {e}")
+                future.set_exception(e)
+                continue
+            future.set_result(result)
+            if callback is not None:
+                self._dispatch(callback, result)
+
+        if self.camera is not None:
+            try:
+                self.camera.close()
+            except Exception as e:
+                warn(f"[command_worker] {self.name}: failed to close camera: {e}")
+
+    def _dispatch(self, callback, result):
+        try:
+            if self._after is None:
+                callback(result)
+            else:
+                self._after(0, lambda: callback(result))
+        except Exception as e:
+            warn(f"[command_worker] {self.name}: callback failed: {e}")
@@ -1,8 +1,13 @@
 import visca
+from visca import decode_position
 import socket
 import time
 import importlib
 
+# How long run() and inquire() wait for the completions still due for
+# commands sent with send(), so they are not taken for their own replies
+PENDING_REPLY_TIMEOUT = 1.0
+
 
 class Camera:
     def __init__(self, ip="192.168.0.25", port=1259, camera_type="ptzoptics"):
@@ -22,6 +27,9 @@ class Camera:
         self._cache = {}
         self._cache_timeout = 0.2  # 200ms timeout
 
+        # Replies (completions or errors) still due for commands sent with send()
+        self._unread = 0
+
     def _get_cached_value(self, command):
         """Get cached value if unexpired, otherwise return None"""
         if command in self._cache:
@@ -94,18 +102,83 @@ class Camera:
     def check(self):
         return self.execute("")
 
-    def run(self, command, timeout=10):
-        executed = False
-        start_time = time.time()
-        while not executed:
+    def send(self, command, timeout=1.0):
+        """
+        Send `command` without waiting for it to complete, for streams of
+        commands that supersede each other (trajectory waypoints, tracking).
+        Returns the interpreted ACK.
+
+        The camera sends the completion as a separate reply later. It is read
+        and discarded before the next command, so it cannot be taken for that
+        command's reply. While both command buffers are busy the camera
+        answers with a buffer full error, the command is then sent again as
+        earlier ones complete, for up to `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        self.drain()
+        while True:
             result = self.execute(command)
-            while self.parser.interpret_completion(result) == "Command Accepted" and (
-                timeout is None or time.time() - start_time < timeout
+            # A completion read before this command's ACK is an earlier command's
+            while (
+                self._unread
+                and self.parser.completion_text(result) == "Command Completed"
+            ):
+                self._unread -= 1
+                result = self.socket.recv(256).hex()
+            remaining = deadline - time.monotonic()
+            if (
+                self.parser.completion_text(result) != "Command Buffer full Error"
+                or remaining <= 0
+                or not self._unread
             ):
-                result = self.check()
-                time.sleep(0.1)
-            if self.parser.interpret_completion(result) == "Command Completed":
-                executed = True
+                break
+            self.drain(remaining, replies=1)
+        result = self.parser.interpret_completion(result)
+        if result == "Command Accepted":
+            self._unread += 1
+        return result
+
+    def drain(self, timeout=0.0, replies=None):
+        """
+        Read and discard the replies still due for commands sent with send(),
+        waiting up to `timeout` seconds for them (or for `replies` of them).
+        """
+        wanted = self._unread if replies is None else min(replies, self._unread)
+        deadline = time.monotonic() + timeout
+        previous = self.socket.gettimeout()
+        try:
+            while wanted > 0:
+                self.socket.settimeout(max(0.0, deadline - time.monotonic()))
+                try:
+                    reply = self.socket.recv(256).hex()
+                except (BlockingIOError, TimeoutError):
+                    return
+                # An ACK is not the end of a command, its completion still comes
+                if self.parser.completion_text(reply) != "Command Accepted":
+                    self._unread -= 1
+                    wanted -= 1
+        finally:
+            self.socket.settimeout(previous)
+
+    def _settle(self):
+        if self._unread:
+            self.drain(PENDING_REPLY_TIMEOUT)
+            # Replies that did not come by now were lost, stop waiting for them
+            self._unread = 0
+
+    def run(self, command, timeout=10):
+        """
+        Send `command` and poll until the camera reports completion, an error,
+        or `timeout` seconds passed. Returns the interpreted last reply.
+        """
+        self._settle()
+        start_time = time.time()
+        result = self.execute(command)
+        while self.parser.interpret_completion(result) == "Command Accepted" and (
+            timeout is None or time.time() - start_time < timeout
+        ):
+            result = self.check()
+            time.sleep(0.1)
 
         return self.parser.interpret_completion(result)
 
@@ -116,6 +189,7 @@ class Camera:
             return cached_value
 
         # Cache miss or expired - execute the command
+        self._settle()
         result = self.execute(command)
         # print(result, command)
         interpreted_result = self.parser.interpret_inquire(result)
@@ -220,10 +294,10 @@ class Camera:
         # Note: focus method will handle cache update based on its success
 
     def off(self):
-        self.run(self.commands["power_off"])
+        return self.run(self.build_command("power_off"))
 
     def on(self):
-        self.run(self.commands["power_on"])
+        return self.run(self.build_command("power_on"))
 
     def restart(self):
         self.off()
@@ -260,6 +334,8 @@ class Camera:
         if result == "Command Completed" and _type == "direct":
             self._update_cache(self.commands["inq"]["zoom_pos"], val)
 
+        return result
+
     def focus(self, _type="direct", val=-1):
         """
         zoom(type, value)
@@ -288,13 +364,15 @@ class Camera:
         if result == "Command Completed" and _type == "direct":
             self._update_cache(self.commands["inq"]["focus_pos"], val)
 
+        return result
+
     def focus_mode(self, mode=None):
         if mode:
             command = self.build_command(f"focus_mode_{mode}")
         else:
             command = self.build_command("af_toggle")
 
-        result = self.run(command)
+        return self.run(command)
 
     def move(self, _type="abs", pan=-1, tilt=-1, pan_speed=10, tilt_speed=10):
         """
@@ -324,8 +402,12 @@ class Camera:
             elif _type == "rel":
                 self._update_cache(
                     self.commands["inq"]["pan_tilt_pos"],
-                    [pan + old_pan_tilt[0], tilt + old_pan_tilt[1]],
+                    [
+                        pan + decode_position(old_pan_tilt[0]),
+                        tilt + decode_position(old_pan_tilt[1]),
+                    ],
                 )
+        return result
 
     def pan(self, _type="abs", pan=-1, pan_speed=10):
         """
@@ -341,11 +423,11 @@ class Camera:
             MIN: 0
             MAX: 65535
         """
-        self.move(
+        return self.move(
             _type,
             pan_speed=pan_speed,
             pan=pan,
-            tilt=self.inquire(self.commands["inq"]["pan_tilt_pos"][1]),
+            tilt=0 if _type == "rel" else decode_position(self.pan_tilt_pos[1]),
         )
 
     def tilt(self, _type="abs", tilt=-1, tilt_speed=10):
@@ -362,11 +444,11 @@ class Camera:
             MIN: 0
             MAX: 65535
         """
-        self.move(
+        return self.move(
             _type,
             tilt_speed=tilt_speed,
             tilt=tilt,
-            pan=self.inquire(self.commands["inq"]["pan_tilt_pos"][0]),
+            pan=0 if _type == "rel" else decode_position(self.pan_tilt_pos[0]),
         )
 
     def pan_up(self, pan_speed, tilt_speed):
@@ -517,7 +599,7 @@ class Camera:
     def preset_set(self, preset):
         command = self.build_command("preset_set", preset)
 
-        result = self.run(command)
+        return self.run(command)
 
     def preset_recall(self, preset):
         """
@@ -531,7 +613,7 @@ class Camera:
 
         command = self.build_command("preset_recall", preset)
 
-        result = self.run(command)
+        return self.run(command)
 
 
 if __name__ == "__main__":
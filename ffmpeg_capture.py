@@ -0,0 +1,162 @@
+import contextlib
+import json
+import shutil
+import subprocess
+from warnings import warn
+
+import numpy as np
+
+
+# Options understood by FFmpegCapture, overridable per camera in cameras.json
+FFMPEG_DEFAULT_OPTIONS = {
+    "ffmpeg_path": "ffmpeg",
+    "ffprobe_path": "ffprobe",
+    "rtsp_transport": "tcp",  # "tcp" or "udp", only used for rtsp:// sources
+    "probesize": 32,
+    "analyzeduration": 0,
+    "low_delay": True,
+    "threads": 1,  # Decoder threads, more threads add frame delay
+    "width": None,  # Output size, probed from the source when not given
+    "height": None,
+    "buffers": 3,  # Number of preallocated frame buffers reused round-robin
+    "open_timeout": 5.0,
+}
+
+
+def ffmpeg_available(options=None):
+    options = {**FFMPEG_DEFAULT_OPTIONS, **(options or {})}
+    return shutil.which(options["ffmpeg_path"]) is not None
+
+
+class FFmpegCapture:
+    """
+    Minimal cv2.VideoCapture look-alike backed by an `ffmpeg` subprocess.
+
+    ffmpeg decodes the source and writes raw rgb24 frames to stdout, which are
+    read straight into a small ring of preallocated numpy buffers. Frames are
+    therefore already RGB, and a returned frame stays valid until `buffers`
+    more frames have been read.
+    """
+
+    def __init__(self, target, options=None):
+        self.target = target
+        self.options = {**FFMPEG_DEFAULT_OPTIONS, **(options or {})}
+        self._proc = None
+        self._buffers = []
+        self._buffer_index = 0
+        self.width = self.options["width"]
+        self.height = self.options["height"]
+        self._open()
+
+    def _input_args(self):
+        args = ["-nostdin", "-hide_banner", "-loglevel", "error"]
+        if str(self.target).lower().startswith("rtsp://"):
+            args += ["-rtsp_transport", str(self.options["rtsp_transport"])]
+        args += [
+            "-probesize",
+            str(self.options["probesize"]),
+            "-analyzeduration",
+            str(self.options["analyzeduration"]),
+        ]
+        if self.options["low_delay"]:
+            args += ["-fflags", "nobuffer", "-flags", "low_delay"]
+        args += ["-threads", str(self.options["threads"])]
+        return args
+
+    def build_command(self):
+        command = [self.options["ffmpeg_path"], *self._input_args(), "-i", self.target]
+        command += ["-an", "-sn", "-vsync", "0"]
+        if self.options["width"] and self.options["height"]:
+            command += ["-vf", f"scale={self.width}:{self.height}"]
+        command += ["-f", "rawvideo", "-pix_fmt", "rgb24", "pipe:1"]
+        return command
+
+    def probe_size(self):
+        """Ask ffprobe for the source resolution, returns (width, height) or None"""
+        command = [self.options["ffprobe_path"], "-v", "error"]
+        if str(self.target).lower().startswith("rtsp://"):
+            command += ["-rtsp_transport", str(self.options["rtsp_transport"])]
+        command += [
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "stream=width,height",
+            "-of",
+            "json",
+            self.target,
+        ]
+        try:
+            result = subprocess.run(
+                command,
+                capture_output=True,
+                timeout=self.options["open_timeout"],
+                check=True,
+            )
+            stream = json.loads(result.stdout)["streams"][0]
+            return int(stream["width"]), int(stream["height"])
+        except Exception as e:
+            warn(f"[vcapture] ffprobe failed for {self.target}: {e}")
+            return None
+
+    def _open(self):
+        if not (self.width and self.height):
+            size = self.probe_size()
+            if size is None:
+                return
+            self.width, self.height = size
+
+        self._buffers = [
+            np.empty((self.height, self.width, 3), dtype=np.uint8)
+            for _ in range(max(1, int(self.options["buffers"])))
+        ]
+        try:
+            self._proc = subprocess.Popen(
+                self.build_command(),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=0,
+            )
+        except OSError as e:
+            warn(f"[vcapture] Failed to start ffmpeg: {e}")
+            self._proc = None
+
+    def isOpened(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    def read(self):
+        proc = self._proc
+        if proc is None:
+            return False, None
+        frame = self._buffers[self._buffer_index]
+        view = memoryview(frame).cast("B")
+        filled = 0
+        while filled < len(view):
+            try:
+                count = proc.stdout.readinto(view[filled:])
+            except (OSError, ValueError):
+                count = 0
+            if not count:
+                # ffmpeg exited or the pipe closed mid-frame
+                return False, None
+            filled += count
+        self._buffer_index = (self._buffer_index + 1) % len(self._buffers)
+        return True, frame
+
+    def set(self, prop, value):
+        # Properties are fixed on the ffmpeg command line
+        return False
+
+    def release(self):
+        # May be called from another thread to unblock a pending read
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        with contextlib.suppress(Exception):
+            proc.terminate()
+            proc.wait(timeout=1.0)
+        if proc.poll() is None:
+            with contextlib.suppress(Exception):
+                proc.kill()
+        with contextlib.suppress(Exception):
+            proc.stdout.close()
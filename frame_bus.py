@@ -0,0 +1,191 @@
+import contextlib
+import threading
+import time
+
+
+SUBSCRIBE_MODES = ("latest", "every", "nth")
+
+
+class FramePacket:
+    """
+    A published frame together with its sequence number and metadata.
+
+    A packet may carry the compressed JPEG it came from instead of (or next to)
+    the decoded RGB frame. `frame` then decodes on first access, so consumers
+    that only need the JPEG never pay for decoding.
+    """
+
+    __slots__ = ("seq", "timestamp", "_frame", "jpeg", "meta")
+
+    def __init__(self, seq, timestamp, frame, meta=None, jpeg=None):
+        self.seq = seq
+        self.timestamp = timestamp
+        self._frame = frame
+        self.jpeg = jpeg
+        self.meta = meta or {}
+
+    @property
+    def frame(self):
+        if self._frame is None and self.jpeg is not None:
+            from mjpeg_capture import decode_jpeg
+
+            self._frame = decode_jpeg(self.jpeg)
+        return self._frame
+
+    @property
+    def decoded(self):
+        return self._frame is not None
+
+
+class FrameBus:
+    """
+    Fan-out of one capture to many consumers.
+
+    Published frames go into a fixed-size ring. Every subscriber keeps its own
+    cursor into that ring, so publishing never waits on a consumer: a slow
+    subscriber simply finds that the frames it has not read yet were overwritten
+    and skips ahead (counted in `FrameSubscriber.dropped`).
+    """
+
+    def __init__(self, capacity=8):
+        if capacity < 1:
+            raise ValueError("FrameBus capacity must be at least 1")
+        self.capacity = capacity
+        self._ring = [None] * capacity
+        self._seq = 0  # Sequence number of the newest packet, 0 = nothing published
+        self._cond = threading.Condition()
+        self._closed = False
+        self._listeners = []
+
+    @property
+    def seq(self):
+        return self._seq
+
+    @property
+    def latest(self):
+        """Get the newest packet without consuming anything"""
+        with self._cond:
+            if self._seq == 0:
+                return None
+            return self._ring[self._seq % self.capacity]
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def publish(self, frame, timestamp=None, jpeg=None, **meta):
+        with self._cond:
+            self._seq += 1
+            packet = FramePacket(
+                self._seq,
+                time.time() if timestamp is None else timestamp,
+                frame,
+                meta,
+                jpeg,
+            )
+            self._ring[self._seq % self.capacity] = packet
+            self._cond.notify_all()
+            listeners = self._listeners
+        for listener in listeners:
+            with contextlib.suppress(Exception):
+                listener(packet)
+        return packet
+
+    def add_listener(self, callback):
+        """
+        Call `callback(packet)` on the publishing thread for every new frame.
+
+        Listeners hold up the capture, so they must only hand the work off
+        (set a flag, schedule a callback), never process the frame themselves.
+        """
+        with self._cond:
+            self._listeners = [*self._listeners, callback]
+
+    def remove_listener(self, callback):
+        with self._cond:
+            self._listeners = [
+                listener for listener in self._listeners if listener != callback
+            ]
+
+    def subscribe(self, mode="latest", every=1):
+        """
+        mode = "latest":
+            Only the newest frame, intermediate frames are skipped.
+        mode = "every":
+            Every frame in order, as long as the reader keeps up with the ring.
+        mode = "nth":
+            Every `every`-th frame in order.
+        """
+        return FrameSubscriber(self, mode, every)
+
+    def close(self):
+        """Wake up all blocked subscribers, no further frames will arrive"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _next_packet(self, subscriber):
+        # Must be called with self._cond held
+        head = self._seq
+        cursor = subscriber._cursor
+        if head <= cursor:
+            return None
+
+        if subscriber.mode == "latest":
+            subscriber._cursor = head
+            return self._ring[head % self.capacity]
+
+        step = subscriber.every if subscriber.mode == "nth" else 1
+        wanted = cursor + step
+        oldest = max(1, head - self.capacity + 1)
+        if wanted < oldest:
+            skipped = -(-(oldest - wanted) // step)
+            subscriber.dropped += skipped
+            wanted += skipped * step
+            subscriber._cursor = wanted - step
+        if wanted > head:
+            return None
+
+        subscriber._cursor = wanted
+        return self._ring[wanted % self.capacity]
+
+
+class FrameSubscriber:
+    """A consumer's cursor on a FrameBus"""
+
+    def __init__(self, bus, mode="latest", every=1):
+        if mode not in SUBSCRIBE_MODES:
+            raise ValueError(f"Unknown subscribe mode {mode}, expected one of {SUBSCRIBE_MODES}")
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        self.bus = bus
+        self.mode = mode
+        self.every = every
+        self.dropped = 0
+        # Start at the current head so a new subscriber only sees new frames
+        self._cursor = bus.seq
+
+    def poll(self):
+        """Get the next packet for this subscriber, or None if there is none yet"""
+        with self.bus._cond:
+            return self.bus._next_packet(self)
+
+    def get(self, timeout=None):
+        """Block until the next packet arrives, returns None on timeout or close"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.bus._cond:
+            while True:
+                packet = self.bus._next_packet(self)
+                if packet is not None or self.bus.closed:
+                    return packet
+                if deadline is None:
+                    self.bus._cond.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self.bus._cond.wait(remaining)
+
+    def __iter__(self):
+        while (packet := self.get()) is not None:
+            yield packet
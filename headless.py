@@ -0,0 +1,411 @@
+"""
+Headless control service: the camera stack of camera_controller without a
+window, for servers without a display.
+
+    python headless.py [--host 127.0.0.1] [--port 5681] [--streams]
+
+Cameras and presets come from catalog.sqlite3 when it exists, otherwise from
+cameras.json and presets.json, and are saved the same way as in the UI. Every
+camera keeps a CommandWorker (connection and command coalescing) open. With
+--streams every camera's capture runs too, so stored presets get snapshots.
+
+Clients send one JSON object per line and get one JSON line back:
+    {"id": 1, "cmd": "cameras"}
+    {"id": 2, "cmd": "call", "camera": 0, "method": "pan_left", "args": [7, 7],
+     "channel": "pan_tilt"}
+    {"id": 3, "cmd": "get", "camera": 0, "property": "zoom_pos"}
+    {"id": 4, "cmd": "presets", "camera": 0}
+    {"id": 5, "cmd": "preset_set", "camera": 0, "slot": 2, "name": "Pulpit"}
+    {"id": 6, "cmd": "preset_recall", "camera": 0, "slot": 2}
+    {"id": 7, "cmd": "rename_preset", "camera": 0, "slot": 2, "name": "Choir"}
+    {"id": 8, "cmd": "status"}
+Replies are {"id": ..., "ok": true, "result": ...} or
+{"id": ..., "ok": false, "error": "..."}. "camera" is an index or a camera key
+("ip|type"). Commands wait for the camera unless "wait": false is given.
+preset_recall and preset_set take any VISCA slot (0-127). Names and snapshots
+are kept for the preset store's slots: 1-9 in presets.json, every VISCA slot
+in the catalog.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import socketserver
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from warnings import warn
+
+from camera_config import camera_folder_name, camera_key, load_cameras
+from camera_streams import start_capture
+from catalog import CATALOG_FILENAME, VISCA_PRESET_SLOTS, Catalog
+from command_worker import CommandWorker
+from preset_store import PRESET_SLOTS, PresetStore
+
+DEFAULT_PORT = 5681
+
+# Camera methods and properties reachable through "call" and "get"
+CAMERA_METHODS = {
+    "on",
+    "off",
+    "zoom",
+    "zoom_stop",
+    "focus",
+    "focus_stop",
+    "focus_mode",
+    "move",
+    "pan",
+    "tilt",
+    "pan_up",
+    "pan_down",
+    "pan_left",
+    "pan_right",
+    "pan_up_left",
+    "pan_up_right",
+    "pan_down_left",
+    "pan_down_right",
+    "pan_stop",
+    "preset_set",
+    "preset_recall",
+}
+# Commands that change camera or preset state and are reported to listeners
+STATE_COMMANDS = {"call", "preset_set", "preset_recall", "rename_preset"}
+CAMERA_PROPERTIES = {
+    "power",
+    "brightness",
+    "backlight",
+    "zoom_pos",
+    "focus_pos",
+    "pan_tilt_pos",
+}
+
+
+def _connect_camera(cam_cfg):
+    from controller import Camera
+
+    return Camera(ip=cam_cfg["ip"], camera_type=cam_cfg["type"])
+
+
+class ServiceError(Exception):
+    """A request the service cannot carry out, reported back to the client"""
+
+
+class ControlService:
+    """
+    Cameras, their command workers, captures and presets, driven by requests.
+
+    `handle(request)` takes a decoded request and returns the reply, and is
+    safe to call from several threads. Calls for one camera run in order on its
+    CommandWorker, like the UI's buttons.
+    """
+
+    def __init__(
+        self,
+        cameras,
+        preset_store,
+        app_dir,
+        connect=_connect_camera,
+        capture=None,
+        timeout=10.0,
+    ):
+        self.cameras = list(cameras)
+        self.preset_store = preset_store
+        # Slots the store keeps names and snapshots for
+        if isinstance(preset_store, Catalog):
+            self._stored_slots = VISCA_PRESET_SLOTS
+        else:
+            self._stored_slots = range(1, PRESET_SLOTS + 1)
+        self.app_dir = app_dir
+        self.timeout = timeout
+        self.started = time.monotonic()
+        self._keys = [camera_key(cam) for cam in self.cameras]
+        self.workers = [
+            CommandWorker(lambda cam=cam: connect(cam), name=cam["ip"])
+            for cam in self.cameras
+        ]
+        for worker in self.workers:
+            worker.connect()
+        self.captures = [None] * len(self.cameras)
+        if capture is not None:
+            for index, cam in enumerate(self.cameras):
+                try:
+                    self.captures[index] = capture(cam)
+                except Exception as e:
+                    warn(f"[headless] Failed to start stream for {cam['ip']}: {e}")
+        self._snapshots = None
+        self._snapshots_lock = threading.Lock()
+        self._listeners = []
+        self._listeners_lock = threading.Lock()
+
+    def add_listener(self, callback):
+        """
+        Call `callback(event)` after each state changing command and saved
+        snapshot. An event is the request without "id", "cmd" and "wait", plus
+        "event" (the command name) and "camera" (the camera key). Listeners run
+        on the handling thread and must only hand the event off.
+        """
+        with self._listeners_lock:
+            self._listeners = [*self._listeners, callback]
+
+    def remove_listener(self, callback):
+        with self._listeners_lock:
+            self._listeners = [
+                listener for listener in self._listeners if listener != callback
+            ]
+
+    def _emit(self, event):
+        for listener in self._listeners:
+            with contextlib.suppress(Exception):
+                listener(event)
+
+    def close(self):
+        for capture in self.captures:
+            if capture is not None:
+                with contextlib.suppress(Exception):
+                    capture.release(wait=False)
+        for worker in self.workers:
+            with contextlib.suppress(Exception):
+                worker.close(timeout=1.0)
+        if self._snapshots is not None:
+            with contextlib.suppress(Exception):
+                self._snapshots.close()
+        with contextlib.suppress(Exception):
+            self.preset_store.close()
+
+    def handle(self, request):
+        request_id = request.get("id") if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict):
+                raise ServiceError("Request must be a JSON object")
+            command = getattr(self, f"_cmd_{request.get('cmd')}", None)
+            if command is None:
+                raise ServiceError(f"Unknown command {request.get('cmd')!r}")
+            result = command(request)
+        except ServiceError as e:
+            return {"id": request_id, "ok": False, "error": str(e)}
+        except FutureTimeoutError:
+            return {"id": request_id, "ok": False, "error": "Camera timed out"}
+        except Exception as e:
+            return {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+        if request.get("cmd") in STATE_COMMANDS:
+            event = {
+                name: value
+                for name, value in request.items()
+                if name not in ("id", "cmd", "wait")
+            }
+            event.update(
+                event=request["cmd"], camera=self._keys[self._camera_index(request)]
+            )
+            self._emit(event)
+        return {"id": request_id, "ok": True, "result": result}
+
+    def _camera_index(self, request):
+        camera = request.get("camera", 0)
+        if isinstance(camera, int) and 0 <= camera < len(self.cameras):
+            return camera
+        if isinstance(camera, str) and camera in self._keys:
+            return self._keys.index(camera)
+        raise ServiceError(f"Unknown camera {camera!r}")
+
+    def _slot(self, request, stored=False):
+        # Any VISCA slot, or with `stored` one the preset store keeps names and
+        # snapshots for
+        slot = request.get("slot")
+        slots = self._stored_slots if stored else VISCA_PRESET_SLOTS
+        if not isinstance(slot, int) or isinstance(slot, bool) or slot not in slots:
+            raise ServiceError(
+                f"slot must be a preset number from {slots[0]} to {slots[-1]}"
+            )
+        return slot
+
+    def _result(self, future, request):
+        if not request.get("wait", True):
+            return None
+        return future.result(timeout=self.timeout)
+
+    def _cmd_cameras(self, request):
+        return [
+            {
+                "index": index,
+                "key": self._keys[index],
+                "ip": cam["ip"],
+                "type": cam["type"],
+                "streaming": self.captures[index] is not None,
+            }
+            for index, cam in enumerate(self.cameras)
+        ]
+
+    def _cmd_status(self, request):
+        return {
+            "uptime": round(time.monotonic() - self.started, 3),
+            "cameras": [
+                {
+                    "key": self._keys[index],
+                    "connected": worker.camera is not None,
+                    "pending": worker.pending,
+                }
+                for index, worker in enumerate(self.workers)
+            ],
+        }
+
+    def _cmd_call(self, request):
+        index = self._camera_index(request)
+        method = request.get("method")
+        if method not in CAMERA_METHODS:
+            raise ServiceError(f"Unknown camera method {method!r}")
+        args = request.get("args", [])
+        if not isinstance(args, list):
+            raise ServiceError("args must be a list")
+        future = self.workers[index].post(method, *args, channel=request.get("channel"))
+        return self._result(future, request)
+
+    def _cmd_get(self, request):
+        index = self._camera_index(request)
+        name = request.get("property")
+        if name not in CAMERA_PROPERTIES:
+            raise ServiceError(f"Unknown camera property {name!r}")
+        future = self.workers[index].submit(lambda camera: getattr(camera, name))
+        return future.result(timeout=self.timeout)
+
+    def _cmd_presets(self, request):
+        return self.preset_store.presets(self._keys[self._camera_index(request)])
+
+    def _cmd_preset_recall(self, request):
+        index = self._camera_index(request)
+        future = self.workers[index].post(
+            "preset_recall", self._slot(request), channel="preset_recall"
+        )
+        return self._result(future, request)
+
+    def _cmd_rename_preset(self, request):
+        index = self._camera_index(request)
+        name = request.get("name")
+        if not isinstance(name, str) or not name.strip():
+            raise ServiceError("name must be a non-empty string")
+        self.preset_store.update_slot(
+            self._keys[index], self._slot(request, stored=True), name=name.strip()
+        )
+        return None
+
+    def _cmd_preset_set(self, request):
+        index = self._camera_index(request)
+        slot = self._slot(request)
+        key = self._keys[index]
+        name = request.get("name")
+        if isinstance(name, str) and name.strip():
+            self.preset_store.update_slot(
+                key, self._slot(request, stored=True), name=name.strip()
+            )
+        # Only the store's slots get a snapshot
+        capture = self.captures[index] if slot in self._stored_slots else None
+
+        def store_preset(camera):
+            camera.preset_set(slot)
+            # Frames published from here on show the stored position
+            if capture is not None:
+                return capture.subscribe("latest")
+
+        def stored(frames):
+            if frames is not None:
+                self._request_snapshot(key, slot, frames)
+
+        future = self.workers[index].submit(store_preset, callback=stored)
+        self._result(future, request)
+        return None
+
+    def _request_snapshot(self, key, slot, frames):
+        with self._snapshots_lock:
+            if self._snapshots is None:
+                from snapshots import SnapshotWorker
+
+                self._snapshots = SnapshotWorker()
+        folder = os.path.join(self.app_dir, "Images", camera_folder_name(key))
+        with contextlib.suppress(Exception):
+            os.makedirs(folder, exist_ok=True)
+
+        def saved(path):
+            image_path = os.path.relpath(path, self.app_dir)
+            self.preset_store.update_slot(key, slot, image_path=image_path)
+            self._emit(
+                {
+                    "event": "preset_image",
+                    "camera": key,
+                    "slot": slot,
+                    "image_path": image_path,
+                }
+            )
+
+        self._snapshots.request(frames, os.path.join(folder, f"{slot}.jpg"), saved)
+
+
+class _LineHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                reply = {"id": None, "ok": False, "error": f"Invalid JSON: {e}"}
+            else:
+                reply = self.server.service.handle(request)
+            self.wfile.write(json.dumps(reply, default=str).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class ServiceServer(socketserver.ThreadingTCPServer):
+    """JSON-lines TCP front end for a ControlService, one thread per client"""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, service):
+        self.service = service
+        super().__init__(address, _LineHandler)
+
+
+def load_service(app_dir, streams=False):
+    """ControlService for the cameras and presets stored in `app_dir`"""
+    catalog_path = os.path.join(app_dir, CATALOG_FILENAME)
+    if os.path.exists(catalog_path):
+        catalog = Catalog(catalog_path)
+        cameras, preset_store = catalog.cameras(), catalog
+    else:
+        cameras = load_cameras(os.path.join(app_dir, "cameras.json"))
+        preset_store = PresetStore(os.path.join(app_dir, "presets.json"))
+    return ControlService(
+        cameras,
+        preset_store,
+        app_dir,
+        capture=start_capture if streams else None,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless camera control service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--streams", action="store_true", help="keep every camera's capture running"
+    )
+    parser.add_argument("--app-dir", default=os.path.dirname(os.path.abspath(__file__)))
+    args = parser.parse_args()
+
+    service = load_service(args.app_dir, streams=args.streams)
+    server = ServiceServer((args.host, args.port), service)
+    print(
+        f"Controlling {len(service.cameras)} cameras, listening on "
+        f"{args.host}:{server.server_address[1]}"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import contextlib
+from urllib.request import urlopen
+from warnings import warn
+
+import cv2
+import numpy as np
+
+
+JPEG_SOI = b"\xff\xd8"
+JPEG_EOI = b"\xff\xd9"
+
+MJPEG_DEFAULT_OPTIONS = {
+    "timeout": 2.0,  # Socket timeout for connect and every read
+}
+
+
+# Start-of-frame markers (baseline, extended, progressive) carrying the image size
+_JPEG_SOF_MARKERS = (0xC0, 0xC1, 0xC2)
+_REDUCED_READ_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def jpeg_size(data):
+    """(width, height) from a JPEG header without decoding, None if not found"""
+    index = 2
+    while index + 9 <= len(data):
+        if data[index] != 0xFF:
+            return None
+        marker = data[index + 1]
+        if marker == 0xFF:
+            index += 1  # Fill byte
+            continue
+        length = int.from_bytes(data[index + 2 : index + 4], "big")
+        if marker in _JPEG_SOF_MARKERS:
+            height = int.from_bytes(data[index + 5 : index + 7], "big")
+            width = int.from_bytes(data[index + 7 : index + 9], "big")
+            return width, height
+        index += 2 + length
+    return None
+
+
+def decode_jpeg(data, size=None):
+    """
+    Decode JPEG bytes to an RGB frame, returns None for broken data.
+
+    With `size` (width, height) the frame is scaled down to that size. The
+    decoder's 1/2, 1/4 or 1/8 scaling is used when the source is large enough,
+    which is much cheaper than decoding at full size and resizing.
+    """
+    flags = cv2.IMREAD_COLOR
+    if size is not None:
+        source = jpeg_size(data)
+        if source is not None:
+            for factor, reduced_flags in _REDUCED_READ_FLAGS:
+                if source[0] // factor >= size[0] and source[1] // factor >= size[1]:
+                    flags = reduced_flags
+                    break
+    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+    if frame is None:
+        return None
+    if size is not None and (frame.shape[1], frame.shape[0]) != tuple(size):
+        frame = cv2.resize(frame, tuple(size), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+
+def encode_frame(packet, size=None, quality=80):
+    """JPEG bytes of a FramePacket scaled to `size`, None if it cannot be decoded"""
+    jpeg = packet.jpeg
+    if jpeg is not None and size in (None, jpeg_size(jpeg)):
+        return jpeg
+    frame = packet.frame if packet.decoded else None
+    if jpeg is not None and (
+        frame is None or size is None or (frame.shape[1], frame.shape[0]) != size
+    ):
+        # Decode straight to the output size, rather than scaling a frame the
+        # capture already downscaled (to its preview size) back up
+        frame = decode_jpeg(jpeg, size)
+    if frame is None:
+        return None
+    if size is not None and (frame.shape[1], frame.shape[0]) != size:
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    ok, buffer = cv2.imencode(
+        ".jpg",
+        cv2.cvtColor(frame, cv2.COLOR_RGB2BGR),
+        [cv2.IMWRITE_JPEG_QUALITY, int(quality)],
+    )
+    return buffer.tobytes() if ok else None
+
+
+class MJPEGCapture:
+    """
+    cv2.VideoCapture look-alike for multipart MJPEG over HTTP.
+
+    `read()` returns the compressed JPEG bytes of each part untouched instead of
+    a decoded frame, so they can be forwarded or written to disk without
+    transcoding. Decoding is left to whoever needs pixels (see `decode_jpeg`).
+    """
+
+    def __init__(self, target, options=None):
+        self.target = target
+        self.options = {**MJPEG_DEFAULT_OPTIONS, **(options or {})}
+        self._stream = None
+        try:
+            self._stream = urlopen(target, timeout=self.options["timeout"])
+        except Exception as e:
+            warn(f"[vcapture] Failed to open MJPEG stream {target}: {e}")
+
+    def isOpened(self):
+        return self._stream is not None
+
+    def _read_headers(self):
+        headers = {}
+        while True:
+            line = self._stream.readline()
+            if not line:
+                return None
+            line = line.strip()
+            if not line:
+                if headers:
+                    return headers
+                continue
+            if line.startswith(b"--"):
+                continue  # Part boundary
+            name, _, value = line.partition(b":")
+            headers[name.strip().lower()] = value.strip()
+
+    def _read_until_eoi(self):
+        data = b""
+        while JPEG_EOI not in data:
+            line = self._stream.readline()
+            if not line:
+                return None
+            data += line
+        return data[: data.index(JPEG_EOI) + len(JPEG_EOI)]
+
+    def read(self):
+        if self._stream is None:
+            return False, None
+        try:
+            headers = self._read_headers()
+            if headers is None:
+                return False, None
+            length = headers.get(b"content-length")
+            if length:
+                data = self._stream.read(int(length))
+                if len(data) != int(length):
+                    return False, None
+            else:
+                data = self._read_until_eoi()
+        except (OSError, ValueError):
+            return False, None
+        if not data or not data.startswith(JPEG_SOI):
+            return False, None
+        return True, data
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        # May be called from another thread to unblock a pending read
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            with contextlib.suppress(Exception):
+                stream.close()
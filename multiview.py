@@ -0,0 +1,158 @@
+import math
+import threading
+import time
+
+from preview import PreviewSurface
+
+
+def grid_layout(count, width, height, columns=None):
+    """
+    Tile rectangles (x, y, width, height) for `count` tiles in a width x height area.
+
+    Tiles fill rows left to right, with as many columns as rows (or one more)
+    unless `columns` is given.
+    """
+    if count <= 0:
+        return []
+    columns = columns or math.ceil(math.sqrt(count))
+    rows = math.ceil(count / columns)
+    tile_width = width // columns
+    tile_height = height // rows
+    return [
+        (
+            (index % columns) * tile_width,
+            (index // columns) * tile_height,
+            tile_width,
+            tile_height,
+        )
+        for index in range(count)
+    ]
+
+
+class MultiviewGrid:
+    """
+    Live previews of several captures in equally sized tiles.
+
+    The captures are expected to scale and rate limit on their own threads
+    (vcapture `output_size` and `max_fps` options), so a tile only has to blit
+    a frame that already has its size. Renders run from one coalesced `after`
+    callback on the window thread. Each callback stops once `budget_ms` is spent
+    and leaves the remaining tiles for the next one, starting where it left off
+    so no tile starves. Frames the capture marked as an unchanged scene do
+    not schedule a render, so a static camera costs the window nothing.
+    """
+
+    def __init__(self, after, widgets, tile_size, budget_ms=8.0, max_fps=15):
+        self._after = after
+        self.tile_size = tuple(tile_size)
+        self.budget = budget_ms / 1000
+        self.min_interval = 1 / max_fps if max_fps else 0.0
+        self._surfaces = [PreviewSurface(widget, *self.tile_size) for widget in widgets]
+        self._captures = [None] * len(widgets)
+        self._listeners = [None] * len(widgets)
+        self._last_seq = [0] * len(widgets)
+        self._last_scene = [None] * len(widgets)
+        self._dirty = set()
+        self._next_tile = 0
+        self._lock = threading.Lock()
+        self._pending = False
+        self._last_tick = 0.0
+        self.last_tick_ms = 0.0
+        self.max_tick_ms = 0.0
+        self.deferred = 0
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def capture(self, index):
+        return self._captures[index]
+
+    def attach(self, index, capture):
+        """Show frames from `capture` in tile `index`, replacing its previous capture"""
+        self.detach(index)
+
+        def listener(packet, index=index):
+            scene = packet.meta.get("scene")
+            if scene is None or scene != self._last_scene[index]:
+                self._frame_ready(index)
+
+        with self._lock:
+            self._captures[index] = capture
+            self._listeners[index] = listener
+            self._last_seq[index] = 0
+            self._last_scene[index] = None
+        capture.bus.add_listener(listener)
+        if capture.bus.latest is not None:
+            self._frame_ready(index)
+
+    def detach(self, index):
+        """Stop showing tile `index`, returns its capture (not released)"""
+        with self._lock:
+            capture, self._captures[index] = self._captures[index], None
+            listener, self._listeners[index] = self._listeners[index], None
+            self._dirty.discard(index)
+        if capture is not None:
+            capture.bus.remove_listener(listener)
+        return capture
+
+    def close(self):
+        """Detach every tile, returns the captures that were shown"""
+        return [
+            capture
+            for capture in (self.detach(index) for index in range(len(self)))
+            if capture is not None
+        ]
+
+    def _frame_ready(self, index):
+        # Runs on the publishing thread, only schedule the render
+        with self._lock:
+            if self._captures[index] is None:
+                return
+            self._dirty.add(index)
+            if self._pending:
+                return
+            self._pending = True
+            delay = self._last_tick + self.min_interval - time.monotonic()
+        self._after(max(0, int(delay * 1000)), self._tick)
+
+    def _tick(self):
+        # Runs on the window thread
+        started = time.monotonic()
+        with self._lock:
+            self._pending = False
+            self._last_tick = started
+            count = len(self)
+            order = [
+                index
+                for index in ((self._next_tile + step) % count for step in range(count))
+                if index in self._dirty
+            ]
+
+        rendered = 0
+        for index in order:
+            if rendered and time.monotonic() - started >= self.budget:
+                break
+            with self._lock:
+                self._dirty.discard(index)
+                capture = self._captures[index]
+            self._next_tile = (index + 1) % count
+            packet = capture.bus.latest if capture is not None else None
+            if packet is None or packet.seq == self._last_seq[index]:
+                continue
+            self._last_seq[index] = packet.seq
+            scene = packet.meta.get("scene")
+            if scene is not None and scene == self._last_scene[index]:
+                continue
+            self._last_scene[index] = scene
+            self._surfaces[index].show(packet.frame)
+            rendered += 1
+
+        self.last_tick_ms = (time.monotonic() - started) * 1000
+        self.max_tick_ms = max(self.max_tick_ms, self.last_tick_ms)
+        with self._lock:
+            if not self._dirty or self._pending:
+                return
+            # Over budget, continue with the remaining tiles on the next tick
+            self.deferred += len(self._dirty)
+            self._pending = True
+        self._after(1, self._tick)
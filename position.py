@@ -0,0 +1,287 @@
+"""
+Closed-loop position feedback for pan, tilt, zoom and focus.
+
+A PositionTracker polls the camera's position inquiries on its CommandWorker
+while a move runs and tells the caller when the head got there. Polls follow
+the move: the velocity of each axis is estimated from successive reads, the
+arrival time predicted from it, and the next poll is scheduled at half of the
+remaining time, so a long slow move costs a few reads and the last moments
+before arrival are sampled closely. Between watches the tracker sends
+nothing at all.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from warnings import warn
+
+from visca import decode_position
+
+AXES = ("pan", "tilt", "zoom", "focus")
+# Position units within which an axis counts as arrived, or as standing still
+DEFAULT_TOLERANCE = {"pan": 16, "tilt": 16, "zoom": 64, "focus": 4}
+VELOCITY_SMOOTHING = 0.5  # Weight of the newest reading in the velocity average
+
+
+def read_position(camera, axes=AXES):
+    """
+    {axis: position} of a Camera for `axes`, bypassing the inquiry cache. Only
+    the inquiries those axes need are sent.
+    """
+    camera.clear_cache()
+    pose = {}
+    if "pan" in axes or "tilt" in axes:
+        pan, tilt = camera.pan_tilt_pos
+        pose["pan"] = decode_position(pan)
+        pose["tilt"] = decode_position(tilt)
+    if "zoom" in axes:
+        pose["zoom"] = decode_position(camera.zoom_pos[0])
+    if "focus" in axes:
+        pose["focus"] = decode_position(camera.focus_pos[0])
+    return pose
+
+
+class _Watch:
+    __slots__ = (
+        "target",
+        "tolerance",
+        "began",
+        "deadline",
+        "callback",
+        "future",
+        "pose",
+        "stamp",
+        "velocity",
+        "moved",
+        "still",
+        "polls",
+        "eta",
+        "failed",
+    )
+
+    def __init__(self, target, tolerance, began, timeout, callback):
+        self.target = target
+        self.tolerance = tolerance
+        self.began = began
+        self.deadline = began + timeout
+        self.callback = callback
+        self.future = Future()
+        self.pose = None
+        self.stamp = None
+        self.velocity = {}
+        self.moved = False
+        self.still = 0
+        self.polls = 0
+        self.eta = None
+        self.failed = False
+
+
+class PositionTracker:
+    """
+    Watches one camera's position until it reaches a target or stops moving.
+
+    `watch()` returns a Future that resolves to {"arrived", "pose", "elapsed",
+    "polls"}. "arrived" is False when the head stopped short of the target
+    (after `settle` reads without movement) or the timeout passed. Without a
+    target the watch ends once the head moved and then stood still. Only one
+    watch runs at a time, a new one cancels the previous. `callback(result)`
+    is handed to `after` (the window's `root.after`) like CommandWorker's.
+    """
+
+    def __init__(
+        self,
+        worker,
+        after=None,
+        min_interval=0.05,
+        max_interval=0.5,
+        settle=3,
+        clock=time.monotonic,
+        read=read_position,
+    ):
+        self.worker = worker
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.settle = settle
+        self._after = after
+        self._clock = clock
+        self._read = read
+        self._watch = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._loop, name="position-tracker", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def watching(self):
+        with self._cond:
+            return self._watch is not None
+
+    @property
+    def eta(self):
+        """Predicted seconds until the current watch arrives, None if unknown"""
+        with self._cond:
+            return None if self._watch is None else self._watch.eta
+
+    def watch(self, target=None, timeout=30.0, tolerance=None, callback=None):
+        """
+        Track the head until it reaches `target` ({axis: position}, any of
+        AXES) or, without a target, until it settles. Returns a Future.
+        """
+        target = dict(target or {})
+        unknown = set(target) - set(AXES)
+        if unknown:
+            raise ValueError(f"Unknown axes {sorted(unknown)}, expected {AXES}")
+        watch = _Watch(
+            target,
+            {**DEFAULT_TOLERANCE, **(tolerance or {})},
+            self._clock(),
+            timeout,
+            callback,
+        )
+        with self._cond:
+            if self._closed:
+                watch.future.cancel()
+                return watch.future
+            previous, self._watch = self._watch, watch
+            self._cond.notify()
+        if previous is not None:
+            previous.future.cancel()
+        return watch.future
+
+    def cancel(self):
+        """Stop the current watch, its Future is cancelled"""
+        with self._cond:
+            watch, self._watch = self._watch, None
+        if watch is not None:
+            watch.future.cancel()
+
+    def close(self):
+        self.cancel()
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(1.0)
+
+    def _sample(self, camera, axes):
+        began = self._clock()
+        pose = self._read(camera, axes)
+        # Several inquiries answer one after another, date the pose in between
+        return (began + self._clock()) / 2, pose
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._watch is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                watch = self._watch
+
+            interval = self._poll(watch)
+
+            with self._cond:
+                if interval is None:
+                    if self._watch is watch:
+                        self._watch = None
+                    continue
+                self._cond.wait_for(
+                    lambda: self._closed or self._watch is not watch, interval
+                )
+
+    def _poll(self, watch):
+        """Read and update `watch`, returns the seconds to the next poll or None"""
+        if watch.future.cancelled():
+            return None
+        remaining = watch.deadline - self._clock()
+        if remaining <= 0:
+            self._finish(watch, False)
+            return None
+        try:
+            future = self.worker.submit(
+                self._sample, tuple(watch.target) or AXES, channel="position"
+            )
+            stamp, pose = future.result(timeout=remaining)
+        except TimeoutError:
+            self._finish(watch, False)
+            return None
+        except Exception as e:
+            # Inquiries can come back garbled while the head moves, keep trying
+            if not watch.failed:
+                warn(f"[position] Failed to read position: {e}")
+                watch.failed = True
+            return self.max_interval
+        watch.polls += 1
+        self._update(watch, stamp, pose)
+
+        if watch.target and self._within(watch, pose, watch.target):
+            self._finish(watch, True)
+            return None
+        if watch.still >= self.settle and (
+            watch.moved or stamp - watch.began >= self.max_interval
+        ):
+            # Standing still: settled when there is no target, stalled otherwise
+            self._finish(watch, not watch.target)
+            return None
+        if watch.eta is None:
+            return self.min_interval
+        # Half the remaining time, but no later than the predicted arrival
+        floor = max(0.0, min(self.min_interval, watch.eta))
+        return min(self.max_interval, max(floor, watch.eta / 2))
+
+    def _within(self, watch, pose, other):
+        return all(
+            abs(pose[axis] - other[axis]) <= watch.tolerance[axis] for axis in other
+        )
+
+    def _update(self, watch, stamp, pose):
+        if watch.pose is not None and stamp > watch.stamp:
+            elapsed = stamp - watch.stamp
+            for axis in pose:
+                speed = (pose[axis] - watch.pose[axis]) / elapsed
+                watch.velocity[axis] = VELOCITY_SMOOTHING * speed + (
+                    1 - VELOCITY_SMOOTHING
+                ) * watch.velocity.get(axis, speed)
+            if self._within(watch, pose, watch.pose):
+                watch.still += 1
+            else:
+                watch.moved = True
+                watch.still = 0
+        watch.pose, watch.stamp = pose, stamp
+        watch.eta = self._predict(watch, pose)
+
+    def _predict(self, watch, pose):
+        """Seconds until every target axis arrives at its current velocity"""
+        if not watch.target or not watch.velocity:
+            return None
+        eta = 0.0
+        for axis, goal in watch.target.items():
+            distance = goal - pose[axis]
+            if abs(distance) <= watch.tolerance[axis]:
+                continue
+            velocity = watch.velocity[axis]
+            if velocity == 0 or (distance > 0) != (velocity > 0):
+                return None
+            eta = max(eta, distance / velocity)
+        return eta
+
+    def _finish(self, watch, arrived):
+        if not watch.future.set_running_or_notify_cancel():
+            return
+        result = {
+            "arrived": arrived,
+            "pose": watch.pose,
+            "elapsed": self._clock() - watch.began,
+            "polls": watch.polls,
+        }
+        watch.future.set_result(result)
+        if watch.callback is None:
+            return
+        try:
+            if self._after is None:
+                watch.callback(result)
+            else:
+                self._after(0, lambda: watch.callback(result))
+        except Exception as e:
+            warn(f"[position] Callback failed: {e}")
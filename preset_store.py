@@ -0,0 +1,202 @@
+import contextlib
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+from warnings import warn
+
+
+PRESET_SLOTS = 9
+DEFAULT_PRESET_NAMES = [
+    "Band",
+    "Speaker R",
+    "Speaker",
+    "Speaker L",
+    "Stage no Lyrics",
+    "Worship Leader",
+    "Wide Shot Left",
+    "Wide Shot Center",
+    "Wide Shot Right",
+]
+
+
+def build_default_slots():
+    return {
+        str(index + 1): {"name": DEFAULT_PRESET_NAMES[index], "image_path": ""}
+        for index in range(PRESET_SLOTS)
+    }
+
+
+def normalize_slots(raw_slots):
+    normalized = build_default_slots()
+    if isinstance(raw_slots, dict):
+        for index in range(1, PRESET_SLOTS + 1):
+            raw_slot = raw_slots.get(str(index), {})
+            if not isinstance(raw_slot, dict):
+                continue
+            raw_name = raw_slot.get("name")
+            raw_image = raw_slot.get("image_path")
+            if isinstance(raw_name, str) and raw_name.strip():
+                normalized[str(index)]["name"] = raw_name.strip()
+            if isinstance(raw_image, str):
+                normalized[str(index)]["image_path"] = raw_image.strip()
+    return normalized
+
+
+def load_presets(path):
+    """Read presets.json, falling back to an empty store for missing or broken files"""
+    default_store = {"version": 1, "cameras": {}}
+    if not os.path.exists(path):
+        return default_store
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return default_store
+    if not isinstance(data, dict):
+        return default_store
+    cameras_data = data.get("cameras")
+    if not isinstance(cameras_data, dict):
+        cameras_data = {}
+    normalized_cameras = {}
+    for key, payload in cameras_data.items():
+        if not isinstance(key, str) or not key:
+            continue
+        slots = payload.get("presets") if isinstance(payload, dict) else {}
+        normalized_cameras[key] = {"presets": normalize_slots(slots)}
+    return {"version": 1, "cameras": normalized_cameras}
+
+
+def write_json_atomic(path, data):
+    """
+    Write `data` as JSON to a temporary file next to `path`, then rename it over
+    `path`. A crash mid-write leaves the previous file intact.
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=folder
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
+
+
+class PresetStore:
+    """
+    Preset names and thumbnail paths per camera, backed by presets.json.
+
+    Changes are made in memory and written by a background thread once no
+    further change arrived for `debounce` seconds (or at the latest after
+    `max_delay`), so bursts of edits cost one write and the UI thread never
+    waits on the disk. `flush()` writes pending changes immediately and
+    `close()` flushes and stops the writer.
+    """
+
+    def __init__(self, path, debounce=0.5, max_delay=5.0):
+        self.path = path
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.exists = os.path.exists(path)
+        self._data = load_presets(path)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._dirty_since = None
+        self._changed_at = None
+        self._closed = False
+        self.writes = 0
+        self._thread = threading.Thread(
+            target=self._run, name="preset-store-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _camera_slots(self, camera_key):
+        # Caller holds the lock
+        cameras_data = self._data.setdefault("cameras", {})
+        camera_data = cameras_data.get(camera_key)
+        if camera_data is None:
+            camera_data = cameras_data[camera_key] = {"presets": build_default_slots()}
+            self._mark_dirty()
+        return camera_data["presets"]
+
+    def presets(self, camera_key):
+        """Copy of the camera's slots ({"1": {"name", "image_path"}, ...})"""
+        with self._lock:
+            return copy.deepcopy(self._camera_slots(camera_key))
+
+    def slot(self, camera_key, slot_index):
+        with self._lock:
+            return dict(self._camera_slots(camera_key)[str(slot_index)])
+
+    def update_slot(self, camera_key, slot_index, **fields):
+        """Change slot fields such as name or image_path, written back later"""
+        with self._lock:
+            self._camera_slots(camera_key)[str(slot_index)].update(fields)
+            self._mark_dirty()
+
+    def _mark_dirty(self):
+        # Caller holds the lock
+        now = time.monotonic()
+        if self._dirty_since is None:
+            self._dirty_since = now
+        self._changed_at = now
+        self._cond.notify()
+
+    @property
+    def dirty(self):
+        with self._lock:
+            return self._dirty_since is not None
+
+    def flush(self):
+        """Write pending changes now, on the calling thread"""
+        with self._write_lock:
+            with self._lock:
+                if self._dirty_since is None:
+                    return
+                data = copy.deepcopy(self._data)
+                self._dirty_since = self._changed_at = None
+            try:
+                write_json_atomic(self.path, data)
+                self.writes += 1
+                self.exists = True
+            except Exception as e:
+                warn(f"[preset_store] Failed to write {self.path}: {e}")
+                with self._lock:
+                    if self._dirty_since is None:
+                        self._mark_dirty()
+
+    def close(self):
+        """Stop the writer and write pending changes"""
+        with self._lock:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5.0)
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._closed:
+                    if self._dirty_since is not None:
+                        now = time.monotonic()
+                        due = min(
+                            self._changed_at + self.debounce,
+                            self._dirty_since + self.max_delay,
+                        )
+                        if now >= due:
+                            break
+                        self._cond.wait(due - now)
+                    else:
+                        self._cond.wait()
+                if self._closed:
+                    return
+            self.flush()
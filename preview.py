@@ -0,0 +1,52 @@
+import cv2
+import numpy as np
+from PIL import Image
+
+
+class PreviewSurface:
+    """
+    Fixed-size preview image for a widget, reused for every frame.
+
+    Two RGBA buffers of the display size are allocated up front and wrapped in
+    PIL images that share their memory. Each frame is scaled into a preallocated
+    buffer and blitted into the back buffer in place, then the buffers are
+    swapped, so showing a frame allocates nothing.
+    """
+
+    def __init__(self, widget, width, height):
+        self.widget = widget
+        self.width = width
+        self.height = height
+        self._scaled = np.empty((height, width, 3), dtype=np.uint8)
+        self._buffers = [
+            np.full((height, width, 4), 255, dtype=np.uint8) for _ in range(2)
+        ]
+        self._images = [
+            Image.frombuffer("RGBA", (width, height), buffer, "raw", "RGBA", 0, 1)
+            for buffer in self._buffers
+        ]
+        self._front = 0
+        self.frames_shown = 0
+
+    @property
+    def image(self):
+        """PIL image currently on display"""
+        return self._images[self._front]
+
+    def show(self, frame):
+        """Blit an RGB frame of any size into the preview and redraw the widget"""
+        if frame is None:
+            return
+        back = 1 - self._front
+        if frame.shape[:2] != (self.height, self.width):
+            frame = cv2.resize(
+                frame,
+                (self.width, self.height),
+                dst=self._scaled,
+                interpolation=cv2.INTER_AREA,
+            )
+        cv2.cvtColor(frame, cv2.COLOR_RGB2RGBA, dst=self._buffers[back])
+        self._front = back
+        self.frames_shown += 1
+        self.widget.image = self._images[back]
+        self.widget.update()
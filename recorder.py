@@ -0,0 +1,271 @@
+"""
+Pre-roll recording: keeps the last seconds of a camera in memory and saves
+them on demand, then keeps recording.
+
+    python recorder.py [--camera 0] [--seconds 30] [--max-mb 64]
+
+Press Enter to save the pre-roll and start recording, Enter again to stop.
+Recordings are MJPEG files (the JPEGs back to back) in
+Recordings/<camera folder>/, which ffmpeg, ffplay and VLC read as
+`-f mjpeg`.
+"""
+
+import argparse
+import collections
+import datetime
+import os
+import threading
+import time
+from concurrent.futures import Future
+from warnings import warn
+
+from mjpeg_capture import encode_frame
+
+RECORDINGS_DIR = "Recordings"
+DEFAULT_SECONDS = 30.0
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class Recorder:
+    """
+    Pre-roll ring of JPEGs for one capture bus, and recordings from it.
+
+    A worker thread reads every frame from the bus, JPEG sources as they
+    came and raw frames encoded there (once per scene, unchanged frames reuse
+    the previous JPEG), so neither the capture nor the preview waits on it.
+    The ring holds at most `seconds` of frames and `max_bytes` of JPEG data,
+    the oldest frames go first. Frames the worker could not keep up with are
+    counted in `dropped`.
+
+    `start_recording(path)` writes the ring to `path` and keeps appending
+    new frames until `stop_recording()`, `duration` seconds or the end of the
+    capture. It returns a Future with {"path", "frames", "bytes"}.
+    """
+
+    def __init__(
+        self,
+        bus,
+        seconds=DEFAULT_SECONDS,
+        max_bytes=DEFAULT_MAX_BYTES,
+        size=None,
+        quality=80,
+    ):
+        self.bus = bus
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        self.size = size
+        self.quality = quality
+        self._subscriber = bus.subscribe("every")
+        self._ring = collections.deque()  # (timestamp, jpeg)
+        self._ring_bytes = 0
+        self._last_scene = None
+        self._last_jpeg = None
+        self._lock = threading.Lock()
+        self._pending = None  # ("start", path, duration, future) or ("stop",)
+        self._recording = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="recorder", daemon=True)
+        self._thread.start()
+
+    @property
+    def dropped(self):
+        return self._subscriber.dropped
+
+    @property
+    def buffered(self):
+        """(frames, bytes, seconds) held in the pre-roll ring"""
+        with self._lock:
+            if not self._ring:
+                return 0, 0, 0.0
+            span = self._ring[-1][0] - self._ring[0][0]
+            return len(self._ring), self._ring_bytes, span
+
+    @property
+    def recording(self):
+        """Path of the recording in progress, None when not recording"""
+        with self._lock:
+            return None if self._recording is None else self._recording["path"]
+
+    def start_recording(self, path, duration=None):
+        """Save the pre-roll to `path` and keep recording, returns a Future"""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                future.cancel()
+                return future
+            if self._pending is not None and self._pending[0] == "start":
+                self._pending[3].cancel()
+            self._pending = ("start", path, duration, future)
+        return future
+
+    def stop_recording(self):
+        with self._lock:
+            self._pending = ("stop",)
+
+    def close(self):
+        """Stop the worker, finishing the recording in progress"""
+        with self._lock:
+            self._closed = True
+        self._thread.join(2.0)
+
+    def _run(self):
+        try:
+            while True:
+                self._handle_pending()
+                with self._lock:
+                    if self._closed:
+                        break
+                packet = self._subscriber.get(timeout=0.1)
+                if packet is None:
+                    if self.bus.closed:
+                        break
+                    self._check_duration(time.monotonic())
+                    continue
+                try:
+                    jpeg = self._encode(packet)
+                except Exception as e:
+                    warn(f"[recorder] Failed to encode frame: {e}")
+                    continue
+                if jpeg is not None:
+                    self._add(packet.timestamp, jpeg)
+        finally:
+            self._handle_pending()
+            self._finish()
+
+    def _encode(self, packet):
+        if packet.jpeg is not None and self.size is None:
+            return packet.jpeg
+        scene = packet.meta.get("scene")
+        if scene is not None and scene == self._last_scene:
+            return self._last_jpeg
+        jpeg = encode_frame(packet, self.size, self.quality)
+        self._last_scene, self._last_jpeg = scene, jpeg
+        return jpeg
+
+    def _add(self, timestamp, jpeg):
+        with self._lock:
+            self._ring.append((timestamp, jpeg))
+            self._ring_bytes += len(jpeg)
+            while len(self._ring) > 1 and (
+                self._ring_bytes > self.max_bytes
+                or timestamp - self._ring[0][0] > self.seconds
+            ):
+                self._ring_bytes -= len(self._ring.popleft()[1])
+        recording = self._recording
+        if recording is None:
+            return
+        try:
+            self._write(recording, jpeg)
+        except OSError as e:
+            warn(f"[recorder] Failed to write {recording['path']}: {e}")
+            self._finish(e)
+            return
+        self._check_duration(time.monotonic())
+
+    def _handle_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, None
+            ring = list(self._ring)
+        if pending is None:
+            return
+        # A new recording or a stop ends the one in progress
+        self._finish()
+        if pending[0] != "start":
+            return
+        _, path, duration, future = pending
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            folder = os.path.dirname(path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            recording = {
+                "path": path,
+                "file": open(path, "wb"),
+                "frames": 0,
+                "bytes": 0,
+                "ends": None if duration is None else time.monotonic() + duration,
+                "future": future,
+            }
+            for _, jpeg in ring:
+                self._write(recording, jpeg)
+        except Exception as e:
+            warn(f"[recorder] Failed to start recording {path}: {e}")
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._recording = recording
+
+    def _write(self, recording, jpeg):
+        recording["file"].write(jpeg)
+        recording["frames"] += 1
+        recording["bytes"] += len(jpeg)
+
+    def _check_duration(self, now):
+        recording = self._recording
+        if recording is not None and recording["ends"] is not None:
+            if now >= recording["ends"]:
+                self._finish()
+
+    def _finish(self, error=None):
+        with self._lock:
+            recording, self._recording = self._recording, None
+        if recording is None:
+            return
+        try:
+            recording["file"].close()
+        except OSError as e:
+            error = error or e
+        if error is not None:
+            recording["future"].set_exception(error)
+            return
+        recording["future"].set_result(
+            {
+                "path": recording["path"],
+                "frames": recording["frames"],
+                "bytes": recording["bytes"],
+            }
+        )
+
+
+def recording_path(app_dir, folder, now=None):
+    """Recordings/<folder>/<date>_<time>.mjpeg under `app_dir`"""
+    now = now or datetime.datetime.now()
+    return os.path.join(
+        app_dir, RECORDINGS_DIR, folder, now.strftime("%Y%m%d_%H%M%S.mjpeg")
+    )
+
+
+def main():
+    from camera_config import camera_folder_name, camera_key, load_cameras
+    from camera_streams import start_capture
+
+    parser = argparse.ArgumentParser(description="Pre-roll recording of a camera")
+    parser.add_argument("--camera", type=int, default=0, help="index in cameras.json")
+    parser.add_argument("--seconds", type=float, default=DEFAULT_SECONDS)
+    parser.add_argument("--max-mb", type=float, default=DEFAULT_MAX_BYTES / 2**20)
+    parser.add_argument("--app-dir", default=os.path.dirname(os.path.abspath(__file__)))
+    args = parser.parse_args()
+
+    cam_cfg = load_cameras(os.path.join(args.app_dir, "cameras.json"))[args.camera]
+    folder = camera_folder_name(camera_key(cam_cfg))
+    capture = start_capture(cam_cfg)
+    recorder = Recorder(capture.bus, args.seconds, int(args.max_mb * 2**20))
+    try:
+        while True:
+            input(f"Enter saves the last {args.seconds:g} s and starts recording")
+            path = recording_path(args.app_dir, folder)
+            future = recorder.start_recording(path)
+            print(f"Recording to {path}")
+            input("Enter stops recording")
+            recorder.stop_recording()
+            print(future.result(timeout=5.0))
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        recorder.close()
+        capture.release()
+
+
+if __name__ == "__main__":
+    main()
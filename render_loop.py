@@ -0,0 +1,86 @@
+import threading
+import time
+
+
+class FrameRenderScheduler:
+    """
+    Drives a preview from the window's event loop instead of a polling loop.
+
+    The capture's frame bus notifies the scheduler when a frame is published,
+    and the scheduler queues a single render callback with `after` (which
+    nebulatk runs on the window thread). Nothing runs while no new frames
+    arrive, a frame that was already shown is never rendered twice, and
+    renders are capped at `max_fps`. Frames the capture marked as the same
+    picture as the one on screen (an unchanged "scene") are not rendered
+    either, they are counted in `skipped`.
+    """
+
+    def __init__(self, after, render, max_fps=30):
+        self._after = after
+        self._render = render
+        self.min_interval = 1 / max_fps if max_fps else 0.0
+        self._lock = threading.Lock()
+        self._pending = False
+        self._capture = None
+        self._last_render = 0.0
+        self.last_seq = 0
+        self.last_scene = None
+        self.frames_ready = 0
+        self.rendered = 0
+        self.skipped = 0
+
+    @property
+    def capture(self):
+        return self._capture
+
+    def attach(self, capture):
+        """Render frames from `capture`, replacing any previous capture"""
+        self.detach()
+        with self._lock:
+            self._capture = capture
+            self.last_seq = 0
+            self.last_scene = None
+        capture.bus.add_listener(self._frame_ready)
+        if capture.bus.latest is not None:
+            self._frame_ready(capture.bus.latest)
+
+    def detach(self):
+        with self._lock:
+            capture, self._capture = self._capture, None
+        if capture is not None:
+            capture.bus.remove_listener(self._frame_ready)
+
+    def _frame_ready(self, packet):
+        # Runs on the publishing thread, only schedule the render
+        with self._lock:
+            self.frames_ready += 1
+            if self._pending or self._capture is None:
+                return
+            scene = packet.meta.get("scene")
+            if scene is not None and scene == self.last_scene:
+                # Nothing new to show, do not wake the window thread
+                self.skipped += 1
+                return
+            self._pending = True
+            delay = self._last_render + self.min_interval - time.monotonic()
+        self._after(max(0, int(delay * 1000)), self._tick)
+
+    def _tick(self):
+        # Runs on the window thread
+        with self._lock:
+            self._pending = False
+            capture = self._capture
+        if capture is None:
+            return
+        packet = capture.bus.latest
+        if packet is None or packet.seq == self.last_seq:
+            return
+        self.last_seq = packet.seq
+        scene = packet.meta.get("scene")
+        if scene is not None and scene == self.last_scene:
+            self.skipped += 1
+            return
+        self.last_scene = scene
+        self._last_render = time.monotonic()
+        self._render(packet)
+        self.rendered += 1
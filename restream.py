@@ -0,0 +1,485 @@
+"""
+Restreaming hub: pulls every camera once and serves it to many HTTP viewers,
+so a room full of monitors does not use up the cameras' RTSP sessions.
+
+    python restream.py [--host 127.0.0.1] [--port 8090]
+
+    GET /cameras.json                      cameras, profiles and viewer counts
+    GET /cameras/<camera>/<profile>.mjpg   MJPEG stream
+    GET /cameras/<camera>/<profile>.jpg    newest frame as a JPEG
+
+<camera> is the camera's index or its Images/ folder name (such as
+10.0.0.1_ptzoptics). A camera's capture starts with its first viewer and is
+released a few seconds after its last viewer left. Each output profile is
+encoded once per frame and the JPEG is shared by all of its viewers and
+snapshots. Profiles come from the "restream" section of cameras.json:
+    "restream": {"profiles": {"360p": {"size": [640, 360], "quality": 70,
+                                       "max_fps": 10}}}
+
+The server has no authentication and listens on 127.0.0.1 unless --host
+says otherwise, such as --host 0.0.0.0 to serve the whole network.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import re
+import threading
+import time
+from http import server
+from socketserver import ThreadingMixIn
+from warnings import warn
+
+from camera_config import camera_folder_name, camera_key, load_cameras
+from camera_streams import start_capture
+from catalog import CATALOG_FILENAME, Catalog
+from mjpeg_capture import encode_frame
+
+DEFAULT_PORT = 8090
+BOUNDARY = "frame"
+# size None keeps the camera's resolution (MJPEG sources pass through as is)
+DEFAULT_PROFILES = {
+    "source": {"size": None, "quality": 85, "max_fps": None},
+    "720p": {"size": (1280, 720), "quality": 80, "max_fps": None},
+    "360p": {"size": (640, 360), "quality": 75, "max_fps": 15},
+}
+
+_ROUTE = re.compile(r"^/cameras/([^/]+)/([A-Za-z0-9_-]+)\.(mjpg|jpg)$")
+
+
+class ProfileStream:
+    """
+    One camera's frames encoded for one output profile, shared by all viewers.
+
+    An encoder thread runs while there are viewers (and `idle_timeout` seconds
+    after the last one left). It takes only the newest frame of the bus, so a
+    slow encode skips frames instead of falling behind, and viewers that are
+    slower still skip encoded frames the same way. `max_fps` is kept on the
+    frames' capture timestamps.
+    """
+
+    def __init__(self, bus, size=None, quality=80, max_fps=None, idle_timeout=5.0):
+        self.bus = bus
+        self.size = tuple(size) if size else None
+        self.quality = quality
+        self.max_fps = max_fps
+        self.idle_timeout = idle_timeout
+        self.encoded = 0
+        self.viewers = 0
+        self._jpeg = None
+        self._source_seq = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._idle_since = time.monotonic()
+        self._closed = False
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def frames(self, timeout=5.0):
+        """
+        Yield encoded JPEGs as they are produced, starting with the current one.
+        Ends when no frame arrives for `timeout` seconds or on close.
+        """
+        with self._cond:
+            self.viewers += 1
+            self._ensure_encoder()
+            seen = None
+        if self._jpeg is None and self.bus.latest is not None:
+            # Start with the newest frame instead of waiting for the next one
+            self.snapshot()
+        try:
+            while True:
+                with self._cond:
+                    if not self._cond.wait_for(
+                        lambda: self._closed
+                        or (self._jpeg is not None and self.encoded != seen),
+                        timeout,
+                    ):
+                        return
+                    if self._closed:
+                        return
+                    seen, jpeg = self.encoded, self._jpeg
+                yield jpeg
+        finally:
+            with self._cond:
+                self.viewers -= 1
+                self._idle_since = time.monotonic()
+
+    def snapshot(self, timeout=2.0):
+        """JPEG of the newest frame, encoded at most once per source frame"""
+        packet = self.bus.latest
+        if packet is None:
+            packet = self.bus.subscribe("latest").get(timeout=timeout)
+            if packet is None:
+                return None
+        with self._cond:
+            if self._source_seq >= packet.seq:
+                return self._jpeg
+        return self._store(packet)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(1.0)
+
+    def _store(self, packet):
+        jpeg = encode_frame(packet, self.size, self.quality)
+        if jpeg is None:
+            return None
+        with self._cond:
+            if packet.seq > self._source_seq:
+                self._jpeg, self._source_seq = jpeg, packet.seq
+                self.encoded += 1
+                self._cond.notify_all()
+            return self._jpeg
+
+    def _ensure_encoder(self):
+        # Must be called with self._cond held
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(
+                target=self._encode_loop, name="restream-encoder", daemon=True
+            )
+            self._thread.start()
+
+    def _encode_loop(self):
+        frames = self.bus.subscribe("latest")
+        frame_interval = 1 / self.max_fps if self.max_fps else 0.0
+        next_frame_at = 0.0
+        while True:
+            with self._cond:
+                idle = time.monotonic() - self._idle_since
+                if self._closed or (not self.viewers and idle > self.idle_timeout):
+                    self._thread = None
+                    return
+            packet = frames.get(timeout=0.5)
+            if packet is None:
+                if self.bus.closed:
+                    with self._cond:
+                        self._thread = None
+                        self._closed = True
+                        self._cond.notify_all()
+                    return
+                continue
+            if packet.timestamp < next_frame_at:
+                continue
+            next_frame_at = max(next_frame_at + frame_interval, packet.timestamp)
+            try:
+                self._store(packet)
+            except Exception as e:
+                warn(f"[restream] Failed to encode frame: {e}")
+
+
+def normalize_profiles(profiles):
+    """Profile options from cameras.json, falling back to DEFAULT_PROFILES"""
+    if not isinstance(profiles, dict) or not profiles:
+        profiles = DEFAULT_PROFILES
+    normalized = {}
+    for name, options in profiles.items():
+        if not re.fullmatch(r"[A-Za-z0-9_-]+", str(name)) or not isinstance(
+            options, dict
+        ):
+            warn(f"[restream] Ignoring profile {name!r}")
+            continue
+        size = options.get("size")
+        normalized[str(name)] = {
+            "size": tuple(int(v) for v in size) if size else None,
+            "quality": int(options.get("quality", 80)),
+            "max_fps": options.get("max_fps"),
+        }
+    return normalized
+
+
+class RestreamHub:
+    """
+    One capture per camera and one ProfileStream per camera and profile, both
+    started on first use.
+
+    Viewers are counted per camera: every acquire() is paired with a
+    release(), and a camera's capture and streams are stopped `linger`
+    seconds after its count dropped to zero, so the camera's RTSP session is
+    not held for the server's lifetime and a viewer reconnecting right away
+    does not reopen the stream.
+    """
+
+    def __init__(self, cameras, profiles=None, capture=start_capture, linger=5.0):
+        self.cameras = list(cameras)
+        self.profiles = normalize_profiles(profiles)
+        self.linger = linger
+        self._capture = capture
+        self._names = [camera_folder_name(camera_key(cam)) for cam in self.cameras]
+        self._captures = [None] * len(self.cameras)
+        # Set while one acquire() starts the camera's capture
+        self._starting = [None] * len(self.cameras)
+        self._viewers = [0] * len(self.cameras)
+        self._idle_timers = [None] * len(self.cameras)
+        self._streams = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def camera_index(self, camera):
+        """Index for a camera given as index or folder name, None if unknown"""
+        if camera.isdigit() and int(camera) < len(self.cameras):
+            return int(camera)
+        if camera in self._names:
+            return self._names.index(camera)
+        return None
+
+    def acquire(self, index, profile):
+        """
+        ProfileStream for camera `index` and `profile`, starting the capture.
+        Call release(index) once done with it.
+        """
+        with self._lock:
+            timer, self._idle_timers[index] = self._idle_timers[index], None
+            if timer is not None:
+                timer.cancel()
+            # Counted from here, so the capture is not stopped while it starts
+            self._viewers[index] += 1
+        try:
+            capture = self._running_capture(index)
+            with self._lock:
+                stream = self._streams.get((index, profile))
+                if stream is None or stream.bus is not capture.bus:
+                    stream = ProfileStream(capture.bus, **self.profiles[profile])
+                    self._streams[(index, profile)] = stream
+                return stream
+        except BaseException:
+            self.release(index)
+            raise
+
+    def _running_capture(self, index):
+        """
+        The camera's capture, started if needed. Opening a stream can take
+        seconds, so it happens outside the lock and other cameras are not held
+        up, while viewers of the same camera wait for the one starting it.
+        """
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("Restream hub is closed")
+                capture = self._captures[index]
+                if capture is not None and not capture.bus.closed:
+                    return capture
+                starting = self._starting[index]
+                if starting is None:
+                    # Not started yet, or the capture ended (camera went away)
+                    self._captures[index] = None
+                    starting = self._starting[index] = threading.Event()
+                    break
+            starting.wait()
+        if capture is not None:
+            with contextlib.suppress(Exception):
+                capture.release(wait=False)
+        capture = None
+        try:
+            capture = self._capture(self.cameras[index])
+        finally:
+            with self._lock:
+                self._starting[index] = None
+                closed = self._closed
+                if not closed:
+                    self._captures[index] = capture
+            starting.set()
+        if closed:
+            with contextlib.suppress(Exception):
+                capture.release(wait=False)
+            raise RuntimeError("Restream hub is closed")
+        return capture
+
+    def release(self, index):
+        """One viewer of camera `index` is done"""
+        with self._lock:
+            self._viewers[index] = max(0, self._viewers[index] - 1)
+            if self._viewers[index] or self._captures[index] is None:
+                return
+            timer = threading.Timer(self.linger, self._stop_idle, (index,))
+            timer.daemon = True
+            self._idle_timers[index] = timer
+        timer.start()
+
+    def _stop_idle(self, index):
+        with self._lock:
+            # A viewer that arrived meanwhile cancelled or replaced this timer
+            if self._idle_timers[index] is not threading.current_thread():
+                return
+            self._idle_timers[index] = None
+            capture, self._captures[index] = self._captures[index], None
+            streams = [
+                self._streams.pop(key) for key in list(self._streams) if key[0] == index
+            ]
+        for stream in streams:
+            stream.close()
+        if capture is not None:
+            with contextlib.suppress(Exception):
+                capture.release(wait=False)
+
+    def stats(self):
+        with self._lock:
+            streams = dict(self._streams)
+        return [
+            {
+                "index": index,
+                "name": self._names[index],
+                "key": camera_key(cam),
+                "streaming": self._captures[index] is not None,
+                "profiles": {
+                    profile: {
+                        "stream": f"/cameras/{self._names[index]}/{profile}.mjpg",
+                        "snapshot": f"/cameras/{self._names[index]}/{profile}.jpg",
+                        "viewers": (
+                            streams[(index, profile)].viewers
+                            if (index, profile) in streams
+                            else 0
+                        ),
+                    }
+                    for profile in self.profiles
+                },
+            }
+            for index, cam in enumerate(self.cameras)
+        ]
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            for timer in self._idle_timers:
+                if timer is not None:
+                    timer.cancel()
+            self._idle_timers = [None] * len(self.cameras)
+            streams, self._streams = list(self._streams.values()), {}
+            captures = [capture for capture in self._captures if capture is not None]
+            self._captures = [None] * len(self.cameras)
+        for stream in streams:
+            stream.close()
+        for capture in captures:
+            with contextlib.suppress(Exception):
+                capture.release(wait=False)
+
+
+class RestreamServer(ThreadingMixIn, server.HTTPServer):
+    """HTTP front end for a RestreamHub, one thread per viewer"""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, hub):
+        self.hub = hub
+        super().__init__(address, _RestreamRequestHandler)
+
+
+class _RestreamRequestHandler(server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path in ("/", "/cameras.json"):
+            self._serve_json(self.server.hub.stats())
+            return
+        match = _ROUTE.match(path)
+        hub = self.server.hub
+        index = match and hub.camera_index(match.group(1))
+        if index is None or match.group(2) not in hub.profiles:
+            self.send_error(404, "Not found")
+            return
+        try:
+            stream = hub.acquire(index, match.group(2))
+        except Exception as e:
+            warn(f"[restream] Failed to start stream for {match.group(1)}: {e}")
+            self.send_error(503, "Camera unavailable")
+            return
+        try:
+            if match.group(3) == "mjpg":
+                self._serve_stream(stream)
+            else:
+                self._serve_snapshot(stream)
+        finally:
+            hub.release(index)
+
+    def _serve_json(self, data):
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _serve_snapshot(self, stream):
+        jpg = stream.snapshot()
+        if jpg is None:
+            self.send_error(503, "No frame available")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Content-Length", str(len(jpg)))
+        self.end_headers()
+        self.wfile.write(jpg)
+
+    def _serve_stream(self, stream):
+        self.send_response(200)
+        self.send_header(
+            "Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}"
+        )
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        with contextlib.closing(stream.frames()) as frames:
+            try:
+                for jpg in frames:
+                    self.wfile.write(
+                        f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                        f"Content-Length: {len(jpg)}\r\n\r\n".encode("ascii")
+                        + jpg
+                        + b"\r\n"
+                    )
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    def log_message(self, fmt, *args):
+        return
+
+
+def load_hub(app_dir):
+    """RestreamHub for the cameras stored in `app_dir`"""
+    catalog_path = os.path.join(app_dir, CATALOG_FILENAME)
+    if os.path.exists(catalog_path):
+        catalog = Catalog(catalog_path)
+        cameras = catalog.cameras()
+        catalog.close()
+    else:
+        cameras = load_cameras(os.path.join(app_dir, "cameras.json"))
+    profiles = None
+    with contextlib.suppress(Exception):
+        with open(os.path.join(app_dir, "cameras.json"), "r", encoding="utf-8") as f:
+            profiles = json.load(f)["restream"]["profiles"]
+    return RestreamHub(cameras, profiles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MJPEG restreaming hub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--app-dir", default=os.path.dirname(os.path.abspath(__file__)))
+    args = parser.parse_args()
+
+    hub = load_hub(args.app_dir)
+    http_server = RestreamServer((args.host, args.port), hub)
+    print(
+        f"Restreaming {len(hub.cameras)} cameras on "
+        f"http://{args.host}:{http_server.server_address[1]}/cameras.json"
+    )
+    try:
+        http_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        http_server.server_close()
+        hub.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,7 @@ try:
         TestVcaptureProperties,
         TestVcaptureRun,
         TestVcaptureRelease,
+        TestTcapture,
     )
     from tests.test_rtsp_feed import (
         TestRtspFeedClose,
@@ -231,6 +232,7 @@ def run_vcapture_tests():
         suite.addTests(loader.loadTestsFromTestCase(TestVcaptureProperties))
         suite.addTests(loader.loadTestsFromTestCase(TestVcaptureRun))
         suite.addTests(loader.loadTestsFromTestCase(TestVcaptureRelease))
+        suite.addTests(loader.loadTestsFromTestCase(TestTcapture))
 
         # Run the tests
         runner = unittest.TextTestRunner(verbosity=1, stream=sys.stdout)
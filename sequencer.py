@@ -0,0 +1,394 @@
+"""
+Preset tours and macros for unattended services.
+
+    python sequencer.py [--app-dir DIR] [MACRO ...]
+
+Macros live in macros.json next to presets.json:
+    {
+      "macros": {
+        "Tour": {
+          "camera": "10.0.0.1|ptzoptics",
+          "loop": true,
+          "steps": [
+            {"tally": 1},
+            {"recall": 1}, {"dwell": 20},
+            {"move": [32000, 33000], "speed": 8}, {"zoom": 4000}, {"dwell": 10},
+            {"command": "wb_auto"}
+          ]
+        }
+      },
+      "schedule": [{"macro": "Tour", "at": "09:55"}]
+    }
+"camera" is a camera key or index. Camera steps run on the camera's
+CommandWorker, and the next step starts when the camera reports completion.
+"dwell" holds the shot for that many seconds after the previous step
+completed. "schedule" starts macros every day at the given local time.
+"""
+
+import argparse
+import contextlib
+import datetime
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from warnings import warn
+
+from camera_config import camera_key, load_cameras
+from camera_group import CameraGroup, run_command
+from catalog import CATALOG_FILENAME, Catalog
+from preset_store import write_json_atomic
+
+MACROS_FILENAME = "macros.json"
+STEP_ACTIONS = ("recall", "dwell", "move", "zoom", "tally", "command")
+
+
+def _step_action(step):
+    if isinstance(step, dict):
+        for action in STEP_ACTIONS:
+            if action in step:
+                return action
+    return None
+
+
+def step_call(step):
+    """(camera method or VISCA command, args) for a camera step"""
+    action = _step_action(step)
+    if action == "recall":
+        return "preset_recall", [int(step["recall"])]
+    if action == "move":
+        pan, tilt = step["move"]
+        speed = int(step.get("speed", 10))
+        return "move", ["abs", int(pan), int(tilt), speed, speed]
+    if action == "zoom":
+        return "zoom", ["direct", int(step["zoom"])]
+    if action == "tally":
+        return "tally_light", [int(step["tally"])]
+    if action == "command":
+        return str(step["command"]), list(step.get("args", []))
+    raise ValueError(f"Not a camera step: {step!r}")
+
+
+def camera_for(camera, keys):
+    """Key in `keys` of a macro's camera, given as a key or an index"""
+    if isinstance(camera, int) and 0 <= camera < len(keys):
+        return keys[camera]
+    if isinstance(camera, str) and camera in keys:
+        return camera
+    raise KeyError(f"Unknown camera {camera!r}")
+
+
+def normalize_macros(data, cameras=None):
+    """
+    {"macros": {...}, "schedule": [...]} from a parsed macros.json, dropping
+    (with a warning) steps, macros and schedule entries that cannot run.
+    With `cameras` (camera keys), macros for other cameras are dropped too.
+    """
+    data = data if isinstance(data, dict) else {}
+    raw_macros = data.get("macros")
+    macros = {}
+    for name, macro in (raw_macros if isinstance(raw_macros, dict) else {}).items():
+        if not isinstance(macro, dict) or not isinstance(macro.get("steps"), list):
+            warn(f"[sequencer] Ignoring macro {name!r}: no steps")
+            continue
+        camera = macro.get("camera", 0)
+        try:
+            if not isinstance(camera, (int, str)):
+                raise KeyError(f"Not a camera key or index: {camera!r}")
+            if cameras is not None:
+                camera_for(camera, list(cameras))
+        except KeyError as e:
+            warn(f"[sequencer] Ignoring macro {name!r}: {e}")
+            continue
+        steps = []
+        for step in macro["steps"]:
+            try:
+                if _step_action(step) == "dwell":
+                    if float(step["dwell"]) < 0:
+                        raise ValueError("negative dwell")
+                else:
+                    step_call(step)
+            except (ValueError, TypeError) as e:
+                warn(f"[sequencer] Ignoring step {step!r} of {name!r}: {e}")
+                continue
+            steps.append(step)
+        macros[str(name)] = {
+            "camera": camera,
+            "loop": bool(macro.get("loop", False)),
+            "steps": steps,
+        }
+    schedule = []
+    raw_schedule = data.get("schedule")
+    for entry in raw_schedule if isinstance(raw_schedule, list) else []:
+        try:
+            _parse_time(entry["at"])
+            if entry["macro"] not in macros:
+                raise ValueError(f"unknown macro {entry['macro']!r}")
+        except (KeyError, TypeError, ValueError) as e:
+            warn(f"[sequencer] Ignoring schedule entry {entry!r}: {e}")
+            continue
+        schedule.append({"macro": entry["macro"], "at": entry["at"]})
+    return {"macros": macros, "schedule": schedule}
+
+
+def load_macros(path, cameras=None):
+    """Read macros.json, an empty macro set for missing or broken files"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        data = {}
+    return normalize_macros(data, cameras)
+
+
+def save_macros(path, data):
+    write_json_atomic(path, normalize_macros(data))
+
+
+def _parse_time(value):
+    parts = [int(part) for part in str(value).split(":")]
+    if len(parts) not in (2, 3):
+        raise ValueError(f"expected HH:MM or HH:MM:SS, got {value!r}")
+    return datetime.time(*parts)
+
+
+class _Run:
+    __slots__ = ("name", "macro", "worker", "index", "stopped")
+
+    def __init__(self, name, macro, worker):
+        self.name = name
+        self.macro = macro
+        self.worker = worker
+        self.index = 0
+        self.stopped = False
+
+
+class Sequencer:
+    """
+    Runs macros on one scheduler thread.
+
+    Timers sit in a heap of due times. A camera step is posted to the camera's
+    CommandWorker, and its completion schedules the next step, so moves follow
+    each other as soon as the camera is done instead of after fixed sleeps.
+    Each step is due at the previous step's due time plus that step's own
+    duration (the dwell, or how long the camera took), not at whenever the
+    threads got around to it. The wake-up latency of every step is absorbed
+    by the next dwell, so a tour keeps its timing over hours.
+
+    `on_step(name, index, step)` is called on the scheduler thread as each step
+    starts. Macros for cameras that are not in `workers` are dropped with a
+    warning, as are their schedule entries.
+    """
+
+    def __init__(
+        self,
+        workers,
+        macros=None,
+        schedule=(),
+        on_step=None,
+        clock=time.monotonic,
+        now=datetime.datetime.now,
+    ):
+        # {camera key: CommandWorker}, macros refer to cameras by key or index
+        self.workers = dict(workers)
+        self._keys = list(self.workers)
+        self.macros = {}
+        for name, macro in dict(macros or {}).items():
+            try:
+                self._worker(macro.get("camera", 0))
+            except KeyError as e:
+                warn(f"[sequencer] Ignoring macro {name!r}: {e}")
+                continue
+            self.macros[name] = macro
+        self.on_step = on_step
+        self._clock = clock
+        self._now = now
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._runs = {}
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._loop, name="sequencer", daemon=True
+        )
+        self._thread.start()
+        for entry in schedule:
+            if entry["macro"] in self.macros:
+                self.schedule_daily(entry["macro"], entry["at"])
+
+    @property
+    def running(self):
+        """Names of the macros currently running"""
+        with self._cond:
+            return list(self._runs)
+
+    def start(self, name, delay=0.0):
+        """Start (or restart) macro `name` after `delay` seconds"""
+        macro = self.macros[name]
+        worker = self._worker(macro.get("camera", 0))
+        run = _Run(name, macro, worker)
+        with self._cond:
+            previous = self._runs.get(name)
+            if previous is not None:
+                previous.stopped = True
+            self._runs[name] = run
+        due = self._clock() + delay
+        self._call_at(due, self._advance, run, due)
+
+    def stop(self, name):
+        """Stop macro `name` after the camera step it is running, if any"""
+        with self._cond:
+            run = self._runs.pop(name, None)
+        if run is not None:
+            run.stopped = True
+
+    def schedule_daily(self, name, at):
+        """Start macro `name` every day at local time `at` ("HH:MM[:SS]")"""
+        if name not in self.macros:
+            raise KeyError(f"Unknown macro {name!r}")
+        start_time = _parse_time(at)
+        now = self._now()
+        start = datetime.datetime.combine(now.date(), start_time)
+        if start <= now:
+            start += datetime.timedelta(days=1)
+        delay = (start - now).total_seconds()
+
+        def fire():
+            try:
+                self.start(name)
+            finally:
+                # Recomputed from the wall clock, so days with DST changes
+                # still fit. Rescheduled even when this start failed.
+                self.schedule_daily(name, at)
+
+        self._call_at(self._clock() + delay, fire)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            for run in self._runs.values():
+                run.stopped = True
+            self._runs.clear()
+            self._cond.notify()
+        self._thread.join(1.0)
+
+    def _worker(self, camera):
+        return self.workers[camera_for(camera, self._keys)]
+
+    def _call_at(self, due, fn, *args):
+        with self._cond:
+            heapq.heappush(self._heap, (due, next(self._counter), fn, args))
+            self._cond.notify()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._heap:
+                        wait = self._heap[0][0] - self._clock()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if self._closed:
+                    return
+                _, _, fn, args = heapq.heappop(self._heap)
+            try:
+                fn(*args)
+            except Exception as e:
+                warn(f"[sequencer] Scheduled call failed: {e}")
+
+    def _finish(self, run):
+        with self._cond:
+            if self._runs.get(run.name) is run:
+                del self._runs[run.name]
+
+    def _advance(self, run, due):
+        """Start the run's next step, `due` is when it was meant to start"""
+        if run.stopped:
+            return
+        steps = run.macro["steps"]
+        if run.index >= len(steps):
+            if not run.macro.get("loop") or not steps:
+                self._finish(run)
+                return
+            run.index = 0
+        index = run.index
+        step = steps[index]
+        run.index += 1
+        if self.on_step is not None:
+            with contextlib.suppress(Exception):
+                self.on_step(run.name, index, step)
+
+        if _step_action(step) == "dwell":
+            next_due = due + float(step["dwell"])
+            self._call_at(next_due, self._advance, run, next_due)
+            return
+
+        method, args = step_call(step)
+        timing = {}
+
+        def call(camera):
+            timing["started"] = self._clock()
+            try:
+                return run_command(camera, method, args)
+            finally:
+                timing["took"] = self._clock() - timing["started"]
+
+        future = run.worker.submit(call)
+        future.add_done_callback(
+            lambda future: self._completed(run, step, due, timing, future)
+        )
+
+    def _completed(self, run, step, due, timing, future):
+        # Runs on the camera's worker thread
+        if not future.cancelled() and future.exception() is not None:
+            warn(f"[sequencer] {run.name}: step {step!r} failed: {future.exception()}")
+        # The next step is due when this one would have finished had it started
+        # on time, so hand-off latency does not add up over a tour
+        next_due = due + timing.get("took", 0.0)
+        self._call_at(next_due, self._advance, run, next_due)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preset tours and macros")
+    parser.add_argument("macros", nargs="*", help="macros to start now")
+    parser.add_argument("--app-dir", default=os.path.dirname(os.path.abspath(__file__)))
+    args = parser.parse_args()
+
+    catalog_path = os.path.join(args.app_dir, CATALOG_FILENAME)
+    if os.path.exists(catalog_path):
+        catalog = Catalog(catalog_path)
+        cameras = catalog.cameras()
+        catalog.close()
+    else:
+        cameras = load_cameras(os.path.join(args.app_dir, "cameras.json"))
+    data = load_macros(
+        os.path.join(args.app_dir, MACROS_FILENAME),
+        [camera_key(cam) for cam in cameras],
+    )
+
+    group = CameraGroup.from_cameras(cameras)
+    sequencer = Sequencer(
+        group.workers,
+        data["macros"],
+        data["schedule"],
+        on_step=lambda name, index, step: print(f"[{name}] {index}: {step}"),
+    )
+    for name in args.macros:
+        sequencer.start(name)
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sequencer.close()
+        group.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import contextlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from warnings import warn
+
+from PIL import Image
+
+from mjpeg_capture import decode_jpeg, jpeg_size
+from thumbnails import write_thumbnail
+
+
+def _save_atomic(path, write):
+    # Readers (the thumbnail cache, the UI) never see a half written image
+    temp_path = f"{path}.tmp"
+    try:
+        write(temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
+
+
+class SnapshotWorker:
+    """
+    Takes preset snapshots off the UI thread.
+
+    `request(frames, image_path)` hands a FrameSubscriber to a pool thread,
+    which waits for its next frame (up to `timeout`, then uses the newest one).
+    Create the subscriber once the preset is stored, so the snapshot shows
+    the stored position rather than a frame from before it.
+
+    The frame is written as a JPEG scaled to `size` (None keeps the source size)
+    at `quality`, plus the button thumbnail when `thumbnail_size` is given.
+    MJPEG frames at their source size are written as received, without
+    re-encoding. `callback(image_path)` is handed to `after`, so it runs on the
+    UI thread.
+    """
+
+    def __init__(
+        self,
+        after=None,
+        max_workers=2,
+        size=None,
+        quality=90,
+        thumbnail_size=None,
+        timeout=2.0,
+    ):
+        self._after = after
+        self.size = tuple(size) if size else None
+        self.quality = quality
+        self.thumbnail_size = thumbnail_size
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="snapshot")
+
+    def request(self, frames, image_path, callback=None):
+        """Save the next frame of `frames` to `image_path`, returns a Future"""
+        return self._pool.submit(self._run, frames, image_path, callback)
+
+    def close(self, wait=True):
+        """Finish the snapshots already requested, unless wait=False"""
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _run(self, frames, image_path, callback):
+        packet = frames.get(timeout=self.timeout) or frames.bus.latest
+        if packet is None:
+            warn(f"[snapshots] No frame for {image_path}")
+            return None
+        try:
+            self.save(packet, image_path)
+        except Exception as e:
+            warn(f"[snapshots] Failed to save {image_path}: {e}")
+            raise
+        if callback is not None:
+            try:
+                if self._after is None:
+                    callback(image_path)
+                else:
+                    self._after(0, lambda: callback(image_path))
+            except Exception as e:
+                warn(f"[snapshots] callback failed: {e}")
+        return image_path
+
+    def save(self, packet, image_path):
+        """Write the packet's frame (and its thumbnail) to `image_path`"""
+        jpeg = packet.jpeg
+        if jpeg is not None and self.size in (None, jpeg_size(jpeg)):
+            # The camera's own JPEG already has the requested size, no transcoding
+            def write(path):
+                with open(path, "wb") as f:
+                    f.write(jpeg)
+
+            image = None
+        else:
+            if jpeg is not None:
+                frame = decode_jpeg(jpeg, self.size)
+            else:
+                frame = packet.frame
+            image = Image.fromarray(frame, "RGB")
+            if self.size is not None and image.size != self.size:
+                image = image.resize(self.size, Image.BILINEAR)
+
+            def write(path):
+                image.save(path, format="JPEG", quality=self.quality)
+
+        _save_atomic(image_path, write)
+        if self.thumbnail_size is not None:
+            with contextlib.suppress(Exception):
+                write_thumbnail(image_path, self.thumbnail_size, image=image)
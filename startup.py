@@ -0,0 +1,35 @@
+import threading
+import time
+
+
+class StartupTimer:
+    """
+    Records how long startup phases take, from any thread.
+
+    `mark(name)` records the time since the timer was created and prints it as
+    "[startup] name: 123 ms" (pass `log=None` to stay quiet). Only the first
+    mark of a name counts, so marks in code that runs again later (a camera
+    switch, every frame) stay cheap and keep the startup figure.
+    """
+
+    def __init__(self, log=print, clock=time.perf_counter):
+        self._clock = clock
+        self._log = log
+        self._lock = threading.Lock()
+        self.started = clock()
+        self.phases = {}
+
+    def elapsed(self):
+        return self._clock() - self.started
+
+    def mark(self, name):
+        with self._lock:
+            if name in self.phases:
+                return
+            elapsed = self.phases[name] = self.elapsed()
+        if self._log is not None:
+            self._log(f"[startup] {name}: {elapsed * 1000:.0f} ms")
+
+    def marked(self, name):
+        with self._lock:
+            return name in self.phases
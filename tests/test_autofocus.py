@@ -0,0 +1,149 @@
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from autofocus import Autofocus
+from command_worker import CommandWorker
+from frame_bus import FrameBus
+
+# Blocks rather than pixel noise, so their edges still show when defocused
+TEXTURE = cv2.resize(
+    np.random.default_rng(0).integers(0, 256, (18, 32, 3), dtype=np.uint8),
+    (160, 90),
+    interpolation=cv2.INTER_NEAREST,
+)
+
+
+class _FakeLens:
+    """Camera whose picture blurs with the distance from `peak`"""
+
+    def __init__(self, position, peak):
+        self.position = position
+        self.peak = peak
+        self.mode = "auto"
+        self.moves = []
+
+    def focus_mode(self, mode=None):
+        self.mode = mode
+
+    def focus(self, _type="direct", val=-1):
+        self.position = val
+        self.moves.append(val)
+
+    @property
+    def focus_pos(self):
+        return [self.position]
+
+    def clear_cache(self):
+        pass
+
+    def close(self):
+        pass
+
+    def picture(self):
+        sigma = abs(self.position - self.peak) / 200
+        if sigma < 0.3:
+            return TEXTURE
+        return cv2.GaussianBlur(TEXTURE, (0, 0), sigma)
+
+
+def _publisher(bus, lens, stop, fps=200, **meta):
+    while not stop.is_set():
+        bus.publish(lens.picture(), **meta)
+        time.sleep(1 / fps)
+
+
+@pytest.fixture
+def focusing():
+    bus = FrameBus()
+    stop = threading.Event()
+    runs = []
+
+    def make(position, peak, publish=True, meta=None, **kwargs):
+        lens = _FakeLens(position, peak)
+        worker = CommandWorker(lambda: lens)
+        if publish:
+            threading.Thread(
+                target=_publisher,
+                args=(bus, lens, stop),
+                kwargs=meta or {},
+                daemon=True,
+            ).start()
+        # Longer than a publish, so no frame rendered before the move counts
+        kwargs.setdefault("settle", 0.02)
+        autofocus = Autofocus(bus, worker, **kwargs)
+        runs.append((autofocus, worker))
+        return autofocus, lens
+
+    yield make
+    stop.set()
+    for autofocus, worker in runs:
+        autofocus.cancel()
+        worker.close(timeout=1.0)
+
+
+class TestAutofocus:
+    def test_climbs_to_the_sharpest_position(self, focusing):
+        autofocus, lens = focusing(300, 900)
+        result = autofocus.future.result(timeout=5.0)
+        assert lens.mode == "manual"
+        assert abs(result["position"] - 900) <= 64
+        assert lens.position == result["position"]
+        assert not result["cancelled"]
+        assert result["moves"] == len(autofocus.readings) - 1 < 40
+
+    def test_turns_back_when_starting_the_wrong_way(self, focusing):
+        autofocus, lens = focusing(1200, 500)
+        result = autofocus.future.result(timeout=5.0)
+        assert lens.moves[0] > 1200
+        assert abs(result["position"] - 500) <= 64
+
+    def test_peak_at_the_end_of_the_range(self, focusing):
+        autofocus, lens = focusing(1000, 0)
+        result = autofocus.future.result(timeout=5.0)
+        assert result["position"] <= 64
+        assert min(lens.moves) >= 0
+
+    def test_coarse_steps_then_fine(self, focusing):
+        autofocus, lens = focusing(300, 900)
+        autofocus.future.result(timeout=5.0)
+        steps = [abs(b - a) for a, b in zip([300, *lens.moves], lens.moves)]
+        assert steps[0] == 128
+        assert min(steps) < 16
+
+    def test_no_frames_fails_the_run(self, focusing):
+        autofocus, lens = focusing(300, 900, publish=False, timeout=0.2)
+        with pytest.raises(TimeoutError), pytest.warns(UserWarning):
+            autofocus.future.result(timeout=2.0)
+            autofocus._thread.join(1.0)
+
+    def test_reused_frames_fail_the_run(self, focusing):
+        # A capture with change detection publishes unchanged frames reused
+        autofocus, lens = focusing(300, 900, meta={"changed": False})
+        with pytest.raises(ValueError), pytest.warns(UserWarning):
+            autofocus.future.result(timeout=2.0)
+            autofocus._thread.join(1.0)
+        assert lens.moves == []
+
+    def test_cancel_ends_on_the_best_position(self, focusing):
+        autofocus, lens = focusing(300, 900, settle=0.05)
+        while autofocus.moves < 2:
+            time.sleep(0.005)
+        autofocus.cancel()
+        result = autofocus.future.result(timeout=5.0)
+        assert result["cancelled"]
+        assert result["moves"] < 5
+        assert lens.position == result["position"]
+
+    def test_already_in_focus_stays(self, focusing):
+        autofocus, lens = focusing(900, 900)
+        result = autofocus.future.result(timeout=5.0)
+        assert abs(result["position"] - 900) <= 64
+        assert result["moves"] < 15
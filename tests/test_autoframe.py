@@ -0,0 +1,175 @@
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from autoframe import (
+    AIM,
+    AutoFramer,
+    available_detectors,
+    axis_speed,
+    downscale,
+    make_detector,
+    subject_offset,
+)
+from command_worker import CommandWorker
+from frame_bus import FrameBus
+
+
+class _FakeCamera:
+    def __init__(self):
+        self.sent = []
+
+    def build_command(self, name, *args):
+        return (name, *args)
+
+    def send(self, command):
+        self.sent.append(command)
+        return "Command Accepted"
+
+    def close(self):
+        pass
+
+
+class _ScriptedDetector:
+    """Returns the box for the current phase, counts its calls"""
+
+    def __init__(self, box=None):
+        self.box = box
+        self.calls = 0
+
+    def __call__(self, frame):
+        self.calls += 1
+        return [] if self.box is None else [self.box]
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+def _publisher(bus, stop, fps=100):
+    frame = np.zeros((180, 320, 3), np.uint8)
+    while not stop.is_set():
+        bus.publish(frame)
+        time.sleep(1 / fps)
+
+
+@pytest.fixture
+def tracking():
+    bus = FrameBus()
+    camera = _FakeCamera()
+    worker = CommandWorker(lambda: camera)
+    stop = threading.Event()
+    threading.Thread(target=_publisher, args=(bus, stop), daemon=True).start()
+    framers = []
+
+    def make(detector, **kwargs):
+        framers.append(AutoFramer(bus, worker, detector, **kwargs))
+        return framers[-1]
+
+    make.camera = camera
+    yield make
+    for framer in framers:
+        framer.close()
+    stop.set()
+    worker.close(timeout=1.0)
+
+
+class TestHelpers:
+    def test_subject_offset_uses_largest_box(self):
+        boxes = [(0, 0, 10, 10), (240, 45, 80, 90)]
+        assert subject_offset(boxes, (320, 180)) == (0.75, 0.0)
+        assert subject_offset([], (320, 180)) is None
+
+    def test_axis_speed_hysteresis(self):
+        # Stopped: the deadband applies
+        assert axis_speed(0.1, False, 0.15, 0.05, 8) == 0
+        assert axis_speed(0.5, False, 0.15, 0.05, 8) == 4
+        assert axis_speed(-0.5, False, 0.15, 0.05, 8) == -4
+        # Moving: keeps going until within release
+        assert axis_speed(0.1, True, 0.15, 0.05, 8) == 1
+        assert axis_speed(0.04, True, 0.15, 0.05, 8) == 0
+        assert axis_speed(2.0, False, 0.15, 0.05, 8) == 8
+
+    def test_downscale_decodes_jpeg_small(self):
+        bus = FrameBus()
+        frame = np.zeros((360, 640, 3), np.uint8)
+        packet = bus.publish(None, jpeg=cv2.imencode(".jpg", frame)[1].tobytes())
+        assert downscale(packet, 160).shape[:2] == (90, 160)
+        packet = bus.publish(frame)
+        assert downscale(packet, 320).shape[:2] == (180, 320)
+        assert downscale(packet, 1000) is frame
+
+    @pytest.mark.skipif(
+        not hasattr(cv2, "HOGDescriptor"), reason="OpenCV build without HOG"
+    )
+    def test_hog_detector_runs(self):
+        detect = make_detector("hog")
+        assert detect(np.zeros((180, 320, 3), np.uint8)) == []
+
+    def test_motion_detector_finds_moving_region(self):
+        detect = make_detector("motion")
+        frame = np.zeros((180, 320, 3), np.uint8)
+        assert detect(frame) == []
+        moved = frame.copy()
+        moved[40:100, 200:240] = 255
+        [(x, y, w, h)] = detect(moved)
+        assert x <= 200 < 240 <= x + w and y <= 40 < 100 <= y + h
+        # A change over most of the picture is the camera moving
+        assert detect(np.full_like(frame, 255)) == []
+
+    def test_unknown_detector(self):
+        with pytest.raises(ValueError):
+            make_detector("yolo")
+
+    def test_available_detectors(self):
+        available = available_detectors()
+        assert "motion" in available
+        assert ("hog" in available) == hasattr(cv2, "HOGDescriptor")
+
+
+class TestAutoFramer:
+    def test_drives_toward_subject_and_stops_when_centered(self, tracking):
+        detector = _ScriptedDetector((260, 60, 40, 40))  # Right of center
+        framer = tracking(detector, rate=50)
+        camera = tracking.camera
+        assert _wait_for(lambda: camera.sent)
+        assert camera.sent[0][0] == "pan_right"
+        detector.box = (140, 70, 40, 40)  # Centered
+        assert _wait_for(lambda: camera.sent[-1][0] == "pan_stop")
+        assert framer.commands == len(camera.sent) == 2
+
+    def test_stops_when_subject_is_lost(self, tracking):
+        detector = _ScriptedDetector((0, 0, 40, 40))
+        tracking(detector, rate=50, lost_after=0.1)
+        camera = tracking.camera
+        assert _wait_for(lambda: camera.sent)
+        assert camera.sent[0][0] == "pan_up_left"
+        detector.box = None
+        assert _wait_for(lambda: camera.sent[-1][0] == "pan_stop")
+
+    def test_detection_rate_is_limited(self, tracking):
+        detector = _ScriptedDetector()
+        framer = tracking(detector, rate=10)
+        time.sleep(0.5)
+        assert 3 <= detector.calls <= 7
+        assert framer.frames == detector.calls
+        assert not tracking.camera.sent
+
+    def test_release_must_be_inside_deadband(self, tracking):
+        with pytest.raises(ValueError):
+            tracking(_ScriptedDetector(), deadband=0.1, release=0.2)
+
+    def test_defaults_to_an_available_detector(self, tracking):
+        framer = tracking(None)
+        assert framer.running
+        assert framer._aim == AIM[available_detectors()[0]]
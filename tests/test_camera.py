@@ -80,16 +80,14 @@ class TestCamera:
     def test_power_on_command(self, camera):
         """Test power on command sends correct VISCA command"""
         with patch.object(camera, "run") as mock_run:
-            camera.on()
-            # The on() method calls run() with the raw command dictionary
-            mock_run.assert_called_once_with(camera.commands["power_on"])
+            assert camera.on() is mock_run.return_value
+            mock_run.assert_called_once_with("8101040002ff")
 
     def test_power_off_command(self, camera):
         """Test power off command sends correct VISCA command"""
         with patch.object(camera, "run") as mock_run:
-            camera.off()
-            # The off() method calls run() with the raw command dictionary
-            mock_run.assert_called_once_with(camera.commands["power_off"])
+            assert camera.off() is mock_run.return_value
+            mock_run.assert_called_once_with("8101040003ff")
 
     def test_power_property_inquiry(self, camera):
         """Test power property queries the correct VISCA inquiry command"""
@@ -290,6 +288,27 @@ class TestCamera:
                 mock_interpret.assert_called_with("9051ff")
                 assert result == "Command Completed"
 
+    def test_run_method_returns_on_error(self, camera):
+        """Test run does not resend a command the camera rejected"""
+        with patch.object(camera, "execute") as mock_execute:
+            mock_execute.return_value = "906102ff"  # Syntax Error
+
+            assert camera.run("8101040002ff") == "Syntax Error"
+            mock_execute.assert_called_once_with("8101040002ff")
+
+    def test_pan_keeps_current_tilt(self, camera):
+        """Test absolute pan sends the decoded current tilt, relative pan none"""
+        camera._update_cache(
+            camera.commands["inq"]["pan_tilt_pos"], ["090c0400", "07050300"]
+        )
+        with patch.object(camera, "move") as mock_move:
+            camera.pan("abs", 0x1000, 5)
+            assert mock_move.call_args.kwargs["tilt"] == 0x7530
+            camera.pan("rel", 0x1000, 5)
+            assert mock_move.call_args.kwargs["tilt"] == 0
+            camera.tilt("abs", 0x1000, 5)
+            assert mock_move.call_args.kwargs["pan"] == 0x9C40
+
     def test_inquire_method(self, camera):
         """Test inquire method calls correct VISCA interpretation"""
         camera.socket.recv.return_value = bytes.fromhex("90500102ff")
@@ -0,0 +1,157 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from camera_group import CameraGroup
+from command_worker import CommandWorker
+
+CAMERAS = [
+    {"ip": "10.0.0.1", "type": "ptzoptics"},
+    {"ip": "10.0.0.2", "type": "ptzoptics"},
+    {"ip": "10.0.0.3", "type": "ptzoptics"},
+]
+
+
+class _FakeCamera:
+    """Like Camera: methods build a command and return what run() interprets"""
+
+    commands = {"tally_light": {}}
+
+    def __init__(self, cam_cfg, delay=0.0, reply="Command Completed"):
+        self.cfg = cam_cfg
+        self.delay = delay
+        self.reply = reply
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def preset_recall(self, preset):
+        return self.run(self.build_command("preset_recall", preset))
+
+    def build_command(self, name, *args):
+        return (name, *args)
+
+    def run(self, command):
+        self.gate.wait(5.0)
+        time.sleep(self.delay)
+        self.calls.append(command)
+        return self.reply
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def group():
+    cameras = {}
+
+    def connect(cam_cfg):
+        cameras[cam_cfg["ip"]] = _FakeCamera(cam_cfg, delay=0.1)
+        return cameras[cam_cfg["ip"]]
+
+    group = CameraGroup.from_cameras(CAMERAS, connect=connect)
+    group.fake_cameras = cameras
+    yield group
+    group.close()
+
+
+class TestCameraGroup:
+    def test_cameras_run_in_parallel(self, group):
+        started = time.monotonic()
+        results = group.preset_recall(4)
+        elapsed = time.monotonic() - started
+        assert list(results) == [
+            "10.0.0.1|ptzoptics",
+            "10.0.0.2|ptzoptics",
+            "10.0.0.3|ptzoptics",
+        ]
+        assert all(
+            result == {"ok": True, "result": "Command Completed"}
+            for result in results.values()
+        )
+        # Three cameras at 0.1 s each: the slowest, not the sum
+        assert elapsed < 0.25
+
+    def test_per_camera_calls(self, group):
+        results = group.preset_recall(
+            {"10.0.0.1|ptzoptics": 1, "10.0.0.3|ptzoptics": 3}
+        )
+        assert set(results) == {"10.0.0.1|ptzoptics", "10.0.0.3|ptzoptics"}
+        assert group.fake_cameras["10.0.0.1"].calls == [("preset_recall", 1)]
+        assert group.fake_cameras["10.0.0.3"].calls == [("preset_recall", 3)]
+        assert group.fake_cameras["10.0.0.2"].calls == []
+
+    def test_visca_commands_without_a_method(self, group):
+        results = group.call("tally_light", 2, cameras=["10.0.0.2|ptzoptics"])
+        assert results["10.0.0.2|ptzoptics"]["ok"]
+        assert group.fake_cameras["10.0.0.2"].calls == [("tally_light", 2)]
+
+    def test_replies_other_than_completed_fail(self):
+        replies = {
+            "10.0.0.1": "Command Completed",
+            "10.0.0.2": "Command Not Executable Error",
+            "10.0.0.3": None,
+        }
+        group = CameraGroup.from_cameras(
+            CAMERAS, connect=lambda cam: _FakeCamera(cam, reply=replies[cam["ip"]])
+        )
+        results = group.preset_recall(4)
+        group.close()
+        assert results["10.0.0.1|ptzoptics"]["ok"]
+        assert results["10.0.0.2|ptzoptics"] == {
+            "ok": False,
+            "error": "Camera replied Command Not Executable Error",
+        }
+        assert not results["10.0.0.3|ptzoptics"]["ok"]
+
+    def test_errors_are_reported_per_camera(self, group):
+        with pytest.warns(UserWarning):
+            results = group.call("wb_nope")
+        assert all(not result["ok"] for result in results.values())
+        assert "wb_nope" in results["10.0.0.1|ptzoptics"]["error"]
+
+    def test_unknown_camera(self, group):
+        with pytest.raises(KeyError):
+            group.call("preset_recall", 1, cameras=["10.0.0.9|ptzoptics"])
+
+    def test_shared_deadline(self):
+        slow = _FakeCamera(CAMERAS[0])
+        slow.gate.clear()
+        fast = _FakeCamera(CAMERAS[1])
+        group = CameraGroup(
+            {
+                "slow": CommandWorker(lambda: slow),
+                "fast": CommandWorker(lambda: fast),
+            }
+        )
+        started = time.monotonic()
+        results = group.preset_recall(1, timeout=0.1)
+        assert time.monotonic() - started < 0.5
+        assert results["slow"] == {"ok": False, "error": "Camera timed out"}
+        assert results["fast"]["ok"]
+        slow.gate.set()
+        for worker in group.workers.values():
+            worker.close()
+
+    def test_simulator_cameras(self):
+        from controller import Camera
+        from cameras import testcamera_sim as sim
+
+        cameras = [{"ip": "127.0.0.1", "type": "testcamera"}]
+        group = CameraGroup.from_cameras(
+            cameras, connect=lambda cam: Camera(ip=cam["ip"], camera_type=cam["type"])
+        )
+        try:
+            for method, *args in [("on",), ("preset_set", 5), ("preset_recall", 5)]:
+                results = group.call(method, *args)
+                assert results == {
+                    "127.0.0.1|testcamera": {"ok": True, "result": "Command Completed"}
+                }
+            assert 5 in sim.STATE.presets
+        finally:
+            group.close()
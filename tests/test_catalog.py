@@ -0,0 +1,164 @@
+import json
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from camera_config import camera_key, load_cameras, normalize_cameras
+from catalog import Catalog, default_preset_name
+from preset_store import DEFAULT_PRESET_NAMES
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = Catalog(str(tmp_path / "catalog.sqlite3"))
+    yield catalog
+    catalog.close()
+
+
+class TestCameraConfig:
+    def test_camera_key(self):
+        assert camera_key({"ip": " 10.0.0.5 ", "type": "sony"}) == "10.0.0.5|sony"
+        assert camera_key({"ip": "10.0.0.5"}) == "10.0.0.5|ptzoptics"
+
+    def test_normalize_cameras(self):
+        cameras = normalize_cameras(
+            {
+                "cameras": [
+                    {"ip": " 10.0.0.1 ", "camera_type": "sony", "stream_url": " "},
+                    {"ip": ""},
+                    "bogus",
+                    {"ip": "10.0.0.2", "capture": {"backend": "ffmpeg"}},
+                ]
+            }
+        )
+        assert cameras == [
+            {"ip": "10.0.0.1", "type": "sony"},
+            {"ip": "10.0.0.2", "type": "ptzoptics", "capture": {"backend": "ffmpeg"}},
+        ]
+        assert normalize_cameras([{"ip": "10.0.0.3"}]) == [
+            {"ip": "10.0.0.3", "type": "ptzoptics"}
+        ]
+        assert normalize_cameras({"cameras": "nope"}) == []
+
+    def test_load_missing_file(self, tmp_path):
+        assert load_cameras(str(tmp_path / "cameras.json")) == []
+
+
+class TestCatalogPresets:
+    def test_defaults_for_unknown_camera(self, catalog):
+        slots = catalog.presets("10.0.0.1|ptzoptics")
+        assert len(slots) == 9
+        assert slots["1"] == {"name": DEFAULT_PRESET_NAMES[0], "image_path": ""}
+        assert catalog.slot("10.0.0.1|ptzoptics", 100) == {
+            "name": "Preset 100",
+            "image_path": "",
+        }
+
+    def test_update_slot_keeps_other_fields(self, catalog):
+        catalog.update_slot("cam", 2, image_path="Images/cam/preset_2.jpg")
+        catalog.update_slot("cam", 2, name="Pulpit")
+        assert catalog.slot("cam", 2) == {
+            "name": "Pulpit",
+            "image_path": "Images/cam/preset_2.jpg",
+        }
+        assert catalog.slot("other", 2)["name"] == default_preset_name(2)
+
+    def test_all_visca_slots(self, catalog):
+        catalog.update_slot("cam", 0, name="Home")
+        catalog.update_slot("cam", 127, name="Last")
+        slots = catalog.presets("cam")
+        assert slots["0"]["name"] == "Home"
+        assert slots["127"]["name"] == "Last"
+        with pytest.raises(ValueError):
+            catalog.update_slot("cam", 128, name="Nope")
+        with pytest.raises(ValueError):
+            catalog.update_slot("cam", 1, colour="red")
+
+    def test_changes_survive_reopen(self, tmp_path):
+        path = str(tmp_path / "catalog.sqlite3")
+        catalog = Catalog(path)
+        assert not catalog.exists
+        catalog.update_slot("cam", 3, name="Choir")
+        catalog.close()
+
+        catalog = Catalog(path)
+        assert catalog.exists
+        assert catalog.slot("cam", 3)["name"] == "Choir"
+        assert not catalog.dirty
+        catalog.close()
+
+    def test_presets_lookup_uses_primary_key(self, catalog):
+        plan = catalog._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT slot, name, image_path FROM presets "
+            "WHERE camera_key = ?",
+            ("cam",),
+        ).fetchall()
+        assert any("USING PRIMARY KEY" in row[-1] for row in plan)
+
+
+class TestCatalogCameras:
+    def test_set_cameras_keeps_order_and_options(self, catalog):
+        cameras = [
+            {"ip": "10.0.0.2", "type": "ptzoptics"},
+            {
+                "ip": "10.0.0.1",
+                "type": "sony",
+                "stream_url": "rtsp://10.0.0.1/main",
+                "capture": {"backend": "ffmpeg", "mode": "thread"},
+            },
+        ]
+        catalog.set_cameras(cameras)
+        assert catalog.cameras() == cameras
+
+        catalog.set_cameras(cameras[1:])
+        assert catalog.cameras() == cameras[1:]
+
+    def test_thumbnails(self, catalog):
+        assert catalog.thumbnail("cam", 1) is None
+        catalog.set_thumbnail("cam", 1, "Images/cam/thumb_1.jpg", 12.5, 96, 54)
+        assert catalog.thumbnail("cam", 1) == ("Images/cam/thumb_1.jpg", 12.5, 96, 54)
+
+
+class TestCatalogImport:
+    def test_import_json(self, tmp_path, catalog):
+        cameras_json = tmp_path / "cameras.json"
+        cameras_json.write_text(
+            json.dumps({"cameras": [{"ip": "10.0.0.1"}, {"ip": "10.0.0.2"}]})
+        )
+        presets_json = tmp_path / "presets.json"
+        presets_json.write_text(
+            json.dumps(
+                {
+                    "version": 1,
+                    "cameras": {
+                        "10.0.0.1|ptzoptics": {
+                            "presets": {"4": {"name": "Pulpit", "image_path": "a.jpg"}}
+                        }
+                    },
+                }
+            )
+        )
+        catalog.update_slot("10.0.0.1|ptzoptics", 50, name="Kept")
+
+        assert catalog.import_json(str(cameras_json), str(presets_json)) == (2, 9)
+        assert [cam["ip"] for cam in catalog.cameras()] == ["10.0.0.1", "10.0.0.2"]
+        slots = catalog.presets("10.0.0.1|ptzoptics")
+        assert slots["4"] == {"name": "Pulpit", "image_path": "a.jpg"}
+        assert slots["50"]["name"] == "Kept"
+
+    def test_import_missing_files_keeps_cameras(self, tmp_path, catalog):
+        catalog.set_cameras([{"ip": "10.0.0.9", "type": "ptzoptics"}])
+        missing = str(tmp_path / "missing.json")
+        assert catalog.import_json(missing, missing) == (0, 0)
+        assert catalog.cameras() == [{"ip": "10.0.0.9", "type": "ptzoptics"}]
+
+    def test_schema_rejects_out_of_range_slot(self, catalog):
+        with pytest.raises(sqlite3.IntegrityError):
+            with catalog._conn:
+                catalog._conn.execute(
+                    "INSERT INTO presets VALUES ('cam', 200, 'x', '')"
+                )
@@ -0,0 +1,169 @@
+import os
+import sys
+import threading
+import time
+import warnings
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from command_worker import CommandWorker
+
+
+class _FakeCamera:
+    def __init__(self):
+        self.calls = []
+        self.closed = False
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def pan_left(self, speed):
+        self.gate.wait(2.0)
+        self.calls.append(("pan_left", speed))
+        return "Command Completed"
+
+    def pan_stop(self):
+        self.calls.append(("pan_stop",))
+        return "Command Completed"
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeAfter:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, ms, callback):
+        self.calls.append(callback)
+
+
+def _worker(camera=None, after=None):
+    camera = camera or _FakeCamera()
+    return CommandWorker(lambda: camera, after=after), camera
+
+
+def _wait_running(future, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not future.running() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+class TestCommandWorker:
+    def test_post_runs_camera_method_and_returns_result(self):
+        worker, camera = _worker()
+        future = worker.post("pan_left", 7)
+        assert future.result(timeout=2.0) == "Command Completed"
+        assert camera.calls == [("pan_left", 7)]
+        worker.close()
+
+    def test_calls_run_in_order(self):
+        worker, camera = _worker()
+        futures = [worker.post("pan_left", speed) for speed in range(5)]
+        futures[-1].result(timeout=2.0)
+        assert camera.calls == [("pan_left", speed) for speed in range(5)]
+        worker.close()
+
+    def test_post_does_not_wait_for_the_camera(self):
+        worker, camera = _worker()
+        camera.gate.clear()
+        future = worker.post("pan_left", 7)
+        assert not future.done()
+        camera.gate.set()
+        future.result(timeout=2.0)
+        worker.close()
+
+    def test_callback_is_handed_to_after(self):
+        after = _FakeAfter()
+        worker, camera = _worker(after=after)
+        results = []
+        worker.post("pan_left", 7, callback=results.append).result(timeout=2.0)
+        worker.close()
+        assert results == []  # Not on the worker thread
+        after.calls[0]()
+        assert results == ["Command Completed"]
+
+    def test_newer_call_on_channel_cancels_queued_one(self):
+        worker, camera = _worker()
+        camera.gate.clear()
+        running = worker.post("pan_left", 1, channel="drive")
+        _wait_running(running)
+        queued = worker.post("pan_left", 2, channel="drive")
+        stop = worker.post("pan_stop", channel="drive")
+        assert queued.cancelled()
+        camera.gate.set()
+        stop.result(timeout=2.0)
+        assert running.result() == "Command Completed"
+        assert camera.calls == [("pan_left", 1), ("pan_stop",)]
+        worker.close()
+
+    def test_channels_are_independent(self):
+        worker, camera = _worker()
+        camera.gate.clear()
+        worker.post("pan_left", 1, channel="drive")
+        first = worker.post("pan_left", 2, channel="a")
+        second = worker.post("pan_left", 3, channel="b")
+        camera.gate.set()
+        assert second.result(timeout=2.0) == "Command Completed"
+        assert not first.cancelled()
+        worker.close()
+
+    def test_failed_call_sets_exception_and_worker_continues(self):
+        worker, camera = _worker()
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter("always")
+            failed = worker.post("missing_method")
+            with pytest.raises(AttributeError):
+                failed.result(timeout=2.0)
+        assert worker.post("pan_stop").result(timeout=2.0) == "Command Completed"
+        worker.close()
+
+    def test_connect_failure_is_retried(self):
+        camera = _FakeCamera()
+        attempts = []
+
+        def connect():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise OSError("unreachable")
+            return camera
+
+        worker = CommandWorker(connect)
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter("always")
+            with pytest.raises(OSError):
+                worker.post("pan_stop").result(timeout=2.0)
+        assert worker.post("pan_stop").result(timeout=2.0) == "Command Completed"
+        worker.close()
+
+    def test_connect_opens_camera_before_first_call(self):
+        camera = _FakeCamera()
+        connected = threading.Event()
+
+        def connect():
+            connected.set()
+            return camera
+
+        worker = CommandWorker(connect)
+        assert worker.connect().result(timeout=2.0) is camera
+        assert connected.is_set()
+        assert camera.calls == []
+        worker.close()
+
+    def test_close_runs_queued_calls_then_closes_camera(self):
+        worker, camera = _worker()
+        camera.gate.clear()
+        worker.post("pan_left", 1)
+        stop = worker.post("pan_stop")
+        worker.close(wait=False)
+        camera.gate.set()
+        assert stop.result(timeout=2.0) == "Command Completed"
+        worker.close()
+        assert camera.closed
+
+    def test_post_after_close_is_cancelled(self):
+        worker, camera = _worker()
+        worker.close()
+        assert worker.post("pan_stop").cancelled()
+        assert camera.calls == []
@@ -0,0 +1,107 @@
+import io
+import json
+import os
+import sys
+from unittest.mock import Mock, patch
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ffmpeg_capture import FFmpegCapture
+
+
+class _ChunkedPipe(io.RawIOBase):
+    """Raw pipe that hands out data in small chunks like a real ffmpeg stdout"""
+
+    def __init__(self, data, chunk=7):
+        self._data = data
+        self._chunk = chunk
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = min(len(buffer), self._chunk, len(self._data))
+        buffer[:count] = self._data[:count]
+        self._data = self._data[count:]
+        return count
+
+
+def _fake_process(data):
+    proc = Mock()
+    proc.stdout = _ChunkedPipe(data)
+    proc.poll.return_value = None
+    return proc
+
+
+class TestFFmpegCapture:
+    def test_command_uses_low_latency_rtsp_options(self):
+        with patch("ffmpeg_capture.subprocess.Popen") as mock_popen:
+            cap = FFmpegCapture(
+                "rtsp://10.0.0.1:554/2",
+                {"width": 4, "height": 2, "rtsp_transport": "udp", "threads": 2},
+            )
+        command = mock_popen.call_args[0][0]
+        assert command[0] == "ffmpeg"
+        assert command[command.index("-rtsp_transport") + 1] == "udp"
+        assert command[command.index("-threads") + 1] == "2"
+        assert command[command.index("-fflags") + 1] == "nobuffer"
+        assert command[command.index("-flags") + 1] == "low_delay"
+        assert command[command.index("-vf") + 1] == "scale=4:2"
+        assert command[-3:] == ["-pix_fmt", "rgb24", "pipe:1"]
+        assert cap.build_command() == command
+
+    def test_http_source_has_no_rtsp_transport(self):
+        with patch("ffmpeg_capture.subprocess.Popen"):
+            cap = FFmpegCapture(
+                "http://127.0.0.1:8765/stream.mjpg", {"width": 4, "height": 2}
+            )
+        assert "-rtsp_transport" not in cap.build_command()
+
+    def test_probes_size_when_not_configured(self):
+        probe = Mock(stdout=json.dumps({"streams": [{"width": 8, "height": 6}]}))
+        with patch("ffmpeg_capture.subprocess.run", return_value=probe), patch(
+            "ffmpeg_capture.subprocess.Popen"
+        ) as mock_popen:
+            cap = FFmpegCapture("http://127.0.0.1:8765/stream.mjpg")
+        assert (cap.width, cap.height) == (8, 6)
+        assert "-vf" not in mock_popen.call_args[0][0]
+
+    def test_failed_probe_leaves_capture_closed(self):
+        with patch(
+            "ffmpeg_capture.subprocess.run", side_effect=OSError("no ffprobe")
+        ), patch("ffmpeg_capture.subprocess.Popen") as mock_popen, patch(
+            "ffmpeg_capture.warn"
+        ):
+            cap = FFmpegCapture("rtsp://10.0.0.1:554/2")
+        mock_popen.assert_not_called()
+        assert not cap.isOpened()
+        assert cap.read() == (False, None)
+
+    def test_read_fills_preallocated_buffers(self):
+        frames = [np.full((2, 4, 3), value, dtype=np.uint8) for value in (1, 2, 3)]
+        data = b"".join(frame.tobytes() for frame in frames)
+        with patch(
+            "ffmpeg_capture.subprocess.Popen", return_value=_fake_process(data)
+        ):
+            cap = FFmpegCapture("rtsp://cam", {"width": 4, "height": 2, "buffers": 2})
+
+        ok, first = cap.read()
+        assert ok
+        np.testing.assert_array_equal(first, frames[0])
+        ok, second = cap.read()
+        np.testing.assert_array_equal(second, frames[1])
+        ok, third = cap.read()
+        np.testing.assert_array_equal(third, frames[2])
+        # Buffers are reused round-robin instead of allocating per frame
+        assert third is first
+        assert cap.read() == (False, None)
+
+    def test_release_terminates_process(self):
+        proc = _fake_process(b"")
+        with patch("ffmpeg_capture.subprocess.Popen", return_value=proc):
+            cap = FFmpegCapture("rtsp://cam", {"width": 4, "height": 2})
+        cap.release()
+        proc.terminate.assert_called_once()
+        assert not cap.isOpened()
@@ -0,0 +1,149 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_bus import FrameBus
+
+
+def _publish_many(bus, count):
+    return [bus.publish(f"frame-{index}") for index in range(count)]
+
+
+class TestFrameBus:
+    def test_latest_is_none_before_publish(self):
+        bus = FrameBus(4)
+        assert bus.latest is None
+        assert bus.seq == 0
+
+    def test_publish_assigns_increasing_sequence_numbers(self):
+        bus = FrameBus(4)
+        packets = _publish_many(bus, 3)
+        assert [packet.seq for packet in packets] == [1, 2, 3]
+        assert bus.latest is packets[-1]
+
+    def test_publish_keeps_metadata(self):
+        bus = FrameBus(4)
+        packet = bus.publish("frame", timestamp=12.5, source="cam1")
+        assert packet.timestamp == 12.5
+        assert packet.meta == {"source": "cam1"}
+
+    def test_invalid_capacity(self):
+        with pytest.raises(ValueError):
+            FrameBus(0)
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValueError):
+            FrameBus(4).subscribe("sometimes")
+
+
+class TestFrameSubscriber:
+    def test_new_subscriber_only_sees_new_frames(self):
+        bus = FrameBus(4)
+        _publish_many(bus, 2)
+        subscriber = bus.subscribe("every")
+        assert subscriber.poll() is None
+        packet = bus.publish("new")
+        assert subscriber.poll() is packet
+
+    def test_latest_mode_skips_to_newest(self):
+        bus = FrameBus(8)
+        subscriber = bus.subscribe("latest")
+        packets = _publish_many(bus, 5)
+        assert subscriber.poll() is packets[-1]
+        assert subscriber.poll() is None
+        assert subscriber.dropped == 0
+
+    def test_every_mode_delivers_in_order(self):
+        bus = FrameBus(8)
+        subscriber = bus.subscribe("every")
+        packets = _publish_many(bus, 5)
+        received = [subscriber.poll() for _ in range(5)]
+        assert received == packets
+        assert subscriber.poll() is None
+
+    def test_nth_mode_delivers_every_nth(self):
+        bus = FrameBus(16)
+        subscriber = bus.subscribe("nth", every=3)
+        _publish_many(bus, 10)
+        seqs = []
+        while (packet := subscriber.poll()) is not None:
+            seqs.append(packet.seq)
+        assert seqs == [3, 6, 9]
+
+    def test_slow_every_subscriber_skips_overwritten_frames(self):
+        bus = FrameBus(4)
+        subscriber = bus.subscribe("every")
+        _publish_many(bus, 10)
+        seqs = []
+        while (packet := subscriber.poll()) is not None:
+            seqs.append(packet.seq)
+        assert seqs == [7, 8, 9, 10]
+        assert subscriber.dropped == 6
+
+    def test_slow_subscriber_does_not_affect_others(self):
+        bus = FrameBus(4)
+        slow = bus.subscribe("every")
+        fast = bus.subscribe("every")
+        for index in range(10):
+            packet = bus.publish(index)
+            assert fast.poll() is packet
+        assert fast.dropped == 0
+        assert slow.poll().seq == 7
+
+    def test_get_blocks_until_publish(self):
+        bus = FrameBus(4)
+        subscriber = bus.subscribe("every")
+        timer = threading.Timer(0.05, bus.publish, args=("late",))
+        timer.start()
+        packet = subscriber.get(timeout=2.0)
+        timer.join()
+        assert packet is not None and packet.frame == "late"
+
+    def test_get_timeout_returns_none(self):
+        subscriber = FrameBus(4).subscribe()
+        start = time.monotonic()
+        assert subscriber.get(timeout=0.05) is None
+        assert time.monotonic() - start >= 0.04
+
+    def test_close_wakes_blocked_subscriber(self):
+        bus = FrameBus(4)
+        subscriber = bus.subscribe()
+        timer = threading.Timer(0.05, bus.close)
+        timer.start()
+        assert subscriber.get(timeout=2.0) is None
+        timer.join()
+        assert bus.closed
+
+    def test_listener_called_with_each_packet(self):
+        bus = FrameBus(4)
+        seen = []
+        bus.add_listener(seen.append)
+        packets = _publish_many(bus, 3)
+        assert seen == packets
+
+    def test_removed_listener_is_not_called(self):
+        bus = FrameBus(4)
+        seen = []
+        bus.add_listener(seen.append)
+        bus.publish("a")
+        bus.remove_listener(seen.append)
+        bus.publish("b")
+        assert [packet.frame for packet in seen] == ["a"]
+
+    def test_failing_listener_does_not_break_publish(self):
+        bus = FrameBus(4)
+        seen = []
+
+        def failing(packet):
+            raise RuntimeError("boom")
+
+        bus.add_listener(failing)
+        bus.add_listener(seen.append)
+        packet = bus.publish("a")
+        assert seen == [packet]
+        assert bus.latest is packet
@@ -0,0 +1,227 @@
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import Catalog
+from frame_bus import FrameBus
+from headless import ControlService, ServiceServer, load_service
+from preset_store import DEFAULT_PRESET_NAMES, PresetStore
+
+CAMERAS = [
+    {"ip": "10.0.0.1", "type": "ptzoptics"},
+    {"ip": "10.0.0.2", "type": "sony"},
+]
+
+
+class _FakeCamera:
+    def __init__(self, cam_cfg):
+        self.cfg = cam_cfg
+        self.calls = []
+        self.zoom_pos = 1234
+        self.closed = False
+
+    def pan_left(self, pan_speed, tilt_speed):
+        self.calls.append(("pan_left", pan_speed, tilt_speed))
+        return "Command Completed"
+
+    def preset_set(self, preset):
+        self.calls.append(("preset_set", preset))
+
+    def preset_recall(self, preset):
+        self.calls.append(("preset_recall", preset))
+        return "Command Completed"
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeCapture:
+    def __init__(self):
+        self.bus = FrameBus()
+        self.released = False
+
+    def subscribe(self, mode="latest", every=1):
+        return self.bus.subscribe(mode, every)
+
+    def release(self, wait=True):
+        self.released = True
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+@pytest.fixture
+def service(tmp_path):
+    cameras = {}
+
+    def connect(cam_cfg):
+        cameras[cam_cfg["ip"]] = _FakeCamera(cam_cfg)
+        return cameras[cam_cfg["ip"]]
+
+    store = PresetStore(str(tmp_path / "presets.json"), debounce=0.01)
+    service = ControlService(CAMERAS, store, str(tmp_path), connect=connect)
+    service.fake_cameras = cameras
+    yield service
+    service.close()
+
+
+class TestControlService:
+    def test_cameras_and_connections(self, service):
+        reply = service.handle({"id": 1, "cmd": "cameras"})
+        assert reply["ok"] and reply["id"] == 1
+        assert [cam["key"] for cam in reply["result"]] == [
+            "10.0.0.1|ptzoptics",
+            "10.0.0.2|sony",
+        ]
+        assert _wait_for(lambda: len(service.fake_cameras) == 2)
+
+    def test_call_runs_on_the_camera_worker(self, service):
+        reply = service.handle(
+            {"cmd": "call", "camera": 1, "method": "pan_left", "args": [7, 5]}
+        )
+        assert reply == {"id": None, "ok": True, "result": "Command Completed"}
+        assert service.fake_cameras["10.0.0.2"].calls == [("pan_left", 7, 5)]
+
+    def test_camera_by_key(self, service):
+        reply = service.handle(
+            {"cmd": "preset_recall", "camera": "10.0.0.2|sony", "slot": 9}
+        )
+        assert reply["ok"]
+        assert service.fake_cameras["10.0.0.2"].calls == [("preset_recall", 9)]
+
+    def test_any_visca_slot_is_recalled_and_set(self, service):
+        assert service.handle({"cmd": "preset_recall", "slot": 0})["ok"]
+        assert service.handle({"cmd": "preset_set", "slot": 127})["ok"]
+        assert service.fake_cameras["10.0.0.1"].calls == [
+            ("preset_recall", 0),
+            ("preset_set", 127),
+        ]
+        assert "127" not in service.preset_store.presets("10.0.0.1|ptzoptics")
+
+    def test_catalog_names_every_visca_slot(self, tmp_path):
+        catalog = Catalog(str(tmp_path / "catalog.db"))
+        service = ControlService(
+            CAMERAS[:1], catalog, str(tmp_path), connect=_FakeCamera
+        )
+        reply = service.handle({"cmd": "rename_preset", "slot": 40, "name": "Choir"})
+        assert reply["ok"]
+        assert catalog.slot("10.0.0.1|ptzoptics", 40)["name"] == "Choir"
+        service.close()
+
+    def test_get_property(self, service):
+        reply = service.handle({"cmd": "get", "camera": 0, "property": "zoom_pos"})
+        assert reply["result"] == 1234
+
+    @pytest.mark.parametrize(
+        "request_, error",
+        [
+            ({"cmd": "nope"}, "Unknown command"),
+            ({"cmd": "call", "method": "close"}, "Unknown camera method"),
+            ({"cmd": "call", "method": "pan_left", "args": 7}, "args must be a list"),
+            ({"cmd": "get", "property": "socket"}, "Unknown camera property"),
+            ({"cmd": "presets", "camera": 5}, "Unknown camera"),
+            ({"cmd": "preset_recall", "slot": -1}, "slot must be"),
+            ({"cmd": "preset_recall", "slot": 128}, "slot must be"),
+            ({"cmd": "preset_set", "slot": True}, "slot must be"),
+            ({"cmd": "preset_set", "slot": 10, "name": "Choir"}, "from 1 to 9"),
+            ({"cmd": "rename_preset", "slot": 0, "name": "Choir"}, "from 1 to 9"),
+            ({"cmd": "rename_preset", "slot": 127, "name": "Choir"}, "slot must be"),
+            ({"cmd": "rename_preset", "slot": 1, "name": " "}, "name must be"),
+            (["cmd"], "JSON object"),
+        ],
+    )
+    def test_bad_requests(self, service, request_, error):
+        reply = service.handle(request_)
+        assert reply["ok"] is False
+        assert error in reply["error"]
+
+    def test_camera_errors_are_reported(self, service):
+        with pytest.warns(UserWarning):
+            reply = service.handle({"cmd": "call", "method": "pan_left", "args": []})
+        assert reply["ok"] is False
+        assert "TypeError" in reply["error"]
+
+    def test_presets_are_persisted(self, tmp_path, service):
+        assert service.handle({"cmd": "presets", "camera": 0})["result"]["1"] == {
+            "name": DEFAULT_PRESET_NAMES[0],
+            "image_path": "",
+        }
+        service.handle(
+            {"cmd": "rename_preset", "camera": 0, "slot": 1, "name": "Choir"}
+        )
+        reply = service.handle(
+            {"cmd": "preset_set", "camera": 0, "slot": 2, "name": "Pulpit"}
+        )
+        assert reply["ok"]
+        assert service.fake_cameras["10.0.0.1"].calls == [("preset_set", 2)]
+        service.preset_store.flush()
+        with open(tmp_path / "presets.json", "r", encoding="utf-8") as f:
+            presets = json.load(f)["cameras"]["10.0.0.1|ptzoptics"]["presets"]
+        assert presets["1"]["name"] == "Choir"
+        assert presets["2"]["name"] == "Pulpit"
+
+    def test_preset_set_saves_snapshot_from_stream(self, tmp_path):
+        captures = []
+
+        def capture(cam_cfg):
+            captures.append(_FakeCapture())
+            return captures[-1]
+
+        store = PresetStore(str(tmp_path / "presets.json"))
+        service = ControlService(
+            CAMERAS[:1], store, str(tmp_path), connect=_FakeCamera, capture=capture
+        )
+        assert service.handle({"cmd": "cameras"})["result"][0]["streaming"]
+        assert service.handle({"cmd": "preset_set", "camera": 0, "slot": 3})["ok"]
+        captures[0].bus.publish(np.full((90, 160, 3), 40, np.uint8))
+        assert _wait_for(
+            lambda: store.slot("10.0.0.1|ptzoptics", 3)["image_path"]
+            == os.path.join("Images", "10.0.0.1_ptzoptics", "3.jpg")
+        )
+        assert os.path.exists(tmp_path / "Images" / "10.0.0.1_ptzoptics" / "3.jpg")
+        service.close()
+        assert captures[0].released
+
+
+class TestServiceServer:
+    def test_json_lines_round_trip(self, service):
+        server = ServiceServer(("127.0.0.1", 0), service)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with socket.create_connection(server.server_address, timeout=2.0) as sock:
+                reader = sock.makefile("rb")
+                sock.sendall(b'{"id": 1, "cmd": "status"}\n\nnot json\n')
+                status = json.loads(reader.readline())
+                invalid = json.loads(reader.readline())
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert status["ok"] and len(status["result"]["cameras"]) == 2
+        assert invalid["ok"] is False and "Invalid JSON" in invalid["error"]
+
+
+class TestLoadService:
+    def test_loads_cameras_json(self, tmp_path):
+        cameras = [{"ip": "127.0.0.1", "type": "testcamera"}]
+        (tmp_path / "cameras.json").write_text(json.dumps({"cameras": cameras}))
+        service = load_service(str(tmp_path))
+        try:
+            assert service.cameras == cameras
+            assert isinstance(service.preset_store, PresetStore)
+            reply = service.handle({"cmd": "preset_recall", "camera": 0, "slot": 1})
+            assert reply == {"id": None, "ok": True, "result": "Command Completed"}
+        finally:
+            service.close()
@@ -0,0 +1,117 @@
+import io
+import os
+import sys
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from camera_streams import TESTCAMERA_DEFAULT_STREAM_URL
+from cameras import testcamera_sim as sim
+from frame_bus import FrameBus
+from mjpeg_capture import MJPEGCapture, decode_jpeg, encode_frame, jpeg_size
+
+
+def _jpeg(value):
+    frame = np.full((6, 8, 3), value, dtype=np.uint8)
+    return cv2.imencode(".jpg", frame)[1].tobytes()
+
+
+def _frame_jpeg(width=320, height=180):
+    frame = np.full((height, width, 3), 80, np.uint8)
+    return cv2.imencode(".jpg", frame)[1].tobytes()
+
+
+def _multipart(parts, with_length=True):
+    body = b""
+    for part in parts:
+        body += b"--frame\r\nContent-Type: image/jpeg\r\n"
+        if with_length:
+            body += f"Content-Length: {len(part)}\r\n".encode("ascii")
+        body += b"\r\n" + part + b"\r\n"
+    return io.BufferedReader(io.BytesIO(body))
+
+
+class TestMJPEGCapture:
+    def test_reads_parts_with_content_length(self):
+        parts = [_jpeg(10), _jpeg(200)]
+        with patch("mjpeg_capture.urlopen", return_value=_multipart(parts)):
+            cap = MJPEGCapture("http://cam/stream.mjpg")
+        assert cap.isOpened()
+        assert cap.read() == (True, parts[0])
+        assert cap.read() == (True, parts[1])
+        assert cap.read() == (False, None)
+
+    def test_reads_parts_without_content_length(self):
+        parts = [_jpeg(10), _jpeg(200)]
+        with patch(
+            "mjpeg_capture.urlopen", return_value=_multipart(parts, with_length=False)
+        ):
+            cap = MJPEGCapture("http://cam/stream.mjpg")
+        assert cap.read() == (True, parts[0])
+        assert cap.read() == (True, parts[1])
+
+    def test_open_failure(self):
+        with patch("mjpeg_capture.urlopen", side_effect=OSError("refused")), patch(
+            "mjpeg_capture.warn"
+        ):
+            cap = MJPEGCapture("http://cam/stream.mjpg")
+        assert not cap.isOpened()
+        assert cap.read() == (False, None)
+
+    def test_decode_jpeg_returns_rgb(self):
+        frame = np.zeros((6, 8, 3), dtype=np.uint8)
+        frame[:, :, 2] = 255  # Red in BGR
+        decoded = decode_jpeg(cv2.imencode(".jpg", frame)[1].tobytes())
+        assert decoded.shape == (6, 8, 3)
+        assert decoded[0, 0, 0] > 200 and decoded[0, 0, 2] < 50
+
+    def test_jpeg_size_reads_header(self):
+        frame = np.zeros((36, 64, 3), dtype=np.uint8)
+        assert jpeg_size(cv2.imencode(".jpg", frame)[1].tobytes()) == (64, 36)
+        assert jpeg_size(b"\xff\xd8not a jpeg") is None
+
+    def test_decode_jpeg_to_size(self):
+        frame = np.full((360, 640, 3), 100, dtype=np.uint8)
+        data = cv2.imencode(".jpg", frame)[1].tobytes()
+        assert decode_jpeg(data, (80, 45)).shape == (45, 80, 3)
+        assert decode_jpeg(data, (300, 150)).shape == (150, 300, 3)
+
+    def test_reads_simulator_stream(self):
+        sim.ensure_server()
+        cap = MJPEGCapture(TESTCAMERA_DEFAULT_STREAM_URL)
+        try:
+            ok, data = cap.read()
+            assert ok
+            assert decode_jpeg(data).shape == (540, 960, 3)
+        finally:
+            cap.release()
+
+
+class TestEncodeFrame:
+    def test_jpeg_at_source_size_passes_through(self):
+        bus = FrameBus()
+        data = _frame_jpeg()
+        packet = bus.publish(None, jpeg=data)
+        assert encode_frame(packet) is data
+        assert encode_frame(packet, (320, 180)) is data
+        assert not packet.decoded
+
+    def test_jpeg_is_scaled(self):
+        packet = FrameBus().publish(None, jpeg=_frame_jpeg())
+        assert jpeg_size(encode_frame(packet, (160, 90))) == (160, 90)
+
+    def test_preview_frame_next_to_the_jpeg(self):
+        # A capture with output_size publishes its small frame and the JPEG
+        data = _frame_jpeg()
+        packet = FrameBus().publish(np.zeros((45, 80, 3), np.uint8), jpeg=data)
+        assert encode_frame(packet) is data
+        assert jpeg_size(encode_frame(packet, (160, 90))) == (160, 90)
+        assert jpeg_size(encode_frame(packet, (80, 45))) == (80, 45)
+
+    def test_raw_frame_is_encoded(self):
+        packet = FrameBus().publish(np.zeros((90, 160, 3), np.uint8))
+        assert jpeg_size(encode_frame(packet)) == (160, 90)
+        assert jpeg_size(encode_frame(packet, (80, 45))) == (80, 45)
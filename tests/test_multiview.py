@@ -0,0 +1,140 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_bus import FrameBus
+from multiview import MultiviewGrid, grid_layout
+
+TILE_SIZE = (32, 18)
+
+
+class _FakeCapture:
+    def __init__(self):
+        self.bus = FrameBus(4)
+
+
+class _FakeWidget:
+    def __init__(self, delay=0.0):
+        self.image = None
+        self.updates = 0
+        self.delay = delay
+
+    def update(self):
+        self.updates += 1
+        time.sleep(self.delay)
+
+
+class _FakeAfter:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, ms, callback):
+        self.calls.append((ms, callback))
+
+    def run(self):
+        calls, self.calls = self.calls, []
+        for _, callback in calls:
+            callback()
+
+
+def _frame(value):
+    return np.full((TILE_SIZE[1], TILE_SIZE[0], 3), value, dtype=np.uint8)
+
+
+def _grid(count, delay=0.0, budget_ms=8.0):
+    after = _FakeAfter()
+    widgets = [_FakeWidget(delay) for _ in range(count)]
+    grid = MultiviewGrid(after, widgets, TILE_SIZE, budget_ms=budget_ms, max_fps=0)
+    captures = [_FakeCapture() for _ in range(count)]
+    for index, capture in enumerate(captures):
+        grid.attach(index, capture)
+    return grid, after, widgets, captures
+
+
+class TestGridLayout:
+    def test_four_tiles_in_two_by_two(self):
+        assert grid_layout(4, 640, 360) == [
+            (0, 0, 320, 180),
+            (320, 0, 320, 180),
+            (0, 180, 320, 180),
+            (320, 180, 320, 180),
+        ]
+
+    def test_partial_last_row(self):
+        layout = grid_layout(5, 600, 400)
+        assert len(layout) == 5
+        assert {tile[2:] for tile in layout} == {(200, 200)}
+        assert layout[-1][:2] == (200, 200)
+
+    def test_fixed_columns(self):
+        layout = grid_layout(4, 400, 100, columns=4)
+        assert [tile[0] for tile in layout] == [0, 100, 200, 300]
+
+    def test_no_tiles(self):
+        assert grid_layout(0, 640, 360) == []
+
+
+class TestMultiviewGrid:
+    def test_new_frames_render_in_their_tiles(self):
+        grid, after, widgets, captures = _grid(2)
+        captures[1].bus.publish(_frame(7))
+        assert len(after.calls) == 1
+        after.run()
+        assert widgets[0].updates == 0
+        assert widgets[1].image.getpixel((0, 0)) == (7, 7, 7, 255)
+
+    def test_frames_from_all_tiles_share_one_callback(self):
+        grid, after, widgets, captures = _grid(4)
+        for value, capture in enumerate(captures):
+            capture.bus.publish(_frame(value))
+        assert len(after.calls) == 1
+        after.run()
+        assert [widget.updates for widget in widgets] == [1, 1, 1, 1]
+
+    def test_budget_defers_remaining_tiles(self):
+        grid, after, widgets, captures = _grid(4, delay=0.004, budget_ms=5.0)
+        for capture in captures:
+            capture.bus.publish(_frame(1))
+        after.run()
+        first_pass = [widget.updates for widget in widgets]
+        assert 0 < sum(first_pass) < 4
+        assert grid.deferred > 0
+        while after.calls:
+            after.run()
+        assert [widget.updates for widget in widgets] == [1, 1, 1, 1]
+
+    def test_tiles_take_turns_when_over_budget(self):
+        grid, after, widgets, captures = _grid(3, delay=0.01, budget_ms=1.0)
+        for _ in range(3):
+            for capture in captures:
+                capture.bus.publish(_frame(1))
+            after.run()
+        assert [widget.updates for widget in widgets] == [1, 1, 1]
+
+    def test_detach_stops_rendering(self):
+        grid, after, widgets, captures = _grid(2)
+        assert grid.detach(0) is captures[0]
+        captures[0].bus.publish(_frame(1))
+        after.run()
+        assert widgets[0].updates == 0
+        assert grid.capture(0) is None
+
+    def test_close_returns_attached_captures(self):
+        grid, after, widgets, captures = _grid(3)
+        grid.detach(1)
+        assert grid.close() == [captures[0], captures[2]]
+
+    def test_unchanged_scene_is_not_rendered(self):
+        grid, after, widgets, captures = _grid(2)
+        captures[0].bus.publish(_frame(1), scene=1)
+        after.run()
+        captures[0].bus.publish(_frame(1), scene=1)
+        assert after.calls == []
+        captures[0].bus.publish(_frame(1), scene=1)
+        captures[1].bus.publish(_frame(2), scene=1)
+        after.run()
+        assert [widget.updates for widget in widgets] == [1, 1]
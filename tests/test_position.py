@@ -0,0 +1,171 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from command_worker import CommandWorker
+from position import PositionTracker, read_position
+
+
+class _MovingCamera:
+    """Head moving linearly from `start` to `target` in `duration` seconds"""
+
+    def __init__(self, start, target=None, duration=0.0, stop_at=None):
+        self.start = dict(start)
+        self.target = dict(target or start)
+        self.duration = duration
+        self.stop_at = stop_at  # Fraction of the way where the head stalls
+        self.began = time.monotonic()
+        self.reads = 0
+        self.cleared = 0
+
+    def _axis(self, axis):
+        progress = 1.0
+        if self.duration > 0:
+            progress = min(1.0, (time.monotonic() - self.began) / self.duration)
+        if self.stop_at is not None:
+            progress = min(progress, self.stop_at)
+        start = self.start[axis]
+        return round(start + (self.target.get(axis, start) - start) * progress)
+
+    @property
+    def pan_tilt_pos(self):
+        self.reads += 1
+        return [self._axis("pan"), self._axis("tilt")]
+
+    @property
+    def zoom_pos(self):
+        return [self._axis("zoom")]
+
+    @property
+    def focus_pos(self):
+        return [self._axis("focus")]
+
+    def clear_cache(self):
+        self.cleared += 1
+
+    def close(self):
+        pass
+
+
+HOME = {"pan": 0x8000, "tilt": 0x8000, "zoom": 0, "focus": 0x1000}
+
+
+@pytest.fixture
+def tracking():
+    made = []
+
+    def make(camera, **kwargs):
+        worker = CommandWorker(lambda: camera)
+        tracker = PositionTracker(worker, **kwargs)
+        made.append((worker, tracker))
+        return tracker
+
+    yield make
+    for worker, tracker in made:
+        tracker.close()
+        worker.close(timeout=1.0)
+
+
+class TestReadPosition:
+    def test_decodes_inquiry_digits(self):
+        class Camera:
+            pan_tilt_pos = ["090c0400", "07050300"]
+            zoom_pos = ["1030808"]
+            focus_pos = ["0000"]
+
+            def clear_cache(self):
+                self.cleared = True
+
+        camera = Camera()
+        assert read_position(camera) == {
+            "pan": 0x9C40,
+            "tilt": 0x7530,
+            "zoom": 0x1388,
+            "focus": 0,
+        }
+        assert camera.cleared
+
+
+class TestPositionTracker:
+    def test_reports_arrival_at_target(self, tracking):
+        target = {"pan": 0xA000, "zoom": 0x2000}
+        camera = _MovingCamera(HOME, target, duration=0.4)
+        tracker = tracking(camera, min_interval=0.01, max_interval=0.2)
+        result = tracker.watch(target, timeout=5.0).result(timeout=5.0)
+        assert result["arrived"]
+        assert result["pose"]["pan"] == pytest.approx(0xA000, abs=16)
+        assert result["pose"]["zoom"] == pytest.approx(0x2000, abs=64)
+        assert 0.3 < result["elapsed"] < 1.0
+        assert result["polls"] == camera.reads
+
+    def test_polls_less_than_fixed_rate_on_slow_moves(self, tracking):
+        target = {"pan": 0xC000}
+        camera = _MovingCamera(HOME, target, duration=1.0)
+        tracker = tracking(camera, min_interval=0.01, max_interval=0.5)
+        result = tracker.watch(target, timeout=5.0).result(timeout=5.0)
+        assert result["arrived"]
+        # Polling every min_interval would have taken about 100 reads
+        assert result["polls"] < 40
+
+    def test_no_polling_when_idle(self, tracking):
+        camera = _MovingCamera(HOME)
+        tracker = tracking(camera, min_interval=0.01)
+        tracker.watch(HOME).result(timeout=2.0)
+        reads = camera.reads
+        time.sleep(0.1)
+        assert camera.reads == reads
+        assert not tracker.watching
+
+    def test_stall_is_not_arrival(self, tracking):
+        target = {"pan": 0xC000}
+        camera = _MovingCamera(HOME, target, duration=0.2, stop_at=0.5)
+        tracker = tracking(camera, min_interval=0.01, max_interval=0.05)
+        result = tracker.watch(target, timeout=5.0).result(timeout=5.0)
+        assert not result["arrived"]
+        assert result["pose"]["pan"] == 0xA000
+
+    def test_settles_without_target(self, tracking):
+        camera = _MovingCamera(HOME, {"tilt": 0x9000}, duration=0.2)
+        tracker = tracking(camera, min_interval=0.01, max_interval=0.05)
+        result = tracker.watch().result(timeout=5.0)
+        assert result["arrived"]
+        assert result["pose"]["tilt"] == 0x9000
+
+    def test_timeout(self, tracking):
+        target = {"pan": 0xC000}
+        camera = _MovingCamera(HOME, target, duration=10.0)
+        tracker = tracking(camera, min_interval=0.01, max_interval=0.05)
+        result = tracker.watch(target, timeout=0.2).result(timeout=2.0)
+        assert not result["arrived"]
+        assert result["elapsed"] >= 0.2
+
+    def test_new_watch_cancels_previous(self, tracking):
+        camera = _MovingCamera(HOME, {"pan": 0xC000}, duration=10.0)
+        tracker = tracking(camera, min_interval=0.01)
+        first = tracker.watch({"pan": 0xC000})
+        second = tracker.watch({"pan": 0xC000}, timeout=0.1)
+        assert first.cancelled()
+        assert not second.result(timeout=2.0)["arrived"]
+
+    def test_callback_goes_through_after(self, tracking):
+        calls = []
+        done = threading.Event()
+
+        def after(delay, fn):
+            calls.append(delay)
+            fn()
+
+        tracker = tracking(_MovingCamera(HOME), after=after)
+        tracker.watch(HOME, callback=lambda result: done.set())
+        assert done.wait(2.0)
+        assert calls == [0]
+
+    def test_unknown_axis(self, tracking):
+        tracker = tracking(_MovingCamera(HOME))
+        with pytest.raises(ValueError):
+            tracker.watch({"roll": 1})
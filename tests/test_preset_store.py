@@ -0,0 +1,117 @@
+import json
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preset_store import (
+    DEFAULT_PRESET_NAMES,
+    PresetStore,
+    load_presets,
+    normalize_slots,
+    write_json_atomic,
+)
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+class TestPresetHelpers:
+    def test_normalize_fills_defaults_and_strips(self):
+        slots = normalize_slots({"2": {"name": "  Pulpit ", "image_path": " a.jpg "}})
+        assert slots["1"] == {"name": DEFAULT_PRESET_NAMES[0], "image_path": ""}
+        assert slots["2"] == {"name": "Pulpit", "image_path": "a.jpg"}
+        assert len(slots) == 9
+
+    def test_load_missing_or_broken_file(self, tmp_path):
+        path = tmp_path / "presets.json"
+        assert load_presets(str(path)) == {"version": 1, "cameras": {}}
+        path.write_text("{not json", encoding="utf-8")
+        assert load_presets(str(path)) == {"version": 1, "cameras": {}}
+
+    def test_atomic_write_keeps_old_file_on_failure(self, tmp_path):
+        path = str(tmp_path / "presets.json")
+        write_json_atomic(path, {"version": 1})
+        with patch("preset_store.json.dump", side_effect=ValueError("boom")):
+            with pytest.raises(ValueError):
+                write_json_atomic(path, {"version": 2})
+        assert _read(path) == {"version": 1}
+        assert os.listdir(tmp_path) == ["presets.json"]
+
+
+class TestPresetStore:
+    def test_new_camera_gets_default_slots(self, tmp_path):
+        store = PresetStore(str(tmp_path / "presets.json"), debounce=0.01)
+        presets = store.presets("1.2.3.4|ptzoptics")
+        assert presets["3"]["name"] == DEFAULT_PRESET_NAMES[2]
+        store.close()
+
+    def test_reads_existing_file(self, tmp_path):
+        path = str(tmp_path / "presets.json")
+        write_json_atomic(
+            path, {"cameras": {"cam": {"presets": {"1": {"name": "Choir"}}}}}
+        )
+        store = PresetStore(path)
+        assert store.exists
+        assert store.slot("cam", 1)["name"] == "Choir"
+        assert not store.dirty
+        store.close()
+
+    def test_burst_of_changes_is_one_write(self, tmp_path):
+        path = str(tmp_path / "presets.json")
+        store = PresetStore(path, debounce=0.05)
+        for index in range(1, 10):
+            store.update_slot("cam", index, name=f"Shot {index}")
+        assert _wait_for(lambda: store.writes >= 1)
+        assert not store.dirty
+        assert store.writes == 1
+        assert _read(path)["cameras"]["cam"]["presets"]["9"]["name"] == "Shot 9"
+        store.close()
+
+    def test_max_delay_bounds_continuous_changes(self, tmp_path):
+        store = PresetStore(str(tmp_path / "presets.json"), debounce=0.05, max_delay=0.1)
+        deadline = time.monotonic() + 0.3
+        while time.monotonic() < deadline:
+            store.update_slot("cam", 1, name=str(time.monotonic()))
+            time.sleep(0.01)
+        assert store.writes >= 1
+        store.close()
+
+    def test_close_flushes_pending_changes(self, tmp_path):
+        path = str(tmp_path / "presets.json")
+        store = PresetStore(path, debounce=60.0)
+        store.update_slot("cam", 4, name="Altar")
+        assert not os.path.exists(path)
+        store.close()
+        assert _read(path)["cameras"]["cam"]["presets"]["4"]["name"] == "Altar"
+
+    def test_returned_presets_are_copies(self, tmp_path):
+        store = PresetStore(str(tmp_path / "presets.json"))
+        store.presets("cam")["1"]["name"] = "changed"
+        assert store.slot("cam", 1)["name"] == DEFAULT_PRESET_NAMES[0]
+        store.close()
+
+    def test_failed_write_stays_dirty(self, tmp_path):
+        store = PresetStore(str(tmp_path / "presets.json"), debounce=60.0)
+        store.update_slot("cam", 1, name="Band")
+        with patch("preset_store.write_json_atomic", side_effect=OSError("full")), patch(
+            "preset_store.warn"
+        ) as mock_warn:
+            store.flush()
+        mock_warn.assert_called_once()
+        assert store.dirty
+        store.close()
+        assert not store.dirty
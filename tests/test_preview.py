@@ -0,0 +1,75 @@
+import os
+import sys
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preview import PreviewSurface
+
+
+class _FakeWidget:
+    def __init__(self):
+        self.image = None
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+
+
+def _frame(value, height=540, width=960):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+class TestPreviewSurface:
+    def test_show_sets_rgba_image_of_display_size(self):
+        widget = _FakeWidget()
+        surface = PreviewSurface(widget, 300, 150)
+        surface.show(_frame(10))
+        assert widget.image is surface.image
+        assert widget.image.mode == "RGBA"
+        assert widget.image.size == (300, 150)
+        assert widget.image.getpixel((0, 0)) == (10, 10, 10, 255)
+        assert widget.updates == 1
+
+    def test_frames_are_blitted_into_the_same_two_images(self):
+        widget = _FakeWidget()
+        surface = PreviewSurface(widget, 300, 150)
+        images = set()
+        for value in range(6):
+            surface.show(_frame(value))
+            images.add(id(widget.image))
+            assert widget.image.getpixel((5, 5)) == (value, value, value, 255)
+        assert len(images) == 2
+
+    def test_frame_of_display_size_is_not_rescaled(self):
+        widget = _FakeWidget()
+        surface = PreviewSurface(widget, 300, 150)
+        frame = np.zeros((150, 300, 3), dtype=np.uint8)
+        frame[0, 0] = (1, 2, 3)
+        surface.show(frame)
+        assert widget.image.getpixel((0, 0)) == (1, 2, 3, 255)
+
+    def test_none_frame_is_ignored(self):
+        widget = _FakeWidget()
+        surface = PreviewSurface(widget, 300, 150)
+        surface.show(None)
+        assert widget.image is None
+        assert surface.frames_shown == 0
+
+    def test_show_writes_into_preallocated_buffers(self):
+        surface = PreviewSurface(_FakeWidget(), 300, 150)
+        buffers = [buffer.ctypes.data for buffer in surface._buffers]
+        scaled = surface._scaled.ctypes.data
+        with patch("preview.cv2.resize", wraps=cv2.resize) as resize, patch(
+            "preview.cv2.cvtColor", wraps=cv2.cvtColor
+        ) as cvt_color:
+            for value in range(4):
+                surface.show(_frame(value))
+        for call in resize.call_args_list:
+            assert call.kwargs["dst"].ctypes.data == scaled
+        for call in cvt_color.call_args_list:
+            assert call.kwargs["dst"].ctypes.data in buffers
+        assert [buffer.ctypes.data for buffer in surface._buffers] == buffers
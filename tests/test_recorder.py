@@ -0,0 +1,134 @@
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_bus import FrameBus
+from recorder import Recorder, recording_path
+
+
+def _jpeg(value, size=(64, 36)):
+    frame = np.full((size[1], size[0], 3), value, np.uint8)
+    return cv2.imencode(".jpg", frame)[1].tobytes()
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+@pytest.fixture
+def recording():
+    recorders = []
+
+    def make(bus, **kwargs):
+        recorders.append(Recorder(bus, **kwargs))
+        return recorders[-1]
+
+    yield make
+    for recorder in recorders:
+        recorder.close()
+
+
+def _publish(bus, jpegs, start=1000.0, fps=10):
+    for index, jpeg in enumerate(jpegs):
+        bus.publish(None, timestamp=start + index / fps, jpeg=jpeg)
+        time.sleep(0.002)  # Stay within the bus ring
+
+
+class TestRecorder:
+    def test_ring_keeps_the_last_seconds(self, recording):
+        bus = FrameBus()
+        recorder = recording(bus, seconds=1.0)
+        jpegs = [_jpeg(value) for value in range(40)]
+        _publish(bus, jpegs)
+        assert _wait_for(lambda: recorder.buffered[2] == pytest.approx(1.0))
+        frames, size, span = recorder.buffered
+        assert frames == 11
+        assert size == sum(len(jpeg) for jpeg in jpegs[-11:])
+
+    def test_ring_is_capped_in_bytes(self, recording):
+        bus = FrameBus()
+        jpegs = [_jpeg(value) for value in range(20)]
+        cap = sum(len(jpeg) for jpeg in jpegs[-5:])
+        recorder = recording(bus, seconds=60.0, max_bytes=cap)
+        _publish(bus, jpegs)
+        assert _wait_for(lambda: recorder.buffered[0] == 5)
+        assert recorder.buffered[1] <= cap
+
+    def test_recording_starts_with_the_pre_roll(self, recording, tmp_path):
+        bus = FrameBus()
+        recorder = recording(bus, seconds=60.0)
+        before = [_jpeg(value) for value in range(5)]
+        after = [_jpeg(value) for value in range(100, 103)]
+        _publish(bus, before)
+        assert _wait_for(lambda: recorder.buffered[0] == 5)
+        path = str(tmp_path / "cam" / "clip.mjpeg")
+        future = recorder.start_recording(path)
+        assert _wait_for(lambda: recorder.recording == path)
+        _publish(bus, after, start=1001.0)
+        assert _wait_for(lambda: recorder.buffered[0] == 8)
+        recorder.stop_recording()
+        result = future.result(timeout=2.0)
+        assert result == {
+            "path": path,
+            "frames": 8,
+            "bytes": sum(len(jpeg) for jpeg in before + after),
+        }
+        with open(path, "rb") as f:
+            assert f.read() == b"".join(before + after)
+        assert recorder.recording is None
+
+    def test_recording_duration(self, recording, tmp_path):
+        bus = FrameBus()
+        recorder = recording(bus)
+        future = recorder.start_recording(str(tmp_path / "clip.mjpeg"), duration=0.1)
+        assert future.result(timeout=2.0)["frames"] == 0
+
+    def test_raw_frames_are_encoded_once_per_scene(self, recording, tmp_path):
+        bus = FrameBus()
+        recorder = recording(bus, size=(32, 18))
+        frame = np.zeros((36, 64, 3), np.uint8)
+        for scene in (1, 1, 1, 2):
+            bus.publish(frame, scene=scene)
+            time.sleep(0.002)
+        assert _wait_for(lambda: recorder.buffered[0] == 4)
+        ring = [jpeg for _, jpeg in recorder._ring]
+        assert ring[0] is ring[1] is ring[2]
+        assert ring[3] is not ring[0]
+        decoded = cv2.imdecode(np.frombuffer(ring[3], np.uint8), cv2.IMREAD_COLOR)
+        assert decoded.shape == (18, 32, 3)
+
+    def test_closed_bus_finishes_recording(self, recording, tmp_path):
+        bus = FrameBus()
+        recorder = recording(bus)
+        future = recorder.start_recording(str(tmp_path / "clip.mjpeg"))
+        assert _wait_for(lambda: recorder.recording is not None)
+        bus.close()
+        assert future.result(timeout=2.0)["frames"] == 0
+
+    def test_unwritable_path_fails_the_future(self, recording, tmp_path):
+        blocker = tmp_path / "file"
+        blocker.write_bytes(b"")
+        recorder = recording(FrameBus())
+        with pytest.warns(UserWarning):
+            future = recorder.start_recording(str(blocker / "clip.mjpeg"))
+            with pytest.raises(OSError):
+                future.result(timeout=2.0)
+
+    def test_recording_path(self):
+        import datetime
+
+        path = recording_path(
+            "app", "10.0.0.1_ptzoptics", datetime.datetime(2024, 5, 1, 9, 30)
+        )
+        assert path == os.path.join(
+            "app", "Recordings", "10.0.0.1_ptzoptics", "20240501_093000.mjpeg"
+        )
@@ -0,0 +1,128 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_bus import FrameBus
+from render_loop import FrameRenderScheduler
+
+
+class _FakeCapture:
+    def __init__(self):
+        self.bus = FrameBus(4)
+
+    def subscribe(self, mode="latest", every=1):
+        return self.bus.subscribe(mode, every)
+
+
+class _FakeAfter:
+    """Collects scheduled callbacks so tests can run them as the window would"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, ms, callback):
+        self.calls.append((ms, callback))
+
+    def run(self):
+        calls, self.calls = self.calls, []
+        for _, callback in calls:
+            callback()
+
+
+def _scheduler(max_fps=0):
+    after = _FakeAfter()
+    rendered = []
+    scheduler = FrameRenderScheduler(after, rendered.append, max_fps=max_fps)
+    return scheduler, after, rendered
+
+
+class TestFrameRenderScheduler:
+    def test_nothing_scheduled_without_frames(self):
+        scheduler, after, rendered = _scheduler()
+        scheduler.attach(_FakeCapture())
+        assert after.calls == []
+        assert rendered == []
+
+    def test_renders_new_frame_from_after_callback(self):
+        scheduler, after, rendered = _scheduler()
+        capture = _FakeCapture()
+        scheduler.attach(capture)
+        packet = capture.bus.publish("frame")
+        assert rendered == []  # Not on the publishing thread
+        after.run()
+        assert rendered == [packet]
+        assert scheduler.last_seq == packet.seq
+
+    def test_burst_is_coalesced_into_one_render_of_latest(self):
+        scheduler, after, rendered = _scheduler()
+        capture = _FakeCapture()
+        scheduler.attach(capture)
+        packets = [capture.bus.publish(index) for index in range(3)]
+        assert len(after.calls) == 1
+        after.run()
+        assert rendered == [packets[-1]]
+        assert scheduler.frames_ready == 3
+
+    def test_same_frame_is_not_rendered_twice(self):
+        scheduler, after, rendered = _scheduler()
+        capture = _FakeCapture()
+        scheduler.attach(capture)
+        capture.bus.publish("frame")
+        scheduler._pending = False
+        scheduler._frame_ready(capture.bus.latest)
+        after.run()
+        after.run()
+        assert len(rendered) == 1
+
+    def test_max_fps_delays_next_render(self):
+        scheduler, after, rendered = _scheduler(max_fps=10)
+        capture = _FakeCapture()
+        scheduler.attach(capture)
+        capture.bus.publish("a")
+        after.run()
+        capture.bus.publish("b")
+        delay, _ = after.calls[0]
+        assert 50 < delay <= 100
+
+    def test_attach_renders_existing_frame(self):
+        scheduler, after, rendered = _scheduler()
+        capture = _FakeCapture()
+        packet = capture.bus.publish("frame")
+        scheduler.attach(capture)
+        after.run()
+        assert rendered == [packet]
+
+    def test_attach_replaces_previous_capture(self):
+        scheduler, after, rendered = _scheduler()
+        old, new = _FakeCapture(), _FakeCapture()
+        scheduler.attach(old)
+        scheduler.attach(new)
+        old.bus.publish("old")
+        assert after.calls == []
+        packet = new.bus.publish("new")
+        after.run()
+        assert rendered == [packet]
+        assert scheduler.capture is new
+
+    def test_detach_drops_pending_render(self):
+        scheduler, after, rendered = _scheduler()
+        capture = _FakeCapture()
+        scheduler.attach(capture)
+        capture.bus.publish("frame")
+        scheduler.detach()
+        after.run()
+        assert rendered == []
+
+    def test_unchanged_scene_is_not_rendered(self):
+        scheduler, after, rendered = _scheduler()
+        capture = _FakeCapture()
+        scheduler.attach(capture)
+        first = capture.bus.publish("frame", scene=1)
+        after.run()
+        capture.bus.publish("frame", scene=1)
+        assert after.calls == []  # The window thread is not woken up
+        changed = capture.bus.publish("moved", scene=2)
+        after.run()
+        assert rendered == [first, changed]
+        assert scheduler.skipped == 1
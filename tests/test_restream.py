@@ -0,0 +1,268 @@
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_bus import FrameBus
+from mjpeg_capture import jpeg_size
+from restream import ProfileStream, RestreamHub, RestreamServer, normalize_profiles
+
+CAMERAS = [
+    {"ip": "10.0.0.1", "type": "ptzoptics"},
+    {"ip": "10.0.0.2", "type": "sony"},
+]
+
+
+def _jpeg(width=320, height=180, value=80):
+    frame = np.full((height, width, 3), value, np.uint8)
+    return cv2.imencode(".jpg", frame)[1].tobytes()
+
+
+class _FakeCapture:
+    def __init__(self):
+        self.bus = FrameBus()
+        self.released = False
+
+    def release(self, wait=True):
+        self.released = True
+        self.bus.close()
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+class TestProfileStream:
+    def test_viewers_share_one_encode_per_frame(self):
+        bus = FrameBus()
+        stream = ProfileStream(bus, size=(160, 90))
+        received = [[], []]
+
+        def view(frames):
+            with contextlib.closing(stream.frames(timeout=1.0)) as generator:
+                for jpg in generator:
+                    frames.append(jpg)
+                    if len(frames) == 3:
+                        break
+
+        threads = [
+            threading.Thread(target=view, args=(r,), daemon=True) for r in received
+        ]
+        for thread in threads:
+            thread.start()
+        for value in range(100):
+            if all(len(frames) >= 3 for frames in received):
+                break
+            bus.publish(None, jpeg=_jpeg(value=value))
+            time.sleep(0.01)
+        for thread in threads:
+            thread.join(2.0)
+        assert all(len(frames) == 3 for frames in received)
+        # Both viewers were served from the same encodes
+        assert stream.encoded <= bus.seq
+        assert set(received[0]) & set(received[1])
+        assert stream.viewers == 0
+        stream.close()
+
+    def test_snapshot_is_encoded_once_per_frame(self):
+        bus = FrameBus()
+        stream = ProfileStream(bus, size=(160, 90))
+        bus.publish(None, jpeg=_jpeg())
+        first = stream.snapshot()
+        assert stream.snapshot() is first
+        assert stream.encoded == 1
+        bus.publish(None, jpeg=_jpeg(value=200))
+        assert stream.snapshot() is not first
+        assert stream.encoded == 2
+
+    def test_snapshot_without_frames(self):
+        assert ProfileStream(FrameBus()).snapshot(timeout=0.01) is None
+
+    def test_encoder_stops_when_idle(self):
+        bus = FrameBus()
+        stream = ProfileStream(bus, idle_timeout=0.0)
+        assert list(stream.frames(timeout=0.05)) == []
+        assert _wait_for(lambda: not stream.running)
+
+    def test_max_fps_skips_frames(self):
+        bus = FrameBus()
+        stream = ProfileStream(bus, max_fps=5)
+        generator = stream.frames(timeout=1.0)
+        thread = threading.Thread(target=lambda: next(generator), daemon=True)
+        thread.start()
+        assert _wait_for(lambda: stream.running)
+        frame = np.zeros((9, 16, 3), np.uint8)
+        # Capture timestamps 50 ms apart, only every fourth is due at 5 fps.
+        # Each due frame is the newest when published, so the encoder sees it
+        for timestamp in range(0, 1050, 50):
+            packet = bus.publish(frame, timestamp=timestamp / 1000)
+            if timestamp % 200 == 0:
+                assert _wait_for(lambda: stream._source_seq == packet.seq)
+        thread.join(2.0)
+        assert stream.encoded == 6
+        stream.close()
+
+    def test_closed_bus_ends_viewers(self):
+        bus = FrameBus()
+        stream = ProfileStream(bus)
+        generator = stream.frames(timeout=5.0)
+        bus.close()
+        assert list(generator) == []
+
+
+class TestRestreamHub:
+    @pytest.fixture
+    def hub(self):
+        captures = []
+
+        def capture(cam_cfg):
+            captures.append(_FakeCapture())
+            return captures[-1]
+
+        hub = RestreamHub(CAMERAS, capture=capture, linger=0.05)
+        hub.fake_captures = captures
+        yield hub
+        hub.close()
+
+    def test_one_capture_per_camera(self, hub):
+        first = hub.acquire(0, "360p")
+        assert hub.acquire(0, "360p") is first
+        hub.acquire(0, "source")
+        assert len(hub.fake_captures) == 1
+        hub.acquire(1, "source")
+        assert len(hub.fake_captures) == 2
+
+    def test_ended_capture_is_restarted(self, hub):
+        hub.acquire(0, "360p")
+        hub.fake_captures[0].bus.close()
+        hub.acquire(0, "360p")
+        assert len(hub.fake_captures) == 2
+        assert hub.fake_captures[0].released
+
+    def test_capture_is_released_after_the_last_viewer(self, hub):
+        hub.acquire(0, "360p")
+        stream = hub.acquire(0, "source")
+        hub.release(0)
+        time.sleep(0.1)
+        assert not hub.fake_captures[0].released
+        hub.release(0)
+        assert _wait_for(lambda: hub.fake_captures[0].released)
+        assert not hub.stats()[0]["streaming"]
+        # The next viewer starts a new capture and streams
+        assert hub.acquire(0, "source") is not stream
+        assert len(hub.fake_captures) == 2
+
+    def test_viewer_returning_within_linger_keeps_the_capture(self, hub):
+        hub.acquire(0, "360p")
+        hub.release(0)
+        hub.acquire(0, "360p")
+        time.sleep(0.1)
+        assert not hub.fake_captures[0].released
+        assert len(hub.fake_captures) == 1
+
+    def test_slow_camera_does_not_hold_up_the_others(self):
+        opening = threading.Event()
+        opened = threading.Event()
+        started = []
+
+        def capture(cam_cfg):
+            started.append(cam_cfg["ip"])
+            if cam_cfg is CAMERAS[0]:
+                opening.set()
+                opened.wait(5.0)
+            return _FakeCapture()
+
+        hub = RestreamHub(CAMERAS, capture=capture)
+        viewers = [
+            threading.Thread(target=hub.acquire, args=(0, "360p"), daemon=True)
+            for _ in range(2)
+        ]
+        for viewer in viewers:
+            viewer.start()
+        assert opening.wait(2.0)
+        began = time.monotonic()
+        hub.acquire(1, "360p")
+        assert [cam["streaming"] for cam in hub.stats()] == [False, True]
+        assert time.monotonic() - began < 0.5
+        opened.set()
+        for viewer in viewers:
+            viewer.join(2.0)
+        # The second viewer waited for the capture the first one started
+        assert sorted(started) == ["10.0.0.1", "10.0.0.2"]
+        assert hub._viewers == [2, 1]
+        hub.close()
+
+    def test_failed_start_is_not_counted(self, hub):
+        def capture(cam_cfg):
+            raise OSError("camera unreachable")
+
+        hub._capture = capture
+        with pytest.raises(OSError):
+            hub.acquire(0, "360p")
+        assert hub._viewers[0] == 0
+        assert not hub.stats()[0]["streaming"]
+
+    def test_camera_index(self, hub):
+        assert hub.camera_index("1") == 1
+        assert hub.camera_index("10.0.0.2_sony") == 1
+        assert hub.camera_index("2") is None
+        assert hub.camera_index("nope") is None
+
+    def test_close_releases_captures(self, hub):
+        hub.acquire(0, "360p")
+        hub.close()
+        assert hub.fake_captures[0].released
+
+    def test_profiles(self):
+        with pytest.warns(UserWarning):
+            profiles = normalize_profiles(
+                {"small": {"size": [64, 36], "quality": 50}, "bad/name": {}}
+            )
+        assert profiles == {"small": {"size": (64, 36), "quality": 50, "max_fps": None}}
+        assert set(normalize_profiles(None)) == {"source", "720p", "360p"}
+
+
+class TestRestreamServer:
+    def test_http_endpoints(self):
+        capture = _FakeCapture()
+        hub = RestreamHub(CAMERAS[:1], capture=lambda cam_cfg: capture)
+        http_server = RestreamServer(("127.0.0.1", 0), hub)
+        threading.Thread(target=http_server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{http_server.server_address[1]}"
+        try:
+            with urllib.request.urlopen(f"{base}/cameras.json", timeout=2) as r:
+                cameras = json.load(r)
+            assert cameras[0]["name"] == "10.0.0.1_ptzoptics"
+            assert not cameras[0]["streaming"]
+
+            capture.bus.publish(None, jpeg=_jpeg())
+            with urllib.request.urlopen(f"{base}/cameras/0/360p.jpg", timeout=2) as r:
+                assert r.headers["Content-Type"] == "image/jpeg"
+                assert jpeg_size(r.read()) == (640, 360)
+
+            with urllib.request.urlopen(
+                f"{base}/cameras/10.0.0.1_ptzoptics/source.mjpg", timeout=2
+            ) as r:
+                assert "multipart/x-mixed-replace" in r.headers["Content-Type"]
+                assert r.readline() == b"--frame\r\n"
+
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(f"{base}/cameras/0/4k.mjpg", timeout=2)
+            assert error.value.code == 404
+        finally:
+            http_server.shutdown()
+            http_server.server_close()
+            hub.close()
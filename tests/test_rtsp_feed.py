@@ -16,6 +16,10 @@ import textwrap
 # Add current directory to Python path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from frame_bus import FrameBus
+from preview import PreviewSurface
+from render_loop import FrameRenderScheduler
+
 
 class TestRtspFeedClose(unittest.TestCase):
     """Test the close function from rtsp_feed.py"""
@@ -102,7 +106,7 @@ class TestRtspFeedIntegration(unittest.TestCase):
         mock_ntk.image_manager.Image.return_value = mock_image
 
         # Mock the main execution to stop after one iteration
-        with patch("rtsp_feed.time") as mock_time:
+        with patch("rtsp_feed.time", create=True) as mock_time:
             mock_time.time.return_value = 0.0
 
             # Patch the while loop condition to run only once
@@ -225,7 +229,7 @@ class TestRtspFeedMocks(unittest.TestCase):
 
     @patch("rtsp_feed.ntk")
     @patch("rtsp_feed.vcapture")
-    @patch("rtsp_feed.time")
+    @patch("rtsp_feed.time", create=True)
     def test_main_loop_simulation(self, mock_time, mock_vcapture_class, mock_ntk):
         """Test simulation of main loop components"""
         # Setup comprehensive mocks
@@ -272,7 +276,7 @@ class TestRtspFeedMocks(unittest.TestCase):
         self.assertIsNotNone(frame)
 
         # 5. PIL Image creation (would happen in real code)
-        with patch("rtsp_feed.Image") as mock_pil:
+        with patch("rtsp_feed.Image", create=True) as mock_pil:
             pil_image = mock_pil.fromarray(frame, "RGB")
             mock_pil.fromarray.assert_called_with(frame, "RGB")
 
@@ -290,8 +294,8 @@ class TestRtspFeedMainExecution(unittest.TestCase):
         if "rtsp_feed" in sys.modules:
             del sys.modules["rtsp_feed"]
 
-    @patch("rtsp_feed.time")
-    @patch("rtsp_feed.Image")
+    @patch("rtsp_feed.time", create=True)
+    @patch("rtsp_feed.Image", create=True)
     @patch("rtsp_feed.vcapture")
     @patch("rtsp_feed.ntk")
     def test_main_execution_block_window_creation(
@@ -339,8 +343,8 @@ class TestRtspFeedMainExecution(unittest.TestCase):
             _object=frame_container, image=None
         )
 
-    @patch("rtsp_feed.time")
-    @patch("rtsp_feed.Image")
+    @patch("rtsp_feed.time", create=True)
+    @patch("rtsp_feed.Image", create=True)
     @patch("rtsp_feed.vcapture")
     @patch("rtsp_feed.ntk")
     def test_main_execution_block_frame_processing(
@@ -426,8 +430,8 @@ class TestRtspFeedMainExecution(unittest.TestCase):
         # Verify time calls
         self.assertEqual(mock_time.time.call_count, 3)
 
-    @patch("rtsp_feed.time")
-    @patch("rtsp_feed.Image")
+    @patch("rtsp_feed.time", create=True)
+    @patch("rtsp_feed.Image", create=True)
     @patch("rtsp_feed.vcapture")
     @patch("rtsp_feed.ntk")
     def test_main_execution_block_no_frame_handling(
@@ -541,6 +545,8 @@ class TestRtspFeedMainBlock(unittest.TestCase):
             "cv2": mock_cv2,
             "close": Mock(),
             "sleep": Mock(),
+            "PreviewSurface": PreviewSurface,
+            "FrameRenderScheduler": FrameRenderScheduler,
         }
 
         # Execute the main block code
@@ -548,12 +554,14 @@ class TestRtspFeedMainBlock(unittest.TestCase):
 
         return exec_globals
 
-    def test_main_block_execution_initialization(self):
-        """Test that the main block initializes all components correctly"""
-        # Setup mocks
+    def _setup_mocks(self, frames):
+        """Window, capture and frame container mocks, the capture publishes
+        one of `frames` each time `running` is checked and stops after them"""
         mock_ntk = Mock()
         mock_window = Mock()
         mock_ntk.Window.return_value = mock_window
+        # Run scheduled callbacks right away, like the window thread would
+        mock_window.root.after.side_effect = lambda ms, callback: callback()
 
         mock_frame_container = Mock()
         mock_ntk.Frame.return_value = mock_frame_container
@@ -561,20 +569,28 @@ class TestRtspFeedMainBlock(unittest.TestCase):
 
         mock_vcapture_class = Mock()
         mock_vcapture_instance = Mock()
-        mock_vcapture_instance.running = (
-            False  # Exit immediately to test just initialization
-        )
+        mock_vcapture_instance.bus = FrameBus(4)
         mock_vcapture_class.return_value = mock_vcapture_instance
 
-        mock_image_class = Mock()
-        mock_image = Mock()
-        mock_ntk.image_manager.Image.return_value = mock_image
+        pending = list(frames)
 
-        mock_time = Mock()
+        def running_side_effect(self):
+            if not pending:
+                return False
+            mock_vcapture_instance.bus.publish(pending.pop(0))
+            return True
+
+        type(mock_vcapture_instance).running = property(running_side_effect)
+        return mock_ntk, mock_window, mock_frame_container, mock_vcapture_class
+
+    def test_main_block_execution_initialization(self):
+        """Test that the main block initializes all components correctly"""
+        mock_ntk, mock_window, mock_frame_container, mock_vcapture_class = (
+            self._setup_mocks([])
+        )
 
-        # Execute the main block
         exec_globals = self._execute_main_block_with_mocks(
-            mock_ntk, mock_vcapture_class, mock_image_class, mock_time
+            mock_ntk, mock_vcapture_class, Mock(), Mock()
         )
 
         # Verify window creation
@@ -591,241 +607,86 @@ class TestRtspFeedMainBlock(unittest.TestCase):
 
         # Verify vcapture initialization
         mock_vcapture_class.assert_called_once_with("rtsp://192.168.0.25:554/2")
-        mock_vcapture_instance.start.assert_called_once()
+        mock_vcapture_class.return_value.start.assert_called_once()
 
-        # Verify initial image creation
-        mock_ntk.image_manager.Image.assert_called_with(
-            _object=mock_frame_container, image=None
-        )
+        # Verify the preview renders into the container at full size
+        preview_surface = exec_globals["preview_surface"]
+        self.assertIs(preview_surface.widget, mock_frame_container)
+        self.assertEqual((preview_surface.width, preview_surface.height), (800, 450))
+        self.assertIs(exec_globals["preview"].capture, mock_vcapture_class.return_value)
 
     def test_main_block_execution_single_loop_iteration(self):
-        """Test that the main block processes one frame correctly"""
-        # Setup mocks
-        mock_ntk = Mock()
-        mock_window = Mock()
-        mock_ntk.Window.return_value = mock_window
-
-        mock_frame_container = Mock()
-        mock_new_frame_container = Mock()
-        mock_ntk.Frame.side_effect = [mock_frame_container, mock_new_frame_container]
-        mock_frame_container.place.return_value = mock_frame_container
-        mock_new_frame_container.place.return_value = mock_new_frame_container
-
-        # Create a test frame
+        """Test that the main block shows a frame in the existing container"""
         test_frame = np.zeros((480, 640, 3), dtype=np.uint8)
         test_frame[:, :, 0] = 255  # Red frame
+        mock_ntk, mock_window, mock_frame_container, mock_vcapture_class = (
+            self._setup_mocks([test_frame])
+        )
 
-        mock_vcapture_class = Mock()
-        mock_vcapture_instance = Mock()
-        # Set to run once, then stop
-        mock_vcapture_instance.running = True
-        mock_vcapture_instance.current_frame = test_frame
-        mock_vcapture_class.return_value = mock_vcapture_instance
-
-        # Mock to stop after first iteration
-        call_count = [0]
-
-        def running_side_effect(self):
-            call_count[0] += 1
-            return call_count[0] == 1  # True first time, False after
-
-        type(mock_vcapture_instance).running = property(running_side_effect)
-
-        mock_image = Mock()
-        mock_new_image = Mock()
-        mock_ntk.image_manager.Image.side_effect = [mock_image, mock_new_image]
-
-        mock_image_class = Mock()
-        mock_pil_image = Mock()
-        mock_image_class.fromarray.return_value = mock_pil_image
-
-        mock_time = Mock()
-        mock_time.time.side_effect = [1.0, 1.1, 1.2]  # Progressive time values
-
-        # Execute the main block
         exec_globals = self._execute_main_block_with_mocks(
-            mock_ntk, mock_vcapture_class, mock_image_class, mock_time
+            mock_ntk, mock_vcapture_class, Mock(), Mock()
         )
 
-        # Verify frame processing occurred
-        mock_image_class.fromarray.assert_called_with(test_frame, "RGB")
-
-        # Verify image resize
-        mock_new_image.resize.assert_called_with(width=800, height=450)
-
-        # Verify new frame container creation with image
-        expected_calls = [
-            call(mock_window, width=800, height=450),  # Initial container
-            call(
-                mock_window, width=800, height=450, image=mock_new_image
-            ),  # New container with image
-        ]
-        mock_ntk.Frame.assert_has_calls(expected_calls)
-
-        # Verify old container was destroyed
-        mock_frame_container.destroy.assert_called_once()
+        # Verify the frame was blitted into the preview image
+        image = mock_frame_container.image
+        self.assertEqual(image.size, (800, 450))
+        self.assertEqual(image.getpixel((10, 10)), (255, 0, 0, 255))
+        mock_frame_container.update.assert_called_once()
 
-        # Verify timing calls
-        self.assertEqual(mock_time.time.call_count, 3)
+        # Verify no new container was created or destroyed
+        mock_ntk.Frame.assert_called_once_with(mock_window, width=800, height=450)
+        mock_frame_container.destroy.assert_not_called()
+        self.assertEqual(exec_globals["preview_surface"].frames_shown, 1)
 
     def test_main_block_execution_none_frame_handling(self):
         """Test that the main block handles None frames correctly"""
-        # Setup mocks
-        mock_ntk = Mock()
-        mock_window = Mock()
-        mock_ntk.Window.return_value = mock_window
-
-        mock_frame_container = Mock()
-        mock_ntk.Frame.return_value = mock_frame_container
-        mock_frame_container.place.return_value = mock_frame_container
-
-        mock_vcapture_class = Mock()
-        mock_vcapture_instance = Mock()
-        # Set to run once with None frame, then stop
-        mock_vcapture_instance.running = True
-        mock_vcapture_instance.current_frame = None
-        mock_vcapture_class.return_value = mock_vcapture_instance
-
-        # Mock to stop after first iteration
-        call_count = [0]
-
-        def running_side_effect(self):
-            call_count[0] += 1
-            return call_count[0] == 1  # True first time, False after
-
-        type(mock_vcapture_instance).running = property(running_side_effect)
-
-        mock_image = Mock()
-        mock_ntk.image_manager.Image.return_value = mock_image
-
-        mock_image_class = Mock()
-        mock_time = Mock()
-        mock_time.time.side_effect = [1.0, 1.1, 1.2]
+        mock_ntk, mock_window, mock_frame_container, mock_vcapture_class = (
+            self._setup_mocks([None])
+        )
 
-        # Execute the main block
         exec_globals = self._execute_main_block_with_mocks(
-            mock_ntk, mock_vcapture_class, mock_image_class, mock_time
+            mock_ntk, mock_vcapture_class, Mock(), Mock()
         )
 
-        # Verify no frame processing occurred (PIL Image should not be called)
-        mock_image_class.fromarray.assert_not_called()
+        # Verify nothing was shown
+        mock_frame_container.update.assert_not_called()
+        self.assertEqual(exec_globals["preview_surface"].frames_shown, 0)
 
         # Verify only initial Frame creation (no new container created)
         mock_ntk.Frame.assert_called_once_with(mock_window, width=800, height=450)
-
-        # Verify no container destruction (since no new container was created)
         mock_frame_container.destroy.assert_not_called()
 
-        # Verify timing calls still occurred
-        self.assertEqual(mock_time.time.call_count, 3)
-
     def test_main_block_execution_multiple_iterations(self):
-        """Test that the main block can handle multiple loop iterations"""
-        # Setup mocks
-        mock_ntk = Mock()
-        mock_window = Mock()
-        mock_ntk.Window.return_value = mock_window
-
-        mock_frame_container = Mock()
-        mock_new_frame_container1 = Mock()
-        mock_new_frame_container2 = Mock()
-        mock_ntk.Frame.side_effect = [
-            mock_frame_container,
-            mock_new_frame_container1,
-            mock_new_frame_container2,
-        ]
-        mock_frame_container.place.return_value = mock_frame_container
-        mock_new_frame_container1.place.return_value = mock_new_frame_container1
-        mock_new_frame_container2.place.return_value = mock_new_frame_container2
-
-        # Create test frames
+        """Test that the main block reuses its preview buffers across frames"""
         test_frame1 = np.zeros((480, 640, 3), dtype=np.uint8)
         test_frame1[:, :, 0] = 255  # Red frame
         test_frame2 = np.zeros((480, 640, 3), dtype=np.uint8)
         test_frame2[:, :, 1] = 255  # Green frame
+        test_frame3 = np.zeros((480, 640, 3), dtype=np.uint8)
+        test_frame3[:, :, 2] = 255  # Blue frame
+        mock_ntk, mock_window, mock_frame_container, mock_vcapture_class = (
+            self._setup_mocks([test_frame1, test_frame2, test_frame3])
+        )
 
-        mock_vcapture_class = Mock()
-        mock_vcapture_instance = Mock()
-        mock_vcapture_class.return_value = mock_vcapture_instance
-
-        # Set up to run 2 iterations, then stop
-        call_count = [0]
-        frame_count = [0]
-
-        def running_side_effect(self):
-            call_count[0] += 1
-            return call_count[0] <= 2  # True for first 2 calls, False after
-
-        def current_frame_side_effect(self):
-            frame_count[0] += 1
-            if frame_count[0] == 1:
-                return test_frame1
-            elif frame_count[0] == 2:
-                return test_frame2
-            return None
-
-        type(mock_vcapture_instance).running = property(running_side_effect)
-        type(mock_vcapture_instance).current_frame = property(current_frame_side_effect)
-
-        mock_image = Mock()
-        mock_new_image1 = Mock()
-        mock_new_image2 = Mock()
-        mock_ntk.image_manager.Image.side_effect = [
-            mock_image,
-            mock_new_image1,
-            mock_new_image2,
-        ]
+        images = []
+        type(mock_frame_container).image = property(
+            lambda self: images[-1], lambda self, value: images.append(value)
+        )
 
-        mock_image_class = Mock()
-        mock_pil_image1 = Mock()
-        mock_pil_image2 = Mock()
-        mock_image_class.fromarray.side_effect = [mock_pil_image1, mock_pil_image2]
-
-        mock_time = Mock()
-        mock_time.time.side_effect = [
-            1.0,
-            1.1,
-            1.2,
-            1.3,
-            1.4,
-            1.5,
-            1.6,
-        ]  # Multiple time values
-
-        # Execute the main block
         exec_globals = self._execute_main_block_with_mocks(
-            mock_ntk, mock_vcapture_class, mock_image_class, mock_time
+            mock_ntk, mock_vcapture_class, Mock(), Mock()
         )
 
-        # Verify both frames were processed
-        expected_fromarray_calls = [
-            call(test_frame1, "RGB"),
-            call(test_frame2, "RGB"),
-        ]
-        mock_image_class.fromarray.assert_has_calls(expected_fromarray_calls)
-
-        # Verify both images were resized
-        mock_new_image1.resize.assert_called_with(width=800, height=450)
-        mock_new_image2.resize.assert_called_with(width=800, height=450)
-
-        # Verify frame container replacements
-        expected_frame_calls = [
-            call(mock_window, width=800, height=450),  # Initial
-            call(
-                mock_window, width=800, height=450, image=mock_new_image1
-            ),  # First replacement
-            call(
-                mock_window, width=800, height=450, image=mock_new_image2
-            ),  # Second replacement
-        ]
-        mock_ntk.Frame.assert_has_calls(expected_frame_calls)
+        # Verify every frame was shown, alternating between two buffers
+        self.assertEqual(len(images), 3)
+        self.assertIs(images[0], images[2])
+        self.assertIsNot(images[0], images[1])
+        self.assertEqual(images[-1].getpixel((10, 10)), (0, 0, 255, 255))
+        self.assertEqual(mock_frame_container.update.call_count, 3)
 
-        # Verify container destructions
-        mock_frame_container.destroy.assert_called_once()
-        mock_new_frame_container1.destroy.assert_called_once()
-
-        # Verify timing calls (3 per iteration * 2 iterations = 6 calls)
-        self.assertEqual(mock_time.time.call_count, 6)
+        # Verify the container was never replaced
+        mock_ntk.Frame.assert_called_once_with(mock_window, width=800, height=450)
+        mock_frame_container.destroy.assert_not_called()
 
 
 class TestRtspFeedErrorHandling(unittest.TestCase):
@@ -0,0 +1,247 @@
+import datetime
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from command_worker import CommandWorker
+from sequencer import (
+    Sequencer,
+    load_macros,
+    normalize_macros,
+    save_macros,
+    step_call,
+)
+
+
+class _FakeCamera:
+    commands = {"tally_light": {}, "wb_auto": {}}
+
+    def __init__(self):
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def _record(self, *call):
+        self.calls.append((time.monotonic(), *call))
+        return "Command Completed"
+
+    def preset_recall(self, preset):
+        self.gate.wait(5.0)
+        return self._record("preset_recall", preset)
+
+    def move(self, _type, pan, tilt, pan_speed, tilt_speed):
+        return self._record("move", pan, tilt, pan_speed)
+
+    def zoom(self, _type, val):
+        return self._record("zoom", val)
+
+    def build_command(self, name, *args):
+        return (name, *args)
+
+    def run(self, command):
+        return self._record(*command)
+
+    def close(self):
+        pass
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+@pytest.fixture
+def camera():
+    return _FakeCamera()
+
+
+@pytest.fixture
+def make_sequencer(camera):
+    created = []
+
+    def make(macros, **kwargs):
+        worker = CommandWorker(lambda: camera)
+        sequencer = Sequencer({"10.0.0.1|ptzoptics": worker}, macros, **kwargs)
+        created.append((sequencer, worker))
+        return sequencer
+
+    yield make
+    for sequencer, worker in created:
+        sequencer.close()
+        worker.close()
+
+
+class TestMacros:
+    def test_step_calls(self):
+        assert step_call({"recall": 3}) == ("preset_recall", [3])
+        assert step_call({"move": [100, 200], "speed": 5}) == (
+            "move",
+            ["abs", 100, 200, 5, 5],
+        )
+        assert step_call({"zoom": 4000}) == ("zoom", ["direct", 4000])
+        assert step_call({"tally": 1}) == ("tally_light", [1])
+        assert step_call({"command": "wb_auto"}) == ("wb_auto", [])
+        with pytest.raises(ValueError):
+            step_call({"dwell": 2})
+
+    def test_invalid_entries_are_dropped(self):
+        with pytest.warns(UserWarning):
+            data = normalize_macros(
+                {
+                    "macros": {
+                        "Tour": {"steps": [{"recall": 1}, {"dwell": -1}, {"jump": 2}]},
+                        "Broken": {},
+                    },
+                    "schedule": [
+                        {"macro": "Tour", "at": "09:55"},
+                        {"macro": "Tour", "at": "soon"},
+                        {"macro": "Other", "at": "10:00"},
+                    ],
+                }
+            )
+        assert data == {
+            "macros": {"Tour": {"camera": 0, "loop": False, "steps": [{"recall": 1}]}},
+            "schedule": [{"macro": "Tour", "at": "09:55"}],
+        }
+
+    def test_macros_for_unknown_cameras_are_dropped(self):
+        macros = {
+            "Index": {"camera": 1, "steps": []},
+            "Key": {"camera": "10.0.0.1|ptzoptics", "steps": []},
+            "Missing": {"camera": 2, "steps": []},
+            "Other": {"camera": "10.0.0.9|ptzoptics", "steps": []},
+            "Broken": {"camera": [0], "steps": []},
+        }
+        with pytest.warns(UserWarning):
+            data = normalize_macros(
+                {"macros": macros}, ["10.0.0.1|ptzoptics", "10.0.0.2|ptzoptics"]
+            )
+        assert list(data["macros"]) == ["Index", "Key"]
+
+    def test_save_and_load(self, tmp_path):
+        path = str(tmp_path / "macros.json")
+        assert load_macros(path) == {"macros": {}, "schedule": []}
+        macros = {"Tour": {"camera": 1, "loop": True, "steps": [{"dwell": 2}]}}
+        save_macros(path, {"macros": macros})
+        assert load_macros(path)["macros"] == macros
+
+
+class TestSequencer:
+    def test_steps_run_in_order(self, camera, make_sequencer):
+        steps = []
+        sequencer = make_sequencer(
+            {
+                "Tour": {
+                    "camera": 0,
+                    "steps": [
+                        {"recall": 2},
+                        {"dwell": 0.05},
+                        {"move": [100, 200], "speed": 8},
+                        {"zoom": 4000},
+                        {"tally": 1},
+                    ],
+                }
+            },
+            on_step=lambda name, index, step: steps.append(index),
+        )
+        sequencer.start("Tour")
+        assert _wait_for(lambda: len(camera.calls) == 4)
+        assert [call[1:] for call in camera.calls] == [
+            ("preset_recall", 2),
+            ("move", 100, 200, 8),
+            ("zoom", 4000),
+            ("tally_light", 1),
+        ]
+        # The dwell counts from the recall's completion
+        assert camera.calls[1][0] - camera.calls[0][0] >= 0.05
+        assert steps == [0, 1, 2, 3, 4]
+        assert _wait_for(lambda: sequencer.running == [])
+
+    def test_next_step_waits_for_completion(self, camera, make_sequencer):
+        camera.gate.clear()
+        sequencer = make_sequencer(
+            {
+                "Tour": {
+                    "camera": "10.0.0.1|ptzoptics",
+                    "steps": [{"recall": 1}, {"zoom": 5}],
+                }
+            }
+        )
+        sequencer.start("Tour")
+        time.sleep(0.1)
+        assert camera.calls == []
+        released = time.monotonic()
+        camera.gate.set()
+        assert _wait_for(lambda: len(camera.calls) == 2)
+        assert camera.calls[1][0] - released < 0.05
+
+    def test_loop_until_stopped(self, camera, make_sequencer):
+        sequencer = make_sequencer(
+            {"Tour": {"loop": True, "steps": [{"recall": 1}, {"dwell": 0.01}]}}
+        )
+        sequencer.start("Tour")
+        assert _wait_for(lambda: len(camera.calls) >= 3)
+        assert sequencer.running == ["Tour"]
+        sequencer.stop("Tour")
+        time.sleep(0.05)
+        count = len(camera.calls)
+        time.sleep(0.05)
+        assert len(camera.calls) == count
+        assert sequencer.running == []
+
+    def test_failed_step_continues(self, camera, make_sequencer):
+        sequencer = make_sequencer(
+            {"Tour": {"steps": [{"command": "no_such_command"}, {"recall": 4}]}}
+        )
+        with pytest.warns(UserWarning):
+            sequencer.start("Tour")
+            assert _wait_for(lambda: len(camera.calls) == 1)
+        assert camera.calls[0][1:] == ("preset_recall", 4)
+
+    def test_daily_schedule(self, camera, make_sequencer):
+        now = datetime.datetime(2026, 3, 1, 9, 54, 59, 900000)
+        sequencer = make_sequencer(
+            {"Tour": {"steps": [{"recall": 7}]}},
+            schedule=[{"macro": "Tour", "at": "09:55"}],
+            now=lambda: now,
+        )
+        assert camera.calls == []
+        assert _wait_for(lambda: camera.calls)
+        assert camera.calls[0][1:] == ("preset_recall", 7)
+        with pytest.raises(KeyError):
+            sequencer.schedule_daily("Other", "10:00")
+
+    def test_failed_start_is_rescheduled(self, make_sequencer):
+        now = datetime.datetime(2026, 3, 1, 9, 54, 59, 900000)
+        sequencer = make_sequencer(
+            {"Tour": {"steps": [{"recall": 7}]}},
+            schedule=[{"macro": "Tour", "at": "09:55"}],
+            now=lambda: now,
+        )
+        starts = []
+
+        def start(name):
+            starts.append(name)
+            raise RuntimeError("camera gone")
+
+        sequencer.start = start
+        with pytest.warns(UserWarning, match="camera gone"):
+            # The clock stays just before 09:55, so the next day is 0.1 s away
+            assert _wait_for(lambda: len(starts) >= 2)
+
+    def test_unknown_camera(self, make_sequencer):
+        with pytest.warns(UserWarning, match="Unknown camera 3"):
+            sequencer = make_sequencer(
+                {"Tour": {"camera": 3, "steps": []}},
+                schedule=[{"macro": "Tour", "at": "09:55"}],
+            )
+        assert sequencer.macros == {}
+        with pytest.raises(KeyError):
+            sequencer.start("Tour")
@@ -0,0 +1,147 @@
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_bus import FrameBus
+from snapshots import SnapshotWorker
+from thumbnails import thumbnail_path
+
+
+def _frame(value, width=320, height=180):
+    return np.full((height, width, 3), value, np.uint8)
+
+
+def _jpeg(frame):
+    ok, data = cv2.imencode(".jpg", frame)
+    assert ok
+    return data.tobytes()
+
+
+@pytest.fixture
+def worker():
+    worker = SnapshotWorker(timeout=1.0)
+    yield worker
+    worker.close()
+
+
+class TestSnapshotWorker:
+    def test_waits_for_next_frame(self, tmp_path, worker):
+        bus = FrameBus()
+        bus.publish(_frame(10))
+        path = str(tmp_path / "1.jpg")
+        future = worker.request(bus.subscribe("latest"), path)
+        time.sleep(0.05)
+        assert not future.done()
+
+        bus.publish(_frame(200))
+        assert future.result(timeout=2.0) == path
+        with Image.open(path) as image:
+            assert image.getpixel((5, 5))[0] > 150
+
+    def test_falls_back_to_latest_frame_on_timeout(self, tmp_path):
+        worker = SnapshotWorker(timeout=0.05)
+        bus = FrameBus()
+        bus.publish(_frame(90))
+        path = str(tmp_path / "1.jpg")
+        assert worker.request(bus.subscribe("latest"), path).result(2.0) == path
+        worker.close()
+
+    def test_no_frame(self, tmp_path):
+        worker = SnapshotWorker(timeout=0.05)
+        with patch("snapshots.warn") as mock_warn:
+            future = worker.request(
+                FrameBus().subscribe("latest"), str(tmp_path / "1.jpg")
+            )
+            assert future.result(2.0) is None
+        mock_warn.assert_called_once()
+        worker.close()
+
+    def test_callback_goes_through_after(self, tmp_path):
+        after = MagicMock()
+        worker = SnapshotWorker(after=after)
+        bus = FrameBus()
+        callback = MagicMock()
+        frames = bus.subscribe("latest")
+        bus.publish(_frame(50))
+        path = str(tmp_path / "1.jpg")
+        worker.request(frames, path, callback=callback).result(2.0)
+        worker.close()
+        after.assert_called_once()
+        assert after.call_args[0][0] == 0
+        callback.assert_not_called()
+        after.call_args[0][1]()
+        callback.assert_called_once_with(path)
+
+    def test_request_does_not_block(self, tmp_path, worker):
+        bus = FrameBus()
+        started = time.perf_counter()
+        worker.request(bus.subscribe("latest"), str(tmp_path / "1.jpg"))
+        assert time.perf_counter() - started < 0.05
+        bus.publish(_frame(1))
+
+    def test_scales_and_writes_thumbnail(self, tmp_path):
+        worker = SnapshotWorker(size=(160, 90), quality=70, thumbnail_size=(100, 50))
+        bus = FrameBus()
+        frames = bus.subscribe("latest")
+        bus.publish(_frame(120))
+        path = str(tmp_path / "1.jpg")
+        worker.request(frames, path).result(2.0)
+        worker.close()
+        with Image.open(path) as image:
+            assert image.size == (160, 90)
+        with Image.open(thumbnail_path(path)) as thumb:
+            assert thumb.size == (100, 50)
+        assert not os.path.exists(f"{path}.tmp")
+
+    def test_mjpeg_passthrough(self, tmp_path, worker):
+        bus = FrameBus()
+        frames = bus.subscribe("latest")
+        data = _jpeg(_frame(60))
+        bus.publish(None, jpeg=data)
+        path = str(tmp_path / "1.jpg")
+        worker.request(frames, path).result(2.0)
+        with open(path, "rb") as f:
+            assert f.read() == data
+
+    def test_full_size_jpeg_next_to_a_preview_frame(self, tmp_path, worker):
+        bus = FrameBus()
+        frames = bus.subscribe("latest")
+        data = _jpeg(_frame(60))
+        bus.publish(_frame(60, 80, 45), jpeg=data)
+        path = str(tmp_path / "1.jpg")
+        worker.request(frames, path).result(2.0)
+        with open(path, "rb") as f:
+            assert f.read() == data
+
+    def test_mjpeg_other_size_is_scaled(self, tmp_path):
+        worker = SnapshotWorker(size=(160, 90))
+        bus = FrameBus()
+        frames = bus.subscribe("latest")
+        bus.publish(None, jpeg=_jpeg(_frame(60)))
+        path = str(tmp_path / "1.jpg")
+        worker.request(frames, path).result(2.0)
+        worker.close()
+        with Image.open(path) as image:
+            assert image.size == (160, 90)
+
+    def test_requests_run_in_parallel(self, tmp_path):
+        worker = SnapshotWorker(max_workers=2, timeout=1.0)
+        bus = FrameBus()
+        futures = [
+            worker.request(bus.subscribe("latest"), str(tmp_path / f"{i}.jpg"))
+            for i in range(2)
+        ]
+        threading.Timer(0.05, lambda: bus.publish(_frame(30))).start()
+        assert [f.result(2.0) for f in futures] == [
+            str(tmp_path / f"{i}.jpg") for i in range(2)
+        ]
+        worker.close()
@@ -0,0 +1,51 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from startup import StartupTimer
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 10.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestStartupTimer:
+    def test_marks_time_since_start(self):
+        clock = _Clock()
+        lines = []
+        timer = StartupTimer(log=lines.append, clock=clock)
+        clock.now = 10.12
+        timer.mark("window")
+        assert abs(timer.phases["window"] - 0.12) < 1e-9
+        assert lines == ["[startup] window: 120 ms"]
+        assert timer.marked("window")
+        assert not timer.marked("first frame")
+
+    def test_only_first_mark_counts(self):
+        clock = _Clock()
+        lines = []
+        timer = StartupTimer(log=lines.append, clock=clock)
+        clock.now = 10.2
+        timer.mark("first frame")
+        clock.now = 12.0
+        timer.mark("first frame")
+        assert abs(timer.phases["first frame"] - 0.2) < 1e-9
+        assert len(lines) == 1
+
+    def test_marks_from_threads(self):
+        timer = StartupTimer(log=None)
+        threads = [
+            threading.Thread(target=timer.mark, args=(f"phase {i % 4}",))
+            for i in range(16)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(timer.phases) == [f"phase {i}" for i in range(4)]
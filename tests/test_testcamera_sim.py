@@ -9,7 +9,12 @@ import pytest
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from controller import Camera
-from camera_streams import TESTCAMERA_DEFAULT_STREAM_URL, stream_url_for_camera
+from visca import decode_position
+from camera_streams import (
+    TESTCAMERA_DEFAULT_STREAM_URL,
+    capture_options_for_camera,
+    stream_url_for_camera,
+)
 from cameras import testcamera_sim as sim
 
 
@@ -62,6 +67,18 @@ def test_stream_url_for_camera_routing():
     )
 
 
+def test_capture_options_for_camera():
+    assert capture_options_for_camera({"ip": "10.0.0.1"}) == ("opencv", {})
+    assert capture_options_for_camera({"ip": "10.0.0.1", "type": "testcamera"}) == (
+        "mjpeg",
+        {},
+    )
+    assert capture_options_for_camera({"capture": "FFmpeg"}) == ("ffmpeg", {})
+    assert capture_options_for_camera(
+        {"capture": {"backend": "ffmpeg", "rtsp_transport": "udp"}}
+    ) == ("ffmpeg", {"rtsp_transport": "udp"})
+
+
 def test_testcamera_state_updates_from_visca_commands():
     cam = Camera(ip="127.0.0.1", camera_type="testcamera")
     try:
@@ -99,6 +116,41 @@ def test_testcamera_incremental_commands_update_state():
         cam.close()
 
 
+def _split_reply_camera(completion_delay):
+    cam = Camera(ip="127.0.0.1", camera_type="testcamera")
+    cam.socket = sim.SimulatedViscaSocket(
+        cam.ip, cam.port, split_replies=True, completion_delay=completion_delay
+    )
+    return cam
+
+
+def test_send_reads_completions_before_inquiries():
+    cam = _split_reply_camera(0.02)
+    try:
+        assert cam.send(cam.build_command("zoom_direct", 1000)) == "Command Accepted"
+        assert cam.send(cam.build_command("zoom_direct", 2000)) == "Command Accepted"
+        assert [decode_position(d) for d in cam.zoom_pos] == [2000]
+        assert [decode_position(d) for d in cam.pan_tilt_pos] == [0x8000, 0x8000]
+        assert cam.run(cam.build_command("zoom_direct", 3000)) == "Command Completed"
+        assert sim.STATE.snapshot()["zoom_pos"] == 3000
+    finally:
+        cam.close()
+
+
+def test_send_waits_out_command_buffer_full():
+    cam = _split_reply_camera(0.15)
+    try:
+        started = time.monotonic()
+        for zoom in (1000, 2000, 3000):
+            assert cam.send(cam.build_command("zoom_direct", zoom)) == "Command Accepted"
+        # The third command went once the first completed
+        assert time.monotonic() - started >= 0.1
+        assert sim.STATE.snapshot()["zoom_pos"] == 3000
+        assert [decode_position(d) for d in cam.zoom_pos] == [3000]
+    finally:
+        cam.close()
+
+
 def test_pan_continues_until_pan_stop():
     cam = Camera(ip="127.0.0.1", camera_type="testcamera")
     try:
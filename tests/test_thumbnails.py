@@ -0,0 +1,108 @@
+import os
+import sys
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import Catalog
+from thumbnails import ThumbnailCache, thumbnail_path, write_thumbnail
+
+SIZE = (100, 50)
+
+
+def _write_image(path, color, size=(640, 360)):
+    Image.new("RGB", size, color).save(path, format="JPEG")
+    return str(path)
+
+
+class TestWriteThumbnail:
+    def test_thumbnail_next_to_image(self, tmp_path):
+        image_path = _write_image(tmp_path / "3.jpg", (200, 10, 10))
+        path = write_thumbnail(image_path, SIZE)
+        assert path == thumbnail_path(image_path) == str(tmp_path / "3.thumb.jpg")
+        with Image.open(path) as thumb:
+            assert thumb.size == SIZE
+        assert not os.path.exists(f"{path}.tmp")
+
+    def test_from_decoded_image(self, tmp_path):
+        image_path = str(tmp_path / "1.jpg")
+        image = Image.fromarray(np.full((360, 640, 3), 80, np.uint8), "RGB")
+        with patch("thumbnails.Image.open") as mock_open:
+            path = write_thumbnail(image_path, SIZE, image=image)
+        mock_open.assert_not_called()
+        with Image.open(path) as thumb:
+            assert thumb.size == SIZE
+
+
+class TestThumbnailCache:
+    def test_missing_image(self, tmp_path):
+        cache = ThumbnailCache(SIZE)
+        assert cache.get("cam", 1, "") is None
+        assert cache.get("cam", 1, str(tmp_path / "missing.jpg")) is None
+        assert len(cache) == 0
+
+    def test_creates_thumbnail_and_serves_from_memory(self, tmp_path):
+        image_path = _write_image(tmp_path / "1.jpg", (0, 200, 0))
+        cache = ThumbnailCache(SIZE)
+        image = cache.get("cam", 1, image_path)
+        assert image.mode == "RGBA"
+        assert image.size == SIZE
+        assert os.path.exists(thumbnail_path(image_path))
+
+        with patch("thumbnails.os.stat") as mock_stat, patch(
+            "thumbnails.Image.open"
+        ) as mock_open:
+            assert cache.get("cam", 1, image_path) is image
+        mock_stat.assert_not_called()
+        mock_open.assert_not_called()
+        assert cache.hits == 1 and cache.misses == 1
+
+    def test_uses_existing_thumbnail(self, tmp_path):
+        image_path = _write_image(tmp_path / "1.jpg", (0, 0, 200))
+        write_thumbnail(image_path, SIZE)
+        cache = ThumbnailCache(SIZE)
+        with patch("thumbnails.write_thumbnail") as mock_write:
+            assert cache.get("cam", 1, image_path).size == SIZE
+        mock_write.assert_not_called()
+
+    def test_invalidate_picks_up_new_snapshot(self, tmp_path):
+        image_path = _write_image(tmp_path / "1.jpg", (255, 0, 0))
+        cache = ThumbnailCache(SIZE)
+        assert cache.get("cam", 1, image_path).getpixel((50, 25))[0] > 200
+
+        _write_image(image_path, (0, 0, 255))
+        newer = os.stat(thumbnail_path(image_path)).st_mtime + 10
+        os.utime(image_path, (newer, newer))
+        cache.invalidate("cam", 1)
+        assert cache.get("cam", 1, image_path).getpixel((50, 25))[2] > 200
+        assert len(cache) == 1
+
+    def test_lru_eviction(self, tmp_path):
+        cache = ThumbnailCache(SIZE, capacity=2)
+        paths = [_write_image(tmp_path / f"{i}.jpg", (i * 50, 0, 0)) for i in range(3)]
+        first = cache.get("cam", 0, paths[0])
+        cache.get("cam", 1, paths[1])
+        assert cache.get("cam", 0, paths[0]) is first
+        cache.get("cam", 2, paths[2])
+        assert len(cache) == 2
+        assert cache.get("cam", 0, paths[0]) is first
+        assert cache.get("cam", 1, paths[1]) is not None
+        assert cache.misses == 4
+
+    def test_records_thumbnail_in_catalog(self, tmp_path):
+        catalog = Catalog(str(tmp_path / "catalog.sqlite3"))
+        image_path = _write_image(tmp_path / "2.jpg", (9, 9, 9))
+        ThumbnailCache(SIZE, catalog=catalog).get("cam", 2, image_path)
+        path, mtime, width, height = catalog.thumbnail("cam", 2)
+        assert path == thumbnail_path(image_path)
+        assert mtime == pytest.approx(os.stat(image_path).st_mtime)
+        assert (width, height) == SIZE
+
+        with patch("thumbnails.write_thumbnail") as mock_write:
+            assert ThumbnailCache(SIZE, catalog=catalog).get("cam", 2, image_path)
+        mock_write.assert_not_called()
+        catalog.close()
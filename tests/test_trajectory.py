@@ -0,0 +1,172 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from command_worker import CommandWorker
+from trajectory import EASINGS, MAX_PAN_SPEED, Trajectory, plan, read_pose
+
+START = {"pan": 1000, "tilt": 2000, "zoom": 0}
+
+
+class _FakeCamera:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+        self.pan_tilt_pos = ["00030e08", "00070d00"]  # 0x03e8, 0x07d0
+        self.zoom_pos = ["0"]
+
+    def build_command(self, name, *args):
+        return (name, *args)
+
+    def send(self, command):
+        time.sleep(self.delay)
+        self.sent.append(command)
+        return "Command Accepted"
+
+    def clear_cache(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class TestPlan:
+    def test_ends_on_target_at_control_rate(self):
+        samples = plan(START, {"pan": 5000, "zoom": 800}, 2.0, rate=10)
+        assert len(samples) == 20
+        assert samples[-1] == (2.0, {"pan": 5000, "tilt": 2000, "zoom": 800})
+        assert [seconds for seconds, _ in samples][:3] == pytest.approx([0.1, 0.2, 0.3])
+
+    @pytest.mark.parametrize("easing", sorted(EASINGS))
+    def test_axes_move_together(self, easing):
+        samples = plan(
+            START, {"pan": 11000, "tilt": 2000 + 5000, "zoom": 20000}, 1.0, 20, easing
+        )
+        pans = [pose["pan"] for _, pose in samples]
+        assert pans == sorted(pans)
+        for _, pose in samples:
+            progress = (pose["pan"] - 1000) / 10000
+            assert (pose["tilt"] - 2000) / 5000 == pytest.approx(progress, abs=1e-3)
+            assert pose["zoom"] / 20000 == pytest.approx(progress, abs=1e-3)
+
+    def test_ease_in_out_is_gentle_at_both_ends(self):
+        pans = [pose["pan"] for _, pose in plan(START, {"pan": 21000}, 1.0, 20)]
+        steps = [b - a for a, b in zip([1000, *pans], pans)]
+        assert steps[0] < steps[10] and steps[-1] < steps[10]
+
+    def test_zoom_only(self):
+        assert plan(START, {"zoom": 100}, 0.0) == [(0.0, {"zoom": 100})]
+
+    def test_unknown_easing(self):
+        with pytest.raises(ValueError):
+            plan(START, {"pan": 0}, 1.0, easing="bounce")
+
+
+class TestTrajectory:
+    def test_reads_start_pose_and_sends_waypoints(self):
+        camera = _FakeCamera()
+        worker = CommandWorker(lambda: camera)
+        assert worker.submit(read_pose).result(2.0) == START
+        move = Trajectory(worker, {"pan": 21000, "zoom": 4000}, 0.2, rate=50)
+        assert move.done.result(2.0) == {"pan": 21000, "tilt": 2000, "zoom": 4000}
+        pan_tilt = [
+            command for command in camera.sent if command[0] == "pan_direct_abs"
+        ]
+        zooms = [command for command in camera.sent if command[0] == "zoom_direct"]
+        assert len(pan_tilt) == len(zooms) == move.sent == 10
+        assert pan_tilt[-1][3:] == (21000, 2000)
+        assert zooms[-1] == ("zoom_direct", 4000)
+        assert all(1 <= command[1] <= MAX_PAN_SPEED for command in pan_tilt)
+        worker.close()
+
+    def test_slow_camera_drops_stale_waypoints(self):
+        camera = _FakeCamera(delay=0.03)
+        worker = CommandWorker(lambda: camera)
+        move = Trajectory(worker, {"pan": 9000}, 0.3, rate=100, start=START)
+        assert move.done.result(2.0)["pan"] == 9000
+        assert move.superseded > 0
+        assert move.sent + move.superseded == 30
+        assert len(camera.sent) == move.sent
+        assert camera.sent[-1][3:] == (9000, 2000)
+        worker.close()
+
+    def test_speed_after_dropped_waypoints(self):
+        camera = _FakeCamera()
+        stalled = threading.Event()
+        send = camera.send
+
+        def stall_once(command):
+            if not stalled.is_set():
+                stalled.set()
+                time.sleep(0.6)
+            return send(command)
+
+        camera.send = stall_once
+        worker = CommandWorker(lambda: camera)
+        move = Trajectory(worker, {"pan": 10000}, 0.5, rate=40, start=START)
+        move.done.result(2.0)
+        assert [command[3] for command in camera.sent] == [1065, 10000]
+        # From the first pose over the stall, not the last planned tick's step
+        assert camera.sent[1][1] >= 10
+        worker.close()
+
+    def test_cancel(self):
+        camera = _FakeCamera()
+        worker = CommandWorker(lambda: camera)
+        move = Trajectory(worker, {"pan": 9000}, 1.0, start=START)
+        time.sleep(0.1)
+        move.cancel()
+        assert move.done.cancelled()
+        time.sleep(0.1)
+        count = len(camera.sent)
+        time.sleep(0.1)
+        assert 0 < len(camera.sent) == count < 20
+        worker.close()
+
+    def test_failed_pose_read(self):
+        camera = _FakeCamera()
+        camera.pan_tilt_pos = None
+        worker = CommandWorker(lambda: camera)
+        with pytest.warns(UserWarning):
+            move = Trajectory(worker, {"pan": 9000}, 1.0)
+            with pytest.raises(Exception):
+                move.done.result(2.0)
+        worker.close()
+
+    def test_simulator_arrives(self):
+        from controller import Camera
+
+        worker = CommandWorker(lambda: Camera(ip="127.0.0.1", camera_type="testcamera"))
+        target = {"pan": 40000, "tilt": 30000, "zoom": 20000}
+        move = Trajectory(worker, target, 0.25, rate=40)
+        move.done.result(2.0)
+        assert worker.submit(read_pose).result(2.0) == target
+        worker.close()
+
+    @pytest.mark.parametrize("completion_delay", [0.01, 0.1])
+    def test_simulator_with_separate_completions(self, completion_delay):
+        # A 0.1 s completion keeps both command buffers busy at 40 Hz
+        from cameras.testcamera_sim import SimulatedViscaSocket
+        from controller import Camera
+
+        def connect():
+            camera = Camera(ip="127.0.0.1", camera_type="testcamera")
+            camera.socket = SimulatedViscaSocket(
+                camera.ip,
+                camera.port,
+                split_replies=True,
+                completion_delay=completion_delay,
+            )
+            return camera
+
+        worker = CommandWorker(connect)
+        target = {"pan": 41000, "tilt": 31000, "zoom": 21000}
+        move = Trajectory(worker, target, 0.25, rate=40)
+        move.done.result(5.0)
+        assert worker.submit(read_pose).result(5.0) == target
+        worker.close()
@@ -10,6 +10,8 @@ import unittest.mock
 from unittest.mock import Mock, patch, MagicMock, PropertyMock
 import numpy as np
 import cv2
+import threading
+import time
 
 # Import the module under test
 import sys
@@ -48,7 +50,21 @@ class TestVcaptureInit(unittest.TestCase):
         mock_queue.assert_called_once_with(maxsize=1)
         self.assertTrue(cap._running.value)
         self.assertEqual(cap._frame_queue._maxsize, 1)
-        self.assertIsNone(cap._current_frame)
+        self.assertIsNone(cap._current_packet)
+        self.assertEqual(cap.backend, "opencv")
+
+    @patch("vcapture.Queue")
+    @patch("vcapture.Value")
+    @patch("vcapture.Process.__init__", return_value=None)
+    @patch("vcapture.Process.daemon", new_callable=PropertyMock)
+    def test_init_rejects_unknown_backend(
+        self, mock_daemon, mock_process_init, mock_value, mock_queue
+    ):
+        """Test vcapture refuses backends it cannot open"""
+        from vcapture import vcapture
+
+        with self.assertRaises(ValueError):
+            vcapture("test_target", backend="gstreamer")
 
 
 class TestVcaptureProperties(unittest.TestCase):
@@ -87,6 +103,62 @@ class TestVcaptureProperties(unittest.TestCase):
         # Initially no frame should be available
         self.assertIsNone(self.cap.current_frame)
 
+    def test_current_frame_publishes_to_bus(self):
+        """Test frames drained by current_frame reach every subscriber"""
+        frame = np.zeros((4, 4, 3), dtype=np.uint8)
+        first = self.cap.subscribe("every")
+        second = self.cap.subscribe("latest")
+        self.cap._frame_queue.empty.side_effect = [False, True]
+        self.cap._frame_queue.get_nowait.return_value = (frame, None, {})
+
+        self.assertIs(self.cap.current_frame, frame)
+        self.assertIs(first.poll().frame, frame)
+        self.assertIs(second.poll().frame, frame)
+        # Reading current_frame again does not consume anything
+        self.assertIs(self.cap.current_frame, frame)
+
+    def test_current_frame_leaves_the_queue_to_the_pump(self):
+        """Test a running pump is the only reader of the queue"""
+        frame = np.zeros((4, 4, 3), dtype=np.uint8)
+        self.cap._pump = Mock()
+        packet = self.cap.bus.publish(frame)
+
+        self.assertIs(self.cap.current_packet, packet)
+        self.assertIs(self.cap.current_frame, frame)
+        self.cap._frame_queue.get_nowait.assert_not_called()
+
+    def test_pump_publishes_until_stopped(self):
+        """Test the pump thread publishes queued frames and closes the bus"""
+        frame = np.zeros((4, 4, 3), dtype=np.uint8)
+        subscriber = self.cap.subscribe("every")
+
+        def get_then_stop(timeout):
+            self.cap._running.value = False
+            return frame, None, {"timestamp": 5.0}
+
+        self.cap._frame_queue.get.side_effect = get_then_stop
+        self.cap._pump_frames()
+
+        packet = subscriber.poll()
+        self.assertIs(packet.frame, frame)
+        self.assertEqual(packet.timestamp, 5.0)
+        self.assertTrue(self.cap.bus.closed)
+
+    def test_current_packet_keeps_jpeg_and_decodes_lazily(self):
+        """Test JPEG-only items are published without decoding"""
+        frame = np.zeros((8, 8, 3), dtype=np.uint8)
+        frame[:, :, 1] = 200
+        ok, encoded = cv2.imencode(".jpg", frame)
+        jpeg = encoded.tobytes()
+        self.cap._frame_queue.empty.side_effect = [False, True]
+        self.cap._frame_queue.get_nowait.return_value = (None, jpeg, {})
+
+        packet = self.cap.current_packet
+        self.assertEqual(packet.jpeg, jpeg)
+        self.assertFalse(packet.decoded)
+        self.assertEqual(self.cap.current_frame.shape, (8, 8, 3))
+        self.assertTrue(packet.decoded)
+
 
 class TestVcaptureRun(unittest.TestCase):
     """Test vcapture run method (the main capture loop)"""
@@ -139,12 +211,66 @@ class TestVcaptureRun(unittest.TestCase):
             self.cap.run()
 
         # Verify VideoCapture was created and configured
-        mock_video_capture_class.assert_called_once_with("test_target")
+        mock_video_capture_class.assert_called_once()
+        self.assertEqual(mock_video_capture_class.call_args[0][0], "test_target")
         mock_cap.set.assert_any_call(cv2.CAP_PROP_BUFFERSIZE, 1)
         mock_cap.isOpened.assert_called()
         mock_cap.read.assert_called()
         mock_cap.release.assert_called_once()
 
+    @patch("vcapture.FFmpegCapture")
+    @patch("vcapture.cv2.VideoCapture")
+    def test_run_ffmpeg_backend_skips_color_conversion(
+        self, mock_video_capture_class, mock_ffmpeg_class
+    ):
+        """Test the ffmpeg backend is used and its RGB frames are passed through"""
+        self.cap.backend = "ffmpeg"
+        self.cap.options = {"rtsp_transport": "udp"}
+        mock_cap = Mock()
+        mock_ffmpeg_class.return_value = mock_cap
+        mock_cap.isOpened.return_value = True
+        mock_frame = np.zeros((2, 2, 3), dtype=np.uint8)
+
+        def read_once(*args):
+            self.cap._running.value = False
+            return True, mock_frame
+
+        mock_cap.read.side_effect = read_once
+
+        with patch("vcapture.cv2.cvtColor") as mock_cvt:
+            self.cap.run()
+
+        mock_ffmpeg_class.assert_called_once_with("test_target", {"rtsp_transport": "udp"})
+        mock_video_capture_class.assert_not_called()
+        mock_cvt.assert_not_called()
+        frame, jpeg, meta = self.cap._frame_queue.put_nowait.call_args[0][0]
+        self.assertIs(frame, mock_frame)
+        self.assertIsNone(jpeg)
+        self.assertIn("timestamp", meta)
+        mock_cap.release.assert_called_once()
+
+    @patch("vcapture.MJPEGCapture")
+    def test_run_mjpeg_backend_passes_jpeg_through(self, mock_mjpeg_class):
+        """Test the mjpeg backend queues the compressed bytes without decoding"""
+        self.cap.backend = "mjpeg"
+        mock_cap = Mock()
+        mock_mjpeg_class.return_value = mock_cap
+        mock_cap.isOpened.return_value = True
+
+        def read_once(*args):
+            self.cap._running.value = False
+            return True, b"\xff\xd8jpeg\xff\xd9"
+
+        mock_cap.read.side_effect = read_once
+
+        with patch("vcapture.cv2.cvtColor") as mock_cvt:
+            self.cap.run()
+
+        mock_cvt.assert_not_called()
+        frame, jpeg, meta = self.cap._frame_queue.put_nowait.call_args[0][0]
+        self.assertIsNone(frame)
+        self.assertEqual(jpeg, b"\xff\xd8jpeg\xff\xd9")
+
     @patch("vcapture.cv2.VideoCapture")
     def test_run_failed_to_open_warning(self, mock_video_capture_class):
         """Test run method issues warning when VideoCapture fails to open"""
@@ -334,14 +460,392 @@ class TestVcaptureRelease(unittest.TestCase):
 
             self.cap = vcapture("test_target")
 
+    @patch("vcapture.Process.is_alive", return_value=False)
     @patch("vcapture.Process.join")
-    def test_release(self, mock_join):
+    def test_release(self, mock_join, mock_is_alive):
         """Test release method stops the process"""
-        self.cap.release()
+        closed = self.cap.release()
 
         # Verify running was set to False and join was called
         self.assertFalse(self.cap._running.value)
         mock_join.assert_called_once_with(timeout=1.0)
+        self.assertIs(closed, self.cap.closed)
+        self.assertTrue(closed.is_set())
+        self.assertTrue(self.cap.bus.closed)
+        self.cap._frame_queue.cancel_join_thread.assert_called_once()
+        self.cap._frame_queue.close.assert_called_once()
+
+    @patch("vcapture.Process.kill")
+    @patch("vcapture.Process.terminate")
+    @patch("vcapture.Process.is_alive", side_effect=[True, False])
+    @patch("vcapture.Process.join")
+    def test_release_terminates_stuck_process(
+        self, mock_join, mock_is_alive, mock_terminate, mock_kill
+    ):
+        """Test a process stuck past the cooperative timeout is terminated"""
+        with patch("vcapture.warn"):
+            self.cap.release()
+
+        mock_terminate.assert_called_once()
+        mock_kill.assert_not_called()
+        self.assertTrue(self.cap.closed.is_set())
+
+    @patch("vcapture.Process.kill")
+    @patch("vcapture.Process.terminate")
+    @patch("vcapture.Process.is_alive", side_effect=[True, True, False])
+    @patch("vcapture.Process.join")
+    def test_release_kills_process_ignoring_terminate(
+        self, mock_join, mock_is_alive, mock_terminate, mock_kill
+    ):
+        """Test escalation ends with kill"""
+        with patch("vcapture.warn"):
+            self.cap.release()
+
+        mock_terminate.assert_called_once()
+        mock_kill.assert_called_once()
+        self.assertTrue(self.cap.closed.is_set())
+
+    @patch("vcapture.Process.is_alive", return_value=False)
+    @patch("vcapture.Process.join")
+    def test_release_without_waiting(self, mock_join, mock_is_alive):
+        """Test release(wait=False) returns at once and closed is set later"""
+        closed = self.cap.release(wait=False)
+        self.assertFalse(self.cap._running.value)
+        self.assertTrue(closed.wait(2.0))
+        # A second release does not stop the worker twice
+        self.cap.release()
+        mock_join.assert_called_once_with(timeout=1.0)
+
+    def test_getstate_leaves_out_parent_only_state(self):
+        """Test the bus is not pickled into a spawned child process"""
+        state = self.cap.__getstate__()
+        self.assertIsNone(state["bus"])
+        self.assertIsNone(state["_pump"])
+        self.assertIs(self.cap.bus, self.cap.__dict__["bus"])
+
+
+class TestTcapture(unittest.TestCase):
+    """Test the thread-backed capture mode"""
+
+    def test_thread_mode_returns_tcapture(self):
+        """Test mode="thread" builds a thread with the vcapture interface"""
+        from vcapture import vcapture, tcapture
+
+        cap = vcapture("test_target", "mjpeg", mode="thread")
+        self.assertIsInstance(cap, tcapture)
+        self.assertEqual(cap.target, "test_target")
+        self.assertEqual(cap.backend, "mjpeg")
+        self.assertTrue(cap.running)
+        self.assertTrue(cap.daemon)
+        self.assertIsNone(cap.current_frame)
+
+    def test_unknown_mode(self):
+        """Test unknown modes are rejected"""
+        from vcapture import vcapture
+
+        with self.assertRaises(ValueError):
+            vcapture("test_target", mode="fiber")
+
+    def test_ffmpeg_keeps_frames_valid_while_on_bus(self):
+        """Test ffmpeg buffers outnumber the bus ring in thread mode"""
+        from vcapture import tcapture
+
+        cap = tcapture("test_target", "ffmpeg", bus_capacity=4)
+        self.assertEqual(cap.options["buffers"], 6)
+
+    @patch("vcapture.cv2.VideoCapture")
+    def test_frames_published_directly(self, mock_video_capture_class):
+        """Test frames reach subscribers without a queue and the thread stops"""
+        from vcapture import tcapture
+
+        mock_cap = Mock()
+        mock_video_capture_class.return_value = mock_cap
+        mock_cap.isOpened.return_value = True
+        frames = [np.full((2, 2, 3), value, dtype=np.uint8) for value in (1, 2)]
+        reads = iter(frames)
+
+        cap = tcapture("test_target")
+        subscriber = cap.subscribe("every")
+
+        def read(*args):
+            frame = next(reads, None)
+            if frame is None:
+                cap._running.value = False
+                return False, None
+            return True, frame
+
+        mock_cap.read.side_effect = read
+        cap.start()
+        cap.join(timeout=2.0)
+
+        self.assertFalse(cap.is_alive())
+        self.assertFalse(cap.running)
+        self.assertEqual([subscriber.poll().seq for _ in frames], [1, 2])
+        self.assertIsNotNone(cap.current_frame)
+        self.assertTrue(cap.bus.closed)
+        mock_cap.release.assert_called_once()
+        cap.release()
+        self.assertTrue(cap.closed.is_set())
+
+    def test_release_unblocks_stuck_reader(self):
+        """Test a thread blocked in a read is unblocked by closing the reader"""
+        from vcapture import tcapture
+
+        cap = tcapture("test_target", "mjpeg")
+        cap.release_timeout = 0.05
+        unblock = threading.Event()
+        reader = Mock()
+        reader.isOpened.return_value = True
+        reader.read.side_effect = lambda: (unblock.wait(5.0), None)
+        reader.release.side_effect = unblock.set
+
+        with patch.object(cap, "_open_capture", return_value=reader):
+            cap.start()
+            while not reader.read.called:
+                time.sleep(0.01)
+            started = time.monotonic()
+            cap.release()
+
+        self.assertLess(time.monotonic() - started, cap.release_budget)
+        self.assertFalse(cap.is_alive())
+        self.assertTrue(cap.closed.is_set())
+
+
+class TestCaptureLoopOptions(unittest.TestCase):
+    """Test the output_size and max_fps capture loop options"""
+
+    def _run_with_frames(self, cap, frames, reader_patch):
+        reads = iter(frames)
+
+        def read(*args):
+            frame = next(reads, None)
+            if frame is None:
+                cap._running.value = False
+                return False, None
+            return True, frame
+
+        with patch(reader_patch) as mock_reader_class:
+            mock_reader = mock_reader_class.return_value
+            mock_reader.isOpened.return_value = True
+            mock_reader.read.side_effect = read
+            subscriber = cap.subscribe("every")
+            cap.run()
+        packets = []
+        while (packet := subscriber.poll()) is not None:
+            packets.append(packet)
+        return packets
+
+    def test_loop_options_are_not_passed_to_the_backend(self):
+        """Test output_size and max_fps are taken out of the backend options"""
+        from vcapture import tcapture
+
+        cap = tcapture("test_target", "mjpeg", {"output_size": [320, 180], "max_fps": 5})
+        self.assertEqual(cap.output_size, (320, 180))
+        self.assertEqual(cap.max_fps, 5)
+        self.assertEqual(cap.options, {})
+
+    def test_ffmpeg_scales_to_output_size(self):
+        """Test ffmpeg is asked to scale instead of resizing in Python"""
+        from vcapture import tcapture
+
+        cap = tcapture("test_target", "ffmpeg", {"output_size": (320, 180)})
+        self.assertEqual((cap.options["width"], cap.options["height"]), (320, 180))
+
+    def test_opencv_frames_are_downscaled(self):
+        """Test frames reach the bus at output_size"""
+        from vcapture import tcapture
+
+        cap = tcapture("test_target", options={"output_size": (32, 18)})
+        frames = [np.zeros((180, 320, 3), dtype=np.uint8)]
+        packets = self._run_with_frames(cap, frames, "vcapture.cv2.VideoCapture")
+        self.assertEqual(packets[0].frame.shape, (18, 32, 3))
+
+    def test_mjpeg_frames_are_decoded_at_output_size(self):
+        """Test downscaled JPEG sources publish small frames next to the JPEG"""
+        from vcapture import tcapture
+
+        cap = tcapture("test_target", "mjpeg", {"output_size": (80, 45)})
+        frame = np.full((360, 640, 3), 200, dtype=np.uint8)
+        jpeg = cv2.imencode(".jpg", frame)[1].tobytes()
+        packets = self._run_with_frames(cap, [jpeg], "vcapture.MJPEGCapture")
+        self.assertEqual(packets[0].jpeg, jpeg)
+        self.assertTrue(packets[0].decoded)
+        self.assertEqual(packets[0].frame.shape, (45, 80, 3))
+
+    def test_max_fps_drops_frames(self):
+        """Test frames read faster than max_fps are dropped"""
+        from vcapture import tcapture
+
+        cap = tcapture("test_target", options={"max_fps": 10})
+        frames = [np.zeros((2, 2, 3), dtype=np.uint8) for _ in range(6)]
+        # Frames read 50 ms apart, so every other one is kept
+        clock = iter(index * 0.05 for index in range(6))
+        with patch("vcapture.time.monotonic", side_effect=lambda: next(clock)):
+            packets = self._run_with_frames(cap, frames, "vcapture.cv2.VideoCapture")
+        self.assertEqual(len(packets), 3)
+
+    def test_unchanged_frames_reuse_the_decoded_frame(self):
+        """Test repeats of a picture are marked unchanged and not decoded again"""
+        from mjpeg_capture import decode_jpeg
+        from vcapture import CHANGE_THRESHOLD, tcapture
+
+        cap = tcapture(
+            "test_target",
+            "mjpeg",
+            {"output_size": (80, 45), "change_threshold": CHANGE_THRESHOLD},
+        )
+        still = np.full((360, 640, 3), 100, dtype=np.uint8)
+        moved = still.copy()
+        moved[:90, :160] = 250
+        jpegs = [
+            cv2.imencode(".jpg", frame)[1].tobytes() for frame in (still, still, moved)
+        ]
+        with patch("vcapture.decode_jpeg", wraps=decode_jpeg) as decode:
+            packets = self._run_with_frames(cap, jpegs, "vcapture.MJPEGCapture")
+        self.assertEqual([p.meta["changed"] for p in packets], [True, False, True])
+        self.assertEqual([p.meta["scene"] for p in packets], [1, 1, 2])
+        self.assertIs(packets[1].frame, packets[0].frame)
+        self.assertEqual(decode.call_count, 2)
+
+    def test_change_detection_is_off_by_default(self):
+        """Test frames are published without change metadata unless asked for"""
+        from vcapture import tcapture
+
+        cap = tcapture("test_target")
+        self.assertIsNone(cap.changes)
+        frames = [np.zeros((18, 32, 3), dtype=np.uint8) for _ in range(2)]
+        packets = self._run_with_frames(cap, frames, "vcapture.cv2.VideoCapture")
+        self.assertNotIn("changed", packets[1].meta)
+        self.assertIsNot(packets[1].frame, packets[0].frame)
+
+
+class TestChangeDetector(unittest.TestCase):
+    def test_small_local_change_is_detected(self):
+        from vcapture import ChangeDetector
+
+        detector = ChangeDetector()
+        frame = np.full((540, 960, 3), 60, dtype=np.uint8)
+        self.assertTrue(detector.update(frame))
+        self.assertFalse(detector.update(frame.copy()))
+        frame[100:130, 200:230] = 255  # One block's worth
+        self.assertTrue(detector.update(frame))
+        self.assertEqual(detector.scene, 2)
+
+    def test_slow_drift_adds_up(self):
+        from vcapture import ChangeDetector
+
+        detector = ChangeDetector(threshold=8)
+        detector.update(np.full((90, 160), 100, dtype=np.uint8))
+        changes = [
+            detector.update(np.full((90, 160), 100 + step * 3, dtype=np.uint8))
+            for step in range(1, 5)
+        ]
+        # 3 levels per frame, only noticed once 8 levels off the reference
+        self.assertEqual(changes, [False, False, True, False])
+
+    def test_jpeg_signature_matches_frame(self):
+        from vcapture import ChangeDetector
+
+        detector = ChangeDetector()
+        frame = np.full((360, 640, 3), 120, dtype=np.uint8)
+        detector.update(frame)
+        jpeg = cv2.imencode(".jpg", frame)[1].tobytes()
+        self.assertFalse(detector.update(jpeg=jpeg))
+        self.assertTrue(detector.update(jpeg=b"\xff\xd8broken\xff\xd9"))
+
+
+class TestFocusMeter(unittest.TestCase):
+    def _pattern(self, blur=0):
+        rng = np.random.default_rng(0)
+        frame = rng.integers(0, 256, (360, 640, 3), dtype=np.uint8)
+        if blur:
+            frame = cv2.GaussianBlur(frame, (0, 0), blur)
+        return frame
+
+    def test_blur_lowers_sharpness(self):
+        from vcapture import FocusMeter
+
+        meter = FocusMeter()
+        values = [meter.measure(self._pattern(blur)) for blur in (0, 1, 3)]
+        self.assertGreater(values[0], values[1])
+        self.assertGreater(values[1], values[2])
+
+    def test_only_the_roi_is_measured(self):
+        from vcapture import FocusMeter
+
+        frame = np.full((360, 640, 3), 128, dtype=np.uint8)
+        frame[:, :100] = self._pattern()[:, :100]  # Detail left of the ROI only
+        self.assertEqual(FocusMeter().measure(frame), 0.0)
+        self.assertGreater(FocusMeter(roi=(0, 0, 0.25, 1)).measure(frame), 0.0)
+
+    def test_jpeg_is_measured_in_grayscale(self):
+        from vcapture import FocusMeter
+
+        meter = FocusMeter()
+        sharp, blurred = (
+            cv2.imencode(".jpg", self._pattern(blur))[1].tobytes() for blur in (0, 3)
+        )
+        self.assertGreater(meter.measure(jpeg=sharp), meter.measure(jpeg=blurred))
+        self.assertIsNone(meter.measure(jpeg=b"\xff\xd8broken\xff\xd9"))
+
+    def test_update_measures_at_the_rate(self):
+        from vcapture import FocusMeter
+
+        now = [0.0]
+        meter = FocusMeter(rate=5.0, clock=lambda: now[0])
+        with patch.object(meter, "measure", side_effect=[1.0, 2.0, 3.0]) as measure:
+            self.assertEqual(meter.update(self._pattern()), 1.0)
+            now[0] = 0.1
+            self.assertEqual(meter.update(self._pattern()), 1.0)  # Not due
+            now[0] = 0.3
+            self.assertEqual(meter.update(self._pattern()), 2.0)
+            self.assertEqual(meter.update(self._pattern()), 2.0)
+        self.assertEqual(measure.call_count, 2)
+
+    def test_sharpness_is_published_with_each_frame(self):
+        from vcapture import tcapture
+
+        cap = tcapture(
+            "test_target", "mjpeg", {"focus_rate": 5.0, "focus_roi": (0, 0, 1, 1)}
+        )
+        jpeg = cv2.imencode(".jpg", self._pattern())[1].tobytes()
+        packets = TestCaptureLoopOptions()._run_with_frames(
+            cap, [jpeg, jpeg], "vcapture.MJPEGCapture"
+        )
+        self.assertEqual(cap.options, {})
+        self.assertGreater(packets[0].meta["sharpness"], 0.0)
+        self.assertEqual(packets[1].meta["sharpness"], packets[0].meta["sharpness"])
+
+    def test_slight_blur_of_an_unchanged_scene_lowers_sharpness(self):
+        from vcapture import CHANGE_THRESHOLD, tcapture
+
+        cap = tcapture(
+            "test_target",
+            options={"change_threshold": CHANGE_THRESHOLD, "focus_rate": 0},
+        )
+        # Low contrast blocks, blurring them barely moves the block averages
+        blocks = np.random.default_rng(0).integers(100, 160, (18, 32, 3))
+        sharp = cv2.resize(
+            blocks.astype(np.uint8), (640, 360), interpolation=cv2.INTER_NEAREST
+        )
+        frames = [sharp, cv2.GaussianBlur(sharp, (0, 0), 0.8)]
+        packets = TestCaptureLoopOptions()._run_with_frames(
+            cap, frames, "vcapture.cv2.VideoCapture"
+        )
+        # Too slight for change detection, the frame is reused
+        self.assertFalse(packets[1].meta["changed"])
+        self.assertLess(packets[1].meta["sharpness"], packets[0].meta["sharpness"])
+
+    def test_focus_metric_is_off_by_default(self):
+        from vcapture import tcapture
+
+        cap = tcapture("test_target")
+        frames = [np.zeros((18, 32, 3), dtype=np.uint8)]
+        packets = TestCaptureLoopOptions()._run_with_frames(
+            cap, frames, "vcapture.cv2.VideoCapture"
+        )
+        self.assertIsNone(cap.focus)
+        self.assertNotIn("sharpness", packets[0].meta)
 
 
 if __name__ == "__main__":
@@ -8,7 +8,7 @@ import inspect
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from controller import Camera
-from visca import ViscaParser
+from visca import ViscaParser, decode_position
 
 
 class TestViscaIntegration:
@@ -41,9 +41,8 @@ class TestViscaIntegration:
             with patch.object(
                 camera.parser, "interpret_completion", return_value="Command Completed"
             ):
-                camera.on()
-                # The on() method calls execute with the raw command dictionary
-                mock_execute.assert_called_with(camera.commands["power_on"])
+                assert camera.on() == "Command Completed"
+                mock_execute.assert_called_with("8101040002ff")
 
         # Test power off
         with patch.object(camera, "execute") as mock_execute:
@@ -51,9 +50,8 @@ class TestViscaIntegration:
             with patch.object(
                 camera.parser, "interpret_completion", return_value="Command Completed"
             ):
-                camera.off()
-                # The off() method calls execute with the raw command dictionary
-                mock_execute.assert_called_with(camera.commands["power_off"])
+                assert camera.off() == "Command Completed"
+                mock_execute.assert_called_with("8101040003ff")
 
     def test_zoom_commands_generate_correct_visca(self, camera):
         """Test that zoom commands generate correct VISCA hex strings"""
@@ -278,5 +276,20 @@ class TestViscaIntegration:
         assert off_command == "8101043303ff"
 
 
+class TestDecodePosition:
+    @pytest.mark.parametrize(
+        "digits, value",
+        [
+            ("08000000", 0x8000),  # pan/tilt slice, starts on a separator
+            ("090c0400", 0x9C40),
+            ("1030808", 0x1388),  # zoom/focus slice, starts on a nibble
+            ("0", 0),
+            (1234, 1234),
+        ],
+    )
+    def test_nibble_separated_values(self, digits, value):
+        assert decode_position(digits) == value
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
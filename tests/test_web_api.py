@@ -0,0 +1,269 @@
+import asyncio
+import base64
+import json
+import os
+import struct
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from headless import ControlService
+from preset_store import PresetStore
+from web_api import (
+    OP_CLOSE,
+    OP_PING,
+    OP_PONG,
+    OP_TEXT,
+    WebApi,
+    encode_frame,
+    read_frame,
+    websocket_accept,
+)
+
+CAMERAS = [{"ip": "10.0.0.1", "type": "ptzoptics"}]
+
+
+class _FakeCamera:
+    def __init__(self, cam_cfg):
+        self.calls = []
+        self.zoom_pos = 1234
+        self.moving = threading.Event()
+        self.moving.set()
+
+    def pan_left(self, pan_speed, tilt_speed):
+        self.calls.append(("pan_left", pan_speed, tilt_speed))
+        # Held while a test clears it, like a move waiting for completion
+        self.moving.wait(5.0)
+        return "Command Completed"
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def service(tmp_path):
+    store = PresetStore(str(tmp_path / "presets.json"), debounce=0.01)
+    service = ControlService(CAMERAS, store, str(tmp_path), connect=_FakeCamera)
+    yield service
+    service.close()
+
+
+def _run(service, client, token=None):
+    """Start a WebApi on a free port and run `client(port)` against it"""
+
+    async def main():
+        api = WebApi(service, token=token)
+        await api.start("127.0.0.1", 0)
+        try:
+            return await asyncio.wait_for(client(api.port), 5.0)
+        finally:
+            await api.close()
+
+    return asyncio.run(main())
+
+
+async def _http(port, method, path, body=None, headers=()):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = b"" if body is None else json.dumps(body).encode()
+    head = [f"{method} {path} HTTP/1.1", "Host: test", f"Content-Length: {len(data)}"]
+    head += [*headers, "Connection: close"]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + data)
+    status = int((await reader.readline()).split()[1])
+    response = await reader.read()
+    writer.close()
+    return status, json.loads(response.split(b"\r\n\r\n", 1)[1])
+
+
+def _client_frame(payload, opcode=OP_TEXT, fin=True):
+    mask = b"\x01\x02\x03\x04"
+    masked = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    return struct.pack("!BB", (0x80 if fin else 0) | opcode, 0x80 | len(payload)) + (
+        mask + masked
+    )
+
+
+async def _websocket(port, path="/ws"):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write(
+        (
+            f"GET {path} HTTP/1.1\r\nHost: test\r\nUpgrade: websocket\r\n"
+            f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        ).encode()
+    )
+    head = await reader.readuntil(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 101")
+    assert f"Sec-WebSocket-Accept: {websocket_accept(key)}".encode() in head
+    return reader, writer
+
+
+async def _receive(reader):
+    _, opcode, payload = await read_frame(reader)
+    assert opcode == OP_TEXT
+    return json.loads(payload)
+
+
+class TestFrames:
+    def test_accept_key_from_rfc6455(self):
+        assert (
+            websocket_accept("dGhlIHNhbXBsZSBub25jZQ==")
+            == "s3pPLMBiTxaQ9kYGzzhZRbK+xOo="
+        )
+
+    @pytest.mark.parametrize("size", [5, 200, 70000])
+    def test_frame_lengths_round_trip(self, size):
+        payload = bytes(range(256)) * (size // 256) + b"x" * (size % 256)
+
+        async def decode():
+            reader = asyncio.StreamReader()
+            reader.feed_data(encode_frame(payload))
+            return await read_frame(reader)
+
+        assert asyncio.run(decode()) == (True, OP_TEXT, payload)
+
+
+class TestHttp:
+    def test_routes(self, service):
+        async def client(port):
+            return (
+                await _http(port, "GET", "/api/cameras"),
+                await _http(port, "GET", "/api/cameras/0/zoom_pos"),
+                await _http(port, "GET", "/api/cameras/10.0.0.1%7Cptzoptics/presets"),
+                await _http(
+                    port,
+                    "POST",
+                    "/api/command",
+                    {"id": 4, "cmd": "call", "method": "pan_left", "args": [3, 2]},
+                ),
+                await _http(port, "GET", "/api/cameras/0/socket"),
+                await _http(port, "GET", "/nope"),
+                await _http(port, "DELETE", "/api/status"),
+            )
+
+        cameras, zoom, presets, call, bad, missing, method = _run(service, client)
+        assert cameras[0] == 200 and cameras[1]["result"][0]["key"] == (
+            "10.0.0.1|ptzoptics"
+        )
+        assert zoom == (200, {"id": None, "ok": True, "result": 1234})
+        assert presets[0] == 200 and "1" in presets[1]["result"]
+        assert call == (200, {"id": 4, "ok": True, "result": "Command Completed"})
+        assert bad[0] == 400 and "Unknown camera property" in bad[1]["error"]
+        assert missing[0] == 404
+        assert method[0] == 405
+
+    def test_keep_alive(self, service):
+        async def client(port):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            request = b"GET /api/status HTTP/1.1\r\nHost: test\r\n\r\n"
+            writer.write(request + request)
+            replies = []
+            for _ in range(2):
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+                replies.append(json.loads(await reader.readexactly(length)))
+            writer.close()
+            return replies
+
+        assert all(reply["ok"] for reply in _run(service, client))
+
+    def test_token(self, service):
+        async def client(port):
+            return (
+                await _http(port, "GET", "/api/status"),
+                await _http(port, "GET", "/api/status?token=secret"),
+                await _http(
+                    port, "GET", "/api/status", headers=["Authorization: Bearer secret"]
+                ),
+            )
+
+        missing, query, header = _run(service, client, token="secret")
+        assert missing[0] == 401
+        assert query[0] == 200 and header[0] == 200
+
+
+class TestWebSocket:
+    def test_requests_and_events(self, service):
+        async def client(port):
+            reader, writer = await _websocket(port)
+            watcher, watcher_writer = await _websocket(port)
+            writer.write(_client_frame(b"", OP_PING))
+            ping = await read_frame(reader)
+            request = json.dumps(
+                {"id": 1, "cmd": "call", "method": "pan_left", "args": [7, 5]}
+            ).encode()
+            # Fragmented text message
+            writer.write(_client_frame(request[:10], fin=False))
+            writer.write(_client_frame(request[10:], opcode=0))
+            replies = [await _receive(reader), await _receive(reader)]
+            event = await _receive(watcher)
+            writer.write(_client_frame(b"not json"))
+            invalid = await _receive(reader)
+            writer.write(_client_frame(struct.pack("!H", 1000), OP_CLOSE))
+            close = await read_frame(reader)
+            writer.close()
+            watcher_writer.close()
+            return ping, replies, event, invalid, close
+
+        ping, replies, event, invalid, close = _run(service, client)
+        assert ping == (True, OP_PONG, b"")
+        reply = next(message for message in replies if "ok" in message)
+        assert reply == {"id": 1, "ok": True, "result": "Command Completed"}
+        assert {"event": "call", "camera": "10.0.0.1|ptzoptics"}.items() <= (
+            event.items()
+        )
+        assert event["method"] == "pan_left" and event["args"] == [7, 5]
+        assert invalid["ok"] is False and "Invalid JSON" in invalid["error"]
+        assert close[1] == OP_CLOSE
+
+    def test_slow_command_does_not_hold_up_later_requests(self, service):
+        camera = service.workers[0].submit(lambda camera: camera).result(1.0)
+        camera.moving.clear()
+
+        async def client(port):
+            reader, writer = await _websocket(port)
+            for request in (
+                {"id": 1, "cmd": "call", "method": "pan_left", "args": [7, 5]},
+                {"id": 2, "cmd": "status"},
+            ):
+                writer.write(_client_frame(json.dumps(request).encode()))
+            first = await _receive(reader)
+            camera.moving.set()
+            replies = [first]
+            while len(replies) < 2 or "event" in replies[-1]:
+                replies.append(await _receive(reader))
+            writer.close()
+            return [reply.get("id") for reply in replies if "event" not in reply]
+
+        assert _run(service, client) == [2, 1]
+
+    def test_socket_too_slow_for_events_is_closed(self, service):
+        async def main():
+            api = WebApi(service)
+            await api.start("127.0.0.1", 0)
+            try:
+                _, writer = await _websocket(api.port)
+                while not api._sockets:
+                    await asyncio.sleep(0.01)
+                (socket,) = api._sockets
+                # A client that stopped reading: its queue is full
+                for _ in range(socket.queue.maxsize):
+                    socket.queue.put_nowait(b"")
+                api._broadcast(json.dumps({"event": "call"}))
+                writer.close()
+                return socket not in api._sockets and socket.writer.is_closing()
+            finally:
+                await api.close()
+
+        assert asyncio.run(main())
+
+    def test_token_in_query(self, service):
+        async def client(port):
+            _, writer = await _websocket(port, "/ws?token=secret")
+            writer.close()
+            return await _http(port, "GET", "/ws")
+
+        assert _run(service, client, token="secret")[0] == 401
@@ -0,0 +1,144 @@
+import collections
+import contextlib
+import os
+import threading
+
+from PIL import Image
+
+THUMBNAIL_SUFFIX = ".thumb.jpg"
+
+
+def thumbnail_path(image_path):
+    """Path of the button-size thumbnail stored next to `image_path`"""
+    return os.path.splitext(image_path)[0] + THUMBNAIL_SUFFIX
+
+
+def write_thumbnail(image_path, size, quality=85, image=None):
+    """
+    Scale the preset image to `size` and save it next to it, returns the thumbnail
+    path. Pass the already decoded `image` to skip reading `image_path` again.
+    """
+    size = tuple(size)
+    if image is None:
+        with Image.open(image_path) as source:
+            # JPEG sources decode at a reduced scale close to `size`
+            source.draft("RGB", size)
+            thumb = source.convert("RGB").resize(size, Image.BILINEAR)
+    else:
+        thumb = image.convert("RGB").resize(size, Image.BILINEAR)
+    path = thumbnail_path(image_path)
+    temp_path = f"{path}.tmp"
+    try:
+        thumb.save(temp_path, format="JPEG", quality=quality)
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
+    return path
+
+
+class ThumbnailCache:
+    """
+    Decoded preset button images, kept in memory up to `capacity` entries.
+
+    Entries are keyed by (camera_key, slot, mtime of the preset image), so a new
+    snapshot of a slot is picked up on its own. The first view of a slot loads
+    the thumbnail file next to the preset image, creating it if it is missing or
+    older than the image. With a `catalog` the thumbnails table is used to find
+    and record the thumbnail instead of comparing file times. Later
+    views come from memory without touching the disk, until `invalidate` is
+    called for the slot.
+    """
+
+    def __init__(self, size, capacity=64, catalog=None):
+        self.size = tuple(size)
+        self.capacity = capacity
+        self._catalog = catalog
+        self._images = collections.OrderedDict()
+        self._mtimes = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._images)
+
+    def get(self, camera_key, slot_index, image_path):
+        """RGBA button image for the slot, or None if its image does not exist"""
+        if not image_path:
+            return None
+        slot_key = (camera_key, slot_index)
+        with self._lock:
+            known = self._mtimes.get(slot_key)
+            if known is not None and known[0] == image_path:
+                image = self._lookup((camera_key, slot_index, known[1]))
+                if image is not None:
+                    return image
+
+        try:
+            mtime = os.stat(image_path).st_mtime
+        except OSError:
+            return None
+        key = (camera_key, slot_index, mtime)
+        with self._lock:
+            self._mtimes[slot_key] = (image_path, mtime)
+            image = self._lookup(key)
+            if image is not None:
+                return image
+            self.misses += 1
+
+        try:
+            image = self._load(camera_key, slot_index, image_path, mtime)
+        except Exception:
+            return None
+        with self._lock:
+            self._images[key] = image
+            while len(self._images) > self.capacity:
+                self._images.popitem(last=False)
+        return image
+
+    def invalidate(self, camera_key, slot_index):
+        """Forget the slot, the next `get` checks its image on disk again"""
+        with self._lock:
+            self._mtimes.pop((camera_key, slot_index), None)
+            for key in [
+                key for key in self._images if key[:2] == (camera_key, slot_index)
+            ]:
+                del self._images[key]
+
+    def _lookup(self, key):
+        # Caller holds the lock
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+            self.hits += 1
+        return image
+
+    def _load(self, camera_key, slot_index, image_path, mtime):
+        path = thumbnail_path(image_path)
+        record = None
+        if self._catalog is not None:
+            with contextlib.suppress(Exception):
+                record = self._catalog.thumbnail(camera_key, slot_index)
+        if record is not None:
+            current = record[1:] == (mtime, *self.size) and os.path.exists(record[0])
+            path = record[0] if current else path
+        else:
+            try:
+                current = os.stat(path).st_mtime >= mtime
+            except OSError:
+                current = False
+        if current:
+            with Image.open(path) as thumb:
+                image = thumb.convert("RGBA")
+            if image.size == self.size:
+                return image
+        path = write_thumbnail(image_path, self.size)
+        if self._catalog is not None:
+            with contextlib.suppress(Exception):
+                self._catalog.set_thumbnail(
+                    camera_key, slot_index, path, mtime, *self.size
+                )
+        with Image.open(path) as thumb:
+            return thumb.convert("RGBA")
@@ -0,0 +1,209 @@
+"""
+Eased, synchronized pan/tilt/zoom moves.
+
+A move from the camera's current pose to a target pose over a duration is
+planned as waypoints at a fixed control rate, all axes following the same
+easing curve so they start and arrive together. Each waypoint is sent as one
+absolute pan/tilt (and zoom) command on the camera's CommandWorker, one tick
+ahead, with the pan/tilt speed the head needs to get there from the last
+waypoint actually sent in the time since that one went out.
+
+Waypoints are sent with `execute` (command and ACK) rather than `run`, so a
+tick never waits for the head to arrive, and all go on one coalescing
+channel: when the camera answers slower than the control rate, stale
+waypoints are dropped instead of queueing up behind the socket.
+"""
+
+import math
+import threading
+import time
+from concurrent.futures import Future
+from warnings import warn
+
+from visca import decode_position
+
+CONTROL_RATE = 20  # Waypoints per second
+AXES = ("pan", "tilt", "zoom")
+# Pan/tilt position units per second for each VISCA speed step (the test
+# camera's figure, measure it for other heads) and the highest speed steps
+PAN_TILT_UNITS_PER_SPEED = 900.0
+MAX_PAN_SPEED = 24
+MAX_TILT_SPEED = 20
+
+EASINGS = {
+    "linear": lambda t: t,
+    "ease_in": lambda t: t**3,
+    "ease_out": lambda t: 1 - (1 - t) ** 3,
+    "ease_in_out": lambda t: t * t * (3 - 2 * t),
+    "sine": lambda t: 0.5 - 0.5 * math.cos(math.pi * t),
+}
+
+
+def read_pose(camera):
+    """{"pan", "tilt", "zoom"} of a Camera from its position inquiries"""
+    pan, tilt = camera.pan_tilt_pos
+    return {
+        "pan": decode_position(pan),
+        "tilt": decode_position(tilt),
+        "zoom": decode_position(camera.zoom_pos[0]),
+    }
+
+
+def plan(start, target, duration, rate=CONTROL_RATE, easing="ease_in_out"):
+    """
+    Waypoints [(seconds, pose)] from `start` to `target`, one per control tick.
+
+    Only the axes in `target` move. Pan and tilt are one command, so a target
+    with only one of them keeps the other at its start value.
+    """
+    if easing not in EASINGS:
+        raise ValueError(f"Unknown easing {easing}, expected one of {list(EASINGS)}")
+    axes = [axis for axis in AXES if axis in target]
+    if "pan" in target or "tilt" in target:
+        axes = sorted({*axes, "pan", "tilt"}, key=AXES.index)
+    goal = {axis: target.get(axis, start[axis]) for axis in axes}
+    ease = EASINGS[easing]
+    steps = max(1, round(duration * rate))
+    return [
+        (
+            index * duration / steps,
+            {
+                axis: round(
+                    start[axis] + (goal[axis] - start[axis]) * ease(index / steps)
+                )
+                for axis in axes
+            },
+        )
+        for index in range(1, steps + 1)
+    ]
+
+
+def _speed(distance, seconds, max_speed):
+    return max(
+        1, min(max_speed, math.ceil(distance / seconds / PAN_TILT_UNITS_PER_SPEED))
+    )
+
+
+def _send_waypoint(camera, pose, previous, seconds):
+    if "pan" in pose:
+        command = camera.build_command(
+            "pan_direct_abs",
+            _speed(abs(pose["pan"] - previous["pan"]), seconds, MAX_PAN_SPEED),
+            _speed(abs(pose["tilt"] - previous["tilt"]), seconds, MAX_TILT_SPEED),
+            pose["pan"],
+            pose["tilt"],
+        )
+        camera.send(command)
+    if "zoom" in pose:
+        camera.send(camera.build_command("zoom_direct", pose["zoom"]))
+    camera.clear_cache()
+
+
+class Trajectory:
+    """
+    Sends a planned move to a camera's CommandWorker on a timing thread.
+
+    The start pose is read from the camera (on its worker) unless given. `done`
+    is a Future that resolves once the last waypoint was sent, or is cancelled
+    by `cancel()`. `sent` counts waypoints handed to the camera and
+    `superseded` those dropped because a newer one arrived first.
+    """
+
+    def __init__(
+        self,
+        worker,
+        target,
+        duration,
+        rate=CONTROL_RATE,
+        easing="ease_in_out",
+        start=None,
+        channel="trajectory",
+        clock=time.monotonic,
+        timeout=5.0,
+    ):
+        if duration < 0:
+            raise ValueError("duration must not be negative")
+        if easing not in EASINGS:
+            raise ValueError(
+                f"Unknown easing {easing}, expected one of {list(EASINGS)}"
+            )
+        self.worker = worker
+        self.target = dict(target)
+        self.duration = duration
+        self.rate = rate
+        self.easing = easing
+        self.channel = channel
+        self.timeout = timeout
+        self.sent = 0
+        self.superseded = 0
+        self.late = 0.0  # Worst lateness of a send against its tick, in seconds
+        self.done = Future()
+        self._start = start
+        self._clock = clock
+        # (pose, clock time) of the last waypoint sent, kept on the worker
+        self._last_sent = None
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="trajectory", daemon=True
+        )
+        self._thread.start()
+
+    def cancel(self):
+        """Stop sending waypoints, the head stays wherever it got to"""
+        self._cancelled.set()
+        self.done.cancel()
+
+    def _send(self, camera, pose, origin, seconds):
+        # Runs on the worker. Superseded waypoints never reached the camera, so
+        # the speed covers the distance from the last pose that did, in the
+        # time since it went out (at least the planned tick)
+        now = self._clock()
+        if self._last_sent is not None:
+            origin, sent_at = self._last_sent
+            seconds = max(seconds, now - sent_at)
+        _send_waypoint(camera, pose, origin, seconds)
+        self._last_sent = (pose, now)
+
+    def _run(self):
+        try:
+            start = self._start
+            if start is None:
+                start = self.worker.submit(read_pose).result(timeout=self.timeout)
+            samples = plan(start, self.target, self.duration, self.rate, self.easing)
+        except Exception as e:
+            warn(f"[trajectory] Failed to plan move: {e}")
+            if self.done.set_running_or_notify_cancel():
+                self.done.set_exception(e)
+            return
+
+        futures = []
+        began = self._clock()
+        previous_time = 0.0
+        for seconds, pose in samples:
+            # Sent one tick ahead so the head travels during the tick
+            due = began + previous_time
+            if self._cancelled.wait(max(0.0, due - self._clock())):
+                return
+            self.late = max(self.late, self._clock() - due)
+            futures.append(
+                self.worker.submit(
+                    self._send,
+                    pose,
+                    start,
+                    max(seconds - previous_time, 1e-3),
+                    channel=self.channel,
+                )
+            )
+            previous_time = seconds
+
+        def finished(last):
+            self.superseded = sum(future.cancelled() for future in futures)
+            self.sent = len(futures) - self.superseded
+            if not self.done.set_running_or_notify_cancel():
+                return
+            if last.cancelled() or last.exception() is None:
+                self.done.set_result(samples[-1][1])
+            else:
+                self.done.set_exception(last.exception())
+
+        futures[-1].add_done_callback(finished)
@@ -1,22 +1,260 @@
 import contextlib
+import queue
+import threading
 from multiprocessing import Process, Value, Queue
 import cv2
+import numpy as np
 import time
 from warnings import warn
 
+from frame_bus import FrameBus
+from ffmpeg_capture import FFmpegCapture
+from mjpeg_capture import MJPEGCapture, decode_jpeg
 
-class vcapture(Process):
-    def __init__(self, target):
-        super().__init__()
+
+CAPTURE_BACKENDS = ("opencv", "ffmpeg", "mjpeg")
+CAPTURE_MODES = ("process", "thread")
+
+# Upper bound for a single blocking open/read in the OpenCV backend, so a dead
+# RTSP stream cannot keep the capture loop from seeing the stop flag
+OPENCV_TIMEOUT_MS = 2000
+
+# Change detection: frames are compared as a grid of block luma averages, a
+# block differing by more than the threshold (0-255) makes the frame changed.
+# Off unless a capture asks for it with the change_threshold option
+CHANGE_GRID = (64, 36)
+CHANGE_THRESHOLD = 8
+
+# Focus assist: sharpness measurements per second and the region measured,
+# (x, y, width, height) as fractions of the frame. Off unless a capture asks
+# for it with the focus_rate option
+FOCUS_RATE = 5.0
+FOCUS_ROI = (0.25, 0.25, 0.5, 0.5)
+
+
+def _check_backend(backend):
+    if backend not in CAPTURE_BACKENDS:
+        raise ValueError(
+            f"Unknown capture backend {backend}, expected one of {CAPTURE_BACKENDS}"
+        )
+
+
+class ChangeDetector:
+    """
+    Tells frames that show something new from repeats of the same picture.
+
+    Each frame is reduced to a CHANGE_GRID of block luma averages: JPEGs are
+    decoded in grayscale at 1/8 size for it, raw frames are subsampled, both
+    far cheaper than a full decode. A frame is changed when any block differs
+    from the last changed frame by more than `threshold`. Comparing against
+    the last changed frame rather than the previous one means slow drifts add
+    up until they are noticed. `scene` counts the changed frames.
+    """
+
+    def __init__(self, threshold=CHANGE_THRESHOLD, grid=CHANGE_GRID):
+        self.threshold = threshold
+        self.grid = tuple(grid)
+        self.scene = 0
+        self._reference = None
+
+    def signature(self, frame=None, jpeg=None):
+        """Block luma grid of a raw frame or JPEG bytes, None if undecodable"""
+        if jpeg is not None:
+            frame = cv2.imdecode(
+                np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8
+            )
+        if frame is None or frame.size == 0:
+            return None
+        # Plain subsampling down to a few pixels per block before averaging
+        block = min(frame.shape[1] // self.grid[0], frame.shape[0] // self.grid[1])
+        step = max(1, block // 4)
+        small = cv2.resize(
+            np.ascontiguousarray(frame[::step, ::step]),
+            self.grid,
+            interpolation=cv2.INTER_AREA,
+        )
+        if small.ndim == 3:
+            small = small.mean(axis=2)
+        return small.astype(np.int16)
+
+    def update(self, frame=None, jpeg=None):
+        """True if the frame differs from the last changed one"""
+        signature = self.signature(frame, jpeg)
+        reference = self._reference
+        if (
+            signature is None
+            or reference is None
+            or np.abs(signature - reference).max() > self.threshold
+        ):
+            if signature is not None:
+                self._reference = signature
+            self.scene += 1
+            return True
+        return False
+
+
+class FocusMeter:
+    """
+    Sharpness of the picture, for focus assist and software autofocus.
+
+    The metric is the variance of the Laplacian of the luma inside `roi`:
+    edges in focus give strong second derivatives, blur flattens them, so it
+    peaks at best focus. Values only compare between frames of the same
+    source and framing. JPEGs are decoded in grayscale at half size for it,
+    raw frames use their green channel (close to luma, same in RGB and BGR).
+    `update` measures at most `rate` times a second, in between it returns
+    the last value. It does not wait for a changed scene: defocus blurs the
+    picture without moving the block averages change detection compares.
+    """
+
+    def __init__(self, rate=FOCUS_RATE, roi=FOCUS_ROI, clock=time.monotonic):
+        self.rate = rate
+        self.roi = tuple(roi)
+        self.value = None
+        self._clock = clock
+        self._next_at = None
+
+    def measure(self, frame=None, jpeg=None):
+        """Sharpness of a raw frame or JPEG bytes, None if undecodable"""
+        if jpeg is not None:
+            frame = cv2.imdecode(
+                np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_2
+            )
+        if frame is None or frame.size == 0:
+            return None
+        height, width = frame.shape[:2]
+        x, y, w, h = self.roi
+        left, top = int(x * width), int(y * height)
+        region = frame[
+            top : max(top + 3, int((y + h) * height)),
+            left : max(left + 3, int((x + w) * width)),
+        ]
+        if region.ndim == 3:
+            region = region[..., 1]
+        return float(cv2.Laplacian(region, cv2.CV_32F).var())
+
+    def update(self, frame=None, jpeg=None):
+        """Sharpness of the frame, measured again only when due"""
+        now = self._clock()
+        if self._next_at is not None and now < self._next_at:
+            return self.value
+        self._next_at = now + (1.0 / self.rate if self.rate else 0.0)
+        self.value = self.measure(frame, jpeg)
+        return self.value
+
+
+class _CaptureLoop:
+    """Capture loop and consumer side shared by the process and thread modes"""
+
+    # Shutdown budget: cooperative stop first, then escalation
+    release_timeout = 1.0
+    terminate_timeout = 0.5
+
+    def _setup(self, target, backend, options, bus_capacity):
+        _check_backend(backend)
         self.target = target
-        self._running = Value("b", True)
-        self._frame_queue = Queue(maxsize=1)  # Only keep latest frame
-        self._current_frame = None
+        self.backend = backend
+        self.options = dict(options or {})
+        # Capture loop options, applied before frames reach the bus
+        output_size = self.options.pop("output_size", None)
+        self.output_size = tuple(output_size) if output_size else None
+        self.max_fps = self.options.pop("max_fps", None)
+        # Change detection is off unless a threshold is given
+        threshold = self.options.pop("change_threshold", None)
+        self.changes = None if threshold is None else ChangeDetector(threshold)
+        # The focus assist metric is off unless a rate is given
+        focus_rate = self.options.pop("focus_rate", None)
+        focus_roi = self.options.pop("focus_roi", FOCUS_ROI)
+        self.focus = None if focus_rate is None else FocusMeter(focus_rate, focus_roi)
+        self._last_frame = None
+        if self.output_size and backend == "ffmpeg":
+            # Let ffmpeg scale while it decodes
+            self.options.setdefault("width", self.output_size[0])
+            self.options.setdefault("height", self.output_size[1])
+        self._current_packet = None
+        self._reader = None
         self.daemon = True
 
-    def run(self):
-        cap = cv2.VideoCapture(self.target)
+        # Frames are fanned out to consumers in this process through the bus
+        self.bus = FrameBus(bus_capacity)
+
+        # Set once the capture has stopped and its resources are released
+        self.closed = threading.Event()
+        self._release_lock = threading.Lock()
+        self._release_started = False
+
+    def _publish(self, item):
+        # Items are (frame, jpeg, meta), JPEG sources send only the bytes
+        frame, jpeg, meta = item
+        self._current_packet = self.bus.publish(frame, jpeg=jpeg, **meta)
+
+    def _emit(self, item):
+        raise NotImplementedError
+
+    def _open_capture(self):
+        """Open the reader for the configured backend"""
+        if self.backend == "ffmpeg":
+            return FFmpegCapture(self.target, self.options)
+        if self.backend == "mjpeg":
+            return MJPEGCapture(self.target, self.options)
+        cap = cv2.VideoCapture(
+            self.target,
+            cv2.CAP_ANY,
+            [
+                cv2.CAP_PROP_OPEN_TIMEOUT_MSEC,
+                OPENCV_TIMEOUT_MS,
+                cv2.CAP_PROP_READ_TIMEOUT_MSEC,
+                OPENCV_TIMEOUT_MS,
+            ],
+        )
         cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+
+    def _make_item(self, frame, meta):
+        """Queue item for a frame as read from the backend"""
+        changed = True
+        if self.changes is not None:
+            if self.backend == "mjpeg":
+                changed = self.changes.update(jpeg=frame)
+            else:
+                changed = self.changes.update(frame)
+            meta = {**meta, "changed": changed, "scene": self.changes.scene}
+        if self.focus is not None:
+            # Measured on the frame as read, before any downscaling
+            if self.backend == "mjpeg":
+                sharpness = self.focus.update(jpeg=frame)
+            else:
+                sharpness = self.focus.update(frame)
+            meta = {**meta, "sharpness": sharpness}
+        # ffmpeg frames live in the reader's buffers and need no work, so only
+        # the decoded and converted frames are kept for reuse
+        reuse = not changed and self._last_frame is not None
+        if self.backend == "mjpeg":
+            if self.output_size is None:
+                return (None, frame, meta)
+            if not reuse:
+                # Decoded here so the consumer gets the small frame ready to show
+                self._last_frame = decode_jpeg(frame, self.output_size)
+            # The camera's JPEG goes along, so snapshots, restreams and the
+            # recorder still write the full size original without transcoding
+            return (self._last_frame, frame, meta)
+        if self.backend == "opencv" and reuse:
+            # Same picture as the last changed frame, skip resizing and converting
+            return (self._last_frame, None, meta)
+        if self.output_size is not None and (
+            (frame.shape[1], frame.shape[0]) != self.output_size
+        ):
+            frame = cv2.resize(frame, self.output_size, interpolation=cv2.INTER_AREA)
+        # The ffmpeg backend already delivers RGB frames
+        if self.backend == "opencv":
+            frame = self._last_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return (frame, None, meta)
+
+    def run(self):
+        cap = self._reader = self._open_capture()
+        # Frames read before this time are dropped to honour max_fps
+        frame_interval = 1 / self.max_fps if self.max_fps else 0.0
+        next_frame_at = 0.0
 
         if not cap.isOpened():
             warn(f"[vcapture] ERROR: Failed to open video source: {self.target}")
@@ -46,8 +284,7 @@ class vcapture(Process):
                         # Check again if we should stop
                         if not self._running.value:
                             break
-                        cap = cv2.VideoCapture(self.target)
-                        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                        cap = self._reader = self._open_capture()
                         failed_reads = 0
                         if not cap.isOpened():
                             warn("[vcapture] ERROR: Failed to reconnect")
@@ -58,32 +295,215 @@ class vcapture(Process):
                     continue
 
                 failed_reads = 0
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-                # Put frame in queue, replacing any existing frame
-                with contextlib.suppress(Exception):
-                    if self._frame_queue.full():
-                        self._frame_queue.get_nowait()  # Remove old frame
-                    self._frame_queue.put_nowait(frame)
+                if frame_interval:
+                    now = time.monotonic()
+                    if now < next_frame_at:
+                        continue
+                    next_frame_at = max(next_frame_at + frame_interval, now)
+                self._emit(self._make_item(frame, {"timestamp": time.time()}))
         finally:
             # Ensure VideoCapture is always released
             cap.release()
             self._running.value = False
 
+    @property
+    def current_packet(self):
+        """Get the most recent FramePacket, with the source JPEG when available"""
+        return self._current_packet
+
     @property
     def current_frame(self):
         """Get the most recent frame"""
-        # Get latest frame if available
-        with contextlib.suppress(Exception):
-            while not self._frame_queue.empty():
-                self._current_frame = self._frame_queue.get_nowait()
-        return self._current_frame
+        packet = self.current_packet
+        return packet.frame if packet is not None else None
+
+    def subscribe(self, mode="latest", every=1):
+        """Get an independent frame cursor, see FrameBus.subscribe"""
+        return self.bus.subscribe(mode, every)
 
     @property
     def running(self):
         return self._running.value
 
-    def release(self):
-        """Release resources and stop the process"""
+    @property
+    def release_budget(self):
+        """Longest time release() can take, in seconds"""
+        return self.release_timeout + 2 * self.terminate_timeout
+
+    def release(self, wait=True):
+        """
+        Stop capturing and release all resources within `release_budget`.
+
+        The loop is asked to stop first. If it is stuck in a blocking read past
+        `release_timeout`, the worker is escalated (see `_stop_worker`). With
+        wait=False this runs in the background. Returns the `closed` event either way.
+        """
+        with self._release_lock:
+            already_started = self._release_started
+            self._release_started = True
+        if already_started:
+            if wait:
+                self.closed.wait(self.release_budget)
+            return self.closed
+
         self._running.value = False
-        self.join(timeout=1.0)
+        if wait:
+            self._shutdown()
+        else:
+            threading.Thread(
+                target=self._shutdown, name="vcapture-release", daemon=True
+            ).start()
+        return self.closed
+
+    def _shutdown(self):
+        try:
+            self._stop_worker()
+        finally:
+            self.bus.close()
+            self.closed.set()
+
+    def _stop_worker(self):
+        raise NotImplementedError
+
+
+class vcapture(_CaptureLoop, Process):
+    """
+    Video capture in a separate process.
+
+    vcapture(target, mode="thread") returns a `tcapture` instead, which runs the
+    same loop on a thread of this process with the same interface.
+    """
+
+    def __new__(cls, *args, mode="process", **kwargs):
+        if mode not in CAPTURE_MODES:
+            raise ValueError(f"Unknown capture mode {mode}, expected one of {CAPTURE_MODES}")
+        if mode == "thread":
+            return tcapture(*args, **kwargs)
+        return super().__new__(cls)
+
+    def __init__(
+        self, target, backend="opencv", options=None, bus_capacity=8, mode="process"
+    ):
+        super().__init__()
+        self._setup(target, backend, options, bus_capacity)
+        self._running = Value("b", True)
+        self._frame_queue = Queue(maxsize=1)  # Only keep latest frame
+        # Fed by a pump thread so no single reader drains the queue for the others
+        self._pump = None
+
+    def __getstate__(self):
+        # The bus and pump only live in the parent, leave them out when the
+        # process object is pickled for a spawned child (Windows)
+        state = self.__dict__.copy()
+        for name in ("bus", "_pump", "_current_packet", "closed", "_release_lock"):
+            state[name] = None
+        return state
+
+    def start(self):
+        super().start()
+        self._pump = threading.Thread(
+            target=self._pump_frames, name="vcapture-pump", daemon=True
+        )
+        self._pump.start()
+
+    def _pump_frames(self):
+        while self._running.value:
+            try:
+                item = self._frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError, ValueError):
+                break
+            self._publish(item)
+        self.bus.close()
+
+    def _emit(self, item):
+        # Put frame in queue, replacing any existing frame
+        with contextlib.suppress(Exception):
+            if self._frame_queue.full():
+                self._frame_queue.get_nowait()  # Remove old frame
+            self._frame_queue.put_nowait(item)
+
+    @property
+    def current_packet(self):
+        """Get the most recent FramePacket, with the source JPEG when available"""
+        if self._pump is not None:
+            # Only the pump drains the queue once it runs, so packets are
+            # published in order by a single thread
+            return self.bus.latest
+        # Get latest frame if available
+        with contextlib.suppress(Exception):
+            while not self._frame_queue.empty():
+                self._publish(self._frame_queue.get_nowait())
+        return self._current_packet
+
+    def _stop_worker(self):
+        self.join(timeout=self.release_timeout)
+        if self.is_alive():
+            warn(f"[vcapture] Capture process for {self.target} did not stop, terminating")
+            self.terminate()
+            self.join(timeout=self.terminate_timeout)
+            if self.is_alive():
+                self.kill()
+                self.join(timeout=self.terminate_timeout)
+
+        if self._pump is not None:
+            self._pump.join(timeout=self.terminate_timeout)
+        # Do not let the queue's feeder thread hold up interpreter exit
+        with contextlib.suppress(Exception):
+            self._frame_queue.cancel_join_thread()
+            self._frame_queue.close()
+
+
+class _Flag:
+    """Thread-mode stand-in for multiprocessing.Value"""
+
+    def __init__(self, value):
+        self.value = value
+
+
+class tcapture(_CaptureLoop, threading.Thread):
+    """
+    Video capture on a thread of the calling process.
+
+    Cheaper to start and frames reach the bus without pickling, which suits a
+    single low-resolution preview. OpenCV and ffmpeg pipe reads release the GIL,
+    so decoding does not stall the UI thread.
+    """
+
+    def __init__(self, target, backend="opencv", options=None, bus_capacity=8):
+        threading.Thread.__init__(self, name="tcapture")
+        self._setup(target, backend, options, bus_capacity)
+        self._running = _Flag(True)
+        if self.backend == "ffmpeg":
+            # Published frames reference the reader's buffers directly here, keep
+            # enough of them that the bus never holds a frame being overwritten
+            self.options.setdefault("buffers", bus_capacity + 2)
+
+    def _emit(self, item):
+        self._publish(item)
+
+    def run(self):
+        try:
+            super().run()
+        finally:
+            self.bus.close()
+
+    def _stop_worker(self):
+        if self.ident is None:
+            return  # Never started
+        self.join(timeout=self.release_timeout)
+        if not self.is_alive():
+            return
+        # Threads cannot be terminated, unblock the reader instead. The ffmpeg
+        # and mjpeg readers can be closed from another thread, OpenCV relies on
+        # its read timeout.
+        if self.backend != "opencv" and self._reader is not None:
+            with contextlib.suppress(Exception):
+                self._reader.release()
+        self.join(timeout=self.terminate_timeout)
+        if self.is_alive():
+            warn(
+                f"[vcapture] Capture thread for {self.target} did not stop in time, "
+                "leaving it to exit on its own"
+            )
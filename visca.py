@@ -7,6 +7,17 @@ class ViscaException(Warning):
     pass
 
 
+def decode_position(digits):
+    """
+    Integer from the digits of a position inquiry, which carry one nibble per
+    byte ("0w0w0w0w" or "w0w0w0w" depending on where the slice starts)
+    """
+    if isinstance(digits, int):
+        return digits
+    nibbles = digits[1::2] if len(digits) % 2 == 0 else digits[0::2]
+    return int(nibbles, 16)
+
+
 class ViscaBase:
     def __init__(self, camera_type):
         try:
@@ -43,6 +54,12 @@ class ViscaBase:
 
 
 class ViscaParser(ViscaBase):
+    def completion_text(self, hex_return):
+        """Text of an ACK, completion or error reply, None for other replies"""
+        hex_return = f"{hex_return[:3]}y{hex_return[4:]}"
+        result = self.returns.get(hex_return.lower())
+        return None if result is None else result["text"]
+
     def interpret_completion(self, hex_return):
         hex_return = f"{hex_return[:3]}y{hex_return[4:]}"
         hex_return = hex_return.lower()
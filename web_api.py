@@ -0,0 +1,395 @@
+"""
+HTTP and WebSocket front end for the headless ControlService, for remote
+operators (tablets, Stream Deck style controllers).
+
+    python web_api.py [--host 127.0.0.1] [--port 8080] [--token SECRET] [--streams]
+
+HTTP (JSON replies, same reply format as headless.py):
+    GET  /api/cameras
+    GET  /api/status
+    GET  /api/cameras/<camera>/presets
+    GET  /api/cameras/<camera>/<property>     zoom_pos, pan_tilt_pos, ...
+    POST /api/command                         body: a headless.py request
+
+WebSocket on /ws: each text message is a headless.py request and is answered
+with its reply, matched by "id": requests run concurrently, so replies can
+come in another order and a slow command never holds up a stop. State
+changes from any client (moves, preset changes, saved snapshots) are pushed
+to every socket as {"event": ...} messages.
+
+<camera> is an index or a URL-quoted camera key. With --token every request
+needs "Authorization: Bearer <token>" or a "token" query parameter.
+"""
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import hashlib
+import hmac
+import json
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from headless import load_service
+
+DEFAULT_PORT = 8080
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+# Threads for service calls, which can wait on a camera for seconds
+DEFAULT_WORKERS = 16
+# Requests one WebSocket can have running before its messages are no longer
+# read, and frames queued for it before it counts as too slow for events
+MAX_PENDING_REQUESTS = 32
+MAX_QUEUED_FRAMES = 256
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+REASONS = {
+    200: "OK",
+    101: "Switching Protocols",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def websocket_accept(key):
+    """Sec-WebSocket-Accept value for a client's Sec-WebSocket-Key"""
+    digest = hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def encode_frame(payload, opcode=OP_TEXT):
+    """Unmasked (server to client) WebSocket frame"""
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def read_frame(reader, max_size=MAX_BODY_BYTES):
+    """Read one frame, returns (fin, opcode, payload)"""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    if length > max_size:
+        raise HttpError(413, "WebSocket message too large")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask is not None:
+        payload = bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+    return bool(first & 0x80), first & 0x0F, payload
+
+
+class _Socket:
+    """
+    Sending side of one WebSocket: frames are queued and written in order by
+    one task, which waits for the transport to drain between writes.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.queue = asyncio.Queue(MAX_QUEUED_FRAMES)
+        self.pending = asyncio.Semaphore(MAX_PENDING_REQUESTS)
+        self.requests = set()
+        self._sender = asyncio.create_task(self._send())
+
+    async def _send(self):
+        with contextlib.suppress(ConnectionError):
+            while True:
+                frame = await self.queue.get()
+                self.writer.write(frame)
+                await self.writer.drain()
+                self.queue.task_done()
+
+    async def send(self, frame):
+        await self.queue.put(frame)
+
+    async def flush(self, timeout=2.0):
+        """Wait until every queued frame was written, or `timeout` seconds"""
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self.queue.join(), timeout)
+
+    def close(self):
+        for task in (*self.requests, self._sender):
+            task.cancel()
+        self.writer.close()
+
+
+class WebApi:
+    """
+    asyncio HTTP/WebSocket server for a ControlService.
+
+    Requests are handed to the service on a pool of `workers` threads of its
+    own, so commands waiting on their cameras neither hold up other clients
+    nor use up the loop's default executor. State change events of the
+    service are broadcast to every open WebSocket, a socket too slow to take
+    them is closed.
+    """
+
+    def __init__(self, service, token=None, workers=DEFAULT_WORKERS):
+        self.service = service
+        self.token = token
+        self._sockets = set()
+        self._loop = None
+        self._server = None
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="web-api")
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self._loop = asyncio.get_running_loop()
+        self.service.add_listener(self._service_event)
+        self._server = await asyncio.start_server(self._connection, host, port)
+        return self._server
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self.service.remove_listener(self._service_event)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for socket in list(self._sockets):
+            socket.close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _service_event(self, event):
+        # Called on the service's handling thread
+        with contextlib.suppress(RuntimeError):
+            self._loop.call_soon_threadsafe(self._broadcast, json.dumps(event))
+
+    def _broadcast(self, message):
+        frame = encode_frame(message)
+        for socket in list(self._sockets):
+            try:
+                if socket.writer.is_closing():
+                    raise ConnectionError
+                socket.queue.put_nowait(frame)
+            except (asyncio.QueueFull, ConnectionError):
+                self._sockets.discard(socket)
+                socket.close()
+
+    async def _handle(self, request):
+        return await self._loop.run_in_executor(
+            self._executor, self.service.handle, request
+        )
+
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.LimitOverrunError:
+                    raise HttpError(400, "Headers too large")
+                if len(head) > MAX_HEADER_BYTES:
+                    raise HttpError(400, "Headers too large")
+                method, target, headers = self._parse_head(head)
+                url = urlsplit(target)
+                self._authorize(headers, url)
+                if url.path == "/ws":
+                    await self._websocket(reader, writer, headers)
+                    return
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    raise HttpError(400, "Invalid Content-Length")
+                if length > MAX_BODY_BYTES:
+                    raise HttpError(413, "Body too large")
+                body = await reader.readexactly(length) if length else b""
+                status, reply = await self._route(method, url.path, body)
+                self._respond(writer, status, reply)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    return
+        except HttpError as e:
+            self._respond(writer, e.status, {"id": None, "ok": False, "error": str(e)})
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            with contextlib.suppress(Exception):
+                writer.close()
+                await writer.wait_closed()
+
+    @staticmethod
+    def _parse_head(head):
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        return method.upper(), target, headers
+
+    def _authorize(self, headers, url):
+        if self.token is None:
+            return
+        supplied = parse_qs(url.query).get("token", [""])[0]
+        authorization = headers.get("authorization", "")
+        if authorization.lower().startswith("bearer "):
+            supplied = authorization[7:].strip()
+        if not hmac.compare_digest(supplied.encode(), self.token.encode()):
+            raise HttpError(401, "Missing or wrong token")
+
+    @staticmethod
+    def _respond(writer, status, reply):
+        body = json.dumps(reply, default=str).encode("utf-8")
+        writer.write(
+            (
+                f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n"
+            ).encode("latin-1")
+            + body
+        )
+
+    async def _route(self, method, path, body):
+        parts = [unquote(part) for part in path.strip("/").split("/")]
+        if parts[:1] != ["api"]:
+            raise HttpError(404, f"No route for {path}")
+        if method == "POST" and parts[1:] == ["command"]:
+            try:
+                request = json.loads(body or b"null")
+            except ValueError as e:
+                raise HttpError(400, f"Invalid JSON: {e}")
+        elif method != "GET":
+            raise HttpError(405, f"{method} is not supported for {path}")
+        elif parts[1:] in (["cameras"], ["status"]):
+            request = {"cmd": parts[1]}
+        elif len(parts) == 4 and parts[1] == "cameras":
+            camera = int(parts[2]) if parts[2].isdigit() else parts[2]
+            if parts[3] == "presets":
+                request = {"cmd": "presets", "camera": camera}
+            else:
+                request = {"cmd": "get", "camera": camera, "property": parts[3]}
+        else:
+            raise HttpError(404, f"No route for {path}")
+        reply = await self._handle(request)
+        return (200 if reply["ok"] else 400), reply
+
+    async def _websocket(self, reader, writer, headers):
+        key = headers.get("sec-websocket-key")
+        if headers.get("upgrade", "").lower() != "websocket" or not key:
+            raise HttpError(400, "Expected a WebSocket upgrade")
+        writer.write(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {websocket_accept(key)}\r\n\r\n"
+            ).encode("latin-1")
+        )
+        await writer.drain()
+        socket = _Socket(writer)
+        self._sockets.add(socket)
+        try:
+            await self._websocket_messages(reader, socket)
+        finally:
+            self._sockets.discard(socket)
+            socket.close()
+
+    async def _websocket_messages(self, reader, socket):
+        message = []
+        while True:
+            try:
+                fin, opcode, payload = await read_frame(reader)
+            except HttpError:
+                # 1009: message too big
+                await socket.send(encode_frame(struct.pack("!H", 1009), OP_CLOSE))
+                await socket.flush()
+                return
+            if opcode == OP_CLOSE:
+                await socket.send(encode_frame(payload[:2], OP_CLOSE))
+                await socket.flush()
+                return
+            if opcode == OP_PING:
+                await socket.send(encode_frame(payload, OP_PONG))
+                continue
+            if opcode in (OP_TEXT, OP_BINARY, OP_CONTINUATION):
+                message.append(payload)
+            if not fin or opcode == OP_PONG:
+                continue
+            data, message = b"".join(message), []
+            try:
+                request = json.loads(data)
+            except ValueError as e:
+                reply = {"id": None, "ok": False, "error": f"Invalid JSON: {e}"}
+                await socket.send(encode_frame(json.dumps(reply)))
+                continue
+            # Each request runs on its own, its reply carries the request's id
+            await socket.pending.acquire()
+            task = asyncio.create_task(self._websocket_request(socket, request))
+            socket.requests.add(task)
+
+    async def _websocket_request(self, socket, request):
+        try:
+            reply = await self._handle(request)
+            await socket.send(encode_frame(json.dumps(reply, default=str)))
+        finally:
+            socket.pending.release()
+            socket.requests.discard(asyncio.current_task())
+
+
+async def serve(service, host, port, token=None):
+    api = WebApi(service, token=token)
+    server = await api.start(host, port)
+    print(f"Controlling {len(service.cameras)} cameras on http://{host}:{api.port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await api.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP/WebSocket camera control")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--token", help="required bearer token")
+    parser.add_argument(
+        "--streams", action="store_true", help="keep every camera's capture running"
+    )
+    parser.add_argument("--app-dir", default=os.path.dirname(os.path.abspath(__file__)))
+    args = parser.parse_args()
+
+    service = load_service(args.app_dir, streams=args.streams)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.token))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()